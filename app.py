@@ -18,26 +18,58 @@
    - MQTT 연결 해제
 """
 
+import os
 import time
 import threading
 import signal
 import sys
 from datetime import datetime
+from functools import partial
 
 # 설정 파일 import
 from config import *
 
+# 하드웨어 시뮬레이션 (센서/디바이스 모듈보다 먼저 설치해야 함)
+if SIMULATION:
+    import sim
+    # sim/replay.py처럼 먼저 설치한 환경이 있으면 그대로 사용
+    if not sim.is_installed():
+        sim.install(latency=SIM_LATENCY, time_scale=SIM_TIME_SCALE, seed=SIM_SEED)
+
 # MQTT 클라이언트 import
 from modules import mqtt_client as mqtt
 
+# 센서 스케줄러 / 스냅샷 import
+from modules.scheduler import SensorScheduler
+from modules.snapshot import SensorSnapshot
+
+# 파생 지표 (VPD, 이슬점, 절대습도, DLI)
+from modules.derived import DerivedMetrics
+
+# 센서 데이터 묶음 전송 (SENSOR_BATCH_ENABLED 설정 시)
+from modules.batch import BatchPublisher
+
+# 변화 보고 (REPORT_BY_EXCEPTION 설정 시)
+from modules.deadband import ExceptionReporter
+
+# 원시 데이터 기록 (RECORD_FILE 설정 시)
+from modules import recorder
+
+# 로컬 시계열 저장소 (STORE_FILE 설정 시)
+from modules import store
+
+# 성능 지표 (카운터 / 지연 히스토그램)
+from modules import metrics
+
+# 원격 프로파일링 (profile 명령)
+from modules import profiler
+
 # ==================== 센서 및 디바이스 모듈 Import ====================
 
-# 센서 모듈들을 개별적으로 import
+# 센서 레지스트리 import
+# 드라이버 모듈은 config.SENSORS에서 켜진 센서를 초기화할 때만 import 됩니다
 try:
-    from sensors.htu21d import HTU21DSensor
-    from sensors.light import LightSensor
-    from sensors.co2 import CO2Sensor
-    from sensors.tds import TDSSensor
+    from sensors import registry as sensor_registry
     SENSORS_AVAILABLE = True
     print("✓ 센서 모듈 import 성공")
 except ImportError as e:
@@ -70,20 +102,44 @@ print()  # 줄바꿈
 
 # ==================== 센서 객체 초기화 ====================
 
-# 전역 센서 객체들
-htu21d_sensor = None
-light_sensor = None
-co2_sensor = None
-tds_sensor = None
+# 초기화된 센서들 {이름: SensorEntry} (config.SENSORS 선언 순서)
+sensor_entries = {}
+
+# 센서별 주기 스케줄러 (init_sensors()에서 생성, start_scheduler()에서 시작)
+scheduler = None
+
+# 파생 지표 (init_derived()에서 생성, 스케줄러 작업 결과마다 갱신)
+derived_metrics = None
 
-def init_sensors():
+# 센서 데이터 묶음 전송기 (SENSOR_BATCH_ENABLED일 때만, 아니면 샘플마다 바로 전송)
+sensor_batcher = None
+
+# 변화 보고 (REPORT_BY_EXCEPTION일 때만, 불감대를 벗어난 필드만 전송)
+reporter = None
+
+def init_derived(state_file=DERIVED_STATE_FILE):
+    """
+    파생 지표 준비 (init_sensors()보다 먼저 호출)
+    
+    Args:
+        state_file (str, optional): 오늘 DLI/통계 저장 파일 (이어서 적분), None이면 저장 안 함
+    """
+    global derived_metrics
+    derived_metrics = DerivedMetrics(state_file=state_file)
+
+
+def init_sensors(specs=SENSORS):
     """
     모든 센서 초기화
     
-    각 센서를 개별적으로 초기화하고 전역 변수에 저장합니다.
-    초기화 실패한 센서는 None으로 유지됩니다.
+    config.SENSORS에 선언된 센서 중 켜진 것만 병렬로 초기화하고
+    센서마다 스케줄러 작업을 등록합니다.
+    초기화 실패한 센서는 건너뜁니다.
+    
+    Args:
+        specs (list): 센서 선언 목록 (sim/replay.py는 대기 시간을 줄인 선언을 넘김)
     """
-    global htu21d_sensor, light_sensor, co2_sensor, tds_sensor
+    global sensor_entries, scheduler
     
     print("=" * 60)
     print("센서 초기화 시작...")
@@ -93,34 +149,100 @@ def init_sensors():
         print("⚠ 센서 모듈이 없어 테스트 모드로 실행됩니다\n")
         return
     
-    # HTU21D 온습도 센서 (I2C)
-    try:
-        htu21d_sensor = HTU21DSensor()
-    except Exception as e:
-        print(f"✗ HTU21D 초기화 실패: {e}")
-    
-    # 조도 센서 (MCP3008 CH0)
-    try:
-        light_sensor = LightSensor(channel=ADC_LIGHT_CHANNEL)
-    except Exception as e:
-        print(f"✗ 조도 센서 초기화 실패: {e}")
+    sensor_entries = sensor_registry.init_sensors(specs, default_period=SENSOR_INTERVAL)
     
-    # CO2 센서 (UART)
-    try:
-        co2_sensor = CO2Sensor(port=CO2_SERIAL_PORT, baudrate=CO2_BAUDRATE)
-    except Exception as e:
-        print(f"✗ CO2 센서 초기화 실패: {e}")
+    # ADC 연속 스트리밍 (기본 칩 SPI_BUS/SPI_DEVICE의 MCP3008)
+    adc_sensor = next((e.sensor for e in sensor_entries.values()
+                       if hasattr(e.sensor, 'adc') and (e.sensor.adc.bus, e.sensor.adc.device) == (SPI_BUS, SPI_DEVICE)), None)
+    if ADC_STREAM_CHANNELS and adc_sensor:
+        try:
+            adc_sensor.adc.start_stream(
+                ADC_STREAM_CHANNELS,
+                rate=ADC_STREAM_RATE,
+                buffer_size=ADC_STREAM_BUFFER,
+                window=ADC_STREAM_WINDOW
+            )
+        except Exception as e:
+            print(f"✗ ADC 스트리밍 시작 실패: {e}")
     
-    # TDS/EC 센서 (MCP3008 CH1)
-    try:
-        tds_sensor = TDSSensor(channel=ADC_TDS_CHANNEL)
-    except Exception as e:
-        print(f"✗ TDS 센서 초기화 실패: {e}")
+    # 센서마다 스케줄러 작업 등록 (버스가 다르면 동시에 읽음)
+    # 같은 I2C 멀티플렉서 뒤의 센서들은 작업 하나로 묶어 채널 순서대로 읽음
+    scheduler = SensorScheduler(max_workers=SCHEDULER_WORKERS)
+    for task in sensor_registry.schedule_groups(sensor_entries.values()):
+        scheduler.add_task(task.name, partial(task.read, lookup_latest), task.period, task.bus, task.timeout)
+    if derived_metrics is not None:
+        scheduler.add_listener(derived_metrics.update)
     
+    print(f"✓ 센서 {len(sensor_entries)}개 초기화: {', '.join(sensor_entries) or '없음'}")
     print("=" * 60)
     print()
 
 
+def lookup_latest(field):
+    """
+    다른 센서의 최신값 조회 (예: TDS 온도 보정용 온도)
+    
+    Args:
+        field (str): 필드 이름
+    
+    Returns:
+        최신값, 없으면 None
+    """
+    if scheduler is None:
+        return None
+    return scheduler.get_latest().get(field)
+
+
+def get_sensor_snapshot():
+    """
+    모든 센서에서 데이터 수집 (측정값별 캡처 시각 포함)
+    
+    Returns:
+        SensorSnapshot: 필드별 값과 monotonic/벽시계 캡처 시각
+    
+    Note:
+        - 센서가 없거나 읽기 실패 시 해당 값은 None
+        - 테스트 모드에서는 랜덤 데이터 반환
+        - 스케줄러가 동작 중이면 센서별 최신값을 반환 (센서를 직접 읽지 않음)
+        - 아니면 모든 센서를 한 번씩 읽음 (버스가 다르면 동시에)
+        - 파생 지표(vpd, dewPoint, absoluteHumidity, ppfd, dli)도 함께 담음
+    """
+    snapshot = SensorSnapshot()
+    
+    # 테스트 모드: 가상 센서 데이터
+    if not SENSORS_AVAILABLE:
+        import random
+        snapshot.add('temperature', round(random.uniform(20, 30), 1))
+        snapshot.add('humidity', round(random.uniform(50, 70), 1))
+        snapshot.add('light', round(random.uniform(400, 900), 0))
+        snapshot.add('co2', round(random.uniform(400, 600), 0))
+        snapshot.add('ec', round(random.uniform(1.0, 2.0), 2))
+        snapshot.add('tds', round(random.uniform(500, 1000), 1))
+        if derived_metrics is not None:
+            derived_metrics.update(snapshot.readings)
+            for field, reading in derived_metrics.get_readings().items():
+                snapshot.add_reading(field, reading)
+        return snapshot
+    
+    if scheduler is None:
+        return snapshot
+    
+    # 스케줄러 동작 중: 센서별 주기로 읽어 둔 최신값 사용
+    if scheduler.is_running():
+        readings = scheduler.get_readings()
+    else:
+        readings = scheduler.run_once()
+    
+    for field, reading in readings.items():
+        snapshot.add_reading(field, reading)
+    if derived_metrics is not None:
+        for field, reading in derived_metrics.get_readings().items():
+            snapshot.add_reading(field, reading)
+    snapshot.health = scheduler.get_health()
+    
+    return snapshot
+
+
 def get_all_sensor_data():
     """
     모든 센서에서 데이터 수집
@@ -134,78 +256,25 @@ def get_all_sensor_data():
             'co2': int,            # CO2 (ppm)
             'ec': float,           # EC (mS/cm)
             'tds': float,          # TDS (ppm)
-            'timestamp': float     # Unix timestamp
+            'vpd': float,          # 포차 (kPa)
+            'dewPoint': float,     # 이슬점 (°C)
+            'absoluteHumidity': float,  # 절대습도 (g/m³)
+            'ppfd': float,         # 광량자속밀도 (µmol/m²/s, 조도에서 환산)
+            'dli': float,          # 오늘 자정부터의 일적산광량 (mol/m²)
+            'timestamp': float,    # Unix timestamp (스냅샷 생성 시각)
+            'readingTimes': dict,  # 필드별 실제 측정 시각 (Unix timestamp)
+            'skew': float,         # 가장 먼저/나중에 측정된 값 사이 시간 (초)
+            'coherent': bool,      # SNAPSHOT_MAX_SKEW 이내 여부 (설정 시)
+            'health': dict,        # 센서별 상태 ('ok', 'degraded', 'open', 'probing')
+            'faults': dict         # 정상이 아닌 센서의 실패 내용 (오류, 연속 실패 수, 재시도까지 초)
         }
     
     Note:
-        - 센서가 없거나 읽기 실패 시 해당 값은 None
-        - 테스트 모드에서는 랜덤 데이터 반환
+        - 센서가 없거나 읽기 실패 시 해당 값은 None (이유는 health / faults)
+        - SNAPSHOT_DROP_STALE이면 최신 값보다 SNAPSHOT_MAX_SKEW 넘게 오래된 값은 None
     """
-    # 테스트 모드: 가상 센서 데이터
-    if not SENSORS_AVAILABLE:
-        import random
-        return {
-            'temperature': round(random.uniform(20, 30), 1),
-            'humidity': round(random.uniform(50, 70), 1),
-            'light': round(random.uniform(400, 900), 0),
-            'co2': round(random.uniform(400, 600), 0),
-            'ec': round(random.uniform(1.0, 2.0), 2),
-            'tds': round(random.uniform(500, 1000), 1),
-            'timestamp': time.time()
-        }
-    
-    # 실제 센서 데이터 수집
-    data = {'timestamp': time.time()}
-    
-    # HTU21D - 온도/습도
-    if htu21d_sensor:
-        try:
-            data['temperature'] = htu21d_sensor.read_temperature()
-            data['humidity'] = htu21d_sensor.read_humidity()
-        except Exception as e:
-            print(f"✗ HTU21D 읽기 오류: {e}")
-            data['temperature'] = None
-            data['humidity'] = None
-    else:
-        data['temperature'] = None
-        data['humidity'] = None
-    
-    # 조도 센서
-    if light_sensor:
-        try:
-            data['light'] = light_sensor.read_lux()
-        except Exception as e:
-            print(f"✗ 조도 센서 읽기 오류: {e}")
-            data['light'] = None
-    else:
-        data['light'] = None
-    
-    # CO2 센서
-    if co2_sensor:
-        try:
-            data['co2'] = co2_sensor.read_co2()
-        except Exception as e:
-            print(f"✗ CO2 센서 읽기 오류: {e}")
-            data['co2'] = None
-    else:
-        data['co2'] = None
-    
-    # TDS/EC 센서
-    if tds_sensor:
-        try:
-            # HTU21D에서 읽은 온도로 보정 (없으면 기본값 25°C)
-            temp = data.get('temperature', 25.0) or 25.0
-            data['ec'] = tds_sensor.read_ec(temperature=temp)
-            data['tds'] = tds_sensor.read_tds(temperature=temp)
-        except Exception as e:
-            print(f"✗ TDS 센서 읽기 오류: {e}")
-            data['ec'] = None
-            data['tds'] = None
-    else:
-        data['ec'] = None
-        data['tds'] = None
-    
-    return data
+    snapshot = get_sensor_snapshot()
+    return snapshot.to_payload(max_skew=SNAPSHOT_MAX_SKEW, drop_stale=SNAPSHOT_DROP_STALE)
 
 
 # ==================== 가상 디바이스 (테스트용) ====================
@@ -281,18 +350,110 @@ device_module = MockDevices()
 camera_module = MockCamera()
 
 
+# ==================== 로컬 시계열 저장소 ====================
+
+def init_store():
+    """
+    시계열 저장소 열기 (STORE_FILE 설정 시)
+    
+    스케줄러 작업 결과와 ADC 스트리밍 샘플이 모두 저장됩니다.
+    저장은 쓰기 스레드가 묶어서 하므로 센서 읽기를 기다리게 하지 않습니다.
+    """
+    if not STORE_FILE:
+        return
+    
+    try:
+        ts_store = store.start(STORE_FILE)
+    except Exception as e:
+        print(f"✗ 시계열 저장소 열기 실패: {e}")
+        return
+    
+    if scheduler is not None:
+        scheduler.add_listener(ts_store.add_readings)
+    
+    if STORE_ADC_STREAM:
+        adcs = {id(e.sensor.adc): e.sensor.adc for e in sensor_entries.values() if hasattr(e.sensor, 'adc')}
+        for adc in adcs.values():
+            if adc.is_streaming():
+                ts_store.add_stream(adc)
+
+
+# ==================== 센서 스케줄러 ====================
+
+def start_scheduler():
+    """
+    센서 스케줄러 시작
+    
+    init_sensors()에서 등록한 센서별 작업을 각자의 주기로 실행합니다.
+    버스가 다른 작업(I2C / SPI / UART)은 워커 풀에서 동시에 실행됩니다.
+    """
+    if scheduler is None or not scheduler.tasks:
+        return
+    
+    scheduler.start()
+    print()
+
+
 # ==================== 센서 데이터 전송 ====================
 
+def init_publishing():
+    """
+    센서 데이터 전송기 준비 (SENSOR_BATCH_ENABLED / REPORT_BY_EXCEPTION 설정 시)
+    """
+    global sensor_batcher, reporter
+    
+    if SENSOR_BATCH_ENABLED:
+        sensor_batcher = BatchPublisher(mqtt.send_sensor_batch)
+    elif REPORT_BY_EXCEPTION:
+        reporter = ExceptionReporter()
+
+
+def publish_sensor_data(data):
+    """
+    센서 데이터 한 건을 전송하고 파생 지표 저장 / 일별 요약 전송까지 처리
+    
+    sensor_loop()가 주기마다 호출합니다 (sim/replay.py도 가상 시계로 같은 경로를 씀).
+    
+    Args:
+        data (dict): get_all_sensor_data() 결과
+    """
+    # MQTT를 통해 서버로 전송 (묶음 모드면 모았다가 한 번에)
+    if sensor_batcher is not None:
+        sensor_batcher.add(data)
+    elif reporter is not None:
+        # 바뀐 필드만 전송, 전송(또는 스풀 저장)에 성공해야 보낸 값으로 기억
+        message = reporter.build(data)
+        if message is not None and mqtt.send_sensor_data(message):
+            reporter.commit(message)
+    else:
+        mqtt.send_sensor_data(data)
+    
+    if derived_metrics is not None:
+        # 파생 지표 저장 (원시 값은 스케줄러 리스너가 저장)
+        if store.current is not None:
+            store.current.add_readings(derived_metrics.get_readings())
+        
+        # 마감된 날의 일별 요약 전송 (실패하면 다음 주기에 다시)
+        for rollup in derived_metrics.pending_rollups():
+            if not mqtt.send_daily(rollup):
+                break
+            derived_metrics.ack_rollup(rollup)
+
+
 def sensor_loop():
     """
     센서 데이터 주기적으로 읽고 MQTT 전송
     
     SENSOR_INTERVAL(기본 5초)마다 실행됩니다.
     무한 루프로 동작하며, 오류 발생 시 재시도합니다.
+    센서 읽기는 스케줄러가 따로 하고, 여기서는 최신값을 모아 전송만 합니다.
     """
     print("✓ 센서 모니터링 시작...")
     print(f"  주기: {SENSOR_INTERVAL}초마다 데이터 수집 및 전송\n")
     
+    # 다음 전송 시각 (monotonic 기준으로 누적해서 주기가 밀리지 않게 함)
+    next_deadline = time.monotonic()
+    
     while True:
         try:
             # 모든 센서 데이터 읽기
@@ -308,18 +469,51 @@ def sensor_loop():
                 print(f"  CO2: {data['co2']} ppm")
                 print(f"  EC: {data['ec']} mS/cm")
                 print(f"  TDS: {data['tds']} ppm")
+                if 'vpd' in data or 'dli' in data:
+                    print(f"  VPD: {data.get('vpd')} kPa, 이슬점: {data.get('dewPoint')}°C, DLI: {data.get('dli')} mol/m²")
+                for name, fault in data.get('faults', {}).items():
+                    print(f"  ⚠ {name}: {fault}")
                 print()
             
-            # MQTT를 통해 서버로 전송
-            mqtt.send_sensor_data(data)
-            
-            # 다음 측정까지 대기
-            time.sleep(SENSOR_INTERVAL)
+            # MQTT 전송, 파생 지표 저장, 일별 요약 전송
+            publish_sensor_data(data)
             
+            # 다음 전송 시각까지 대기 (읽기/전송에 걸린 시간은 빼고)
+            next_deadline += SENSOR_INTERVAL
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_deadline = time.monotonic()
+        
         except Exception as e:
             print(f"✗ 센서 루프 오류: {e}")
             print("  5초 후 재시도...\n")
             time.sleep(5)
+            next_deadline = time.monotonic()
+
+
+# ==================== 성능 지표 전송 ====================
+
+def metrics_loop():
+    """
+    성능 지표 요약을 METRICS_INTERVAL마다 MQTT로 전송
+    
+    히스토그램은 전송할 때마다 비우므로 각 메시지는 지난 주기 동안의 지연을 담고,
+    카운터는 시작 후 누적값입니다.
+    """
+    next_deadline = time.monotonic() + METRICS_INTERVAL
+    
+    while True:
+        delay = next_deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_deadline += METRICS_INTERVAL
+        
+        try:
+            mqtt.send_metrics(metrics.summary())
+        except Exception as e:
+            print(f"✗ 성능 지표 전송 오류: {e}")
 
 
 # ==================== 명령 처리 ====================
@@ -331,8 +525,11 @@ def handle_command(data):
     Args:
         data (dict): 명령 데이터
         {
-            "type": "pump" | "led" | "fan" | "all" | "camera",
-            "action": "on" | "off" | "capture"
+            "type": "pump" | "led" | "fan" | "all" | "camera" | "profile" | "encoding",
+            "action": "on" | "off" | "capture" | "start" | "stop",
+            "seconds": 30,     # profile start 전용 (선택)
+            "memory": false,   # profile start 전용 (선택, 메모리 할당 추적)
+            "topic": "sensor", "encoding": "msgpack"   # encoding 전용
         }
     
     처리 흐름:
@@ -346,6 +543,10 @@ def handle_command(data):
         - fan on/off: 환풍기 제어 (현재 비활성화)
         - all off: 모든 기기 끄기 (현재 비활성화)
         - camera capture: 사진 촬영 및 전송 (현재 비활성화)
+        - profile start/stop: 표본 추출 CPU 프로파일 (memory가 true면 메모리 할당 스냅샷도),
+                              끝나면 압축 결과를 MQTT_TOPIC_PROFILE로 전송
+        - encoding: 토픽(sensor/status/image)의 payload 인코딩 변경
+                    (json/msgpack/cbor/struct, 지원 목록은 online 상태 메시지의 'encodings')
     
     Note:
         현재 디바이스가 연결되지 않아 테스트 모드로 동작합니다.
@@ -412,6 +613,30 @@ def handle_command(data):
                 print(f"  ⚠ 알 수 없는 액션: {action}")
                 return
         
+        # ========== 원격 프로파일링 ==========
+        # 명령 처리는 paho 네트워크 스레드에서 돌기 때문에 측정은 백그라운드 스레드에서 함
+        elif cmd_type == 'profile':
+            if action == 'start':
+                seconds = data.get('seconds', 30)
+                memory = bool(data.get('memory', False))
+                if profiler.start(seconds=seconds, on_done=mqtt.send_profile, memory=memory) is None:
+                    print("  ⚠ 이미 프로파일링 중입니다")
+            elif action == 'stop':
+                if not profiler.stop():
+                    print("  ⚠ 실행 중인 프로파일링이 없습니다")
+            else:
+                print(f"  ⚠ 알 수 없는 액션: {action}")
+                return
+        
+        # ========== payload 인코딩 변경 ==========
+        # 서버가 읽을 수 있게 된 뒤에 바이너리 형식으로 바꾸도록 서버 쪽에서 요청
+        elif cmd_type == 'encoding':
+            try:
+                mqtt.set_encoding(data.get('topic'), data.get('encoding'))
+            except ValueError as e:
+                print(f"  ⚠ {e}")
+                return
+        
         # ========== 알 수 없는 명령 ==========
         else:
             print(f"  ✗ 알 수 없는 명령 타입: {cmd_type}")
@@ -425,7 +650,7 @@ def handle_command(data):
             
             if DEBUG:
                 print(f"[상태 전송] 펌프:{status['pump']}, LED:{status['led']}, 팬:{status['fan']} (테스트)\n")
-        
+    
     except Exception as e:
         print(f"✗ 명령 처리 오류: {e}\n")
 
@@ -458,16 +683,29 @@ def cleanup():
     # 1. 센서 정리
     if SENSORS_AVAILABLE:
         try:
-            if light_sensor:
-                light_sensor.close()
-            if tds_sensor:
-                tds_sensor.close()
-            if co2_sensor:
-                co2_sensor.close()
+            if scheduler:
+                scheduler.stop()
+            # ADC 스트림이 닫히기 전에 남은 샘플 저장
+            store.stop()
+            for entry in sensor_entries.values():
+                entry.close()
             print("✓ 센서 종료 완료")
         except Exception as e:
             print(f"⚠ 센서 종료 오류: {e}")
     
+    # 오늘 DLI/통계 저장 (재시작 후 이어서 적분)
+    try:
+        if derived_metrics is not None:
+            derived_metrics.save()
+    except Exception as e:
+        print(f"⚠ 파생 지표 저장 오류: {e}")
+    
+    # 원시 데이터 기록 중이면 남은 레코드 쓰고 닫기
+    try:
+        recorder.stop()
+    except Exception as e:
+        print(f"⚠ 기록 종료 오류: {e}")
+    
     # 2. 모든 기기 끄기 (현재는 테스트 모드)
     # TODO: 나중에 실제 디바이스 연결 시 활성화
     try:
@@ -476,8 +714,12 @@ def cleanup():
     except Exception as e:
         print(f"⚠ 기기 종료 오류: {e}")
     
-    # 3. MQTT 연결 해제
+    # 3. MQTT 연결 해제 (스풀에 남은 메시지는 다음 실행에서 보냄)
     try:
+        # 모으던 센서 데이터 묶음은 보내거나 스풀에 저장
+        if sensor_batcher is not None:
+            sensor_batcher.flush()
+        mqtt.close_spool()
         mqtt.disconnect_from_broker()
         print("✓ MQTT 연결 해제")
     except Exception as e:
@@ -497,7 +739,7 @@ def main():
     프로그램 실행 순서:
         1. 시스템 정보 출력
         2. 시그널 핸들러 등록
-        3. 센서 초기화
+        3. 센서 초기화 및 스케줄러 시작
         4. MQTT 브로커 연결
         5. 센서 루프 스레드 시작
         6. 메인 루프 (명령 대기)
@@ -519,17 +761,50 @@ def main():
     print("=" * 60)
     print()
     
+    # ========== 데이터 디렉터리 준비 ==========
+    # 캘리브레이션, 파생 지표 상태, 저장소, 스풀 파일이 여기에 생김
+    os.makedirs(DATA_DIR, exist_ok=True)
+    
     # ========== 시그널 핸들러 등록 ==========
     # Ctrl+C 누르면 signal_handler 함수 호출
     signal.signal(signal.SIGINT, signal_handler)
     
+    # ========== 원시 데이터 기록 시작 ==========
+    # 센서보다 먼저 시작해야 첫 읽기부터 기록됨 (sim/replay.py로 재생)
+    if RECORD_FILE:
+        try:
+            recorder.start(RECORD_FILE)
+        except Exception as e:
+            print(f"✗ 원시 데이터 기록 시작 실패: {e}")
+    
+    # ========== 파생 지표 준비 ==========
+    # 저장된 오늘 DLI/통계를 이어서 적분 (DERIVED_STATE_FILE)
+    init_derived()
+    
     # ========== 센서 초기화 ==========
     init_sensors()
     
+    # ========== 시계열 저장소 열기 ==========
+    init_store()
+    
+    # ========== 센서 데이터 전송기 준비 ==========
+    init_publishing()
+    
+    # ========== 센서 스케줄러 시작 ==========
+    start_scheduler()
+    
     # ========== MQTT 명령 콜백 등록 ==========
     # MQTT로 명령이 오면 handle_command 함수 호출
     mqtt.set_command_callback(handle_command)
     
+    # ========== MQTT 스풀 열기 ==========
+    # 연결 전/끊긴 동안의 메시지를 디스크에 쌓았다가 연결되면 보냄
+    if SPOOL_FILE:
+        try:
+            mqtt.open_spool(SPOOL_FILE)
+        except Exception as e:
+            print(f"✗ MQTT 스풀 열기 실패: {e}")
+    
     # ========== MQTT 브로커 연결 ==========
     print("MQTT 브로커 연결 중...")
     if mqtt.connect_to_broker():
@@ -552,11 +827,18 @@ def main():
     sensor_thread = threading.Thread(target=sensor_loop, daemon=True)
     sensor_thread.start()
     
+    # ========== 성능 지표 전송 스레드 시작 ==========
+    if METRICS_INTERVAL:
+        metrics_thread = threading.Thread(target=metrics_loop, name="metrics", daemon=True)
+        metrics_thread.start()
+    
     # ========== 시스템 가동 메시지 ==========
     print("=" * 60)
     print("✓ 시스템 가동 중...")
     print("  - 센서 모니터링: 백그라운드 실행")
     print("  - MQTT 명령 대기: 활성")
+    if METRICS_INTERVAL:
+        print(f"  - 성능 지표 전송: {METRICS_INTERVAL}초마다 ({MQTT_TOPIC_METRICS})")
     print()
     print("종료하려면 Ctrl+C를 누르세요")
     print("=" * 60)
@@ -568,7 +850,7 @@ def main():
     try:
         while True:
             time.sleep(1)
-            
+    
     except KeyboardInterrupt:
         # Ctrl+C 입력 시 (signal_handler가 처리하지만 여기도 대비)
         pass
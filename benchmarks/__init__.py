@@ -0,0 +1,12 @@
+"""
+벤치마크 패키지
+
+실제 하드웨어/브로커 없이 가짜 하드웨어(sim)와 로컬 브로커로 성능을 측정합니다.
+
+    broker.py   : 벤치마크용 최소 MQTT 브로커 / 구독자
+    pipeline.py : 센서 → MQTT → 구독자 종단 간 지연, 최대 발행률, CPU/RSS
+    micro.py    : 함수별 마이크로벤치마크, 기준값 대비 성능 저하 감지
+
+결과 파일은 benchmarks/results/, 마이크로벤치마크 기준값은 benchmarks/baselines/에
+JSON으로 저장됩니다 (기기 모델별).
+"""
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""
+벤치마크용 로컬 MQTT 브로커 / 구독자
+
+외부 브로커(mosquitto 등) 없이 벤치마크를 돌릴 수 있도록 MQTT 3.1.1의
+필요한 부분(CONNECT, SUBSCRIBE, PUBLISH QoS 0/1, PING, DISCONNECT)만 구현합니다.
+paho 클라이언트가 실제 TCP 소켓으로 붙으므로 발행 경로는 운영 환경과 같습니다.
+
+구독자는 받은 메시지마다 수신 시각(time.monotonic)을 기록합니다.
+리눅스에서 monotonic 시계는 프로세스 간에 공유되므로, 브로커를 별도 프로세스로
+띄워도 발행 시각과 바로 비교할 수 있습니다.
+"""
+
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+# 패킷 종류 (고정 헤더 상위 4비트)
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+
+# ==================== 패킷 인코딩 ====================
+
+def encode_length(length):
+    """남은 길이(remaining length) 가변 길이 인코딩"""
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        out.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(out)
+
+
+def encode_string(text):
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    return struct.pack('>H', len(data)) + data
+
+
+def packet(kind, body=b'', flags=0):
+    return bytes([(kind << 4) | flags]) + encode_length(len(body)) + body
+
+
+def read_packet(sock_file):
+    """
+    패킷 하나 읽기
+    
+    Returns:
+        tuple: (종류, 플래그, 본문), 연결이 끊기면 None
+    """
+    header = sock_file.read(1)
+    if not header:
+        return None
+    
+    length = 0
+    multiplier = 1
+    while True:
+        byte = sock_file.read(1)
+        if not byte:
+            return None
+        length += (byte[0] & 0x7F) * multiplier
+        if not byte[0] & 0x80:
+            break
+        multiplier *= 128
+    
+    body = sock_file.read(length) if length else b''
+    if len(body) < length:
+        return None
+    
+    return header[0] >> 4, header[0] & 0x0F, body
+
+
+def topic_matches(topic_filter, topic):
+    """구독 필터('+', '#' 와일드카드)가 토픽과 맞는지 확인"""
+    filter_parts = topic_filter.split('/')
+    topic_parts = topic.split('/')
+    
+    for i, part in enumerate(filter_parts):
+        if part == '#':
+            return True
+        if i >= len(topic_parts) or (part != '+' and part != topic_parts[i]):
+            return False
+    
+    return len(filter_parts) == len(topic_parts)
+
+
+# ==================== 브로커 ====================
+
+class _Session:
+    """브로커에 연결된 클라이언트 하나"""
+    
+    def __init__(self, sock):
+        self.sock = sock
+        self.filters = []
+        self.lock = threading.Lock()
+    
+    def send(self, data):
+        with self.lock:
+            self.sock.sendall(data)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        broker = self.server.broker
+        session = _Session(self.request)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        
+        try:
+            while True:
+                result = read_packet(self.rfile)
+                if result is None:
+                    break
+                
+                kind, flags, body = result
+                
+                if kind == CONNECT:
+                    session.send(packet(CONNACK, b'\x00\x00'))
+                elif kind == SUBSCRIBE:
+                    packet_id = body[:2]
+                    pos = 2
+                    granted = bytearray()
+                    while pos < len(body):
+                        length, = struct.unpack('>H', body[pos:pos + 2])
+                        session.filters.append(body[pos + 2:pos + 2 + length].decode('utf-8'))
+                        granted.append(0)  # 구독자에게는 QoS 0으로 전달
+                        pos += 2 + length + 1
+                    broker.add(session)
+                    session.send(packet(SUBACK, packet_id + bytes(granted)))
+                elif kind == UNSUBSCRIBE:
+                    session.filters.clear()
+                    session.send(packet(UNSUBACK, body[:2]))
+                elif kind == PUBLISH:
+                    qos = (flags >> 1) & 0x03
+                    length, = struct.unpack('>H', body[:2])
+                    topic = body[2:2 + length].decode('utf-8')
+                    pos = 2 + length
+                    if qos:
+                        session.send(packet(PUBACK, body[pos:pos + 2]))
+                        pos += 2
+                    broker.route(topic, body[pos:])
+                elif kind == PINGREQ:
+                    session.send(packet(PINGRESP))
+                elif kind == DISCONNECT:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            broker.remove(session)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Broker:
+    """
+    최소 MQTT 브로커 (스레드 서버)
+    
+    사용 예:
+        broker = Broker(port=0)   # 0이면 빈 포트 자동 선택
+        broker.start()
+        print(broker.port)
+        broker.stop()
+    """
+    
+    def __init__(self, host='127.0.0.1', port=0):
+        self._server = _Server((host, port), _Handler)
+        self._server.broker = self
+        self.host = host
+        self.port = self._server.server_address[1]
+        
+        self._lock = threading.Lock()
+        self._sessions = []
+        self._thread = None
+        self.routed = 0       # 받은 PUBLISH 수
+    
+    
+    def add(self, session):
+        with self._lock:
+            if session not in self._sessions:
+                self._sessions.append(session)
+    
+    
+    def remove(self, session):
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+    
+    
+    def route(self, topic, payload):
+        """구독 필터가 맞는 세션에 QoS 0으로 전달"""
+        data = packet(PUBLISH, encode_string(topic) + payload)
+        
+        with self._lock:
+            self.routed += 1
+            targets = [s for s in self._sessions if any(topic_matches(f, topic) for f in s.filters)]
+        
+        for session in targets:
+            try:
+                session.send(data)
+            except OSError:
+                self.remove(session)
+    
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-broker", daemon=True)
+        self._thread.start()
+    
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ==================== 구독자 ====================
+
+class Subscriber:
+    """
+    최소 MQTT 구독자
+    
+    메시지마다 on_message(topic, payload, received) 를 호출합니다.
+    received는 수신 시각 (time.monotonic).
+    """
+    
+    def __init__(self, host, port, topic, on_message, client_id='bench-subscriber'):
+        self.topic = topic
+        self.on_message = on_message
+        self.received = 0
+        
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self.sock.makefile('rb')
+        
+        # CONNECT: 프로토콜 이름, 레벨 4, clean session, keepalive 60초
+        body = encode_string('MQTT') + bytes([4, 0x02]) + struct.pack('>H', 60) + encode_string(client_id)
+        self.sock.sendall(packet(CONNECT, body))
+        read_packet(self._file)  # CONNACK
+        
+        self.sock.sendall(packet(SUBSCRIBE, struct.pack('>H', 1) + encode_string(topic) + b'\x00', flags=0x02))
+        read_packet(self._file)  # SUBACK
+        
+        self._thread = threading.Thread(target=self._loop, name="bench-subscriber", daemon=True)
+        self._thread.start()
+    
+    
+    def _loop(self):
+        try:
+            while True:
+                result = read_packet(self._file)
+                if result is None:
+                    return
+                
+                kind, flags, body = result
+                if kind != PUBLISH:
+                    continue
+                
+                received = time.monotonic()
+                length, = struct.unpack('>H', body[:2])
+                topic = body[2:2 + length].decode('utf-8')
+                pos = 2 + length + (2 if (flags >> 1) & 0x03 else 0)
+                self.received += 1
+                self.on_message(topic, body[pos:], received)
+        except (ConnectionError, OSError, ValueError):
+            return
+    
+    
+    def close(self):
+        try:
+            self.sock.sendall(packet(DISCONNECT))
+            self.sock.close()
+        except OSError:
+            pass
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    print("=== 벤치마크 브로커 테스트 ===\n")
+    
+    broker = Broker()
+    broker.start()
+    print(f"브로커: {broker.host}:{broker.port}")
+    
+    latencies = []
+    subscriber = Subscriber(broker.host, broker.port, 'farm/+/sensor',
+                            lambda topic, payload, received: latencies.append(received - float(payload)))
+    
+    # 발행자: 구독자와 같은 최소 클라이언트로 QoS 1 발행
+    publisher = socket.create_connection((broker.host, broker.port))
+    publisher_file = publisher.makefile('rb')
+    publisher.sendall(packet(CONNECT, encode_string('MQTT') + bytes([4, 0x02]) + struct.pack('>H', 60)
+                             + encode_string('bench-publisher')))
+    read_packet(publisher_file)
+    
+    for i in range(1000):
+        body = encode_string('farm/test/sensor') + struct.pack('>H', i + 1) + str(time.monotonic()).encode()
+        publisher.sendall(packet(PUBLISH, body, flags=0x02))
+        read_packet(publisher_file)  # PUBACK
+    
+    time.sleep(0.2)
+    latencies.sort()
+    print(f"수신 {len(latencies)}/1000, p50 {latencies[len(latencies) // 2] * 1000:.3f}ms, "
+          f"max {latencies[-1] * 1000:.3f}ms")
+    
+    subscriber.close()
+    publisher.close()
+    broker.stop()
\ No newline at end of file
@@ -0,0 +1,453 @@
+"""
+구성 요소 마이크로벤치마크 (기준값 저장 + 성능 저하 감지)
+
+자주 호출되는 함수 하나하나의 호출당 시간을 가짜 하드웨어(sim) 위에서 측정합니다.
+하드웨어 대기(SPI 전송, 카메라 프레임 간격, ADC 샘플 간격)는 0으로 두어 코드 자체의 비용만 봅니다.
+카메라 워밍업처럼 모듈 코드에 있는 대기는 그대로 측정됩니다.
+
+    mcp3008.read_adc        : MCP3008.read_adc() (가짜 SPI 버스)
+    tds.read_tds            : TDSSensor.read_tds() (ADC 읽기 + 룩업 테이블)
+    tds.convert             : TDSSensor.convert() (전압 → TDS/EC 계산식)
+    tds.convert_codes       : TDSSensor.convert_codes() (ADC 값 1024개 배치 → 전압/TDS/EC)
+    light.convert_lux       : LightSensor.convert_lux() (ADC 값 1024개 배치 → lux)
+    payload.json_dumps      : send_sensor_data()의 payload 구성 + json.dumps
+    codec.encode.<형식>     : codec.encode() (json / msgpack / cbor / struct, 라이브러리 없으면 건너뜀)
+    codec.decode.<형식>     : codec.decode() (서버 쪽 복원 비용)
+    mqtt.send_sensor_data   : send_sensor_data() 전체 (발행하지 않는 가짜 클라이언트)
+    app.handle_command      : handle_command() 명령 분기 (LED on)
+    camera.capture_image    : camera.capture_image() (가짜 캡처 장치)
+
+--save-baseline으로 결과를 기기 모델별 기준값 파일(benchmarks/baselines/)에 저장하고,
+이후 실행에서는 기준값보다 허용 비율(--tolerance) 넘게 느려진 함수를 표시합니다.
+느려진 함수가 있으면 종료 코드 1을 돌려줍니다.
+
+사용법:
+    python -m benchmarks.micro --save-baseline
+    python -m benchmarks.micro --tolerance 0.2
+    python -m benchmarks.micro mcp3008.read_adc tds.convert
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.pipeline import machine_info
+from config import ADC_OVERSAMPLING
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# 기준값 대비 이 비율 넘게 느려지면 성능 저하로 표시 (0.15 = 15%)
+DEFAULT_TOLERANCE = 0.15
+
+# 반복 1회(repeat)가 최소 이 시간은 걸리도록 호출 횟수를 늘림 (초)
+MIN_REPEAT_TIME = 0.2
+
+# 등록된 벤치마크 {이름: 준비 함수}
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    벤치마크 등록 데코레이터
+    
+    준비 함수는 측정할 함수(인자 없음)를 돌려주거나, 측정할 수 없으면 None을 돌려줍니다.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# ==================== 측정 대상 ====================
+
+_environment = None
+
+
+def _install_sim():
+    """가짜 하드웨어 설치 (처음 한 번), 하드웨어 대기 시간은 0"""
+    global _environment
+    
+    if _environment is None:
+        import sim
+        with contextlib.redirect_stdout(io.StringIO()):
+            _environment = sim.install(seed=0)
+        _environment.delay_scale = 0.0
+    return _environment
+
+
+def _sample_payload():
+    """스냅샷 payload와 같은 모양의 데이터"""
+    from modules.snapshot import SensorSnapshot
+    
+    snapshot = SensorSnapshot()
+    for field, value in (('temperature', 24.3), ('humidity', 61.2), ('light', 742),
+                         ('co2', 512), ('ec', 1.62), ('tds', 812.4)):
+        snapshot.add(field, value)
+    return snapshot.to_payload()
+
+
+class _NullClient:
+    """발행하지 않는 가짜 paho 클라이언트"""
+    
+    class _Result:
+        rc = 0
+    
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        return self._Result
+
+
+@benchmark('mcp3008.read_adc')
+def _bench_read_adc():
+    _install_sim()
+    from sensors.mcp3008 import MCP3008
+    
+    adc = MCP3008(bus=0, device=0)
+    return lambda: adc.read_adc(0)
+
+
+@benchmark('tds.read_tds')
+def _bench_read_tds():
+    _install_sim()
+    from sensors.tds import TDSSensor
+    
+    sensor = TDSSensor()
+    
+    # 오버샘플링 샘플 간격(대기)은 빼고 변환/결합/룩업 비용만 측정
+    settings = dict(ADC_OVERSAMPLING.get(sensor.channel, {}))
+    if settings:
+        settings['spacing'] = 0.0
+        sensor.adc.configure_channel(sensor.channel, **settings)
+    return lambda: sensor.read_tds(23.5)
+
+
+@benchmark('tds.convert')
+def _bench_tds_convert():
+    _install_sim()
+    from sensors.tds import TDSSensor
+    
+    sensor = TDSSensor()
+    return lambda: sensor.convert(1.234, 23.5)
+
+
+# 배치 변환 벤치마크 입력 (스트리밍 window 하나 분량)
+_BATCH_CODES = [(i * 37) % 1024 for i in range(1024)]
+
+
+@benchmark('tds.convert_codes')
+def _bench_tds_convert_codes():
+    _install_sim()
+    from sensors.tds import TDSSensor
+    
+    sensor = TDSSensor()
+    return lambda: sensor.convert_codes(_BATCH_CODES, 23.5)
+
+
+@benchmark('light.convert_lux')
+def _bench_light_convert_lux():
+    _install_sim()
+    from sensors.light import LightSensor
+    
+    sensor = LightSensor()
+    return lambda: sensor.convert_lux(_BATCH_CODES)
+
+
+@benchmark('payload.json_dumps')
+def _bench_json_dumps():
+    from config import DEVICE_ID
+    
+    data = _sample_payload()
+    return lambda: json.dumps({"deviceId": DEVICE_ID, **data})
+
+
+def _codec_message(encoding):
+    """형식별 인코딩 벤치마크 입력 (사용할 수 없는 형식이면 None)"""
+    from config import DEVICE_ID
+    from modules import codec
+    
+    if encoding not in codec.supported('sensor'):
+        return None
+    payload = {"deviceId": DEVICE_ID, **_sample_payload()}
+    return payload, codec.encode(payload, encoding)
+
+
+def _register_codec(encoding):
+    @benchmark(f'codec.encode.{encoding}')
+    def _bench_encode():
+        from modules import codec
+        
+        sample = _codec_message(encoding)
+        if sample is None:
+            return None
+        return lambda: codec.encode(sample[0], encoding)
+    
+    @benchmark(f'codec.decode.{encoding}')
+    def _bench_decode():
+        from modules import codec
+        
+        sample = _codec_message(encoding)
+        if sample is None:
+            return None
+        return lambda: codec.decode(sample[1])
+
+
+for _encoding in ('json', 'msgpack', 'cbor', 'struct'):
+    _register_codec(_encoding)
+
+
+@benchmark('mqtt.send_sensor_data')
+def _bench_send_sensor_data():
+    try:
+        from modules import mqtt_client as mqtt
+    except ImportError:
+        return None
+    
+    mqtt.client = _NullClient()
+    mqtt.is_connected = True
+    mqtt.DEBUG = False
+    data = _sample_payload()
+    return lambda: mqtt.send_sensor_data(data)
+
+
+@benchmark('app.handle_command')
+def _bench_handle_command():
+    _install_sim()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+    except ImportError:
+        return None
+    
+    app.mqtt.is_connected = False  # 상태 전송은 미연결로 바로 반환
+    command = {'type': 'led', 'action': 'on'}
+    return lambda: app.handle_command(command)
+
+
+@benchmark('camera.capture_image')
+def _bench_capture_image():
+    _install_sim()
+    with contextlib.redirect_stdout(io.StringIO()):
+        from modules import camera
+    
+    if camera.camera is None:
+        return None
+    
+    # 측정 중 찍은 사진은 임시 폴더에 같은 이름으로 덮어씀
+    image_dir = tempfile.mkdtemp(prefix='bench-camera-')
+    camera.IMAGE_DIR = image_dir
+    
+    def capture():
+        camera.capture_image('bench.jpg')
+    
+    capture.cleanup = lambda: shutil.rmtree(image_dir, ignore_errors=True)
+    return capture
+
+
+# ==================== 측정 ====================
+
+def measure(func, repeats=7, min_time=MIN_REPEAT_TIME):
+    """
+    호출당 시간 측정
+    
+    먼저 한 번 호출해 보고, 반복 1회가 min_time 이상 걸리도록 호출 횟수를 정한 뒤
+    repeats번 반복합니다. 측정 중에는 GC를 끕니다 (timeit과 같은 방식).
+    
+    Returns:
+        dict: 호출당 시간 (us) {'min', 'median', 'stdev', 'loops', 'repeats'}
+    """
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    loops = max(1, int(min_time / first)) if first > 0 else 1000
+    
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            timings.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    
+    def us(v):
+        return round(v * 1e6, 3)
+    
+    return {
+        'min': us(min(timings)),
+        'median': us(statistics.median(timings)),
+        'stdev': us(statistics.stdev(timings)) if len(timings) > 1 else 0.0,
+        'loops': loops,
+        'repeats': repeats
+    }
+
+
+def run(names=None, repeats=7):
+    """
+    마이크로벤치마크 실행
+    
+    Args:
+        names (list, optional): 실행할 벤치마크 이름 (기본: 전부)
+        repeats (int): 반복 횟수
+    
+    Returns:
+        dict: {이름: 측정 결과}, 준비할 수 없는 벤치마크는 {'skipped': 이유}
+    """
+    results = {}
+    
+    for name in names or BENCHMARKS:
+        setup = BENCHMARKS.get(name)
+        if setup is None:
+            print(f"⚠ 알 수 없는 벤치마크: {name}")
+            continue
+        
+        try:
+            func = setup()
+        except Exception as e:
+            print(f"✗ {name}: 준비 실패 ({e})")
+            results[name] = {'skipped': str(e)}
+            continue
+        
+        if func is None:
+            print(f"⚠ {name}: 건너뜀 (필요한 모듈/장치 없음)")
+            results[name] = {'skipped': 'unavailable'}
+            continue
+        
+        try:
+            # 측정 대상의 출력(print)은 버림
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[name] = measure(func, repeats=repeats)
+        finally:
+            cleanup = getattr(func, 'cleanup', None)
+            if cleanup:
+                cleanup()
+        
+        r = results[name]
+        print(f"  {name:24s} {r['median']:12.3f}us  (min {r['min']:.3f}, ±{r['stdev']:.3f}, {r['loops']}회 × {r['repeats']})")
+    
+    return results
+
+
+# ==================== 기준값 ====================
+
+def baseline_path(model=None):
+    """기기 모델별 기준값 파일 경로"""
+    model = model or machine_info()['model']
+    slug = ''.join(c if c.isalnum() else '-' for c in model).strip('-').lower()
+    return os.path.join(BASELINE_DIR, f"micro-{slug}.json")
+
+
+def load_baseline(path):
+    """기준값 파일 읽기 (없으면 None)"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(results, path, machine=None):
+    """
+    측정 결과를 기준값으로 저장
+    
+    이번에 측정하지 않은 벤치마크의 기존 기준값은 남겨 둡니다.
+    """
+    previous = load_baseline(path) or {}
+    benchmarks = dict(previous.get('benchmarks', {}))
+    benchmarks.update({name: r for name, r in results.items() if 'skipped' not in r})
+    
+    data = {
+        'benchmark': 'micro',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine or machine_info(),
+        'benchmarks': benchmarks
+    }
+    
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def check_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    기준값 대비 느려진 벤치마크 찾기
+    
+    중앙값이 기준 중앙값 × (1 + tolerance)를 넘으면 성능 저하로 봅니다.
+    
+    Returns:
+        list: [(이름, 기준 us, 현재 us, 변화율), ...]
+    """
+    regressions = []
+    reference = baseline.get('benchmarks', {})
+    
+    for name, result in results.items():
+        base = reference.get(name)
+        if 'skipped' in result or not base or not base.get('median'):
+            continue
+        
+        change = result['median'] / base['median'] - 1.0
+        mark = '✗' if change > tolerance else '✓'
+        print(f"  {mark} {name:24s} {base['median']:12.3f} → {result['median']:12.3f}us ({change * 100:+.1f}%)")
+        
+        if change > tolerance:
+            regressions.append((name, base['median'], result['median'], change))
+    
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="구성 요소 마이크로벤치마크")
+    parser.add_argument('names', nargs='*', help=f"실행할 벤치마크 (기본: 전부) - {', '.join(BENCHMARKS)}")
+    parser.add_argument('--repeats', type=int, default=7, help="반복 횟수")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="허용 저하 비율 (0.15 = 15%%)")
+    parser.add_argument('--baseline', help="기준값 파일 (기본: benchmarks/baselines/micro-<모델>.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준값으로 저장")
+    parser.add_argument('--output', help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+    
+    machine = machine_info()
+    path = args.baseline or baseline_path(machine['model'])
+    
+    print(f"=== 마이크로벤치마크 ({machine['model']}, Python {machine['python']}) ===\n")
+    results = run(args.names, repeats=args.repeats)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'machine': machine, 'benchmarks': results}, f, indent=2)
+    
+    if args.save_baseline:
+        save_baseline(results, path, machine)
+        print(f"\n✓ 기준값 저장: {path}")
+        return 0
+    
+    baseline = load_baseline(path)
+    if baseline is None:
+        print(f"\n⚠ 기준값 없음: {path} (--save-baseline으로 저장)")
+        return 0
+    
+    print(f"\n기준값 비교 ({baseline.get('machine', {}).get('commit')}, 허용 {args.tolerance * 100:.0f}%):")
+    regressions = check_regressions(results, baseline, args.tolerance)
+    
+    if regressions:
+        print(f"\n✗ 성능 저하 {len(regressions)}개: {', '.join(name for name, *_ in regressions)}")
+        return 1
+    
+    print("\n✓ 성능 저하 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
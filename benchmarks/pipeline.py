@@ -0,0 +1,558 @@
+"""
+센서 파이프라인 종단 간 벤치마크
+
+get_sensor_snapshot() → to_payload() → mqtt_client.send_sensor_data() → 브로커 → 구독자
+전체 경로를 가짜 하드웨어(sim)와 로컬 브로커(benchmarks/broker.py)로 측정합니다.
+
+측정 항목:
+    1. 단계별 지연 백분위수 (p50/p90/p99/max, ms)
+       - read      : get_sensor_snapshot() (스케줄러 없이 모든 센서를 한 번씩 읽음)
+       - convert   : snapshot.to_payload()
+       - encode    : send_sensor_data() 호출부터 client.publish() 호출 전까지 (JSON 직렬화)
+       - publish   : client.publish() 호출 시간
+       - delivered : publish() 호출부터 구독자 수신까지
+       - total     : read 시작부터 구독자 수신까지
+    2. 최대 지속 가능 발행률 (samples/s)
+       - 스케줄러를 돌린 채(운영과 같은 경로) 목표 발행률을 단계적으로 올리면서
+         유실 1% 미만, p99 지연 기준 이내, 목표의 95% 이상 발행을 만족하는 최고 발행률
+    3. 메시지 1000개당 CPU 시간과 RSS 증가량 (브로커/구독자는 별도 프로세스라 제외)
+
+결과는 JSON 파일로 저장하므로 같은 Pi 모델에서 릴리스끼리 비교할 수 있습니다.
+
+사용법:
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --samples 500 --rates 10,100,1000 --compare benchmarks/results/이전.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from config import SIM_LATENCY, MQTT_TOPIC_SENSOR, SNAPSHOT_MAX_SKEW, SNAPSHOT_DROP_STALE
+
+# 단계 이름 (결과 파일 순서)
+STAGES = ('read', 'convert', 'encode', 'publish', 'delivered', 'total')
+
+# 발행률 단계 (samples/s)
+DEFAULT_RATES = (10, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# 메시지 순번 필드 (구독자가 수신 시각과 짝지을 때 사용)
+SEQ_FIELD = '_bench'
+
+
+# ==================== 통계 ====================
+
+def percentile(values, p):
+    """
+    백분위수 (선형 보간)
+    
+    Args:
+        values (list): 정렬된 값 목록
+        p (float): 0~100
+    """
+    if not values:
+        return None
+    k = (len(values) - 1) * p / 100.0
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def summarize(samples):
+    """
+    지연 목록(초) → 요약 통계(ms)
+    """
+    values = sorted(samples)
+    if not values:
+        return {'count': 0}
+    
+    def ms(v):
+        return round(v * 1000, 4)
+    
+    return {
+        'count': len(values),
+        'mean': ms(sum(values) / len(values)),
+        'p50': ms(percentile(values, 50)),
+        'p90': ms(percentile(values, 90)),
+        'p99': ms(percentile(values, 99)),
+        'max': ms(values[-1])
+    }
+
+
+def cpu_seconds():
+    """이 프로세스의 누적 CPU 시간 (user + system, 초)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def rss_kb():
+    """현재 RSS (KB)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        # /proc가 없으면 최대 RSS로 대신함 (리눅스 KB 단위)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# ==================== 브로커 프로세스 ====================
+
+def _broker_process(conn, topic):
+    """
+    브로커와 구독자를 별도 프로세스에서 실행
+    
+    부모와의 메시지:
+        → ('ready', port)
+        ← 'collect' → {순번: 수신 시각} (보낸 뒤 비움)
+        ← 'stop'
+    """
+    from benchmarks.broker import Broker, Subscriber
+    
+    broker = Broker()
+    broker.start()
+    
+    received = {}
+    
+    def on_message(topic, payload, at):
+        try:
+            seq = json.loads(payload).get(SEQ_FIELD)
+        except ValueError:
+            return
+        if seq is not None:
+            received[seq] = at
+    
+    subscriber = Subscriber(broker.host, broker.port, topic, on_message)
+    conn.send(('ready', broker.port))
+    
+    while True:
+        request = conn.recv()
+        if request == 'collect':
+            batch, received = received, {}
+            conn.send(batch)
+        elif request == 'stop':
+            break
+    
+    subscriber.close()
+    broker.stop()
+
+
+class BrokerProcess:
+    """로컬 브로커 + 구독자 자식 프로세스"""
+    
+    def __init__(self, topic):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_broker_process, args=(child_conn, topic), name="bench-broker", daemon=True
+        )
+        self._process.start()
+        
+        if not self._conn.poll(10):
+            raise RuntimeError("벤치마크 브로커가 시작되지 않았습니다")
+        _, self.port = self._conn.recv()
+        self.host = '127.0.0.1'
+    
+    
+    def collect(self):
+        """지금까지 받은 {순번: 수신 시각}"""
+        self._conn.send('collect')
+        return self._conn.recv()
+    
+    
+    def wait_for(self, expected, timeout=2.0):
+        """
+        순번 expected(집합)가 모두 도착하거나 timeout까지 수집
+        """
+        received = {}
+        deadline = time.monotonic() + timeout
+        while True:
+            received.update(self.collect())
+            if expected <= received.keys() or time.monotonic() >= deadline:
+                return received
+            time.sleep(0.05)
+    
+    
+    def stop(self):
+        try:
+            self._conn.send('stop')
+        except OSError:
+            pass
+        self._process.join(timeout=5)
+
+
+# ==================== 파이프라인 측정 ====================
+
+class Pipeline:
+    """
+    app의 센서 → MQTT 경로에 측정 지점을 단 실행기
+    """
+    
+    def __init__(self, broker, seed=0):
+        import sim
+        sim.install(latency=SIM_LATENCY, seed=seed)
+        
+        # 가짜 하드웨어 설치 후에 import (app은 import 시 센서 모듈을 불러옴)
+        import app
+        from modules import mqtt_client as mqtt
+        
+        self.app = app
+        self.mqtt = mqtt
+        self.seq = 0
+        self._publish_start = None
+        self._publish_end = None
+        
+        # 로컬 브로커로 연결, 메시지마다 출력하지 않음
+        mqtt.MQTT_BROKER = broker.host
+        mqtt.MQTT_PORT = broker.port
+        mqtt.DEBUG = False
+        app.DEBUG = False
+        
+        app.init_derived(state_file=None)
+        app.init_sensors()
+        if not mqtt.connect_to_broker():
+            raise RuntimeError("로컬 브로커 연결 실패")
+        
+        # publish() 호출 구간 기록
+        original = mqtt.client.publish
+        
+        def timed_publish(*args, **kwargs):
+            self._publish_start = time.monotonic()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._publish_end = time.monotonic()
+        
+        mqtt.client.publish = timed_publish
+    
+    
+    def sample(self):
+        """
+        스냅샷 하나를 읽어 발행
+        
+        스케줄러가 돌고 있으면 최신값을 모으고, 아니면 센서를 직접 읽습니다
+        (app.get_sensor_snapshot()과 같은 동작).
+        
+        Returns:
+            dict: 단계 경계 시각 (monotonic) 과 순번, 발행 실패 시 None
+        """
+        t0 = time.monotonic()
+        snapshot = self.app.get_sensor_snapshot()
+        t1 = time.monotonic()
+        data = snapshot.to_payload(max_skew=SNAPSHOT_MAX_SKEW, drop_stale=SNAPSHOT_DROP_STALE)
+        t2 = time.monotonic()
+        
+        self.seq += 1
+        data[SEQ_FIELD] = self.seq
+        if not self.mqtt.send_sensor_data(data):
+            return None
+        t3 = time.monotonic()
+        
+        return {
+            'seq': self.seq,
+            'start': t0,
+            'read': t1,
+            'convert': t2,
+            'publish_start': self._publish_start,
+            'publish_end': self._publish_end,
+            'sent': t3
+        }
+    
+    
+    def close(self):
+        self.app.cleanup()
+
+
+def stage_latencies(marks, received):
+    """
+    단계 경계 시각 + 수신 시각 → 단계별 지연 목록 (초)
+    """
+    stages = {name: [] for name in STAGES}
+    
+    for m in marks:
+        stages['read'].append(m['read'] - m['start'])
+        stages['convert'].append(m['convert'] - m['read'])
+        stages['encode'].append(m['publish_start'] - m['convert'])
+        stages['publish'].append(m['publish_end'] - m['publish_start'])
+        
+        at = received.get(m['seq'])
+        if at is not None:
+            stages['delivered'].append(at - m['publish_start'])
+            stages['total'].append(at - m['start'])
+    
+    return stages
+
+
+def measure_latency(pipeline, broker, samples, interval):
+    """
+    1단계: 단계별 지연 (센서를 매번 직접 읽음)
+    """
+    print(f"\n▶ 단계별 지연 측정: {samples}개")
+    
+    marks = []
+    for _ in range(samples):
+        m = pipeline.sample()
+        if m is not None:
+            marks.append(m)
+        if interval:
+            time.sleep(interval)
+    
+    received = broker.wait_for({m['seq'] for m in marks})
+    stages = stage_latencies(marks, received)
+    
+    result = {name: summarize(values) for name, values in stages.items()}
+    result['sent'] = len(marks)
+    result['delivered_count'] = len(stages['delivered'])
+    
+    for name in STAGES:
+        s = result[name]
+        if s['count']:
+            print(f"  {name:10s} p50 {s['p50']:9.3f}ms  p90 {s['p90']:9.3f}ms  "
+                  f"p99 {s['p99']:9.3f}ms  max {s['max']:9.3f}ms")
+    
+    return result
+
+
+def measure_rate(pipeline, broker, rate, duration, max_p99):
+    """
+    2단계: 목표 발행률 하나를 duration초 동안 유지해 보기 (스케줄러 동작 중)
+    
+    Returns:
+        dict: 실제 발행률, 유실률, 지연, 메시지 1000개당 CPU/RSS
+    """
+    count = max(int(rate * duration), 1)
+    period = 1.0 / rate
+    
+    broker.collect()  # 이전 단계 잔여 메시지 버림
+    marks = []
+    failed = 0
+    
+    cpu_before = cpu_seconds()
+    rss_before = rss_kb()
+    start = time.monotonic()
+    next_due = start
+    
+    for _ in range(count):
+        m = pipeline.sample()
+        if m is None:
+            failed += 1
+        else:
+            marks.append(m)
+        
+        next_due += period
+        wait = next_due - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+    
+    elapsed = time.monotonic() - start
+    cpu_used = cpu_seconds() - cpu_before
+    rss_after = rss_kb()
+    
+    received = broker.wait_for({m['seq'] for m in marks})
+    stages = stage_latencies(marks, received)
+    total = summarize(stages['total'])
+    
+    achieved = len(marks) / elapsed if elapsed else 0.0
+    delivered = len(stages['delivered'])
+    loss = 1.0 - delivered / count
+    
+    sustainable = (
+        achieved >= rate * 0.95
+        and loss < 0.01
+        and total.get('p99') is not None and total['p99'] <= max_p99
+    )
+    
+    result = {
+        'target_rate': rate,
+        'achieved_rate': round(achieved, 1),
+        'sent': len(marks),
+        'failed': failed,
+        'delivered': delivered,
+        'loss': round(loss, 4),
+        'total': total,
+        'delivered_latency': summarize(stages['delivered']),
+        'cpu_seconds_per_1k': round(cpu_used / max(len(marks), 1) * 1000, 4),
+        'rss_kb': rss_after,
+        'rss_growth_kb_per_1k': round((rss_after - rss_before) / max(len(marks), 1) * 1000, 1),
+        'sustainable': sustainable
+    }
+    
+    mark = '✓' if sustainable else '✗'
+    print(f"  {mark} {rate:6d}/s → 실제 {achieved:8.1f}/s, 유실 {loss * 100:5.2f}%, "
+          f"p99 {total.get('p99', float('nan')):8.3f}ms, CPU {result['cpu_seconds_per_1k']:.3f}s/1k")
+    return result
+
+
+# ==================== 실행 환경 정보 ====================
+
+def machine_info():
+    """
+    비교용 실행 환경 (Pi 모델, 파이썬, 커밋)
+    """
+    try:
+        with open('/proc/device-tree/model') as f:
+            model = f.read().strip('\x00\n ')
+    except OSError:
+        model = platform.machine()
+    
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(RESULTS_DIR), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    return {
+        'model': model,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'commit': commit,
+        'sim_latency': SIM_LATENCY
+    }
+
+
+def compare(previous, current):
+    """
+    이전 결과 파일과 비교 출력
+    """
+    print(f"\n=== 비교: {previous['machine'].get('commit')} → {current['machine'].get('commit')} ===")
+    
+    if previous['machine'].get('model') != current['machine'].get('model'):
+        print(f"⚠ 기기 모델이 다릅니다: {previous['machine'].get('model')} / {current['machine'].get('model')}")
+    
+    for name in STAGES:
+        old = previous['latency'].get(name, {})
+        new = current['latency'].get(name, {})
+        if old.get('p50') is None or new.get('p50') is None:
+            continue
+        for key in ('p50', 'p99'):
+            change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            print(f"  {name:10s} {key}: {old[key]:9.3f} → {new[key]:9.3f}ms ({change:+.1f}%)")
+    
+    print(f"  최대 지속 발행률: {previous.get('max_sustainable_rate')} → "
+          f"{current.get('max_sustainable_rate')} samples/s")
+
+
+# ==================== 실행 ====================
+
+def run(samples=200, interval=0.0, rates=DEFAULT_RATES, duration=3.0, max_p99=100.0, seed=0):
+    """
+    벤치마크 실행
+    
+    Args:
+        samples (int): 지연 측정 샘플 수
+        interval (float): 지연 측정 샘플 간격 (초)
+        rates (iterable): 시험할 발행률 (samples/s, 오름차순)
+        duration (float): 발행률 단계마다 유지할 시간 (초)
+        max_p99 (float): 지속 가능으로 볼 종단 간 p99 상한 (ms)
+        seed (int): 시뮬레이션 난수 시드
+    
+    Returns:
+        dict: 결과 (JSON으로 저장 가능)
+    """
+    broker = BrokerProcess(MQTT_TOPIC_SENSOR)
+    pipeline = None
+    
+    try:
+        pipeline = Pipeline(broker, seed=seed)
+        
+        latency = measure_latency(pipeline, broker, samples, interval)
+        
+        # 운영과 같이 스케줄러가 센서를 읽고, 발행 루프는 최신값만 모음
+        pipeline.app.start_scheduler()
+        time.sleep(1.0)  # 모든 센서가 한 번씩 읽힐 때까지
+        
+        print(f"\n▶ 최대 지속 발행률 측정 (단계당 {duration}초, p99 ≤ {max_p99}ms)")
+        steps = []
+        max_rate = None
+        for rate in rates:
+            step = measure_rate(pipeline, broker, rate, duration, max_p99)
+            steps.append(step)
+            if not step['sustainable']:
+                break
+            max_rate = rate
+    
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        broker.stop()
+    
+    sustained = next((s for s in reversed(steps) if s['sustainable']), steps[-1] if steps else None)
+    
+    return {
+        'benchmark': 'pipeline',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'settings': {
+            'samples': samples,
+            'interval': interval,
+            'rates': list(rates),
+            'duration': duration,
+            'max_p99_ms': max_p99,
+            'seed': seed
+        },
+        'latency': latency,
+        'rates': steps,
+        'max_sustainable_rate': max_rate,
+        'cpu_seconds_per_1k': sustained['cpu_seconds_per_1k'] if sustained else None,
+        'rss_kb': sustained['rss_kb'] if sustained else None
+    }
+
+
+def save(result, path=None):
+    """
+    결과 JSON 저장 (기본: benchmarks/results/pipeline-<모델>-<시각>.json)
+    """
+    if path is None:
+        model = ''.join(c if c.isalnum() else '-' for c in result['machine']['model']).strip('-').lower()
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(RESULTS_DIR, f"pipeline-{model}-{stamp}.json")
+    
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="센서 → MQTT 파이프라인 종단 간 벤치마크")
+    parser.add_argument('--samples', type=int, default=200, help="지연 측정 샘플 수")
+    parser.add_argument('--interval', type=float, default=0.0, help="지연 측정 샘플 간격 (초)")
+    parser.add_argument('--rates', default=','.join(map(str, DEFAULT_RATES)), help="시험할 발행률 (쉼표 구분)")
+    parser.add_argument('--duration', type=float, default=3.0, help="발행률 단계당 시간 (초)")
+    parser.add_argument('--max-p99', type=float, default=100.0, help="지속 가능 판정 p99 상한 (ms)")
+    parser.add_argument('--seed', type=int, default=0, help="시뮬레이션 난수 시드")
+    parser.add_argument('--output', help="결과 파일 경로")
+    parser.add_argument('--compare', help="비교할 이전 결과 파일")
+    args = parser.parse_args(argv)
+    
+    result = run(
+        samples=args.samples,
+        interval=args.interval,
+        rates=[int(r) for r in args.rates.split(',') if r],
+        duration=args.duration,
+        max_p99=args.max_p99,
+        seed=args.seed
+    )
+    
+    path = save(result, args.output)
+    print(f"\n✓ 최대 지속 발행률: {result['max_sustainable_rate']} samples/s")
+    print(f"✓ 결과 저장: {path}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
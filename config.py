@@ -2,6 +2,14 @@
 스마트팜 설정 파일 - MQTT 버전
 """
 
+import os
+
+# ==================== 데이터 파일 위치 ====================
+# 캘리브레이션, 파생 지표 상태, 시계열 저장소, MQTT 스풀처럼 계속 남는 파일을 두는 디렉터리
+# 기본값은 이 프로젝트 폴더 (실행한 위치와 상관없음), SD 카드 대신 다른 곳에 두려면 절대 경로로 변경
+# 예: DATA_DIR = "/var/lib/smartfarm"
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # ==================== MQTT 브로커 설정 ====================
 MQTT_BROKER = "localhost"  # 실제 브로커 주소로 변경 (예: 192.168.0.100)
 MQTT_PORT = 1883
@@ -15,13 +23,52 @@ MQTT_TOPIC_SENSOR = f"farm/{DEVICE_ID}/sensor"       # 센서 데이터 발행
 MQTT_TOPIC_STATUS = f"farm/{DEVICE_ID}/status"       # 디바이스 상태 발행
 MQTT_TOPIC_CONTROL = f"farm/{DEVICE_ID}/control"     # 제어 명령 구독
 MQTT_TOPIC_IMAGE = f"farm/{DEVICE_ID}/image"         # 이미지 발행
+MQTT_TOPIC_METRICS = f"farm/{DEVICE_ID}/metrics"     # 성능 지표 발행
+MQTT_TOPIC_PROFILE = f"farm/{DEVICE_ID}/profile"     # 원격 프로파일 결과 발행
+MQTT_TOPIC_DAILY = f"farm/{DEVICE_ID}/daily"         # 일별 요약(DLI, 최소/최대/평균) 발행
+MQTT_TOPIC_SENSOR_BATCH = f"farm/{DEVICE_ID}/sensor/batch"  # 센서 데이터 묶음 발행 (SENSOR_BATCH_ENABLED)
+
+# 토픽 종류별 payload 인코딩 (modules/codec.py)
+# "json"(기존 형식) / "msgpack" / "cbor" / "struct"(센서 데이터 전용 고정 레이아웃)
+# 바이너리 형식은 3바이트 헤더(형식 ID, 스키마 버전)로 시작하고, 서버는 codec.decode()로 읽습니다
+# 서버가 제어 명령 {"type": "encoding", "topic": "sensor", "encoding": "msgpack"}으로 바꿀 수도 있습니다
+# REPORT_BY_EXCEPTION이면 sensor 토픽에 struct는 쓸 수 없습니다 (바뀐 필드만 보내므로)
+PAYLOAD_ENCODINGS = {
+    "sensor": "json",
+    "status": "json",
+    "image": "json",
+}
+
+# MQTT 연결이 끊겨 보내지 못한 센서/상태/이미지 메시지를 디스크에 쌓아 두었다가
+# 다시 연결되면 오래된 것부터 SPOOL_DRAIN_RATE로 보냅니다 (modules/spool.py)
+SPOOL_FILE = os.path.join(DATA_DIR, "mqtt_spool.db")  # None이면 쌓지 않음 (끊긴 동안의 메시지는 버림)
+SPOOL_MAX_BYTES = 200 * 1024 * 1024 # 최대 크기 (넘으면 오래된 메시지부터 버림)
+SPOOL_MAX_MESSAGES = 500000         # 최대 메시지 수
+SPOOL_DRAIN_RATE = 50               # 재연결 후 전송 속도 (메시지/초, 실시간 메시지와 별도)
+SPOOL_DRAIN_BATCH = 50              # 한 번에 발행하고 확인을 기다릴 메시지 수
 
 # MQTT 인증 (필요시 사용)
 MQTT_USERNAME = None  # "username"
 MQTT_PASSWORD = None  # "password"
 
 # ==================== 센서 읽기 주기 ====================
-SENSOR_INTERVAL = 5  # 초
+SENSOR_INTERVAL = 5  # 초 (서버 전송 주기)
+SCHEDULER_WORKERS = 3  # 동시 읽기 워커 수 (I2C / SPI / UART)
+
+# 스냅샷 시각 정합성 - 값마다 실제 측정 시각(readingTimes)이 함께 전송됩니다
+# SNAPSHOT_MAX_SKEW: 한 시점으로 볼 최대 측정 시각 차이 (초), None이면 검사 안 함
+# SNAPSHOT_DROP_STALE: True면 최신 값보다 MAX_SKEW 넘게 오래된 값은 None으로 전송
+SNAPSHOT_MAX_SKEW = None
+SNAPSHOT_DROP_STALE = False
+
+# ==================== 센서 장애 격리 ====================
+# 읽기 마감 시간은 센서 타입별 기본값(sensors/registry.py) 또는 센서 선언의 'timeout' (초)
+# 연속 BREAKER_THRESHOLD번 실패하면 차단하고, BREAKER_BASE_DELAY초부터 2배씩(최대 MAX) 기다렸다 재시도
+# 상태는 payload의 'health'(센서별 ok/degraded/open/probing)와 'faults'(실패 내용)로 전송됩니다
+SENSOR_READ_TIMEOUT = 1.0   # 타입에 기본값이 없을 때의 마감 시간 (초)
+BREAKER_THRESHOLD = 3
+BREAKER_BASE_DELAY = 10
+BREAKER_MAX_DELAY = 600
 
 # ==================== 센서 설정 (라즈베리파이 GPIO 연결) =================================================
 
@@ -31,9 +78,16 @@ I2C_SDA = 2       # GPIO 2번 핀
 I2C_SCL = 3       # GPIO 3번 핀
 HTU21D_ADDR = 0x40  # I2C 주소
 
+# ==================== I2C 멀티플렉서 (TCA9548A) ====================
+# HTU21D는 주소가 0x40 고정이라 여러 개를 쓰려면 멀티플렉서 채널마다 하나씩 연결합니다
+# 센서 선언에 'mux_channel': 0~7 을 넣으면 그 채널을 선택한 뒤 읽습니다 (sensors/tca9548a.py)
+I2C_MUX_ADDR = 0x70  # A0~A2 점퍼로 0x70~0x77
+
 # ==================== CO2 센서 (UART 통신) ====================
 CO2_SERIAL_PORT = "/dev/ttyAMA0"  # 또는 "/dev/serial0"
 CO2_BAUDRATE = 9600
+CO2_POLL_INTERVAL = 2   # 측정 요청 주기 (초)
+CO2_MAX_AGE = 30        # 캐시 값 유효 시간 (초), 넘으면 None 처리
 
 # ==================== MCP3008 ADC (SPI 통신 - 고정 핀) ====================
 SPI_BUS = 0       # SPI 버스 번호
@@ -49,6 +103,73 @@ ADC_TDS_CHANNEL = 1   # MCP3008의 CH1
 # ==================== 조도 센서 (아날로그 - MCP3008 ADC 사용) ====================
 ADC_LIGHT_CHANNEL = 0   # MCP3008의 CH0
 
+# ==================== MCP3008 칩 목록 (여러 개 사용 시) ====================
+# 칩 이름 → SPI 버스/CE와 채널 맵 {센서 이름: 채널}
+# 센서 선언에 'adc': 칩 이름을 넣으면 채널 맵에서 채널을 찾습니다 ('channel'로 직접 지정해도 됨)
+# 캘리브레이션은 칩별로 따로 저장됩니다 (기본 칩은 채널 번호, 나머지는 "버스.CE:채널")
+ADC_CHIPS = {
+    'adc0': {'spi_bus': SPI_BUS, 'spi_device': SPI_DEVICE,
+             'channels': {'light': ADC_LIGHT_CHANNEL, 'tds': ADC_TDS_CHANNEL}},
+    # 'adc1': {'spi_bus': 0, 'spi_device': 1, 'channels': {'light2': 0, 'tds2': 1}},   # CE1
+    # 'adc2': {'spi_bus': 1, 'spi_device': 0, 'channels': {'light3': 0, 'tds3': 1}},   # SPI1 CE0
+}
+
+# ==================== ADC 캘리브레이션 ====================
+# 채널별 다점 보정 곡선과 K값을 저장하는 파일 (sensors/calibration.py 참고)
+# 센서는 이 곡선을 1024칸 룩업 테이블로 컴파일해서 변환에 사용합니다
+CALIBRATION_FILE = os.path.join(DATA_DIR, "calibration.json")
+
+# TDS 룩업 테이블 온도 축 (최저 °C, 최고 °C, 간격 °C) - 범위 밖 온도는 양 끝 값 사용
+TDS_LUT_TEMPERATURES = (0, 40, 1)
+
+# ==================== ADC 오버샘플링 (채널별) ====================
+# samples: 읽기 1회당 샘플 수 / method: 'median' 또는 'trimmed' (트림 평균)
+# spacing: 샘플 간격 (초) / trim: 'trimmed' 방식에서 양쪽에서 버릴 비율
+# 목록에 없는 채널은 샘플 1개로 읽습니다
+# 기본 칩(adc0) 채널 기준이며, 다른 칩의 센서는 선언에 'oversampling': {...}으로 지정합니다
+ADC_OVERSAMPLING = {
+    ADC_TDS_CHANNEL: {'samples': 9, 'method': 'median', 'spacing': 0.0005},
+    ADC_LIGHT_CHANNEL: {'samples': 5, 'method': 'trimmed', 'spacing': 0.0, 'trim': 0.2},
+}
+
+# ==================== ADC 연속 스트리밍 ====================
+# 지정한 채널을 백그라운드에서 고속 샘플링해 링 버퍼에 저장합니다
+# 스트리밍 채널은 센서 루프에서 최근 ADC_STREAM_WINDOW초 평균으로 읽힙니다
+# 빈 리스트면 스트리밍 사용 안 함 (예: [ADC_TDS_CHANNEL])
+ADC_STREAM_CHANNELS = []
+ADC_STREAM_RATE = 200       # 스윕 주기 (Hz)
+ADC_STREAM_BUFFER = 2048    # 채널별 링 버퍼 크기 (샘플 수, 200Hz 기준 약 10초)
+ADC_STREAM_WINDOW = 1.0     # 평균 구간 (초)
+
+# ==================== 센서 목록 (레지스트리) ====================
+# 사용할 센서를 타입/버스/채널로 선언합니다 (sensors/registry.py 참고)
+# - type: 센서 타입 ('htu21d', 'light', 'co2', 'tds')
+# - bus: 버스 이름 (생략 시 타입 기본값). 버스가 다른 센서는 동시에 읽습니다
+# - period: 읽기 주기 (초, 생략 시 SENSOR_INTERVAL)
+# - enabled: False면 초기화하지 않고 드라이버도 import 하지 않음
+# - adc: ADC 센서가 연결된 칩 (ADC_CHIPS의 이름), 채널은 칩의 채널 맵에서 찾음
+# - mux_channel: HTU21D가 연결된 TCA9548A 채널
+# - timeout: 읽기 마감 시간 (초, 생략 시 타입 기본값)
+# - 그 외 키(channel, port 등)는 드라이버 생성자 인자로 전달됩니다
+# 같은 타입이 여럿이면 값은 payload의 'instances'에 센서 이름별로 들어가고,
+# 처음 선언한 센서의 값은 기존 필드('temperature' 등)에도 들어갑니다
+SENSORS = [
+    {'name': 'htu21d', 'type': 'htu21d', 'bus': 'i2c', 'period': 5},
+    {'name': 'light', 'type': 'light', 'bus': 'spi', 'adc': 'adc0', 'period': 1},
+    {'name': 'co2', 'type': 'co2', 'bus': 'uart', 'port': CO2_SERIAL_PORT, 'baudrate': CO2_BAUDRATE, 'period': 30},
+    {'name': 'tds', 'type': 'tds', 'bus': 'spi', 'adc': 'adc0', 'period': 1},
+]
+
+# 큰 베드 예시 - HTU21D 3개를 멀티플렉서 CH0~2에, ADC 칩 2개 (위 htu21d 선언 대신 사용)
+# SENSORS += [
+#     {'name': 'bed1', 'type': 'htu21d', 'mux_channel': 0, 'period': 5},
+#     {'name': 'bed2', 'type': 'htu21d', 'mux_channel': 1, 'period': 5},
+#     {'name': 'bed3', 'type': 'htu21d', 'mux_channel': 2, 'period': 5},
+#     {'name': 'light2', 'type': 'light', 'adc': 'adc1', 'period': 1},
+#     {'name': 'tds2', 'type': 'tds', 'adc': 'adc1', 'period': 1,
+#      'oversampling': {'samples': 9, 'method': 'median', 'spacing': 0.0005}},
+# ]
+
 
 
 
@@ -83,5 +204,83 @@ USB_PORT_LED = "1-1.4"    # 루아즈 LED 네온 스트립 조명
 CAMERA_RESOLUTION = (640, 480)  # 해상도
 CAMERA_QUALITY = 85             # JPEG 품질 (0-100)
 
+# ==================== 하드웨어 시뮬레이션 ====================
+# True면 app.py 시작 시 가짜 하드웨어(sim 패키지)를 설치합니다
+# 라즈베리파이 없이 전체 스택을 실제 코드 경로로 실행/프로파일링할 때 사용
+SIMULATION = False
+SIM_LATENCY = {             # 버스별 트랜잭션 추가 지연 (초), 전송 시간은 별도로 계산됨
+    'spi': 0.00005,         # spidev ioctl 오버헤드
+    'i2c': 0.0003,          # I2C 드라이버 오버헤드
+    'uart': 0.002,          # MH-Z19 응답 처리 시간
+    'gpio': 0.0,
+    'camera': 0.033,        # 프레임 간격 (30fps)
+}
+SIM_TIME_SCALE = 1.0        # 시뮬레이션 시계 배속 (1440이면 하루가 1분)
+SIM_SEED = None             # 난수 시드 (None이면 매번 다름)
+
+# ==================== 파생 지표 (VPD, 이슬점, 절대습도, DLI) ====================
+# 온도/습도/조도 값이 들어올 때마다 기기에서 계산해 센서 payload에 함께 보냅니다 (modules/derived.py)
+# DLI는 현지 시각 자정에 0으로 초기화되고, 지난 날의 요약은 MQTT_TOPIC_DAILY로 발행됩니다
+LUX_TO_PPFD = 0.0185        # lux → PPFD(µmol/m²/s) 환산 계수 (태양광 약 0.0185, 백색 LED 약 0.014~0.016)
+DLI_MAX_GAP = 300           # 조도 샘플 간격이 이보다 길면 그 구간은 적분하지 않음 (초)
+DERIVED_STATE_FILE = os.path.join(DATA_DIR, "derived_state.json")  # 오늘 DLI/통계 저장 (재시작해도 이어감), None이면 저장 안 함
+DERIVED_SAVE_INTERVAL = 300 # 상태 저장 최소 간격 (초)
+
+# ==================== 로컬 시계열 저장소 ====================
+# 센서 샘플(스케줄러 결과, 파생 지표, ADC 스트리밍)을 SQLite(WAL)에 묶어서 저장 (modules/store.py)
+# MQTT가 끊겨 있어도 값이 남고, 센서/시간 구간으로 조회할 수 있습니다
+STORE_FILE = os.path.join(DATA_DIR, "sensor_store.db")  # None이면 저장 안 함
+STORE_COMMIT_INTERVAL = 2.0 # 묶어서 쓰는 주기 (초), 길수록 SD 카드 쓰기가 줄어듦
+STORE_BATCH_SIZE = 5000     # 대기 샘플이 이만큼 차면 주기 전에 씀
+STORE_MAX_PENDING = 100000  # 대기 샘플 최대 개수 (넘으면 오래된 것부터 버림)
+STORE_RETENTION_DAYS = 30   # 보관 기간 (일), None이면 삭제 안 함
+STORE_ADC_STREAM = True     # ADC 스트리밍 샘플(ADC_STREAM_CHANNELS)도 모두 저장
+
+# ==================== 센서 데이터 묶음 전송 ====================
+# 샘플을 모아 열 형식 메시지 하나로 MQTT_TOPIC_SENSOR_BATCH에 발행 (modules/batch.py)
+# 서버는 modules.batch.decode_batch()로 풀어서 씁니다
+SENSOR_BATCH_ENABLED = False     # True면 MQTT_TOPIC_SENSOR 대신 묶음으로 전송
+SENSOR_BATCH_SIZE = 12           # 묶음 최대 샘플 수
+SENSOR_BATCH_MAX_AGE = 60        # 첫 샘플 후 이 시간(초)이 지나면 전송
+SENSOR_BATCH_COMPRESS_MIN = 1024 # 인코딩 크기가 이보다 크면 zlib 압축 (바이트), None이면 압축 안 함
+
+# ==================== 변화 보고 (report-by-exception) ====================
+# 필드 값이 불감대를 벗어났거나 REPORT_MAX_SILENCE초 동안 보내지 않았을 때만 그 필드를 전송
+# 메시지에는 보낸 필드와 seq(메시지 번호)가 담깁니다 (modules/deadband.py)
+# 묶음 전송(SENSOR_BATCH_ENABLED)을 켜면 묶음이 모든 샘플을 보내므로 이 설정은 쓰이지 않습니다
+REPORT_BY_EXCEPTION = False  # True면 바뀐 필드만 MQTT_TOPIC_SENSOR로 전송
+REPORT_MAX_SILENCE = 300     # 바뀌지 않아도 이 시간(초)마다 한 번은 보냄 (하트비트)
+
+# 필드별 불감대: |새 값 - 마지막으로 보낸 값| > max(abs, rel × |마지막으로 보낸 값|) 이면 전송
+# 목록에 없는 필드는 값이 바뀌면 바로 전송
+DEADBANDS = {
+    'temperature': {'abs': 0.2},             # °C
+    'humidity': {'abs': 1.0},                # %
+    'light': {'abs': 10, 'rel': 0.05},       # lux
+    'co2': {'abs': 20},                      # ppm
+    'ec': {'abs': 0.05},                     # mS/cm
+    'tds': {'abs': 10, 'rel': 0.02},         # ppm
+    'vpd': {'abs': 0.05},                    # kPa
+    'dewPoint': {'abs': 0.2},                # °C
+    'absoluteHumidity': {'abs': 0.2},        # g/m³
+    'ppfd': {'abs': 1.0, 'rel': 0.05},       # µmol/m²/s
+    'dli': {'abs': 0.1},                     # mol/m²
+}
+
+# ==================== 원시 데이터 기록 ====================
+# 파일 경로를 지정하면 ADC 코드, I2C 결과, UART 수신 바이트를 압축 기록합니다
+# 재생: python -m sim.replay <파일> [배속]
+RECORD_FILE = None  # 예: "./recordings/farm.rec.gz"
+
+# ==================== 성능 지표 ====================
+# 센서 읽기/발행/명령/재연결 횟수와 지연 히스토그램을 MQTT_TOPIC_METRICS로 발행 (modules/metrics.py)
+METRICS_INTERVAL = 60       # 발행 주기 (초), 0이면 발행 안 함
+
+# ==================== 원격 프로파일링 ====================
+# 제어 명령 {"type": "profile", "action": "start", "seconds": 30}으로 시작 (modules/profiler.py)
+PROFILE_INTERVAL = 0.01     # 스택 표본 간격 (초)
+PROFILE_MAX_SECONDS = 300   # 최대 측정 시간 (초)
+PROFILE_TOP = 30            # 결과에 넣을 상위 함수 / 할당 위치 수
+
 # ==================== 로깅 설정 ====================
 DEBUG = True  # 디버그 메시지 출력
\ No newline at end of file
@@ -0,0 +1,302 @@
+"""
+센서 데이터 묶음(batch) 전송 모듈 - 열(column) 형식
+
+센서 데이터를 주기마다 하나씩 보내면 메시지마다 deviceId와 모든 필드 이름이 반복되고,
+기기가 많아지면 브로커의 초당 메시지 수가 먼저 한계에 닿습니다.
+BatchPublisher는 샘플을 max_samples개 또는 max_age초 동안 모았다가 한 메시지로 보냅니다.
+
+메시지 형식 (JSON):
+    {
+        "v": 1,                       # 형식 버전
+        "deviceId": "farm_001",
+        "n": 3,                       # 샘플 수
+        "t0": 1700000000000,          # 첫 샘플 timestamp (ms)
+        "dt": [0, 5000, 5001],        # 앞 샘플과의 timestamp 차이 (ms, 첫 값은 0)
+        "fields": {
+            "temperature": [24.1, 24.2, null],
+            "readingTimes": {"temperature": [-12, -8, null],    # 샘플 timestamp 기준 (ms)
+                             "bed2.temperature": [-30, -2, null]},   # 인스턴스는 평평한 키 그대로
+            "health": {"co2": ["ok", "open", "ok"]},
+            ...
+        }
+    }
+
+- 필드마다 값 배열 하나, 중첩 dict(instances, health, faults ...)는 같은 모양의 중첩 배열
+- 샘플에 없던 필드는 null (decode_batch()가 중첩 필드에서는 다시 뺌)
+- 인코딩한 크기가 compress_min 바이트를 넘으면 zlib으로 압축 (첫 바이트가 '{'가 아니면 압축본)
+
+서버에서는 decode_batch(payload)로 원래의 샘플 목록(send_sensor_data 형식)을 얻습니다.
+"""
+
+import json
+import threading
+import time
+import zlib
+
+from config import DEVICE_ID, SENSOR_BATCH_SIZE, SENSOR_BATCH_MAX_AGE, SENSOR_BATCH_COMPRESS_MIN
+from modules import metrics
+
+# 형식 버전
+VERSION = 1
+
+# 샘플 timestamp 기준 상대 시각(ms)으로 보내는 필드 ({필드: Unix timestamp})
+TIME_FIELDS = ('readingTimes',)
+
+
+# ==================== 인코딩 / 디코딩 ====================
+
+def _columns(values):
+    """
+    샘플별 값 목록 → 열 (dict 값은 키별 중첩 열)
+    """
+    if not any(isinstance(v, dict) for v in values):
+        return list(values)
+    
+    keys = []
+    for value in values:
+        if isinstance(value, dict):
+            keys.extend(k for k in value if k not in keys)
+    
+    return {
+        key: _columns([v.get(key) if isinstance(v, dict) else None for v in values])
+        for key in keys
+    }
+
+
+def _rows(column, n):
+    """
+    열 → 샘플별 값 목록 (중첩 열은 None을 뺀 dict, 모두 비면 None)
+    """
+    if isinstance(column, list):
+        return column
+    
+    rows = [{} for _ in range(n)]
+    for key, sub in column.items():
+        for row, value in zip(rows, _rows(sub, n)):
+            if value is not None:
+                row[key] = value
+    return [row or None for row in rows]
+
+
+def encode_batch(samples, device_id=DEVICE_ID, compress_min=SENSOR_BATCH_COMPRESS_MIN):
+    """
+    샘플 목록을 열 형식 메시지로 인코딩
+    
+    Args:
+        samples (list): get_all_sensor_data() 형식 dict 목록 (timestamp 필수)
+        device_id (str): 기기 ID
+        compress_min (int): 이 크기(바이트)를 넘으면 zlib 압축, None이면 압축 안 함
+    
+    Returns:
+        bytes: JSON 또는 zlib 압축된 JSON
+    """
+    stamps = [round(sample['timestamp'] * 1000) for sample in samples]
+    deltas = [0] + [b - a for a, b in zip(stamps, stamps[1:])]
+    
+    rows = []
+    for sample, stamp in zip(samples, stamps):
+        row = {k: v for k, v in sample.items() if k != 'timestamp'}
+        for field in TIME_FIELDS:
+            if isinstance(row.get(field), dict):
+                row[field] = {
+                    k: round(t * 1000) - stamp if t is not None else None
+                    for k, t in row[field].items()
+                }
+        rows.append(row)
+    
+    keys = []
+    for row in rows:
+        keys.extend(k for k in row if k not in keys)
+    
+    message = {
+        'v': VERSION,
+        'deviceId': device_id,
+        'n': len(samples),
+        't0': stamps[0] if stamps else None,
+        'dt': deltas if stamps else [],
+        'fields': {key: _columns([row.get(key) for row in rows]) for key in keys}
+    }
+    data = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    
+    if compress_min is not None and len(data) > compress_min:
+        return zlib.compress(data, 6)
+    return data
+
+
+def decode_batch(payload):
+    """
+    encode_batch() 메시지를 샘플 목록으로 복원 (서버용)
+    
+    Args:
+        payload (bytes | str): 받은 메시지 (압축 여부는 자동 판별)
+    
+    Returns:
+        list: [{'deviceId', 'timestamp', 필드...}, ...] (send_sensor_data 형식)
+    
+    Raises:
+        ValueError: 형식이 다르거나 지원하지 않는 버전
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    if not payload.startswith(b'{'):
+        payload = zlib.decompress(payload)
+    
+    message = json.loads(payload)
+    if message.get('v') != VERSION:
+        raise ValueError(f"지원하지 않는 묶음 형식 버전: {message.get('v')}")
+    
+    n = message['n']
+    stamps = []
+    stamp = message['t0']
+    for delta in message['dt']:
+        stamp += delta
+        stamps.append(stamp)
+    
+    samples = [{'deviceId': message['deviceId'], 'timestamp': s / 1000} for s in stamps]
+    for key, column in message['fields'].items():
+        for sample, value in zip(samples, _rows(column, n)):
+            # 중첩 필드는 원래 없던 것이므로 빼고, 값 필드의 None은 그대로 둠
+            if value is not None or isinstance(column, list):
+                sample[key] = value
+    
+    for sample in samples:
+        stamp = sample['timestamp'] * 1000
+        for field in TIME_FIELDS:
+            if isinstance(sample.get(field), dict):
+                sample[field] = {k: round((stamp + ms) / 1000, 3) for k, ms in sample[field].items()}
+    return samples
+
+
+# ==================== 묶음 전송 ====================
+
+class BatchPublisher:
+    """
+    샘플을 모았다가 한 메시지로 보내는 전송기
+    
+    사용 예:
+        batcher = BatchPublisher(mqtt.send_sensor_batch)
+        batcher.add(get_all_sensor_data())   # max_samples개 / max_age초가 되면 전송
+        batcher.flush()                      # 종료 전에 남은 샘플 전송
+    """
+    
+    def __init__(self, send, max_samples=SENSOR_BATCH_SIZE, max_age=SENSOR_BATCH_MAX_AGE,
+                 compress_min=SENSOR_BATCH_COMPRESS_MIN):
+        """
+        Args:
+            send (callable): send(message: bytes, count: int) → bool
+            max_samples (int): 묶음 최대 샘플 수
+            max_age (float): 첫 샘플 후 이 시간(초)이 지나면 전송
+            compress_min (int): 압축을 시작할 크기 (바이트)
+        """
+        self.send = send
+        self.max_samples = max(int(max_samples), 1)
+        self.max_age = max_age
+        self.compress_min = compress_min
+        
+        self._samples = []
+        self._first = None   # 첫 샘플을 넣은 시각 (monotonic)
+        self._lock = threading.Lock()
+        
+        self._flushes = metrics.counter('batch.flushes')
+        self._sent_samples = metrics.counter('batch.samples')
+        self._sent_bytes = metrics.counter('batch.bytes')
+        metrics.gauge('batch.pending', lambda: len(self._samples))
+    
+    
+    def add(self, sample):
+        """
+        샘플 추가 (가득 찼거나 오래됐으면 바로 전송)
+        
+        Returns:
+            bool: 이번에 묶음을 전송했으면 전송 결과, 아니면 True
+        """
+        with self._lock:
+            self._samples.append(sample)
+            if self._first is None:
+                self._first = time.monotonic()
+            
+            due = (len(self._samples) >= self.max_samples
+                   or time.monotonic() - self._first >= self.max_age)
+            if not due:
+                return True
+            samples = self._take()
+        
+        return self._send(samples)
+    
+    
+    def flush(self):
+        """
+        모은 샘플을 지금 전송
+        
+        Returns:
+            bool: 전송 결과 (보낼 샘플이 없으면 True)
+        """
+        with self._lock:
+            samples = self._take()
+        return self._send(samples)
+    
+    
+    def _take(self):
+        samples, self._samples = self._samples, []
+        self._first = None
+        return samples
+    
+    
+    def _send(self, samples):
+        if not samples:
+            return True
+        
+        message = encode_batch(samples, compress_min=self.compress_min)
+        self._flushes.inc()
+        self._sent_samples.inc(len(samples))
+        self._sent_bytes.inc(len(message))
+        return self.send(message, len(samples))
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    import random
+    
+    print("=== 센서 데이터 묶음 전송 테스트 ===\n")
+    
+    now = time.time()
+    samples = []
+    for i in range(60):
+        t = now + i * 5 + random.uniform(-0.01, 0.01)
+        samples.append({
+            'temperature': round(24 + random.uniform(-0.5, 0.5), 1),
+            'humidity': round(60 + random.uniform(-2, 2), 1),
+            'light': random.randint(800, 900),
+            'co2': random.randint(400, 450) if i % 10 else None,
+            'ec': 1.2,
+            'tds': 600.0,
+            'timestamp': t,
+            'readingTimes': {'temperature': round(t - 0.8, 3), 'light': round(t - 0.1, 3)},
+            'skew': 0.7,
+            'health': {'co2': 'ok' if i % 10 else 'open'},
+            **({'faults': {'co2': {'error': 'timeout', 'failures': 3}}} if i % 10 == 0 else {})
+        })
+    
+    single = sum(len(json.dumps({'deviceId': DEVICE_ID, **s})) for s in samples)
+    plain = encode_batch(samples, compress_min=None)
+    packed = encode_batch(samples)
+    print(f"샘플 {len(samples)}개")
+    print(f"  개별 JSON: {single} bytes (메시지 {len(samples)}개)")
+    print(f"  열 형식:   {len(plain)} bytes")
+    print(f"  압축:      {len(packed)} bytes")
+    
+    decoded = decode_batch(packed)
+    expected = [{'deviceId': DEVICE_ID, **s} for s in samples]
+    same = all(
+        abs(a['timestamp'] - b['timestamp']) < 0.001
+        and {k: v for k, v in a.items() if k != 'timestamp'} == {k: v for k, v in b.items() if k != 'timestamp'}
+        for a, b in zip(decoded, expected)
+    )
+    print(f"  복원 일치: {'✓' if same and len(decoded) == len(samples) else '✗'}\n")
+    
+    sent = []
+    batcher = BatchPublisher(lambda message, count: sent.append(count) or True, max_samples=12, max_age=60)
+    for sample in samples[:30]:
+        batcher.add(sample)
+    batcher.flush()
+    print(f"묶음 전송: {sent}")
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+센서 장애 격리 모듈 - 읽기 마감 시간과 회로 차단기
+
+I2C 선이 불안정하거나 UART가 빠지면 드라이버 읽기가 멈추거나 계속 실패합니다.
+그대로 두면 주기마다 마감 시간만큼 워커와 버스 락을 붙잡아 다른 센서까지 늦어집니다.
+
+- TimedCall: 센서 전용 스레드에서 읽기를 실행하고 마감 시간까지만 기다립니다.
+  마감을 넘긴 읽기는 버려두고(스레드는 끝나면 돌아옴) 그동안의 호출은 바로 실패시킵니다.
+- CircuitBreaker: 연속 실패가 threshold번이면 차단(open)하고, 지수적으로 늘어나는
+  대기 시간(base_delay × 2^n, 최대 max_delay)이 지난 뒤 한 번만 시험 읽기(probing)를 합니다.
+  성공하면 정상(ok)으로 돌아가고, 실패하면 더 오래 기다립니다.
+
+스케줄러(modules/scheduler.py)가 센서 작업마다 하나씩 만들어 사용하고,
+상태는 payload의 'health' / 'faults'로 전송됩니다.
+"""
+
+import queue
+import random
+import threading
+import time
+
+from config import BREAKER_THRESHOLD, BREAKER_BASE_DELAY, BREAKER_MAX_DELAY
+
+# 차단기 상태
+OK = 'ok'                # 정상
+DEGRADED = 'degraded'    # 실패했지만 아직 차단 전
+OPEN = 'open'            # 차단됨 (재시도 대기)
+PROBING = 'probing'      # 재시도 읽기 중
+
+
+class ReadTimeout(Exception):
+    """읽기가 마감 시간 안에 끝나지 않음"""
+
+
+class _Call:
+    __slots__ = ('func', 'done', 'result', 'error', 'started')
+    
+    def __init__(self, func):
+        self.func = func
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = time.monotonic()
+
+
+class TimedCall:
+    """
+    마감 시간이 있는 함수 호출
+    
+    사용 예:
+        read = TimedCall(entry.read, timeout=0.5, name='htu21d')
+        result = read()   # 0.5초 넘으면 ReadTimeout
+    """
+    
+    def __init__(self, func, timeout, name='sensor'):
+        """
+        Args:
+            func (callable): 인자 없는 읽기 함수
+            timeout (float): 마감 시간 (초)
+            name (str): 스레드 이름에 붙일 이름
+        """
+        self.func = func
+        self.timeout = timeout
+        self.name = name
+        
+        self._requests = queue.SimpleQueue()
+        self._thread = None
+        self._stuck = None  # 마감을 넘겨 아직 끝나지 않은 호출
+    
+    
+    def _worker(self):
+        while True:
+            call = self._requests.get()
+            call.started = time.monotonic()
+            try:
+                call.result = call.func()
+            except BaseException as e:
+                call.error = e
+            call.done.set()
+    
+    
+    def __call__(self):
+        """
+        읽기 실행
+        
+        Returns:
+            func()의 반환값
+        
+        Raises:
+            ReadTimeout: 마감을 넘겼거나, 이전에 마감을 넘긴 읽기가 아직 안 끝남
+            func()에서 발생한 예외
+        """
+        stuck = self._stuck
+        if stuck is not None:
+            if not stuck.done.is_set():
+                raise ReadTimeout(f"이전 읽기가 {time.monotonic() - stuck.started:.1f}초째 끝나지 않음")
+            self._stuck = None
+        
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name=f"read-{self.name}", daemon=True)
+            self._thread.start()
+        
+        call = _Call(self.func)
+        self._requests.put(call)
+        
+        if not call.done.wait(self.timeout):
+            self._stuck = call
+            raise ReadTimeout(f"{self.timeout:g}초 안에 끝나지 않음")
+        
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class CircuitBreaker:
+    """
+    센서 하나의 회로 차단기
+    
+    사용 예:
+        breaker = CircuitBreaker('co2')
+        if breaker.allow():
+            try:
+                read()
+                breaker.success()
+            except Exception as e:
+                breaker.failure(e)
+    """
+    
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, base_delay=BREAKER_BASE_DELAY,
+                 max_delay=BREAKER_MAX_DELAY):
+        """
+        Args:
+            name (str): 센서(작업) 이름
+            threshold (int): 차단할 연속 실패 횟수
+            base_delay (float): 첫 재시도 대기 (초)
+            max_delay (float): 최대 재시도 대기 (초)
+        """
+        self.name = name
+        self.threshold = max(int(threshold), 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        
+        self.state = OK
+        self.failures = 0         # 연속 실패 횟수
+        self.trips = 0            # 차단된 횟수 (누적)
+        self.last_error = None
+        self.retry_at = None      # 다음 재시도 시각 (monotonic)
+        self._lock = threading.Lock()
+    
+    
+    def allow(self, now=None):
+        """
+        지금 읽어도 되는지 확인
+        
+        차단 중이면 재시도 시각이 지났을 때 한 번만 True를 돌려주고 PROBING으로 바뀝니다.
+        
+        Returns:
+            bool: 읽어도 되면 True
+        """
+        with self._lock:
+            if self.state in (OK, DEGRADED):
+                return True
+            if self.state == PROBING:
+                return False
+            
+            now = time.monotonic() if now is None else now
+            if now < self.retry_at:
+                return False
+            
+            self.state = PROBING
+            return True
+    
+    
+    def success(self):
+        """읽기 성공 기록"""
+        with self._lock:
+            recovered = self.state in (OPEN, PROBING)
+            self.state = OK
+            self.failures = 0
+            self.last_error = None
+            self.retry_at = None
+        
+        if recovered:
+            print(f"✓ {self.name} 센서 복구")
+    
+    
+    def failure(self, error):
+        """
+        읽기 실패 기록
+        
+        Args:
+            error: 예외 또는 설명 문자열
+        
+        Returns:
+            bool: 이번 실패로 차단(또는 재차단)됐으면 True
+        """
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) or type(error).__name__
+            
+            if self.state != PROBING and self.failures < self.threshold:
+                self.state = DEGRADED
+                return False
+            
+            # 차단: 차단될 때마다 대기 시간 2배 (±10% 흔들어 여러 센서가 한꺼번에 재시도하지 않게)
+            exponent = self.failures - self.threshold
+            delay = min(self.base_delay * (2 ** exponent), self.max_delay)
+            delay *= random.uniform(0.9, 1.1)
+            
+            self.state = OPEN
+            self.trips += 1
+            self.retry_at = time.monotonic() + delay
+        
+        print(f"⚠ {self.name} 센서 차단: 연속 {self.failures}회 실패 ({self.last_error}), {delay:.1f}초 후 재시도")
+        return True
+    
+    
+    def status(self):
+        """
+        상태 조회 (payload 'health' / 'faults'용)
+        
+        Returns:
+            dict: {'state', 'failures', 'error', 'retryIn'} (정상이면 'state'만)
+        """
+        with self._lock:
+            if self.state == OK:
+                return {'state': OK}
+            
+            status = {'state': self.state, 'failures': self.failures, 'error': self.last_error}
+            if self.state == OPEN:
+                status['retryIn'] = round(max(self.retry_at - time.monotonic(), 0.0), 1)
+            return status
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    print("=== 회로 차단기 테스트 ===\n")
+    
+    # 마감 시간
+    hang = threading.Event()
+    read = TimedCall(lambda: hang.wait(10) and 42, timeout=0.1, name='test')
+    for _ in range(2):
+        try:
+            read()
+        except ReadTimeout as e:
+            print(f"ReadTimeout: {e}")
+    hang.set()
+    time.sleep(0.01)
+    print(f"멈춘 읽기가 끝난 뒤: {read()}\n")
+    
+    # 차단 / 재시도 / 복구
+    breaker = CircuitBreaker('test', threshold=3, base_delay=0.1, max_delay=1.0)
+    for i in range(10):
+        if breaker.allow():
+            breaker.failure("I2C NACK") if i < 5 else breaker.success()
+        print(f"  {i}: {breaker.status()}")
+        time.sleep(0.15)
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+MQTT payload 인코딩 모듈 - JSON / MessagePack / CBOR / 고정 struct
+
+Pi Zero에서는 json.dumps가 메시지당 CPU 비용의 대부분이고, 종량제 LTE에서는 바이트가 비용입니다.
+토픽(sensor / status / image)마다 인코딩을 고를 수 있습니다.
+
+- json:    기존 형식 그대로 (기본값, 기존 서버가 그대로 읽음)
+- msgpack: MessagePack (msgpack 라이브러리 필요), 이미지는 base64 없이 원본 바이트
+- cbor:    CBOR (cbor2 라이브러리 필요), 이미지는 base64 없이 원본 바이트
+- struct:  센서 데이터 전용 고정 레이아웃 (라이브러리 불필요)
+
+바이너리 메시지는 3바이트 헤더로 시작해 스스로 형식을 알려 줍니다.
+    [0x00] [형식 ID] [스키마 버전]
+JSON 메시지는 '{'로 시작하므로 decode()가 둘을 구분합니다.
+레이아웃을 바꿀 때는 스키마 버전을 올리고, decode()는 이전 버전도 계속 읽어야 합니다.
+
+struct 센서 레이아웃 (스키마 1, 리틀 엔디언):
+    d        timestamp (Unix, 초)
+    11 × f   SENSOR_FIELDS 값 (None은 NaN)
+    11 × i   SENSOR_FIELDS 측정 시각 (timestamp 기준 ms, 없으면 -2^31)
+    f        skew (초)
+    나머지   그 밖의 필드(deviceId, health, faults, instances, coherent ...)를 담은 압축 JSON
+             readingTimes 중 SENSOR_FIELDS가 아닌 키('bed2.temperature' 등)도 여기에 들어감
+복원하면 SENSOR_FIELDS 11개는 항상 들어 있습니다 (입력에 없던 필드도 None으로 나옴, 고정 칸이라
+없음과 None을 구분하지 않음). 필드를 빼서 보내는 변화 보고(REPORT_BY_EXCEPTION)에는 쓸 수 없습니다.
+"""
+
+import json
+import math
+import struct
+
+# 라이브러리 import 시도
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import cbor2
+    CBOR_AVAILABLE = True
+except ImportError:
+    CBOR_AVAILABLE = False
+
+# 바이너리 헤더 첫 바이트 (JSON 텍스트는 0x00으로 시작할 수 없음)
+MAGIC = 0x00
+
+# 형식 ID (헤더 두 번째 바이트)
+FORMAT_IDS = {'msgpack': 1, 'cbor': 2, 'struct': 3}
+FORMAT_NAMES = {v: k for k, v in FORMAT_IDS.items()}
+
+# 형식별 현재 스키마 버전 (헤더 세 번째 바이트)
+SCHEMA_VERSIONS = {'msgpack': 1, 'cbor': 1, 'struct': 1}
+
+# 원본 바이트를 그대로 담을 수 있는 형식 (이미지를 base64로 바꾸지 않음)
+BYTES_ENCODINGS = ('msgpack', 'cbor')
+
+# struct 스키마 1의 고정 필드 (순서 바꾸면 안 됨)
+SENSOR_FIELDS = (
+    'temperature', 'humidity', 'light', 'co2', 'ec', 'tds',
+    'vpd', 'dewPoint', 'absoluteHumidity', 'ppfd', 'dli'
+)
+
+# 정수로 복원할 필드
+_INT_FIELDS = ('light', 'co2')
+
+_MISSING_TIME = -2 ** 31
+_SENSOR_STRUCT = struct.Struct('<d' + 'f' * len(SENSOR_FIELDS) + 'i' * len(SENSOR_FIELDS) + 'f')
+_FIXED_KEYS = frozenset(SENSOR_FIELDS) | {'timestamp', 'readingTimes', 'skew'}
+_SENSOR_FIELD_SET = frozenset(SENSOR_FIELDS)
+
+
+def supported(kind=None):
+    """
+    지금 사용할 수 있는 인코딩 목록
+    
+    Args:
+        kind (str): 'sensor' / 'status' / 'image' (struct는 sensor만 가능), None이면 전체
+    
+    Returns:
+        list: 인코딩 이름
+    """
+    names = ['json']
+    if MSGPACK_AVAILABLE:
+        names.append('msgpack')
+    if CBOR_AVAILABLE:
+        names.append('cbor')
+    if kind in (None, 'sensor'):
+        names.append('struct')
+    return names
+
+
+def check(kind, encoding):
+    """
+    토픽 종류에 쓸 수 있는 인코딩인지 확인
+    
+    Raises:
+        ValueError: 모르는 인코딩이거나, 라이브러리가 없거나, 그 토픽에 쓸 수 없음
+    """
+    if encoding not in ('json', *FORMAT_IDS):
+        raise ValueError(f"알 수 없는 인코딩: {encoding}")
+    if encoding not in supported(kind):
+        raise ValueError(f"{kind} 토픽에 사용할 수 없는 인코딩: {encoding}")
+
+
+# ==================== struct 센서 레이아웃 ====================
+
+# 마지막으로 인코딩한 나머지 필드 (health 등은 거의 바뀌지 않으므로 JSON을 다시 만들지 않음)
+_rest_cache = (None, b'')
+
+
+def _pack_sensor(payload):
+    global _rest_cache
+    
+    timestamp = payload['timestamp']
+    reading_times = payload.get('readingTimes') or {}
+    
+    values = [payload.get(field) for field in SENSOR_FIELDS]
+    values = [math.nan if value is None else value for value in values]
+    
+    base = timestamp * 1000
+    walls = [reading_times.get(field) for field in SENSOR_FIELDS]
+    times = [_MISSING_TIME if wall is None else round(wall * 1000 - base) for wall in walls]
+    
+    skew = payload.get('skew')
+    skew = math.nan if skew is None else skew
+    try:
+        head = _SENSOR_STRUCT.pack(timestamp, *values, *times, skew)
+    except struct.error:
+        # 측정 시각이 ±24일을 넘게 벗어난 경우에만 (거의 없음) 범위로 자름
+        times = [t if t == _MISSING_TIME else max(min(t, 2 ** 31 - 1), _MISSING_TIME + 1) for t in times]
+        head = _SENSOR_STRUCT.pack(timestamp, *values, *times, skew)
+    
+    rest = {k: v for k, v in payload.items() if k not in _FIXED_KEYS}
+    # 고정 칸이 없는 측정 시각(인스턴스 필드 등)은 JSON 쪽으로
+    extra_times = {k: v for k, v in reading_times.items() if k not in _SENSOR_FIELD_SET}
+    if extra_times:
+        rest['readingTimes'] = extra_times
+    if not rest:
+        return head
+    
+    cached, data = _rest_cache
+    if rest != cached:
+        data = json.dumps(rest, separators=(',', ':')).encode('utf-8')
+        # 호출한 쪽이 dict를 나중에 고쳐도 비교가 틀리지 않게 복사본을 기억
+        _rest_cache = (json.loads(data), data)
+    return head + data
+
+
+def _unpack_sensor(body):
+    fields = _SENSOR_STRUCT.unpack_from(body)
+    n = len(SENSOR_FIELDS)
+    timestamp = fields[0]
+    values = fields[1:1 + n]
+    times = fields[1 + n:1 + 2 * n]
+    skew = fields[-1]
+    
+    payload = {}
+    rest = body[_SENSOR_STRUCT.size:]
+    if rest:
+        payload.update(json.loads(rest))
+    
+    for field, value in zip(SENSOR_FIELDS, values):
+        if math.isnan(value):
+            payload[field] = None
+        elif field in _INT_FIELDS:
+            payload[field] = int(round(value))
+        else:
+            # float32로 줄었던 값을 보낼 때의 자릿수 정도로 되돌림
+            payload[field] = float(f"{value:.6g}")
+    
+    payload['timestamp'] = timestamp
+    extra_times = payload.get('readingTimes') or {}
+    payload['readingTimes'] = {
+        field: round(timestamp + ms / 1000, 3)
+        for field, ms in zip(SENSOR_FIELDS, times) if ms != _MISSING_TIME
+    }
+    payload['readingTimes'].update(extra_times)
+    if not math.isnan(skew):
+        payload['skew'] = round(skew, 3)
+    return payload
+
+
+# ==================== 인코딩 / 디코딩 ====================
+
+def encode(payload, encoding='json', kind='sensor'):
+    """
+    payload 인코딩
+    
+    Args:
+        payload (dict): 보낼 데이터 (struct는 센서 데이터 형식, timestamp 필수)
+        encoding (str): 'json' / 'msgpack' / 'cbor' / 'struct'
+        kind (str): 토픽 종류 (struct 사용 가능 여부 확인용)
+    
+    Returns:
+        str | bytes: json이면 str (기존과 같음), 나머지는 헤더가 붙은 bytes
+    """
+    if encoding == 'json':
+        return json.dumps(payload)
+    
+    check(kind, encoding)
+    header = bytes((MAGIC, FORMAT_IDS[encoding], SCHEMA_VERSIONS[encoding]))
+    
+    if encoding == 'msgpack':
+        return header + msgpack.packb(payload, use_bin_type=True)
+    if encoding == 'cbor':
+        return header + cbor2.dumps(payload)
+    return header + _pack_sensor(payload)
+
+
+def decode(message):
+    """
+    encode() 결과를 dict로 복원 (서버용, 형식은 자동 판별)
+    
+    Args:
+        message (bytes | str): 받은 메시지
+    
+    Returns:
+        dict: payload
+    
+    Raises:
+        ValueError: 모르는 형식/스키마 버전이거나 필요한 라이브러리가 없음
+    """
+    if isinstance(message, str):
+        return json.loads(message)
+    if not message or message[0] != MAGIC:
+        return json.loads(message)
+    
+    if len(message) < 3:
+        raise ValueError("바이너리 헤더가 잘렸습니다")
+    encoding = FORMAT_NAMES.get(message[1])
+    version = message[2]
+    if encoding is None:
+        raise ValueError(f"알 수 없는 형식 ID: {message[1]}")
+    if not 1 <= version <= SCHEMA_VERSIONS[encoding]:
+        raise ValueError(f"지원하지 않는 {encoding} 스키마 버전: {version}")
+    
+    body = message[3:]
+    if encoding == 'msgpack':
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack 라이브러리가 없습니다")
+        return msgpack.unpackb(body, raw=False)
+    if encoding == 'cbor':
+        if not CBOR_AVAILABLE:
+            raise ValueError("cbor2 라이브러리가 없습니다")
+        return cbor2.loads(body)
+    return _unpack_sensor(body)
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    import timeit
+    
+    print("=== payload 인코딩 테스트 ===\n")
+    print(f"사용 가능: {supported()}\n")
+    
+    payload = {
+        'deviceId': 'raspberry-pi-001',
+        'temperature': 24.3, 'humidity': 61.2, 'light': 742, 'co2': 512,
+        'ec': 1.62, 'tds': 812.4, 'vpd': 1.176, 'dewPoint': 16.4,
+        'absoluteHumidity': 13.35, 'ppfd': 13.7, 'dli': 0.41,
+        'timestamp': 1700000000.123,
+        'readingTimes': {f: round(1700000000.123 - i * 0.2, 3) for i, f in enumerate(SENSOR_FIELDS)},
+        'skew': 2.0,
+        'instances': {'bed2': {'temperature': 24.1, 'vpd': 1.05}},
+        'health': {'htu21d': 'ok', 'light': 'ok', 'co2': 'ok', 'tds': 'ok'}
+    }
+    payload['readingTimes'].update({'bed2.temperature': 1700000000.023, 'bed2.vpd': 1700000000.023})
+    
+    print(f"{'인코딩':<8} {'크기':>6} {'인코딩(µs)':>11} {'디코딩(µs)':>11}  복원")
+    for encoding in supported('sensor'):
+        message = encode(payload, encoding)
+        encode_time = min(timeit.repeat(lambda: encode(payload, encoding), number=2000, repeat=3)) / 2000
+        decode_time = min(timeit.repeat(lambda: decode(message), number=2000, repeat=3)) / 2000
+        same = decode(message) == payload
+        print(f"{encoding:<8} {len(message):>6} {encode_time * 1e6:>11.1f} {decode_time * 1e6:>11.1f}  "
+              f"{'✓' if same else '✗'}")
\ No newline at end of file
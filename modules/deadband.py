@@ -0,0 +1,245 @@
+"""
+변화 보고(report-by-exception) 모듈 - 필드별 불감대(deadband)와 하트비트
+
+sensor_loop가 5초마다 보내는 값은 대부분 그대로입니다 (습도, EC는 몇 시간씩 평평함).
+ExceptionReporter는 필드마다 마지막으로 보낸 값을 기억해 두고,
+값이 불감대를 벗어났거나 max_silence초 동안 보내지 않았을 때만 그 필드를 메시지에 넣습니다.
+
+불감대: |새 값 - 마지막으로 보낸 값| > max(abs, rel × |마지막으로 보낸 값|) 이면 변화
+    - DEADBANDS에 없는 필드는 값이 조금이라도 바뀌면 변화
+    - 인스턴스 필드('bed2.temperature')와 instances 안의 값은 필드 이름('temperature')의 불감대 사용
+    - None ↔ 값, 숫자가 아닌 값(health 상태 등)은 같지 않으면 변화
+    - dict 필드(health, faults, instances)는 안의 값 중 하나라도 바뀌면 dict 전체를 보냄
+      (faults의 retryIn처럼 매번 바뀌는 VOLATILE_KEYS는 비교하지 않음)
+    - 샘플에서 빠진 필드(센서가 복구되어 사라진 faults 등)는 한 번 null로 보냄
+
+메시지 형식:
+    {
+        "deviceId": "...",
+        "seq": 42,                  # 메시지 번호 (1부터, 재시작하면 1부터 다시)
+        "timestamp": 1700000000.1,
+        "humidity": 61.0,           # 바뀐 필드(와 하트비트가 된 필드)만
+        "readingTimes": {"humidity": 1700000000.0}
+    }
+순서: 메시지는 seq 순서대로 발행됩니다. 연결이 끊긴 동안 스풀(modules/spool.py)에 쌓인
+센서 메시지가 남아 있으면 실시간 메시지도 그 뒤에 붙으므로, 재연결 후에도 오래된 seq가
+새 seq보다 늦게 도착하지 않습니다 (mqtt_client.send_sensor_data()).
+스풀 전송은 at-least-once라 같은 메시지가 두 번 올 수 있으므로, 서버는 이미 받은 seq
+이하의 메시지는 버려야 합니다. seq가 건너뛰면 메시지가 빠진 것이므로(스풀이 가득 차 버려짐 등)
+다음 하트비트(max_silence초 이내)까지 해당 기기의 값을 확정하지 않으면 됩니다.
+seq가 1이면 재시작 후 첫 메시지이며 전체 값이 담겨 있습니다.
+
+sensor 토픽 인코딩으로 struct는 쓸 수 없습니다 (빠진 필드가 None으로 복원됨, mqtt_client._supported()).
+"""
+
+import threading
+import time
+
+from config import DEADBANDS, REPORT_MAX_SILENCE
+from modules import metrics
+from modules.snapshot import INSTANCE_SEP, split_field
+
+# 변화 여부와 상관없이 보낼 때마다 붙는 필드
+META_FIELDS = ('timestamp', 'readingTimes', 'skew', 'coherent')
+
+# 비교하지 않는 dict 안의 키 (값은 함께 보냄)
+VOLATILE_KEYS = ('retryIn',)
+
+
+class ExceptionReporter:
+    """
+    불감대를 벗어난 필드만 골라 보내는 전송기
+    
+    사용 예:
+        reporter = ExceptionReporter()
+        message = reporter.build(get_all_sensor_data())
+        if message is not None and mqtt.send_sensor_data(message):
+            reporter.commit(message)     # 보낸 값만 마지막 값으로 기억
+    """
+    
+    def __init__(self, deadbands=DEADBANDS, max_silence=REPORT_MAX_SILENCE):
+        """
+        Args:
+            deadbands (dict): {필드: {'abs': 절대 불감대, 'rel': 상대 불감대(비율)}}
+            max_silence (float): 바뀌지 않아도 이 시간(초)마다 한 번은 보냄 (하트비트)
+        """
+        self.deadbands = deadbands
+        self.max_silence = max_silence
+        
+        self.seq = 0          # 마지막으로 보낸 메시지 번호
+        self._last = {}       # {필드: 마지막으로 보낸 값}
+        self._sent_at = {}    # {필드: 마지막으로 보낸 시각 (monotonic)}
+        self._lock = threading.Lock()
+        
+        self._messages = metrics.counter('report.messages')
+        self._skipped = metrics.counter('report.skipped')
+        self._fields_sent = metrics.counter('report.fields_sent')
+        self._fields_suppressed = metrics.counter('report.fields_suppressed')
+    
+    
+    # ==================== 변화 판단 ====================
+    
+    def _band(self, field):
+        """필드의 (abs, rel) 불감대 (인스턴스 필드는 뒤쪽 이름 기준)"""
+        band = self.deadbands.get(field)
+        if band is None and INSTANCE_SEP in field:
+            band = self.deadbands.get(field.rsplit(INSTANCE_SEP, 1)[1])
+        if band is None:
+            return 0.0, 0.0
+        return band.get('abs', 0.0), band.get('rel', 0.0)
+    
+    
+    def _changed(self, field, old, new):
+        """
+        마지막으로 보낸 값(old)에서 불감대를 벗어났는지
+        """
+        if isinstance(old, dict) and isinstance(new, dict):
+            keys = (set(old) | set(new)) - set(VOLATILE_KEYS)
+            return any(self._changed(key, old.get(key), new.get(key)) for key in keys)
+        
+        numeric = (int, float)
+        if (isinstance(old, numeric) and isinstance(new, numeric)
+                and not isinstance(old, bool) and not isinstance(new, bool)):
+            absolute, relative = self._band(field)
+            return abs(new - old) > max(absolute, relative * abs(old))
+        
+        return old != new
+    
+    
+    # ==================== 메시지 ====================
+    
+    def build(self, sample, now=None):
+        """
+        보낼 메시지 만들기 (상태는 commit()에서 바뀜)
+        
+        Args:
+            sample (dict): get_all_sensor_data() 형식
+            now (float): 현재 시각 (monotonic, 테스트용)
+        
+        Returns:
+            dict: 바뀐 필드 + seq + 메타 필드, 보낼 필드가 없으면 None
+        """
+        now = time.monotonic() if now is None else now
+        
+        with self._lock:
+            fields = {}
+            for field, value in sample.items():
+                if field in META_FIELDS:
+                    continue
+                
+                if field not in self._last:
+                    due = True
+                else:
+                    sent_at = self._sent_at[field]
+                    due = (now - sent_at >= self.max_silence
+                           or self._changed(field, self._last[field], value))
+                if due:
+                    fields[field] = value
+            
+            # 없어진 필드는 한 번 None으로 알림
+            for field, value in self._last.items():
+                if field not in sample and value is not None:
+                    fields[field] = None
+            
+            suppressed = sum(1 for f in sample if f not in META_FIELDS and f not in fields)
+            self._fields_suppressed.inc(suppressed)
+            if not fields:
+                self._skipped.inc()
+                return None
+            
+            message = {'seq': self.seq + 1, **fields}
+        
+        for field in META_FIELDS:
+            if field not in sample:
+                continue
+            if field == 'readingTimes':
+                # 인스턴스 값의 시각은 'bed2.temperature'처럼 평평한 키 (보내는 instances에 있으면 유지)
+                instances = fields.get('instances') or {}
+                message[field] = {
+                    k: v for k, v in sample[field].items()
+                    if k in fields or split_field(k)[0] in instances
+                }
+            else:
+                message[field] = sample[field]
+        return message
+    
+    
+    def commit(self, message, now=None):
+        """
+        보낸 메시지의 값을 마지막으로 보낸 값으로 기억
+        
+        전송에 실패한 메시지는 commit하지 않으면 다음 build()에서 다시 나옵니다.
+        """
+        now = time.monotonic() if now is None else now
+        
+        with self._lock:
+            self.seq = max(self.seq, message['seq'])
+            count = 0
+            for field, value in message.items():
+                if field == 'seq' or field in META_FIELDS:
+                    continue
+                self._last[field] = value
+                self._sent_at[field] = now
+                count += 1
+        
+        self._messages.inc()
+        self._fields_sent.inc(count)
+    
+    
+    def reset(self):
+        """기억한 값을 모두 잊음 (다음 메시지에 전체 값을 보냄)"""
+        with self._lock:
+            self._last.clear()
+            self._sent_at.clear()
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    import random
+    
+    print("=== 변화 보고 테스트 ===\n")
+    
+    reporter = ExceptionReporter(
+        deadbands={'temperature': {'abs': 0.3}, 'humidity': {'abs': 1.0}, 'ec': {'abs': 0.05},
+                   'light': {'abs': 10, 'rel': 0.05}},
+        max_silence=300
+    )
+    
+    random.seed(1)
+    temperature = 24.0
+    sent_messages = 0
+    sent_fields = 0
+    samples = 0
+    for step in range(720):   # 5초 간격 1시간
+        now = step * 5.0
+        temperature += random.gauss(0, 0.02)
+        bed2 = round(temperature - 1.5 + (0.5 if step >= 600 else 0.0), 1)
+        sample = {
+            'temperature': round(temperature, 1),
+            'humidity': round(61 + random.gauss(0, 0.2), 1),
+            'ec': round(1.6 + random.gauss(0, 0.005), 2),
+            'light': 0 if step < 360 else 800 + random.randint(-10, 10),
+            'instances': {'bed2': {'temperature': bed2}},
+            'timestamp': 1700000000 + now,
+            'readingTimes': {'temperature': 1700000000 + now - 0.2, 'bed2.temperature': 1700000000 + now - 0.1},
+            'health': {'htu21d': 'ok', 'co2': 'open' if 100 <= step < 110 else 'ok'}
+        }
+        if step == 100:
+            sample['faults'] = {'co2': {'error': 'timeout', 'failures': 3, 'retryIn': 4.8}}
+        samples += 1
+        message = reporter.build(sample, now=now)
+        if message is None:
+            continue
+        reporter.commit(message, now=now)
+        sent_messages += 1
+        sent_fields += len(message) - 3
+        if step == 600:
+            # 인스턴스 값이 바뀌면 그 캡처 시각도 함께 나가야 함
+            ok = 'instances' in message and 'bed2.temperature' in message['readingTimes']
+            print(f"  {now:6.0f}s 인스턴스 변화: {message['instances']}, "
+                  f"시각 {'✓' if ok else '✗'} {message['readingTimes']}")
+        if message['seq'] <= 8:
+            fields = {k: v for k, v in message.items() if k not in ('seq', 'timestamp', 'readingTimes')}
+            print(f"  {now:6.0f}s seq={message['seq']}: {fields}")
+    
+    print(f"\n샘플 {samples}개 → 메시지 {sent_messages}개, 필드 {samples * 6}개 → {sent_fields}개")
\ No newline at end of file
@@ -0,0 +1,491 @@
+"""
+파생 지표 모듈 - VPD, 이슬점, 절대습도, DLI를 기기에서 바로 계산
+
+서버가 원시값(온도, 습도, 조도)의 전체 이력을 받아 다시 계산하지 않도록
+센서 값이 들어올 때마다 조금씩(incremental) 계산해 둡니다.
+
+- VPD / 이슬점 / 절대습도: 같은 센서(인스턴스)의 최신 온도와 습도로 계산
+- PPFD: 조도(lux) × LUX_TO_PPFD (광원에 따라 계수가 다름)
+- DLI: PPFD를 시간에 대해 적분한 값 (mol/m²/일), 현지 시각 자정에 0으로 초기화
+  샘플 간격이 DLI_MAX_GAP보다 길면 그 구간은 적분하지 않고, 적분한 비율을 coverage로 남김
+
+스케줄러 리스너로 등록하면 센서 작업이 끝날 때마다 update()가 호출되고,
+get_readings()의 값이 센서 payload에 함께 실립니다 ('vpd', 'dewPoint', 'absoluteHumidity',
+'ppfd', 'dli', 인스턴스가 있으면 'bed2.vpd' 등).
+하루가 끝나면 필드별 최소/최대/평균과 DLI를 담은 일별 요약(rollup)을 만들어
+pending_rollups()로 내보냅니다 (MQTT_TOPIC_DAILY로 발행).
+
+오늘의 DLI 적분과 일별 통계는 DERIVED_STATE_FILE에 저장되어 재시작해도 이어집니다.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+from config import LUX_TO_PPFD, DLI_MAX_GAP, DERIVED_STATE_FILE, DERIVED_SAVE_INTERVAL
+from modules.snapshot import Reading, INSTANCE_SEP
+
+# 일별 요약에 최소/최대/평균을 남길 필드
+STATS_FIELDS = ('temperature', 'humidity', 'vpd', 'dewPoint', 'absoluteHumidity', 'ppfd')
+
+# 물의 기체 상수 (J/(kg·K))
+_RV = 461.5
+
+
+# ==================== 계산식 ====================
+
+def saturation_vapor_pressure(temperature):
+    """
+    포화 수증기압 (Tetens 식, FAO-56)
+    
+    Args:
+        temperature (float): 기온 (°C)
+    
+    Returns:
+        float: 포화 수증기압 (kPa)
+    """
+    return 0.6108 * math.exp(17.27 * temperature / (temperature + 237.3))
+
+
+def vapor_pressure_deficit(temperature, humidity):
+    """
+    포차 (VPD)
+    
+    Args:
+        temperature (float): 기온 (°C)
+        humidity (float): 상대습도 (%)
+    
+    Returns:
+        float: VPD (kPa)
+    """
+    humidity = min(max(humidity, 0.0), 100.0)
+    return saturation_vapor_pressure(temperature) * (1.0 - humidity / 100.0)
+
+
+def dew_point(temperature, humidity):
+    """
+    이슬점 (Magnus 식, b=17.62, c=243.12)
+    
+    Args:
+        temperature (float): 기온 (°C)
+        humidity (float): 상대습도 (%), 0이면 0.1%로 계산
+    
+    Returns:
+        float: 이슬점 (°C)
+    """
+    humidity = min(max(humidity, 0.1), 100.0)
+    gamma = math.log(humidity / 100.0) + 17.62 * temperature / (243.12 + temperature)
+    return 243.12 * gamma / (17.62 - gamma)
+
+
+def absolute_humidity(temperature, humidity):
+    """
+    절대습도 (공기 1m³ 안의 수증기 질량)
+    
+    Args:
+        temperature (float): 기온 (°C)
+        humidity (float): 상대습도 (%)
+    
+    Returns:
+        float: 절대습도 (g/m³)
+    """
+    humidity = min(max(humidity, 0.0), 100.0)
+    vapor_pressure = saturation_vapor_pressure(temperature) * 1000.0 * humidity / 100.0  # Pa
+    return vapor_pressure / (_RV * (temperature + 273.15)) * 1000.0
+
+
+def _next_midnight(day):
+    """day 다음 날 현지 시각 자정 (Unix timestamp)"""
+    return datetime.combine(day + timedelta(days=1), dtime()).timestamp()
+
+
+def _split(field):
+    """'bed2.temperature' → ('bed2.', 'temperature'), 'temperature' → ('', 'temperature')"""
+    prefix, sep, name = field.rpartition(INSTANCE_SEP)
+    return (prefix + sep, name)
+
+
+# ==================== DLI 적분 ====================
+
+class DailyLightIntegral:
+    """
+    PPFD 샘플을 사다리꼴로 적분하는 하루치 DLI
+    
+    날짜 전환은 DerivedMetrics가 close()로 처리합니다.
+    """
+    
+    def __init__(self, max_gap=DLI_MAX_GAP):
+        """
+        Args:
+            max_gap (float): 이보다 긴 샘플 간격은 적분하지 않음 (초)
+        """
+        self.max_gap = max_gap
+        self.total = 0.0      # 오늘 적분값 (µmol/m²)
+        self.covered = 0.0    # 적분한 시간 (초)
+        self.last = None      # 마지막 샘플 (wall, ppfd)
+    
+    
+    def add(self, wall, ppfd):
+        """
+        PPFD 샘플 하나 추가 (시각이 이전 샘플보다 앞서면 무시)
+        """
+        if self.last is not None:
+            last_wall, last_ppfd = self.last
+            dt = wall - last_wall
+            if dt <= 0:
+                return
+            if dt <= self.max_gap:
+                self.total += (last_ppfd + ppfd) / 2.0 * dt
+                self.covered += dt
+        self.last = (wall, ppfd)
+    
+    
+    def close(self, midnight):
+        """
+        자정까지 마지막 값으로 적분하고 하루를 마감
+        
+        Returns:
+            tuple: (DLI (mol/m²/일), 적분한 시간 (초))
+        """
+        if self.last is not None:
+            last_wall, last_ppfd = self.last
+            dt = midnight - last_wall
+            if 0 < dt <= self.max_gap:
+                self.total += last_ppfd * dt
+                self.covered += dt
+            # 다음 날은 자정의 값에서 시작
+            if last_wall < midnight:
+                self.last = (midnight, last_ppfd)
+        
+        result = (self.mol(), self.covered)
+        self.total = 0.0
+        self.covered = 0.0
+        return result
+    
+    
+    def mol(self):
+        """지금까지의 DLI (mol/m²)"""
+        return self.total / 1e6
+    
+    
+    def to_state(self):
+        return {'total': self.total, 'covered': self.covered, 'last': self.last}
+    
+    
+    def load_state(self, state):
+        self.total = state.get('total', 0.0)
+        self.covered = state.get('covered', 0.0)
+        last = state.get('last')
+        self.last = tuple(last) if last else None
+
+
+# ==================== 파생 지표 ====================
+
+class DerivedMetrics:
+    """
+    센서 값으로 파생 지표를 계속 갱신
+    
+    사용 예:
+        derived = DerivedMetrics()
+        scheduler.add_listener(derived.update)
+        ...
+        for field, reading in derived.get_readings().items():
+            snapshot.add_reading(field, reading)
+    """
+    
+    def __init__(self, lux_to_ppfd=LUX_TO_PPFD, max_gap=DLI_MAX_GAP,
+                 state_file=DERIVED_STATE_FILE, save_interval=DERIVED_SAVE_INTERVAL):
+        """
+        Args:
+            lux_to_ppfd (float): lux → PPFD (µmol/m²/s) 환산 계수
+            max_gap (float): DLI 적분에서 허용할 최대 샘플 간격 (초)
+            state_file (str, optional): 오늘 적분/통계 저장 파일, None이면 저장 안 함
+            save_interval (float): 저장 최소 간격 (초)
+        """
+        self.lux_to_ppfd = lux_to_ppfd
+        self.max_gap = max_gap
+        self.state_file = state_file
+        self.save_interval = save_interval
+        
+        self.day = date.today()     # 통계/적분 중인 날짜 (현지 시각)
+        self._inputs = {}           # {접두어: {'temperature': Reading, 'humidity': Reading}}
+        self._values = {}           # {파생 필드: Reading}
+        self._dli = {}              # {접두어: DailyLightIntegral}
+        self._stats = {}            # {필드: [개수, 합, 최소, 최대]}
+        self._rollups = []          # 아직 발행하지 못한 일별 요약
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 파일 쓰기는 한 번에 하나씩 (같은 .tmp를 씀)
+        self._saved = time.monotonic()
+        
+        self.load()
+    
+    
+    # ==================== 갱신 ====================
+    
+    def update(self, readings):
+        """
+        새 센서 값 반영 (스케줄러 리스너)
+        
+        Args:
+            readings (dict): {필드: Reading} 한 센서 작업의 결과
+        """
+        with self._lock:
+            changed = set()
+            
+            for field, reading in readings.items():
+                if reading.value is None:
+                    continue
+                
+                self._advance(reading.wall)
+                prefix, name = _split(field)
+                
+                if name in ('temperature', 'humidity'):
+                    self._inputs.setdefault(prefix, {})[name] = reading
+                    self._record(field, reading.value)
+                    changed.add(prefix)
+                elif name == 'light':
+                    self._add_light(prefix, reading)
+            
+            for prefix in changed:
+                self._compute_air(prefix)
+            
+            # 여러 워커가 동시에 저장하지 않게 락 안에서 이번 저장을 차지
+            save = self.state_file and time.monotonic() - self._saved >= self.save_interval
+            if save:
+                self._saved = time.monotonic()
+        
+        if save:
+            self.save()
+    
+    
+    def _compute_air(self, prefix):
+        """
+        접두어(인스턴스)의 최신 온도/습도로 VPD, 이슬점, 절대습도 계산 (락 안에서 호출)
+        """
+        inputs = self._inputs.get(prefix, {})
+        temperature = inputs.get('temperature')
+        humidity = inputs.get('humidity')
+        if temperature is None or humidity is None:
+            return
+        
+        t = temperature.value
+        rh = humidity.value
+        monotonic = max(temperature.monotonic, humidity.monotonic)
+        wall = max(temperature.wall, humidity.wall)
+        
+        for name, value in (('vpd', round(vapor_pressure_deficit(t, rh), 3)),
+                            ('dewPoint', round(dew_point(t, rh), 1)),
+                            ('absoluteHumidity', round(absolute_humidity(t, rh), 2))):
+            self._values[prefix + name] = Reading(value, monotonic=monotonic, wall=wall)
+            self._record(prefix + name, value)
+    
+    
+    def _add_light(self, prefix, reading):
+        """
+        조도 샘플로 PPFD 계산 후 DLI 적분 (락 안에서 호출)
+        """
+        ppfd = max(reading.value, 0) * self.lux_to_ppfd
+        
+        integral = self._dli.get(prefix)
+        if integral is None:
+            integral = self._dli[prefix] = DailyLightIntegral(self.max_gap)
+        integral.add(reading.wall, ppfd)
+        
+        self._values[prefix + 'ppfd'] = Reading(round(ppfd, 1), monotonic=reading.monotonic, wall=reading.wall)
+        self._values[prefix + 'dli'] = Reading(round(integral.mol(), 3), monotonic=reading.monotonic, wall=reading.wall)
+        self._record(prefix + 'ppfd', ppfd)
+    
+    
+    def _record(self, field, value):
+        """일별 통계에 값 하나 추가 (락 안에서 호출)"""
+        if _split(field)[1] not in STATS_FIELDS:
+            return
+        
+        stats = self._stats.get(field)
+        if stats is None:
+            self._stats[field] = [1, value, value, value]
+        else:
+            stats[0] += 1
+            stats[1] += value
+            if value < stats[2]:
+                stats[2] = value
+            if value > stats[3]:
+                stats[3] = value
+    
+    
+    def _advance(self, wall):
+        """
+        wall이 새 날짜면 지난 날(들)을 마감해 일별 요약을 만듦 (락 안에서 호출)
+        """
+        day = datetime.fromtimestamp(wall).date()
+        if day <= self.day:
+            return
+        
+        while self.day < day:
+            midnight = _next_midnight(self.day)
+            day_length = midnight - datetime.combine(self.day, dtime()).timestamp()
+            
+            rollup = {
+                'date': self.day.isoformat(),
+                'stats': {
+                    field: {
+                        'min': round(low, 3),
+                        'max': round(high, 3),
+                        'mean': round(total / n, 3),
+                        'n': n
+                    }
+                    for field, (n, total, low, high) in sorted(self._stats.items())
+                },
+                'dli': {},
+                'lightCoverage': {}
+            }
+            for prefix, integral in sorted(self._dli.items()):
+                mol, covered = integral.close(midnight)
+                rollup['dli'][prefix + 'dli'] = round(mol, 3)
+                rollup['lightCoverage'][prefix + 'dli'] = round(min(covered / day_length, 1.0), 3)
+                self._values[prefix + 'dli'] = Reading(0.0, wall=midnight)
+            
+            if rollup['stats'] or rollup['dli']:
+                self._rollups.append(rollup)
+                print(f"✓ 일별 요약 생성: {rollup['date']} (DLI {rollup['dli']})")
+            
+            self._stats = {}
+            self.day += timedelta(days=1)
+        
+        # 요약은 바로 저장 (발행 전에 재시작해도 잃지 않게)
+        self._saved = -math.inf
+    
+    
+    # ==================== 조회 ====================
+    
+    def get_readings(self):
+        """
+        최신 파생 값 (자정이 지났으면 먼저 하루를 마감)
+        
+        Returns:
+            dict: {필드: Reading} 예: {'vpd': Reading(0.92), 'dli': Reading(8.41), 'bed2.vpd': ...}
+        """
+        with self._lock:
+            self._advance(time.time())
+            return dict(self._values)
+    
+    
+    def pending_rollups(self):
+        """
+        아직 발행하지 못한 일별 요약 (오래된 것부터)
+        
+        Returns:
+            list: [{'date', 'stats', 'dli', 'lightCoverage'}, ...]
+        """
+        with self._lock:
+            return list(self._rollups)
+    
+    
+    def ack_rollup(self, rollup):
+        """
+        발행한 일별 요약 제거
+        """
+        with self._lock:
+            if rollup in self._rollups:
+                self._rollups.remove(rollup)
+        self.save()
+    
+    
+    # ==================== 저장 ====================
+    
+    def save(self):
+        """
+        오늘 적분/통계와 발행 대기 요약을 파일에 저장 (state_file이 없으면 무시)
+        
+        임시 파일에 쓴 뒤 교체하므로 저장 중 전원이 나가도 기존 파일이 깨지지 않습니다.
+        여러 스레드(스케줄러 워커, sensor_loop, 종료 처리)에서 불려도 저장은 차례로 합니다.
+        """
+        if not self.state_file:
+            return
+        
+        with self._save_lock:
+            # 상태는 저장 락 안에서 읽어야 늦게 읽은 상태가 먼저 쓰여 덮이지 않음
+            with self._lock:
+                data = {
+                    'day': self.day.isoformat(),
+                    'dli': {prefix: integral.to_state() for prefix, integral in self._dli.items()},
+                    'stats': self._stats,
+                    'rollups': self._rollups
+                }
+                text = json.dumps(data)
+                self._saved = time.monotonic()
+            
+            tmp_path = self.state_file + ".tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.state_file)
+            except Exception as e:
+                print(f"⚠ 파생 지표 상태 저장 실패 ({self.state_file}): {e}")
+    
+    
+    def load(self):
+        """
+        저장된 상태 읽기
+        
+        저장된 날짜가 지났으면 그 날을 마감해 일별 요약으로 남깁니다.
+        파일이 없거나 깨졌으면 빈 상태로 시작합니다.
+        """
+        if not self.state_file:
+            return
+        
+        try:
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠ 파생 지표 상태 읽기 실패 ({self.state_file}): {e}")
+            return
+        
+        with self._lock:
+            self.day = date.fromisoformat(data['day'])
+            for prefix, state in data.get('dli', {}).items():
+                integral = self._dli[prefix] = DailyLightIntegral(self.max_gap)
+                integral.load_state(state)
+            self._stats = {field: list(stats) for field, stats in data.get('stats', {}).items()}
+            self._rollups = list(data.get('rollups', []))
+            self._advance(time.time())
+        
+        dli = {prefix + 'dli': round(integral.mol(), 3) for prefix, integral in self._dli.items()}
+        print(f"✓ 파생 지표 상태 로드: {self.day} (DLI {dli}, 발행 대기 요약 {len(self._rollups)}개)")
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    print("=== 파생 지표 테스트 ===\n")
+    
+    for t, rh in ((20.0, 80.0), (25.0, 60.0), (30.0, 50.0)):
+        print(f"  {t}°C {rh}%: VPD {vapor_pressure_deficit(t, rh):.3f} kPa, "
+              f"이슬점 {dew_point(t, rh):.1f}°C, 절대습도 {absolute_humidity(t, rh):.2f} g/m³")
+    
+    # 어제 06시부터 1분 간격 조도 샘플 (정오에 최대 1000 lux인 반원 모양) → 자정이 지나면 요약
+    derived = DerivedMetrics(state_file=None)
+    start = datetime.combine(date.today() - timedelta(days=1), dtime(6)).timestamp()
+    derived.day = date.today() - timedelta(days=1)
+    
+    for minute in range(0, 19 * 60, 1):
+        wall = start + minute * 60
+        hours = minute / 60.0
+        lux = 1000.0 * math.sin(math.pi * hours / 12.0) if hours < 12 else 0.0
+        derived.update({
+            'light': Reading.from_wall(lux, wall),
+            'temperature': Reading.from_wall(22.0 + 4.0 * math.sin(math.pi * hours / 12.0), wall),
+            'humidity': Reading.from_wall(70.0, wall)
+        })
+    
+    expected = 1000.0 * LUX_TO_PPFD * 12 * 3600 * 2 / math.pi / 1e6
+    print(f"\n해석해 DLI: {expected:.3f} mol/m²")
+    for rollup in derived.pending_rollups():
+        print(f"일별 요약: {json.dumps(rollup, ensure_ascii=False)}")
+    print(f"오늘 값: {derived.get_readings()}")
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+성능 지표 모듈 - 카운터와 고정 구간 지연 히스토그램
+
+센서 읽기, MQTT 발행, 명령 처리, 재연결 같은 자주 지나가는 경로에서
+값 하나를 더하는 정도의 비용으로 횟수와 지연 시간을 모읍니다.
+히스토그램은 고정된 구간(LATENCY_BUCKETS)별 개수만 세므로 메모리가 늘지 않습니다.
+
+summary()로 만든 요약은 METRICS_INTERVAL마다 farm/{DEVICE_ID}/metrics 토픽으로
+발행되어, 서버에서 어느 Pi의 I2C 버스가 느린지, MQTT 발행이 밀리는지 볼 수 있습니다.
+
+사용 예:
+    from modules import metrics
+    
+    start = time.perf_counter()
+    read_sensor()
+    metrics.observe('sensor.htu21d', time.perf_counter() - start)
+    metrics.inc('sensor.htu21d.errors')
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+# 지연 히스토그램 구간 상한 (ms, 1-2-3-5-7 간격). 마지막 구간 뒤에 상한 없는 구간이 하나 더 있음
+LATENCY_BUCKETS = (
+    0.1, 0.2, 0.3, 0.5, 0.7,
+    1, 2, 3, 5, 7,
+    10, 20, 30, 50, 70,
+    100, 200, 300, 500, 700,
+    1000, 2000, 5000
+)
+
+
+class Counter:
+    """
+    증가만 하는 카운터
+    """
+    
+    __slots__ = ('value', '_lock')
+    
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+
+class Histogram:
+    """
+    고정 구간 지연 히스토그램
+    
+    구간별 개수, 합계, 최댓값만 보관합니다.
+    백분위수는 구간 경계로 추정합니다 (해당 구간의 상한).
+    """
+    
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'max', '_lock')
+    
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        """
+        Args:
+            bounds (tuple): 구간 상한 (ms, 오름차순)
+        """
+        self.bounds = tuple(bounds)
+        self._lock = threading.Lock()
+        self.reset()
+    
+    
+    def reset(self):
+        """모든 구간 비우기"""
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    
+    def observe(self, seconds):
+        """
+        지연 시간 하나 기록
+        
+        Args:
+            seconds (float): 걸린 시간 (초)
+        """
+        ms = seconds * 1000.0
+        index = bisect_left(self.bounds, ms)
+        
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += ms
+            if ms > self.max:
+                self.max = ms
+    
+    
+    def percentile(self, p, counts=None, count=None, maximum=None):
+        """
+        백분위수 추정 (ms)
+        
+        Args:
+            p (float): 0~100
+        
+        Returns:
+            float: p% 지점이 들어가는 구간의 상한 (실제 최댓값을 넘지 않음), 기록이 없으면 None
+        """
+        counts = self.counts if counts is None else counts
+        count = self.count if count is None else count
+        maximum = self.max if maximum is None else maximum
+        if not count:
+            return None
+        
+        target = count * p / 100.0
+        seen = 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= target and n:
+                # 구간 상한이 실제 최댓값보다 크면 최댓값 (예: 모두 0.3ms인데 p99 = 0.5ms가 되지 않게)
+                return min(self.bounds[index], maximum) if index < len(self.bounds) else maximum
+        return maximum
+    
+    
+    def summary(self, reset=False):
+        """
+        요약 (발행용)
+        
+        Args:
+            reset (bool): 요약 후 비울지 여부 (구간별 통계를 발행 주기 단위로 볼 때)
+        
+        Returns:
+            dict: {'n', 'sum', 'max', 'p50', 'p90', 'p99', 'counts'}
+                  counts는 뒤쪽의 0을 잘라낸 구간별 개수
+        """
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            total = self.total
+            maximum = self.max
+            if reset:
+                self.reset()
+        
+        while counts and not counts[-1]:
+            counts.pop()
+        
+        return {
+            'n': count,
+            'sum': round(total, 3),
+            'max': round(maximum, 3),
+            'p50': self.percentile(50, counts, count, maximum),
+            'p90': self.percentile(90, counts, count, maximum),
+            'p99': self.percentile(99, counts, count, maximum),
+            'counts': counts
+        }
+
+
+# ==================== 전역 레지스트리 ====================
+
+_counters = {}
+_histograms = {}
+_gauges = {}
+_lock = threading.Lock()
+_started = time.time()
+_last_summary = time.monotonic()
+
+
+def counter(name):
+    """
+    이름으로 카운터 조회 (없으면 생성)
+    
+    Returns:
+        Counter: 카운터
+    """
+    c = _counters.get(name)
+    if c is None:
+        with _lock:
+            c = _counters.setdefault(name, Counter())
+    return c
+
+
+def histogram(name, bounds=LATENCY_BUCKETS):
+    """
+    이름으로 히스토그램 조회 (없으면 생성)
+    
+    Returns:
+        Histogram: 히스토그램
+    """
+    h = _histograms.get(name)
+    if h is None:
+        with _lock:
+            h = _histograms.setdefault(name, Histogram(bounds))
+    return h
+
+
+def inc(name, n=1):
+    """카운터 증가"""
+    counter(name).inc(n)
+
+
+def observe(name, seconds):
+    """지연 시간 기록 (초)"""
+    histogram(name).observe(seconds)
+
+
+def gauge(name, func):
+    """
+    요약할 때마다 값을 읽어 갈 함수 등록 (예: 대기 중인 메시지 수)
+    
+    Args:
+        name (str): 이름
+        func (callable): 인자 없이 현재 값을 돌려주는 함수
+    """
+    with _lock:
+        _gauges[name] = func
+
+
+def summary(reset=True):
+    """
+    모든 지표 요약
+    
+    카운터는 시작 후 누적값, 히스토그램은 지난 요약 이후 구간(window)의 값입니다.
+    
+    Args:
+        reset (bool): 히스토그램을 비울지 여부
+    
+    Returns:
+        dict: {
+            'uptime': float,      # 시작 후 경과 시간 (초)
+            'window': float,      # 히스토그램 집계 구간 (초)
+            'buckets': list,      # 히스토그램 구간 상한 (ms)
+            'counters': dict,     # {이름: 누적 횟수}
+            'gauges': dict,       # {이름: 현재 값}
+            'histograms': dict    # {이름: Histogram.summary()}
+        }
+    """
+    global _last_summary
+    
+    now = time.monotonic()
+    with _lock:
+        counters = dict(_counters)
+        histograms = dict(_histograms)
+        gauges = dict(_gauges)
+        window = now - _last_summary
+        if reset:
+            _last_summary = now
+    
+    gauge_values = {}
+    for name, func in gauges.items():
+        try:
+            gauge_values[name] = func()
+        except Exception:
+            gauge_values[name] = None
+    
+    return {
+        'uptime': round(time.time() - _started, 1),
+        'window': round(window, 1),
+        'buckets': list(LATENCY_BUCKETS),
+        'counters': {name: c.value for name, c in sorted(counters.items())},
+        'gauges': gauge_values,
+        'histograms': {name: h.summary(reset) for name, h in sorted(histograms.items())}
+    }
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    import json
+    import random
+    
+    print("=== 성능 지표 테스트 ===\n")
+    
+    for _ in range(1000):
+        observe('sensor.htu21d', random.gauss(0.068, 0.002))
+        observe('mqtt.publish', random.expovariate(1 / 0.0002))
+    inc('sensor.htu21d.errors', 3)
+    gauge('mqtt.pending', lambda: 0)
+    
+    # 기록 비용
+    start = time.perf_counter()
+    for _ in range(100000):
+        observe('bench', 0.001)
+    print(f"observe() 비용: {(time.perf_counter() - start) / 100000 * 1e6:.2f}us")
+    
+    start = time.perf_counter()
+    for _ in range(100000):
+        inc('bench.count')
+    print(f"inc() 비용: {(time.perf_counter() - start) / 100000 * 1e6:.2f}us\n")
+    
+    data = summary()
+    print(json.dumps(data['histograms']['sensor.htu21d']))
+    print(f"요약 크기: {len(json.dumps(data))} bytes")
\ No newline at end of file
@@ -2,40 +2,65 @@
 MQTT 클라이언트 모듈 - 센서 데이터 전송 및 제어 명령 수신
 """
 import json
+import threading
 import time
 import paho.mqtt.client as mqtt
 from paho.mqtt.client import CallbackAPIVersion
 from config import *
+from modules import codec
+from modules import metrics
+from modules.spool import Spool
 
 # 전역 변수
 client = None
 is_connected = False
 command_callback = None
 
+# 발행 후 on_publish를 기다리는 메시지 {mid: 발행 시각} (클라이언트가 밀리는지 보는 지표)
+_pending = {}
+_pending_early = set()   # publish()가 mid를 돌려주기 전에 on_publish가 먼저 온 mid
+_pending_lock = threading.Lock()
+_PENDING_MAX = 10000
+_disconnected_at = None  # 연결이 끊긴 시각 (재연결 시간 측정용)
+
+# 보내지 못한 메시지를 쌓아 두는 디스크 스풀 (open_spool()로 열기)
+spool = None
+
+# 토픽 종류별 payload 인코딩 (set_encoding() 또는 서버의 encoding 명령으로 변경)
+encodings = {}
+
+metrics.gauge('mqtt.pending', lambda: len(_pending))
+
 # ==================== MQTT 이벤트 핸들러 ====================
 
 def on_connect(client, userdata, flags, rc, properties=None):
     """브로커 연결 시 호출"""
-    global is_connected
+    global is_connected, _disconnected_at
     
     if rc == 0:
         is_connected = True
+        metrics.inc('mqtt.connects')
+        if _disconnected_at is not None:
+            metrics.observe('mqtt.reconnect', time.monotonic() - _disconnected_at)
+            _disconnected_at = None
         print(f"✓ MQTT 브로커 연결 성공: {MQTT_BROKER}:{MQTT_PORT}")
         
         # 제어 명령 토픽 구독
         client.subscribe(MQTT_TOPIC_CONTROL)
         print(f"✓ 토픽 구독: {MQTT_TOPIC_CONTROL}")
         
-        # 연결 알림 전송
+        # 연결 알림 전송 (서버가 인코딩을 고를 수 있게 지원 목록도 함께)
         status = {
             "deviceId": DEVICE_ID,
             "status": "online",
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "encodings": get_encodings()
         }
         client.publish(MQTT_TOPIC_STATUS, json.dumps(status), qos=1)
-        
+    
     else:
         is_connected = False
+        metrics.inc('mqtt.connect_failures')
         print(f"✗ MQTT 연결 실패 (코드: {rc})")
         error_messages = {
             1: "잘못된 프로토콜 버전",
@@ -47,14 +72,16 @@ def on_connect(client, userdata, flags, rc, properties=None):
         print(f"  원인: {error_messages.get(rc, '알 수 없는 오류')}")
 
 
-def on_disconnect(client, userdata, rc, properties=None):
+def on_disconnect(client, userdata, flags, rc, properties=None):
     """브로커 연결 끊김 시 호출"""
-    global is_connected
+    global is_connected, _disconnected_at
     is_connected = False
     
     if rc == 0:
         print("✓ MQTT 브로커 정상 연결 해제")
     else:
+        metrics.inc('mqtt.disconnects')
+        _disconnected_at = time.monotonic()
         print(f"✗ MQTT 연결 끊김 (코드: {rc})")
         print("  재연결 시도 중...")
 
@@ -70,16 +97,31 @@ def on_message(client, userdata, msg):
         
         # 명령 콜백 실행
         if command_callback and topic == MQTT_TOPIC_CONTROL:
+            metrics.inc('command.received')
+            start = time.perf_counter()
             command_callback(payload)
-            
+            metrics.observe('command', time.perf_counter() - start)
+    
     except json.JSONDecodeError as e:
+        metrics.inc('command.errors')
         print(f"✗ JSON 파싱 오류: {e}")
     except Exception as e:
+        metrics.inc('command.errors')
         print(f"✗ 메시지 처리 오류: {e}")
 
 
 def on_publish(client, userdata, mid, rc=None, properties=None):
     """메시지 발행 완료 시 호출"""
+    now = time.perf_counter()
+    with _pending_lock:
+        start = _pending.pop(mid, None)
+        if start is None:
+            _pending_early.add(mid)
+    
+    if start is not None:
+        # publish() 호출부터 소켓에 쓰기(QoS 0) / PUBACK(QoS 1)까지
+        metrics.observe('mqtt.delivery', now - start)
+    
     if DEBUG:
         print(f"  → 메시지 발행 완료 (ID: {mid})")
 
@@ -134,7 +176,7 @@ def connect_to_broker():
             time.sleep(0.1)
         
         return is_connected
-        
+    
     except Exception as e:
         print(f"✗ MQTT 연결 오류: {e}")
         return False
@@ -159,20 +201,190 @@ def disconnect_from_broker():
             client.disconnect()
             is_connected = False
             print("✓ MQTT 브로커 연결 해제")
-            
+        
         except Exception as e:
             print(f"✗ MQTT 연결 해제 오류: {e}")
 
 
-# ==================== 데이터 전송 ====================
+# ==================== 저장 후 전송 스풀 ====================
 
-def send_sensor_data(data):
-    """센서 데이터 전송"""
-    if not is_connected:
+def open_spool(path=SPOOL_FILE):
+    """
+    디스크 스풀 열기 (연결이 끊긴 동안의 센서/상태/이미지 메시지 보관)
+    
+    다시 연결되면 백그라운드 스레드가 오래된 것부터 SPOOL_DRAIN_RATE로 보냅니다.
+    
+    Args:
+        path (str): 스풀 파일 경로
+    
+    Returns:
+        Spool: 스풀
+    """
+    global spool
+    
+    spool = Spool(path)
+    spool.start_drain(_publish, lambda: is_connected)
+    
+    if spool.count:
+        print(f"✓ MQTT 스풀 열기: {path} (대기 메시지 {spool.count}개, {spool.bytes} bytes)")
+    else:
+        print(f"✓ MQTT 스풀 열기: {path}")
+    return spool
+
+
+def close_spool():
+    """스풀 닫기 (남은 메시지는 다음 실행에서 보냄)"""
+    global spool
+    
+    current, spool = spool, None
+    if current is not None:
+        current.close()
+
+
+def _backlogged(topic):
+    """
+    스풀에 이 토픽의 대기 메시지가 남아 있는지
+    
+    센서 데이터와 기기 상태(펌프/LED/팬)는 서버가 마지막 값으로 덮어쓰므로, 대기 메시지가
+    다 나갈 때까지는 실시간 메시지도 스풀 뒤에 붙여 발행 순서(seq, timestamp)가 뒤바뀌지 않게 합니다.
+    이미지는 파일 이름(촬영 시각)마다 따로 저장되어 덮어쓰는 값이 없으므로 순서를 지키지 않고
+    바로 보냅니다 (큰 이미지가 스풀 전송 속도 제한에 묶여 늦어지지 않게).
+    """
+    return spool is not None and spool.pending(topic) > 0
+
+
+def _spool_message(topic, message, qos, label, reason="MQTT 미연결"):
+    """
+    보내지 못한 메시지를 스풀에 저장
+    
+    Returns:
+        bool: 저장했으면 True (스풀이 없으면 False - 메시지는 버려짐)
+    """
+    if spool is None:
         if DEBUG:
-            print("⚠ MQTT 미연결 - 센서 데이터 전송 불가")
+            print(f"⚠ {reason} - {label} 전송 불가")
         return False
     
+    try:
+        spool.put(topic, message, qos)
+    except Exception as e:
+        print(f"✗ 스풀 저장 오류 ({label}): {e}")
+        return False
+    
+    if DEBUG:
+        print(f"⚠ {reason} - {label} 스풀에 저장 (대기 {spool.count}개)")
+    return True
+
+
+# ==================== payload 인코딩 ====================
+
+def _supported(kind):
+    """
+    토픽 종류에 쓸 수 있는 인코딩 목록
+    
+    변화 보고(REPORT_BY_EXCEPTION) 메시지는 바뀐 필드만 담는데, struct는 고정 필드를 모두
+    담아 빠진 필드가 None(= 필드가 사라짐)으로 복원되므로 센서 토픽에서 쓰지 않습니다.
+    """
+    names = codec.supported(kind)
+    if kind == 'sensor' and REPORT_BY_EXCEPTION:
+        names.remove('struct')
+    return names
+
+
+def _check_encoding(kind, encoding):
+    """
+    Raises:
+        ValueError: 그 토픽에 쓸 수 없는 인코딩
+    """
+    codec.check(kind, encoding)
+    if encoding not in _supported(kind):
+        raise ValueError(f"변화 보고 모드에서는 {kind} 토픽에 {encoding} 인코딩을 쓸 수 없습니다")
+
+
+def set_encoding(kind, encoding):
+    """
+    토픽 종류별 payload 인코딩 변경 (modules/codec.py)
+    
+    Args:
+        kind (str): 'sensor' / 'status' / 'image'
+        encoding (str): 'json' / 'msgpack' / 'cbor' / 'struct' (struct는 sensor만)
+    
+    Raises:
+        ValueError: 모르는 토픽 종류이거나 사용할 수 없는 인코딩
+                    (REPORT_BY_EXCEPTION이면 sensor 토픽의 struct도)
+    """
+    if kind not in PAYLOAD_ENCODINGS:
+        raise ValueError(f"알 수 없는 토픽 종류: {kind}")
+    _check_encoding(kind, encoding)
+    
+    encodings[kind] = encoding
+    print(f"✓ {kind} 토픽 인코딩: {encoding}")
+
+
+def get_encodings():
+    """
+    Returns:
+        dict: {'current': {토픽 종류: 인코딩}, 'supported': {토픽 종류: [인코딩]}}
+    """
+    return {
+        'current': dict(encodings),
+        'supported': {kind: _supported(kind) for kind in PAYLOAD_ENCODINGS}
+    }
+
+
+def _encode(kind, payload):
+    """설정된 인코딩으로 payload 직렬화 (json이면 기존과 같은 문자열)"""
+    return codec.encode(payload, encodings.get(kind, 'json'), kind)
+
+
+# 설정 파일의 인코딩 적용 (라이브러리가 없거나 쓸 수 없는 조합이면 json으로)
+for _kind, _encoding in PAYLOAD_ENCODINGS.items():
+    try:
+        _check_encoding(_kind, _encoding)
+        encodings[_kind] = _encoding
+    except ValueError as e:
+        print(f"⚠ {e} - {_kind} 토픽은 json으로 전송")
+        encodings[_kind] = 'json'
+
+
+# ==================== 데이터 전송 ====================
+
+def _publish(topic, message, qos=0):
+    """
+    발행하고 지표 기록 (publish() 호출 시간, 발행 완료까지 대기 메시지)
+    
+    Returns:
+        MQTTMessageInfo: paho 발행 결과
+    """
+    start = time.perf_counter()
+    result = client.publish(topic, message, qos=qos)
+    end = time.perf_counter()
+    metrics.observe('mqtt.publish', end - start)
+    
+    if result.rc != mqtt.MQTT_ERR_SUCCESS:
+        metrics.inc('mqtt.publish_failures')
+        return result
+    
+    with _pending_lock:
+        if result.mid in _pending_early:
+            # 호출 안에서 이미 소켓에 쓰고 on_publish까지 끝남
+            _pending_early.discard(result.mid)
+            metrics.observe('mqtt.delivery', end - start)
+        else:
+            if len(_pending) >= _PENDING_MAX:
+                _pending.pop(next(iter(_pending)))
+            _pending[result.mid] = start
+    
+    return result
+
+
+def send_sensor_data(data):
+    """
+    센서 데이터 전송
+    
+    연결이 끊겨 있거나 발행에 실패하면 스풀에 저장했다가 다시 연결되면 보냅니다.
+    스풀에 센서 데이터가 남아 있으면 그 뒤에 붙여 발행 순서를 지킵니다.
+    """
     try:
         # 디바이스 ID 추가
         payload = {
@@ -180,11 +392,16 @@ def send_sensor_data(data):
             **data
         }
         
-        # JSON으로 변환
-        message = json.dumps(payload)
+        # 직렬화 (PAYLOAD_ENCODINGS['sensor'], 기본 JSON)
+        message = _encode('sensor', payload)
+        
+        if not is_connected:
+            return _spool_message(MQTT_TOPIC_SENSOR, message, 0, "센서 데이터")
+        if _backlogged(MQTT_TOPIC_SENSOR):
+            return _spool_message(MQTT_TOPIC_SENSOR, message, 0, "센서 데이터", "스풀 전송 중")
         
         # 토픽에 발행
-        result = client.publish(MQTT_TOPIC_SENSOR, message, qos=0)
+        result = _publish(MQTT_TOPIC_SENSOR, message, qos=0)
         
         if result.rc == mqtt.MQTT_ERR_SUCCESS:
             if DEBUG:
@@ -192,20 +409,53 @@ def send_sensor_data(data):
             return True
         else:
             print(f"✗ 센서 데이터 전송 실패 (코드: {result.rc})")
-            return False
-            
+            return _spool_message(MQTT_TOPIC_SENSOR, message, 0, "센서 데이터")
+    
     except Exception as e:
         print(f"✗ 센서 데이터 전송 오류: {e}")
         return False
 
 
-def send_device_status(data):
-    """디바이스 상태 전송"""
-    if not is_connected:
-        if DEBUG:
-            print("⚠ MQTT 미연결 - 상태 전송 불가")
+def send_sensor_batch(message, count):
+    """
+    센서 데이터 묶음 전송 (modules/batch.py encode_batch() 결과)
+    
+    묶음 하나가 여러 샘플을 담으므로 QoS 1로 보내고,
+    연결이 끊겨 있거나 발행에 실패하면 스풀에 저장합니다.
+    스풀에 묶음이 남아 있으면 그 뒤에 붙여 발행 순서를 지킵니다.
+    
+    Args:
+        message (bytes): 인코딩된 묶음 (JSON 또는 zlib 압축)
+        count (int): 담긴 샘플 수 (로그용)
+    """
+    try:
+        if not is_connected:
+            return _spool_message(MQTT_TOPIC_SENSOR_BATCH, message, 1, "센서 데이터 묶음")
+        if _backlogged(MQTT_TOPIC_SENSOR_BATCH):
+            return _spool_message(MQTT_TOPIC_SENSOR_BATCH, message, 1, "센서 데이터 묶음", "스풀 전송 중")
+        
+        result = _publish(MQTT_TOPIC_SENSOR_BATCH, message, qos=1)
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            if DEBUG:
+                print(f"→ 센서 데이터 묶음 전송: 샘플 {count}개 ({len(message)} bytes)")
+            return True
+        else:
+            print(f"✗ 센서 데이터 묶음 전송 실패 (코드: {result.rc})")
+            return _spool_message(MQTT_TOPIC_SENSOR_BATCH, message, 1, "센서 데이터 묶음")
+    
+    except Exception as e:
+        print(f"✗ 센서 데이터 묶음 전송 오류: {e}")
         return False
+
+
+def send_device_status(data):
+    """
+    디바이스 상태 전송
     
+    연결이 끊겨 있거나 발행에 실패하면 스풀에 저장했다가 다시 연결되면 보냅니다.
+    스풀에 상태 메시지가 남아 있으면 그 뒤에 붙여, 서버가 오래된 기기 상태로 되돌아가지 않게 합니다.
+    """
     try:
         # 디바이스 ID 추가
         payload = {
@@ -214,11 +464,16 @@ def send_device_status(data):
             **data
         }
         
-        # JSON으로 변환
-        message = json.dumps(payload)
+        # 직렬화 (PAYLOAD_ENCODINGS['status'], 기본 JSON)
+        message = _encode('status', payload)
+        
+        if not is_connected:
+            return _spool_message(MQTT_TOPIC_STATUS, message, 1, "상태")
+        if _backlogged(MQTT_TOPIC_STATUS):
+            return _spool_message(MQTT_TOPIC_STATUS, message, 1, "상태", "스풀 전송 중")
         
         # 토픽에 발행 (QoS 1로 보장)
-        result = client.publish(MQTT_TOPIC_STATUS, message, qos=1)
+        result = _publish(MQTT_TOPIC_STATUS, message, qos=1)
         
         if result.rc == mqtt.MQTT_ERR_SUCCESS:
             if DEBUG:
@@ -226,27 +481,29 @@ def send_device_status(data):
             return True
         else:
             print(f"✗ 디바이스 상태 전송 실패 (코드: {result.rc})")
-            return False
-            
+            return _spool_message(MQTT_TOPIC_STATUS, message, 1, "상태")
+    
     except Exception as e:
         print(f"✗ 디바이스 상태 전송 오류: {e}")
         return False
 
 
 def send_image(image_path):
-    """이미지 전송 (base64 인코딩)"""
-    if not is_connected:
-        if DEBUG:
-            print("⚠ MQTT 미연결 - 이미지 전송 불가")
-        return False
+    """
+    이미지 전송 (JSON이면 base64, msgpack/cbor면 원본 바이트)
     
+    연결이 끊겨 있거나 발행에 실패하면 스풀에 저장했다가 다시 연결되면 보냅니다.
+    스풀에 남은 이미지보다 먼저 나갈 수 있습니다 (순서 무관, _backlogged() 참고).
+    """
     try:
         import base64
         import os
         
-        # 이미지 파일 읽기
+        # 이미지 파일 읽기 (바이너리 인코딩은 base64 없이 그대로 담음)
         with open(image_path, 'rb') as f:
-            image_data = base64.b64encode(f.read()).decode('utf-8')
+            image_data = f.read()
+        if encodings.get('image', 'json') not in codec.BYTES_ENCODINGS:
+            image_data = base64.b64encode(image_data).decode('utf-8')
         
         # 페이로드 구성
         payload = {
@@ -256,19 +513,22 @@ def send_image(image_path):
             "image": image_data
         }
         
-        # JSON으로 변환
-        message = json.dumps(payload)
+        # 직렬화 (PAYLOAD_ENCODINGS['image'], 기본 JSON)
+        message = _encode('image', payload)
+        
+        if not is_connected:
+            return _spool_message(MQTT_TOPIC_IMAGE, message, 1, "이미지")
         
         # 토픽에 발행 (QoS 1로 보장)
-        result = client.publish(MQTT_TOPIC_IMAGE, message, qos=1)
+        result = _publish(MQTT_TOPIC_IMAGE, message, qos=1)
         
         if result.rc == mqtt.MQTT_ERR_SUCCESS:
             print(f"→ 이미지 전송: {image_path} ({len(image_data)} bytes)")
             return True
         else:
             print(f"✗ 이미지 전송 실패 (코드: {result.rc})")
-            return False
-            
+            return _spool_message(MQTT_TOPIC_IMAGE, message, 1, "이미지")
+    
     except FileNotFoundError:
         print(f"✗ 이미지 파일 없음: {image_path}")
         return False
@@ -277,6 +537,114 @@ def send_image(image_path):
         return False
 
 
+def send_metrics(data):
+    """
+    성능 지표 요약 전송 (modules/metrics.py summary())
+    
+    서버에서 기기별로 센서 버스 지연, 발행 대기, 재연결 횟수를 볼 수 있게
+    MQTT_TOPIC_METRICS로 보냅니다. 유실되어도 다음 요약이 누적 카운터를 담으므로 QoS 0.
+    """
+    if not is_connected:
+        return False
+    
+    try:
+        payload = {
+            "deviceId": DEVICE_ID,
+            "timestamp": time.time(),
+            **data
+        }
+        
+        # 지표 요약은 작게 보내도록 공백 없이 직렬화
+        message = json.dumps(payload, separators=(',', ':'))
+        result = _publish(MQTT_TOPIC_METRICS, message, qos=0)
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            if DEBUG:
+                print(f"→ 성능 지표 전송 ({len(message)} bytes)")
+            return True
+        else:
+            print(f"✗ 성능 지표 전송 실패 (코드: {result.rc})")
+            return False
+    
+    except Exception as e:
+        print(f"✗ 성능 지표 전송 오류: {e}")
+        return False
+
+
+def send_daily(rollup):
+    """
+    일별 요약 전송 (modules/derived.py)
+    
+    하루에 한 번뿐인 메시지라 QoS 1로 보냅니다.
+    
+    Args:
+        rollup (dict): {'date', 'stats', 'dli', 'lightCoverage'}
+    """
+    if not is_connected:
+        return False
+    
+    try:
+        payload = {
+            "deviceId": DEVICE_ID,
+            "timestamp": time.time(),
+            **rollup
+        }
+        
+        message = json.dumps(payload, separators=(',', ':'))
+        result = _publish(MQTT_TOPIC_DAILY, message, qos=1)
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            print(f"→ 일별 요약 전송: {rollup['date']}")
+            return True
+        else:
+            print(f"✗ 일별 요약 전송 실패 (코드: {result.rc})")
+            return False
+    
+    except Exception as e:
+        print(f"✗ 일별 요약 전송 오류: {e}")
+        return False
+
+
+def send_profile(artifact, info=None):
+    """
+    프로파일 결과 전송 (modules/profiler.py)
+    
+    Args:
+        artifact (bytes): gzip 압축 JSON
+        info (dict, optional): 측정 시간, 표본 수 등 요약
+    """
+    if not is_connected:
+        print("⚠ MQTT 미연결 - 프로파일 결과 전송 불가")
+        return False
+    
+    try:
+        import base64
+        
+        payload = {
+            "deviceId": DEVICE_ID,
+            "timestamp": time.time(),
+            "encoding": "gzip+base64",
+            **(info or {}),
+            "data": base64.b64encode(artifact).decode('ascii')
+        }
+        
+        message = json.dumps(payload)
+        
+        # 요청한 결과이므로 QoS 1로 보장
+        result = _publish(MQTT_TOPIC_PROFILE, message, qos=1)
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            print(f"→ 프로파일 결과 전송 ({len(artifact)} bytes)")
+            return True
+        else:
+            print(f"✗ 프로파일 결과 전송 실패 (코드: {result.rc})")
+            return False
+    
+    except Exception as e:
+        print(f"✗ 프로파일 결과 전송 오류: {e}")
+        return False
+
+
 # ==================== 명령 콜백 ====================
 
 def set_command_callback(callback):
@@ -0,0 +1,322 @@
+"""
+원격 프로파일링 모듈 - 실행 중인 app.py 들여다보기
+
+MQTT 제어 명령({"type": "profile", "action": "start", "seconds": 30})으로 시작하면
+백그라운드 스레드가 interval마다 sys._current_frames()로 모든 스레드(센서 루프,
+스케줄러 워커, paho 네트워크 스레드와 그 안에서 도는 명령 처리)의 스택을 표본 추출합니다.
+명령에 "memory": true를 넣으면 tracemalloc으로 메모리 할당도 추적해, 끝날 때 할당 위치
+상위 목록을 남깁니다.
+
+결과는 JSON을 gzip으로 압축한 바이트(artifact)로 만들어 MQTT로 보냅니다.
+스택은 collapsed 형식("스레드;함수;함수... 표본수")이라 flamegraph 도구에 바로 넣을 수 있습니다.
+
+부하:
+    - 표본 하나에 드는 시간은 스레드 수 × 스택 깊이에 비례합니다. PC에서 스레드 10개,
+      깊이 20 정도면 약 0.2ms라 10ms 간격에서 CPU 약 2%지만, Pi Zero는 10~20배 느려서
+      같은 간격이면 CPU의 20~40%를 쓸 수 있습니다. 길게 잴 때는 PROFILE_INTERVAL을 늘리세요.
+    - tracemalloc은 측정하는 동안 모든 메모리 할당을 느리게 합니다 (할당이 많은 코드는
+      1프레임 추적에서도 10배 이상). 그래서 기본은 꺼져 있고, 켜도 할당 위치 한 줄만 추적합니다.
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from config import PROFILE_INTERVAL, PROFILE_MAX_SECONDS, PROFILE_TOP
+
+# 스택에서 생략할 표준 라이브러리 경로 (스레드 진입부 등)
+_STDLIB = os.path.dirname(threading.__file__)
+
+
+class Profiler:
+    """
+    표본 추출 CPU 프로파일러 + tracemalloc 할당 스냅샷
+    
+    사용 예:
+        profiler = Profiler(seconds=30)
+        profiler.start(on_done=lambda artifact, info: ...)
+        ...
+        profiler.stop()   # seconds 전에 끝내려면
+    """
+    
+    def __init__(self, seconds=30, interval=PROFILE_INTERVAL, memory=False):
+        """
+        Args:
+            seconds (float): 측정 시간 (초), PROFILE_MAX_SECONDS로 제한
+            interval (float): 표본 간격 (초)
+            memory (bool): tracemalloc 할당 추적 여부 (할당이 느려지므로 필요할 때만)
+        """
+        self.seconds = min(max(float(seconds), 0.1), PROFILE_MAX_SECONDS)
+        self.interval = max(float(interval), 0.001)
+        self.memory = memory
+        
+        self.samples = 0
+        self.stacks = Counter()       # (스레드 이름, 프레임...) → 표본 수
+        self.started = None
+        self.elapsed = 0.0
+        
+        self._stop = threading.Event()
+        self._thread = None
+        self._own_tracemalloc = False
+    
+    
+    def start(self, on_done=None):
+        """
+        백그라운드에서 측정 시작
+        
+        Args:
+            on_done (callable, optional): on_done(artifact, info) - 끝나면 호출
+                                          artifact는 gzip 압축 JSON 바이트
+        """
+        if self.memory and not tracemalloc.is_tracing():
+            # 결과에는 할당한 줄만 쓰므로 1프레임 (프레임이 많을수록 할당마다 더 느려짐)
+            tracemalloc.start(1)
+            self._own_tracemalloc = True
+        
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, args=(on_done,), name="profiler", daemon=True)
+        self._thread.start()
+    
+    
+    def stop(self):
+        """측정을 일찍 끝냄 (결과는 on_done으로 전달됨)"""
+        self._stop.set()
+    
+    
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    
+    def _sample(self, own_ident, names):
+        """
+        모든 스레드의 현재 스택 한 번 기록
+        """
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if not code.co_filename.startswith(_STDLIB) or not stack:
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            
+            stack.append(names.get(ident, f"thread-{ident}"))
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+        
+        self.samples += 1
+    
+    
+    def _run(self, on_done):
+        own_ident = threading.get_ident()
+        start = time.monotonic()
+        deadline = start + self.seconds
+        next_sample = start
+        
+        names = {}
+        names_refreshed = 0.0
+        
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            
+            # 스레드 이름은 1초마다만 갱신 (threading.enumerate 비용)
+            if now - names_refreshed >= 1.0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                names_refreshed = now
+            
+            self._sample(own_ident, names)
+            
+            next_sample += self.interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_sample = time.monotonic()
+        
+        self.elapsed = time.monotonic() - start
+        
+        try:
+            report = self.report()
+        except Exception as e:
+            print(f"✗ 프로파일 결과 생성 오류: {e}")
+            report = {'error': str(e)}
+        finally:
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+                self._own_tracemalloc = False
+        
+        artifact = gzip.compress(json.dumps(report, separators=(',', ':')).encode('utf-8'))
+        info = {
+            'seconds': round(self.elapsed, 2),
+            'samples': self.samples,
+            'size': len(artifact)
+        }
+        print(f"✓ 프로파일 완료: {info['seconds']}초, 표본 {self.samples}개, {len(artifact)} bytes")
+        
+        if on_done:
+            on_done(artifact, info)
+    
+    
+    def report(self):
+        """
+        측정 결과 정리
+        
+        Returns:
+            dict: {
+                'started', 'seconds', 'interval', 'samples',
+                'threads': {스레드 이름: 표본 수},
+                'functions': [{'function', 'self', 'total'}, ...],   # 상위 PROFILE_TOP개
+                'stacks': ["스레드;함수;... 표본수", ...],           # collapsed 형식
+                'memory': {'current', 'peak', 'top': [...]}          # tracemalloc
+            }
+        """
+        threads = Counter()
+        self_counts = Counter()
+        total_counts = Counter()
+        
+        for stack, count in self.stacks.items():
+            threads[stack[0]] += count
+            
+            # 함수별 집계는 줄 번호를 뺀 "함수 (파일)" 기준
+            functions = [frame.rsplit(':', 1)[0] + ')' for frame in stack[1:]]
+            self_counts[functions[-1]] += count
+            for function in set(functions):
+                total_counts[function] += count
+        
+        functions = [
+            {'function': name, 'self': self_counts[name], 'total': total}
+            for name, total in total_counts.most_common(PROFILE_TOP)
+        ]
+        
+        stacks = [
+            f"{';'.join(stack)} {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        
+        return {
+            'started': self.started,
+            'seconds': round(self.elapsed, 3),
+            'interval': self.interval,
+            'samples': self.samples,
+            'threads': dict(threads.most_common()),
+            'functions': functions,
+            'stacks': stacks,
+            'memory': self._memory_report()
+        }
+    
+    
+    def _memory_report(self):
+        """
+        tracemalloc 할당 상위 위치 (추적 중이 아니면 None)
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        
+        top = []
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP]:
+            frame = stat.traceback[0]
+            top.append({
+                'file': frame.filename,
+                'line': frame.lineno,
+                'size': stat.size,
+                'count': stat.count
+            })
+        
+        return {'current': current, 'peak': peak, 'top': top}
+
+
+# ==================== 전역 프로파일러 ====================
+
+# 실행 중인 프로파일러 (한 번에 하나만)
+_current = None
+_lock = threading.Lock()
+
+
+def start(seconds=30, on_done=None, interval=PROFILE_INTERVAL, memory=False):
+    """
+    프로파일링 시작 (이미 실행 중이면 시작하지 않음)
+    
+    Returns:
+        Profiler: 시작한 프로파일러, 이미 실행 중이면 None
+    """
+    global _current
+    
+    with _lock:
+        if _current is not None and _current.is_running():
+            return None
+        _current = Profiler(seconds, interval, memory)
+        _current.start(on_done)
+    
+    memory_note = ", 메모리 할당 추적" if memory else ""
+    print(f"✓ 프로파일링 시작: {_current.seconds}초, {_current.interval * 1000:.0f}ms 간격{memory_note}")
+    return _current
+
+
+def stop():
+    """
+    실행 중인 프로파일링을 일찍 끝냄
+    
+    Returns:
+        bool: 실행 중이던 프로파일러가 있었는지 여부
+    """
+    with _lock:
+        profiler = _current
+    
+    if profiler is None or not profiler.is_running():
+        return False
+    profiler.stop()
+    return True
+
+
+def is_running():
+    """프로파일링 중인지 여부"""
+    return _current is not None and _current.is_running()
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    print("=== 프로파일러 테스트 ===\n")
+    
+    def busy():
+        data = []
+        end = time.time() + 2
+        while time.time() < end:
+            data.append(sum(i * i for i in range(1000)))
+    
+    worker = threading.Thread(target=busy, name="busy-worker")
+    worker.start()
+    
+    done = threading.Event()
+    result = {}
+    
+    def on_done(artifact, info):
+        result['report'] = json.loads(gzip.decompress(artifact))
+        result['info'] = info
+        done.set()
+    
+    start(seconds=1.5, on_done=on_done, memory=True)
+    done.wait(5)
+    worker.join()
+    
+    report = result['report']
+    print(f"\n스레드: {report['threads']}")
+    print("상위 함수:")
+    for f in report['functions'][:5]:
+        print(f"  {f['total']:4d} {f['self']:4d}  {f['function']}")
+    print(f"메모리: current {report['memory']['current']} bytes, peak {report['memory']['peak']} bytes")
+    print(f"압축 크기: {result['info']['size']} bytes")
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+센서 원시 데이터 기록 모듈
+
+드라이버가 하드웨어에서 받은 원시 데이터(MCP3008 ADC 코드, HTU21D I2C 결과,
+CO2 UART 수신 바이트)를 압축된 바이너리 파일에 기록합니다.
+기록한 파일은 sim/replay.py로 같은 변환/집계/MQTT 발행 경로에 다시 흘려보낼 수 있습니다
+(현장 문제 재현, 한 달치 데이터로 부하 테스트 등).
+
+파일 형식 (gzip 압축):
+    헤더: b'SFRC' + 버전(1바이트) + 시작 시각(double, Unix timestamp)
+    레코드: 종류(1바이트) + 이전 레코드와의 시간 차(uint32, 마이크로초) + 내용
+        ADC  : 장치(1바이트, bus << 4 | device) + 채널(1바이트) + 코드(uint16)
+        I2C  : 주소(1바이트) + 종류(1바이트, 0=온도 1=습도) + 값(float32)
+        I2C_MUX : 멀티플렉서 채널(1바이트) + I2C와 같은 내용 - TCA9548A 뒤의 센서
+        UART : 길이(uint16) + 수신 바이트
+        SYNC : 절대 시각(double) - 시간 차가 uint32를 넘을 때
+
+드라이버는 기록 중이 아니면(current가 None) 비용 없이 지나갑니다.
+
+사용 예:
+    from modules import recorder
+    recorder.start("./recordings/farm.rec.gz")
+    ...
+    recorder.stop()
+"""
+
+import gzip
+import struct
+import threading
+import time
+
+MAGIC = b'SFRC'
+VERSION = 1
+
+# 레코드 종류
+SYNC = 0
+ADC = 1
+I2C = 2
+UART = 3
+I2C_MUX = 4
+
+I2C_KINDS = ('temperature', 'humidity')
+
+_HEADER = struct.Struct('<4sBd')
+_RECORD = struct.Struct('<BI')
+_SYNC = struct.Struct('<d')
+_ADC = struct.Struct('<BBH')
+_I2C = struct.Struct('<BBf')
+_I2C_MUX = struct.Struct('<BBBf')
+_UART = struct.Struct('<H')
+
+# 버퍼가 이만큼 차면 백그라운드 스레드를 깨워 파일에 씀 (바이트)
+FLUSH_SIZE = 64 * 1024
+
+
+class Recorder:
+    """
+    원시 데이터 기록기
+    
+    드라이버 스레드는 메모리 버퍼에 레코드를 덧붙이기만 하고,
+    압축과 파일 쓰기는 백그라운드 스레드가 flush_interval마다 합니다.
+    """
+    
+    def __init__(self, path, flush_interval=1.0):
+        """
+        Args:
+            path (str): 기록 파일 경로 (있으면 덮어씀)
+            flush_interval (float): 파일에 쓰는 주기 (초)
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.bytes_written = 0
+        
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._last_us = 0
+        
+        start = time.time()
+        self._file = gzip.open(path, 'wb', compresslevel=6)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, start))
+        self._start = start
+        
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._writer_loop, name="recorder", daemon=True)
+        self._thread.start()
+    
+    
+    def _append(self, kind, payload):
+        """
+        레코드 하나를 버퍼에 추가
+        """
+        now_us = int((time.time() - self._start) * 1000000)
+        
+        with self._lock:
+            delta = now_us - self._last_us
+            if delta < 0 or delta > 0xFFFFFFFF:
+                # 시계가 되돌아갔거나 너무 오래 비었으면 절대 시각으로 다시 맞춤
+                self._buffer += _RECORD.pack(SYNC, 0) + _SYNC.pack(self._start + now_us / 1000000)
+                delta = 0
+            self._last_us = now_us
+            
+            self._buffer += _RECORD.pack(kind, delta)
+            self._buffer += payload
+            self.records += 1
+            full = len(self._buffer) >= FLUSH_SIZE
+        
+        if full:
+            self._wakeup.set()
+    
+    
+    def adc(self, bus, device, channel, code):
+        """MCP3008 변환 결과 기록"""
+        self._append(ADC, _ADC.pack((bus << 4) | device, channel, code))
+    
+    
+    def i2c(self, address, kind, value, mux_channel=None):
+        """
+        I2C 센서 결과 기록
+        
+        Args:
+            address (int): I2C 주소
+            kind (str): 'temperature' 또는 'humidity'
+            value (float): 드라이버가 읽은 값
+            mux_channel (int, optional): TCA9548A 채널 (멀티플렉서 뒤의 센서)
+        """
+        if mux_channel is None:
+            self._append(I2C, _I2C.pack(address, I2C_KINDS.index(kind), value))
+        else:
+            self._append(I2C_MUX, _I2C_MUX.pack(mux_channel, address, I2C_KINDS.index(kind), value))
+    
+    
+    def uart(self, data):
+        """UART 수신 바이트 기록 (프레임 단위가 아니라 받은 그대로)"""
+        self._append(UART, _UART.pack(len(data)) + bytes(data))
+    
+    
+    def flush(self):
+        """
+        버퍼를 파일에 쓰기
+        """
+        with self._lock:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            self.bytes_written += len(data)
+    
+    
+    def _writer_loop(self):
+        """
+        백그라운드 쓰기 스레드
+        """
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"✗ 기록 파일 쓰기 오류: {e}")
+    
+    
+    def close(self):
+        """
+        남은 레코드를 쓰고 파일 닫기
+        """
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=2.0)
+        
+        self.flush()
+        self._file.close()
+
+
+# ==================== 전역 기록기 ====================
+
+# 기록 중인 Recorder (드라이버가 확인), 기록 중이 아니면 None
+current = None
+
+
+def start(path, flush_interval=1.0):
+    """
+    원시 데이터 기록 시작
+    
+    Args:
+        path (str): 기록 파일 경로
+        flush_interval (float): 파일에 쓰는 주기 (초)
+    
+    Returns:
+        Recorder: 기록기
+    """
+    global current
+    
+    stop()
+    current = Recorder(path, flush_interval)
+    print(f"✓ 원시 데이터 기록 시작: {path}")
+    return current
+
+
+def stop():
+    """
+    기록 중지 (기록 중이 아니면 아무것도 안 함)
+    """
+    global current
+    
+    recorder, current = current, None
+    if recorder is not None:
+        recorder.close()
+        print(f"✓ 원시 데이터 기록 종료: {recorder.path} (레코드 {recorder.records}개)")
+
+
+def read_records(path):
+    """
+    기록 파일 읽기 (한 레코드씩)
+    
+    Args:
+        path (str): 기록 파일 경로
+    
+    Yields:
+        tuple: (시각, 종류, 내용)
+               ADC  → (장치, 채널, 코드)
+               I2C  → (주소, 'temperature' | 'humidity', 값)
+                      멀티플렉서 뒤의 센서는 주소가 (멀티플렉서 채널, 주소)
+               UART → bytes
+    """
+    with gzip.open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        
+        magic, version, start = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"기록 파일 형식이 아닙니다: {path}")
+        
+        t = start
+        while True:
+            head = f.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                return  # 파일 끝 (기록 중 종료로 잘린 레코드는 버림)
+            
+            kind, delta = _RECORD.unpack(head)
+            t += delta / 1000000
+            
+            if kind == SYNC:
+                t, = _SYNC.unpack(f.read(_SYNC.size))
+            elif kind == ADC:
+                device, channel, code = _ADC.unpack(f.read(_ADC.size))
+                yield t, ADC, (device, channel, code)
+            elif kind == I2C:
+                address, index, value = _I2C.unpack(f.read(_I2C.size))
+                yield t, I2C, (address, I2C_KINDS[index], value)
+            elif kind == I2C_MUX:
+                channel, address, index, value = _I2C_MUX.unpack(f.read(_I2C_MUX.size))
+                yield t, I2C, ((channel, address), I2C_KINDS[index], value)
+            elif kind == UART:
+                length, = _UART.unpack(f.read(_UART.size))
+                yield t, UART, f.read(length)
+            else:
+                raise ValueError(f"알 수 없는 레코드 종류: {kind}")
+
+
+# ==================== 테스트 ====================
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    
+    print("=== 원시 데이터 기록 테스트 ===\n")
+    
+    path = os.path.join(tempfile.gettempdir(), "recorder_test.rec.gz")
+    rec = start(path)
+    
+    started = time.perf_counter()
+    for i in range(10000):
+        rec.adc(0, 0, i % 2, 500 + i % 7)
+    elapsed = time.perf_counter() - started
+    rec.i2c(0x40, 'temperature', 24.7)
+    rec.uart(bytes([0xFF, 0x86, 0x01, 0xA4, 0x40, 0, 0, 0, 0x95]))
+    
+    stop()
+    
+    records = list(read_records(path))
+    print(f"레코드 {len(records)}개, 파일 {os.path.getsize(path)} bytes")
+    print(f"ADC 기록 비용: {elapsed / 10000 * 1e6:.2f}us/레코드")
+    print(f"마지막 레코드: {records[-2:]}")
+    os.remove(path)
\ No newline at end of file
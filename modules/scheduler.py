@@ -0,0 +1,508 @@
+"""
+센서 스케줄러 모듈 - 센서별 주기 실행 및 버스 간 동시 읽기
+
+센서마다 자기 주기(CO2 30초, ADC 1초, HTU21D 5초 등)를 가지고 실행됩니다.
+마감 시각은 time.monotonic() 기준으로 "시작 시각 + k * 주기"로 계산하므로
+읽기 시간만큼 주기가 조금씩 밀리는 누적 오차가 없습니다.
+
+서로 다른 버스(I2C, SPI, UART)의 센서는 작은 워커 풀에서 동시에 읽고,
+같은 버스의 센서는 버스별 락으로 순서대로 읽습니다.
+
+작업마다 읽기 마감 시간(timeout)과 회로 차단기가 있습니다 (modules/breaker.py).
+멈춘 읽기는 마감 시간 뒤에 버스 락을 놓고 실패로 처리되며, 연속으로 실패한 센서는
+차단되어 지수 백오프 간격으로만 다시 시도하므로 다른 센서의 읽기를 늦추지 않습니다.
+
+add_listener()로 등록한 함수는 작업이 성공할 때마다 그 결과({필드: Reading})로
+호출됩니다 (예: 파생 지표 계산, modules/derived.py).
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import metrics
+from modules.breaker import CircuitBreaker, TimedCall, ReadTimeout
+from modules.snapshot import Reading
+
+
+class SensorTask:
+    """
+    스케줄러에 등록된 센서 작업 하나
+    
+    실행 통계(지터, 오버런)를 함께 보관합니다.
+    """
+    
+    def __init__(self, name, func, period, bus, timeout=None):
+        """
+        Args:
+            name (str): 작업 이름 (예: 'htu21d')
+            func (callable): 읽기 함수. 필드 dict를 반환 (예: {'co2': 420})
+                             값 대신 Reading을 넣으면 그 캡처 시각을 그대로 사용
+            period (float): 실행 주기 (초)
+            bus (str): 버스 이름 (예: 'i2c', 'spi', 'uart'). 같은 버스끼리는 순차 실행
+            timeout (float, optional): 읽기 마감 시간 (초), None이면 제한 없음
+        """
+        self.name = name
+        self.func = func
+        self.period = period
+        self.bus = bus
+        self.timeout = timeout
+        
+        # 마감 시간이 있으면 전용 스레드에서 실행 (멈춰도 워커와 버스 락을 놓을 수 있게)
+        self.call = TimedCall(func, timeout, name) if timeout else func
+        self.breaker = CircuitBreaker(name)
+        
+        self.origin = 0.0       # 첫 실행 시각 (monotonic)
+        self.index = 0          # 다음 실행 회차 (마감 = origin + index * period)
+        self.running = False    # 워커에서 실행 중 여부
+        
+        # 통계
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0       # 이전 실행이 안 끝났거나 늦어서 건너뛴 회차 수
+        self.last_jitter = 0.0  # 마감 대비 실제 시작 지연 (초)
+        self.max_jitter = 0.0
+        self.total_jitter = 0.0
+        self.last_duration = 0.0
+        self.last_result = None
+        self.last_run = None    # 마지막 완료 시각 (Unix timestamp)
+        
+        # 발행용 지표 (modules/metrics.py), 예: sensor.i2c.htu21d
+        self.latency = metrics.histogram(f"sensor.{bus}.{name}")
+        self.error_count = metrics.counter(f"sensor.{bus}.{name}.errors")
+        self.overrun_count = metrics.counter(f"sensor.{bus}.{name}.overruns")
+        self.timeout_count = metrics.counter(f"sensor.{bus}.{name}.timeouts")
+        self.trip_count = metrics.counter(f"sensor.{bus}.{name}.trips")
+    
+    
+    @property
+    def deadline(self):
+        """다음 실행 마감 시각 (monotonic)"""
+        return self.origin + self.index * self.period
+    
+    
+    def get_stats(self):
+        """
+        실행 통계 조회
+        
+        Returns:
+            dict: 주기, 상태, 실행/오류/오버런 횟수, 지터(ms), 실행 시간(ms)
+        """
+        return {
+            'period': self.period,
+            'bus': self.bus,
+            'state': self.breaker.state,
+            'runs': self.runs,
+            'errors': self.errors,
+            'overruns': self.overruns,
+            'jitter_ms': round(self.last_jitter * 1000, 2),
+            'max_jitter_ms': round(self.max_jitter * 1000, 2),
+            'mean_jitter_ms': round(self.total_jitter / self.runs * 1000, 2) if self.runs else 0.0,
+            'duration_ms': round(self.last_duration * 1000, 2),
+            'last_run': self.last_run
+        }
+
+
+class SensorScheduler:
+    """
+    센서별 주기 스케줄러
+    
+    사용 예:
+        scheduler = SensorScheduler(max_workers=3)
+        scheduler.add_task('co2', read_co2, period=30, bus='uart')
+        scheduler.start()
+        data = scheduler.get_latest()
+    """
+    
+    def __init__(self, max_workers=3):
+        """
+        Args:
+            max_workers (int): 워커 스레드 수 (보통 버스 수만큼)
+        """
+        self.max_workers = max_workers
+        self.tasks = {}
+        
+        self._executor = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()     # 작업 상태 / 최신값 보호
+        self._bus_locks = {}              # 버스별 락
+        self._latest = {}                 # 필드별 최신 Reading
+        self._listeners = []              # 작업 결과를 받을 함수 목록
+        self._stepped = False             # step()으로 바깥에서 돌리는 중
+    
+    
+    def add_task(self, name, func, period, bus, timeout=None):
+        """
+        센서 작업 등록
+        
+        Args:
+            name (str): 작업 이름
+            func (callable): 읽기 함수 (필드 dict 반환)
+            period (float): 실행 주기 (초)
+            bus (str): 버스 이름
+            timeout (float, optional): 읽기 마감 시간 (초)
+        """
+        if period <= 0:
+            raise ValueError(f"주기는 0보다 커야 합니다: {name} ({period})")
+        
+        with self._lock:
+            self.tasks[name] = SensorTask(name, func, period, bus, timeout)
+            self._bus_locks.setdefault(bus, threading.Lock())
+        
+        self._wakeup.set()
+    
+    
+    def add_listener(self, listener):
+        """
+        작업 결과 리스너 등록
+        
+        리스너는 워커 스레드에서 listener({필드: Reading})로 호출되므로
+        빨리 끝나야 하고, 스레드 안전해야 합니다.
+        
+        Args:
+            listener (callable): 성공한 작업의 결과를 받을 함수
+        """
+        with self._lock:
+            self._listeners.append(listener)
+    
+    
+    def start(self):
+        """
+        스케줄러 시작
+        
+        모든 작업을 즉시 한 번 실행한 뒤 각자의 주기로 반복합니다.
+        """
+        if self._thread is not None:
+            return
+        
+        self._align(time.monotonic())
+        
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="sensor-worker"
+        )
+        self._thread = threading.Thread(target=self._loop, name="sensor-scheduler", daemon=True)
+        self._thread.start()
+        
+        print(f"✓ 센서 스케줄러 시작 (작업 {len(self.tasks)}개, 워커 {self.max_workers}개)")
+        for task in self.tasks.values():
+            limit = f", 마감 {task.timeout}초" if task.timeout else ""
+            print(f"  - {task.name}: {task.period}초 주기 ({task.bus}{limit})")
+    
+    
+    def stop(self):
+        """
+        스케줄러 중지
+        
+        실행 중인 읽기가 끝날 때까지 기다립니다.
+        """
+        if self._thread is None:
+            return
+        
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        
+        print("✓ 센서 스케줄러 중지")
+    
+    
+    def run_once(self):
+        """
+        모든 작업을 한 번씩 바로 실행하고 끝날 때까지 대기
+        
+        스케줄러를 시작하지 않고 한 번만 읽을 때 사용합니다.
+        버스가 다른 작업은 동시에, 같은 버스의 작업은 순서대로 실행됩니다.
+        차단된 센서는 재시도 시각이 지났을 때만 읽습니다.
+        
+        Returns:
+            dict: {필드: Reading}
+        """
+        with self._lock:
+            tasks = [task for task in self.tasks.values() if not task.running and task.breaker.allow()]
+            for task in tasks:
+                task.running = True
+        
+        now = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for task in tasks:
+                executor.submit(self._run, task, now)
+        
+        return self.get_readings()
+    
+    
+    def step(self, now):
+        """
+        스레드 없이 바깥 시계로 스케줄러 돌리기 (예: sim/replay.py의 가상 시계)
+        
+        now까지 마감이 된 작업을 실행하고 끝날 때까지 기다립니다.
+        첫 호출의 now가 모든 작업의 시작 시각이 되며, 그 뒤로는 start()와 같은 주기 격자,
+        오버런 계산, 회로 차단기를 그대로 따릅니다.
+        
+        Args:
+            now (float): 현재 시각 (time.monotonic()과 같은 기준, 호출마다 커져야 함)
+        
+        Returns:
+            float: 다음 마감 시각 (작업이 없으면 None)
+        """
+        if self._thread is not None:
+            raise RuntimeError("스케줄러 스레드가 동작 중입니다")
+        
+        if not self._stepped:
+            self._align(now)
+            self._stepped = True
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                with self._lock:
+                    for task in self.tasks.values():
+                        if task.deadline <= now:
+                            self._dispatch(task, now)
+            finally:
+                self._executor = None
+        
+        return self.next_deadline()
+    
+    
+    def next_deadline(self):
+        """가장 가까운 작업 마감 시각 (monotonic, 작업이 없으면 None)"""
+        with self._lock:
+            return min((task.deadline for task in self.tasks.values()), default=None)
+    
+    
+    def _align(self, now):
+        """
+        모든 작업의 주기 격자를 now에서 시작
+        """
+        with self._lock:
+            for task in self.tasks.values():
+                task.origin = now
+                task.index = 0
+    
+    
+    def _loop(self):
+        """
+        스케줄러 스레드 본체
+        
+        가장 가까운 마감 시각까지 기다렸다가, 마감이 지난 작업을 워커 풀에 넘깁니다.
+        """
+        while not self._stop.is_set():
+            now = time.monotonic()
+            next_deadline = None
+            
+            with self._lock:
+                for task in self.tasks.values():
+                    if task.deadline <= now:
+                        self._dispatch(task, now)
+                    
+                    if next_deadline is None or task.deadline < next_deadline:
+                        next_deadline = task.deadline
+            
+            delay = 1.0 if next_deadline is None else next_deadline - time.monotonic()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+    
+    
+    def _dispatch(self, task, now):
+        """
+        마감이 된 작업을 워커에 제출 (락을 잡은 상태에서 호출)
+        """
+        if not task.running and not task.breaker.allow(now):
+            # 차단 중: 재시도 시각 전의 회차는 그냥 넘김 (오버런 아님)
+            task.index = math.floor((now - task.origin) / task.period) + 1
+            return
+        
+        deadline = task.deadline
+        previous = task.index
+        
+        # 다음 회차: 놓친 회차는 건너뛰되 원래 격자(origin + k * period)는 유지
+        task.index = math.floor((now - task.origin) / task.period) + 1
+        missed = task.index - previous - 1
+        
+        if task.running:
+            # 이전 실행이 아직 안 끝남 → 이번 회차는 건너뜀
+            missed += 1
+        
+        if missed:
+            task.overruns += missed
+            task.overrun_count.inc(missed)
+        
+        if task.running:
+            return
+        
+        task.running = True
+        self._executor.submit(self._run, task, deadline)
+    
+    
+    def _run(self, task, deadline):
+        """
+        워커 스레드에서 작업 실행
+        
+        같은 버스의 작업은 버스 락으로 순차 실행됩니다.
+        예외, 마감 초과, 모든 값이 None인 결과는 실패로 회로 차단기에 기록됩니다.
+        """
+        try:
+            with self._bus_locks[task.bus]:
+                started = time.monotonic()
+                jitter = started - deadline
+                
+                try:
+                    result = task.call()
+                    failure = None
+                    if result and all(getattr(v, 'value', v) is None for v in result.values()):
+                        failure = "값 없음"
+                except ReadTimeout as e:
+                    print(f"✗ 센서 작업 마감 초과 ({task.name}): {e}")
+                    task.timeout_count.inc()
+                    result = None
+                    failure = f"timeout: {e}"
+                except Exception as e:
+                    print(f"✗ 센서 작업 오류 ({task.name}): {e}")
+                    result = None
+                    failure = e
+                
+                finished = time.monotonic()
+                duration = finished - started
+            
+            error = failure is not None
+            task.latency.observe(duration)
+            if error:
+                task.error_count.inc()
+                if task.breaker.failure(failure):
+                    task.trip_count.inc()
+            else:
+                task.breaker.success()
+            
+            readings = None
+            with self._lock:
+                task.runs += 1
+                task.last_jitter = jitter
+                task.max_jitter = max(task.max_jitter, jitter)
+                task.total_jitter += jitter
+                task.last_duration = duration
+                task.last_run = time.time()
+                
+                if result is None:
+                    task.errors += 1
+                    # 실패한 작업의 필드는 오래된 값 대신 None으로
+                    for field in task.last_result or ():
+                        self._latest[field] = Reading(None, monotonic=finished)
+                else:
+                    task.errors += error
+                    task.last_result = result
+                    readings = {}
+                    for field, value in (result or {}).items():
+                        # 시각이 없는 값은 작업이 끝난 시각으로 기록
+                        if not isinstance(value, Reading):
+                            value = Reading(value, monotonic=finished)
+                        self._latest[field] = value
+                        readings[field] = value
+                listeners = list(self._listeners)
+            
+            if readings:
+                for listener in listeners:
+                    try:
+                        listener(readings)
+                    except Exception as e:
+                        print(f"✗ 센서 결과 리스너 오류 ({task.name}): {e}")
+        finally:
+            task.running = False
+    
+    
+    def get_latest(self):
+        """
+        모든 작업의 최신 결과를 합친 dict 반환
+        
+        Returns:
+            dict: {필드: 최신값}
+        """
+        with self._lock:
+            return {field: reading.value for field, reading in self._latest.items()}
+    
+    
+    def get_readings(self):
+        """
+        모든 작업의 최신 결과를 캡처 시각과 함께 반환
+        
+        Returns:
+            dict: {필드: Reading}
+        """
+        with self._lock:
+            return dict(self._latest)
+    
+    
+    def get_health(self):
+        """
+        작업별 회로 차단기 상태
+        
+        Returns:
+            dict: {작업 이름: CircuitBreaker.status()}
+        """
+        with self._lock:
+            tasks = list(self.tasks.values())
+        return {task.name: task.breaker.status() for task in tasks}
+    
+    
+    def get_stats(self):
+        """
+        작업별 실행 통계 조회
+        
+        Returns:
+            dict: {작업 이름: 통계 dict}
+        """
+        with self._lock:
+            return {name: task.get_stats() for name, task in self.tasks.items()}
+    
+    
+    def is_running(self):
+        """스케줄러 동작 여부 (스레드로, 또는 step()으로 바깥에서)"""
+        return self._thread is not None or self._stepped
+
+
+# ==================== 테스트 ====================
+
+if __name__ == "__main__":
+    import random
+    
+    print("=== 센서 스케줄러 테스트 ===\n")
+    
+    def fake_i2c():
+        time.sleep(0.07)  # HTU21D 변환 시간 흉내
+        return {'temperature': round(random.uniform(20, 30), 1)}
+    
+    def fake_spi():
+        time.sleep(0.005)
+        return {'light': random.randint(400, 900)}
+    
+    def fake_uart():
+        return {'co2': random.randint(400, 600)}
+    
+    def fake_stuck():
+        time.sleep(10)  # 빠진 UART 흉내 (응답 없음)
+        return {'o2': 20.9}
+    
+    scheduler = SensorScheduler(max_workers=3)
+    scheduler.add_task('htu21d', fake_i2c, period=0.5, bus='i2c')
+    scheduler.add_task('adc', fake_spi, period=0.1, bus='spi')
+    scheduler.add_task('co2', fake_uart, period=1.0, bus='uart')
+    scheduler.add_task('stuck', fake_stuck, period=0.2, bus='uart', timeout=0.05)
+    scheduler.start()
+    
+    time.sleep(3)
+    
+    print(f"\n최신값: {scheduler.get_latest()}")
+    print(f"상태: {scheduler.get_health()}")
+    print("통계:")
+    for name, stats in scheduler.get_stats().items():
+        print(f"  {name}: {stats}")
+    
+    scheduler.stop()
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+센서 스냅샷 모듈 - 측정값별 캡처 시각 관리
+
+센서마다 실제로 읽은 시각이 다르므로(느린 CO2, HTU21D 등) 값마다
+monotonic 시각과 벽시계(Unix) 시각을 따로 보관합니다.
+서버에서 VPD처럼 여러 센서를 엮어 계산할 때, 값들이 얼마나 떨어진
+시점에 측정됐는지(skew)를 보고 한 시점의 데이터로 볼 수 있는지 판단합니다.
+
+같은 타입 센서가 여러 개면(베드별 HTU21D 등) 필드 이름이 "인스턴스.필드"
+(예: 'bed2.temperature')이고, payload에서는 값만 'instances' 아래에 인스턴스별로 묶입니다.
+캡처 시각(readingTimes)은 묶지 않고 "인스턴스.필드" 키 그대로 둡니다 (to_payload() 참고).
+"""
+
+import time
+
+# 기본 센서 필드 (스냅샷에 값이 없어도 payload에는 None으로 포함)
+SENSOR_FIELDS = ('temperature', 'humidity', 'light', 'co2', 'ec', 'tds')
+
+# 인스턴스 필드 구분자 ("인스턴스.필드")
+INSTANCE_SEP = '.'
+
+
+def instance_field(instance, field):
+    """인스턴스별 필드 이름 (예: 'bed2', 'temperature' → 'bed2.temperature')"""
+    return f"{instance}{INSTANCE_SEP}{field}"
+
+
+def split_field(field):
+    """
+    필드 이름 → (인스턴스, 필드) (예: 'bed2.temperature' → ('bed2', 'temperature'))
+    
+    인스턴스가 없는 필드는 (None, 필드)입니다. readingTimes 키를 instances 값과 맞출 때 씁니다.
+    """
+    if INSTANCE_SEP in field:
+        instance, name = field.split(INSTANCE_SEP, 1)
+        return instance, name
+    return None, field
+
+
+class Reading:
+    """
+    측정값 하나와 캡처 시각
+    """
+    
+    __slots__ = ('value', 'monotonic', 'wall')
+    
+    def __init__(self, value, monotonic=None, wall=None):
+        """
+        Args:
+            value: 측정값 (실패 시 None)
+            monotonic (float, optional): 캡처 시각 (time.monotonic). 없으면 지금
+            wall (float, optional): 캡처 시각 (Unix timestamp). 없으면 monotonic에서 환산
+        """
+        now_mono = time.monotonic()
+        now_wall = time.time()
+        
+        if monotonic is None:
+            monotonic = now_mono if wall is None else wall - now_wall + now_mono
+        if wall is None:
+            wall = monotonic - now_mono + now_wall
+        
+        self.value = value
+        self.monotonic = monotonic
+        self.wall = wall
+    
+    
+    @classmethod
+    def from_wall(cls, value, wall):
+        """벽시계 시각만 아는 값 (예: ADC 읽기 결과의 timestamp)"""
+        return cls(value, wall=wall)
+    
+    
+    @classmethod
+    def from_age(cls, value, age):
+        """age초 전에 캡처된 값 (예: CO2 캐시). age가 None이면 지금"""
+        if age is None:
+            return cls(value)
+        return cls(value, monotonic=time.monotonic() - age)
+    
+    
+    def __repr__(self):
+        return f"Reading({self.value!r}, wall={self.wall:.3f})"
+
+
+class SensorSnapshot:
+    """
+    여러 센서의 측정값 묶음
+    
+    사용 예:
+        snapshot = SensorSnapshot()
+        snapshot.add('temperature', 25.3)
+        snapshot.add_reading('co2', Reading.from_age(420, age=1.2))
+        payload = snapshot.to_payload(max_skew=2.0)
+    """
+    
+    def __init__(self, fields=SENSOR_FIELDS):
+        """
+        Args:
+            fields (iterable): payload에 항상 포함할 필드 목록
+        """
+        self.fields = tuple(fields)
+        self.readings = {}
+        self.created = time.time()  # 스냅샷 생성 시각 (Unix timestamp)
+        self.health = None          # 센서별 회로 차단기 상태 {이름: status dict} (modules/breaker.py)
+    
+    
+    def add(self, field, value, monotonic=None, wall=None):
+        """
+        측정값 추가 (시각을 주지 않으면 지금 캡처한 것으로 기록)
+        """
+        self.readings[field] = Reading(value, monotonic=monotonic, wall=wall)
+    
+    
+    def add_reading(self, field, reading):
+        """
+        Reading 객체 추가
+        """
+        self.readings[field] = reading
+    
+    
+    def _valid(self):
+        """값이 있는 측정값 목록"""
+        return [r for r in self.readings.values() if r.value is not None]
+    
+    
+    def skew(self):
+        """
+        측정 시각 차이
+        
+        Returns:
+            float: 가장 먼저/나중에 캡처된 값 사이 시간 (초)
+                   값이 없으면 0.0
+        """
+        valid = self._valid()
+        if not valid:
+            return 0.0
+        times = [r.monotonic for r in valid]
+        return max(times) - min(times)
+    
+    
+    def is_coherent(self, max_skew):
+        """
+        한 시점의 스냅샷으로 볼 수 있는지 확인
+        
+        Args:
+            max_skew (float): 허용 시각 차이 (초)
+        
+        Returns:
+            bool: skew()가 max_skew 이하이면 True
+        """
+        return self.skew() <= max_skew
+    
+    
+    def values(self):
+        """
+        필드별 값만 반환
+        
+        Returns:
+            dict: {필드: 값}, 인스턴스 필드는 {'instances': {인스턴스: {필드: 값}}}로 묶음
+        """
+        data = dict.fromkeys(self.fields)
+        for field, reading in self.readings.items():
+            instance, name = split_field(field)
+            if instance is not None:
+                data.setdefault('instances', {}).setdefault(instance, {})[name] = reading.value
+            else:
+                data[field] = reading.value
+        return data
+    
+    
+    def to_payload(self, max_skew=None, drop_stale=False):
+        """
+        MQTT 전송용 dict 생성
+        
+        Args:
+            max_skew (float, optional): 허용 시각 차이 (초). 없으면 검사하지 않음
+            drop_stale (bool): True면 가장 최근 값보다 max_skew 넘게 오래된 값을 None으로
+                               바꿔 남은 값들이 항상 coherent 하도록 함
+        
+        Returns:
+            dict: {
+                'temperature': float, ...       # 필드별 값
+                'instances': {인스턴스: {필드: 값}},  # 같은 타입 센서가 여럿일 때
+                'timestamp': float,             # 스냅샷 생성 시각
+                'readingTimes': {필드: float},  # 필드별 캡처 시각 (Unix timestamp, 값이 있는 필드만)
+                'skew': float,                  # 캡처 시각 차이 (초)
+                'coherent': bool,               # max_skew 이내 여부 (max_skew 지정 시)
+                'health': {센서: 상태},          # 'ok' / 'degraded' / 'open' / 'probing' (health 설정 시)
+                'faults': {센서: {'error', 'failures', 'retryIn'}}   # 정상이 아닌 센서만
+            }
+        
+        readingTimes는 인스턴스 값도 평평한 "인스턴스.필드" 키를 씁니다.
+            {'temperature': 24.3, 'instances': {'bed2': {'temperature': 24.1, 'vpd': 0.9}},
+             'readingTimes': {'temperature': 1700000000.1, 'bed2.temperature': 1700000000.3,
+                              'bed2.vpd': 1700000000.3}}
+        instances[인스턴스][필드]의 캡처 시각은 readingTimes[인스턴스 + '.' + 필드]이며,
+        payload를 거르거나 바꾸는 쪽(modules/deadband.py, modules/codec.py, modules/batch.py)도
+        이 형식을 그대로 유지합니다 (split_field()로 키를 나눔).
+        """
+        readings = dict(self.readings)
+        
+        if max_skew is not None and drop_stale:
+            valid = self._valid()
+            if valid:
+                newest = max(r.monotonic for r in valid)
+                for field, reading in readings.items():
+                    if reading.value is not None and newest - reading.monotonic > max_skew:
+                        readings[field] = Reading(None, monotonic=reading.monotonic)
+        
+        snapshot = SensorSnapshot(self.fields)
+        snapshot.readings = readings
+        snapshot.created = self.created
+        
+        payload = snapshot.values()
+        payload['timestamp'] = self.created
+        payload['readingTimes'] = {
+            field: round(reading.wall, 3)
+            for field, reading in readings.items()
+            if reading.value is not None
+        }
+        payload['skew'] = round(snapshot.skew(), 3)
+        
+        if max_skew is not None:
+            payload['coherent'] = snapshot.is_coherent(max_skew)
+        
+        if self.health:
+            payload['health'] = {name: status['state'] for name, status in self.health.items()}
+            faults = {
+                name: {k: v for k, v in status.items() if k != 'state'}
+                for name, status in self.health.items() if status['state'] != 'ok'
+            }
+            if faults:
+                payload['faults'] = faults
+        
+        return payload
+
+
+# ==================== 테스트 ====================
+
+if __name__ == "__main__":
+    print("=== 센서 스냅샷 테스트 ===\n")
+    
+    snapshot = SensorSnapshot()
+    snapshot.add('temperature', 25.3)
+    time.sleep(0.07)
+    snapshot.add('humidity', 61.2)
+    snapshot.add_reading('co2', Reading.from_age(420, age=12.0))
+    
+    print(f"skew: {snapshot.skew():.3f}초")
+    print(f"coherent (0.5초): {snapshot.is_coherent(0.5)}")
+    print(f"payload: {snapshot.to_payload(max_skew=0.5)}")
+    print(f"payload (drop_stale): {snapshot.to_payload(max_skew=0.5, drop_stale=True)}")
+    
+    snapshot.add(instance_field('bed2', 'temperature'), 24.1)
+    payload = snapshot.to_payload()
+    print(f"instances: {payload['instances']}")
+    print(f"readingTimes: {payload['readingTimes']}")
\ No newline at end of file
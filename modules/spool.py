@@ -0,0 +1,383 @@
+"""
+MQTT 저장 후 전송(store-and-forward) 스풀 모듈
+
+온실 Wi-Fi가 몇 시간씩 끊기면 그동안의 센서 데이터, 상태, 이미지 메시지가 모두 사라집니다.
+보내지 못한 메시지를 디스크(SQLite)에 쌓아 두었다가, 다시 연결되면
+오래된 것부터 drain_rate(메시지/초)로 나눠 보냅니다. 실시간 메시지는 그동안에도 바로 나갑니다.
+
+- 크기 제한: max_bytes / max_messages를 넘으면 가장 오래된 메시지부터 버림
+- 전원이 나가도 안전: 메시지마다 트랜잭션으로 기록 (synchronous=FULL)
+- 보낸 메시지는 브로커가 받았다고 확인한 뒤에만 지움 (QoS 1로 다시 발행, PUBACK 대기)
+  확인 전에 끊기면 다음 연결에서 다시 보내므로 중복될 수 있음 (at-least-once)
+
+pending(topic)으로 토픽별 대기 메시지가 있는지 알 수 있어, 순서가 중요한 토픽(센서 데이터)은
+대기 메시지가 남아 있는 동안 실시간 메시지도 스풀 뒤에 붙여 순서를 지킬 수 있습니다.
+
+대기 메시지 수/크기, 가장 오래된 메시지의 나이, 전송 속도는
+성능 지표(spool.*)로 발행됩니다 (modules/metrics.py).
+"""
+
+import sqlite3
+import threading
+import time
+
+from config import SPOOL_MAX_BYTES, SPOOL_MAX_MESSAGES, SPOOL_DRAIN_RATE, SPOOL_DRAIN_BATCH
+from modules import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    topic TEXT NOT NULL,
+    qos INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+"""
+
+# 발행 확인(PUBACK) 대기 시간 (초)
+ACK_TIMEOUT = 10.0
+
+
+class Spool:
+    """
+    디스크 메시지 대기열 (오래된 것부터)
+    
+    사용 예:
+        spool = Spool("./mqtt_spool.db")
+        spool.put(topic, message, qos=1)            # 보내지 못한 메시지
+        spool.start_drain(publish, is_connected)    # 연결되면 알아서 전송
+    """
+    
+    def __init__(self, path, max_bytes=SPOOL_MAX_BYTES, max_messages=SPOOL_MAX_MESSAGES):
+        """
+        Args:
+            path (str): 스풀 파일 경로 (없으면 생성)
+            max_bytes (int): 최대 payload 합계 (바이트)
+            max_messages (int): 최대 메시지 수
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        
+        self.count, self.bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM messages"
+        ).fetchone()
+        # 토픽별 대기 메시지 수
+        self._topics = dict(self._conn.execute("SELECT topic, COUNT(*) FROM messages GROUP BY topic"))
+        self.drain_rate = 0.0   # 최근 묶음의 실제 전송 속도 (메시지/초)
+        self.dropped = 0        # 가득 차서 버린 메시지 수 (누적)
+        self._full = False      # 가득 참 경고를 이미 출력했는지
+        
+        self._spooled = metrics.counter('spool.spooled')
+        self._drained = metrics.counter('spool.drained')
+        self._dropped = metrics.counter('spool.dropped')
+        metrics.gauge('spool.depth', lambda: self.count)
+        metrics.gauge('spool.bytes', lambda: self.bytes)
+        metrics.gauge('spool.oldest_age', self.oldest_age)
+        metrics.gauge('spool.drain_rate', lambda: round(self.drain_rate, 1))
+        
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+    
+    
+    # ==================== 대기열 ====================
+    
+    def put(self, topic, payload, qos=0):
+        """
+        메시지 저장 (제한을 넘으면 가장 오래된 메시지를 버림)
+        
+        Args:
+            topic (str): MQTT 토픽
+            payload (str | bytes): 메시지
+            qos (int): 원래 QoS
+        """
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO messages (created, topic, qos, payload) VALUES (?, ?, ?, ?)",
+                    (time.time(), topic, qos, payload)
+                )
+            self.count += 1
+            self.bytes += len(payload)
+            self._topics[topic] = self._topics.get(topic, 0) + 1
+            dropped = self._trim()
+        
+        self._spooled.inc()
+        if dropped:
+            self.dropped += dropped
+            self._dropped.inc(dropped)
+            if not self._full:
+                self._full = True
+                print(f"⚠ 스풀 가득 참 ({self.count}개, {self.bytes} bytes): 오래된 메시지부터 버림")
+        self._wakeup.set()
+    
+    
+    def _trim(self):
+        """
+        제한을 넘은 만큼 오래된 메시지 삭제 (락 안에서 호출)
+        
+        Returns:
+            int: 삭제한 메시지 수
+        """
+        if self.count <= self.max_messages and self.bytes <= self.max_bytes:
+            return 0
+        
+        count, size = self.count, self.bytes
+        last_id = None
+        removed = {}
+        while count > self.max_messages or size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT id, LENGTH(payload), topic FROM messages WHERE id > ? ORDER BY id LIMIT 256",
+                (last_id or 0,)
+            ).fetchall()
+            if not rows:
+                break
+            for message_id, length, topic in rows:
+                if count <= self.max_messages and size <= self.max_bytes:
+                    break
+                last_id = message_id
+                count -= 1
+                size -= length
+                removed[topic] = removed.get(topic, 0) + 1
+        
+        if last_id is not None:
+            with self._conn:
+                self._conn.execute("DELETE FROM messages WHERE id <= ?", (last_id,))
+            self.count, self.bytes = count, size
+            for topic, n in removed.items():
+                self._forget(topic, n)
+        return sum(removed.values())
+    
+    
+    def _forget(self, topic, n=1):
+        """토픽별 대기 수에서 n개 빼기 (락 안에서 호출)"""
+        left = self._topics.get(topic, 0) - n
+        if left > 0:
+            self._topics[topic] = left
+        else:
+            self._topics.pop(topic, None)
+    
+    
+    def peek(self, limit):
+        """
+        가장 오래된 메시지 limit개
+        
+        Returns:
+            list: [(id, topic, payload, qos), ...]
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, topic, payload, qos FROM messages ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+    
+    
+    def remove(self, messages):
+        """
+        보낸 메시지 삭제
+        
+        Args:
+            messages (list): peek()이 돌려준 항목 중 보낸 것
+        """
+        if not messages:
+            return
+        
+        with self._lock:
+            with self._conn:
+                for message in messages:
+                    # 보내는 동안 _trim()으로 이미 지워진 메시지는 세지 않음
+                    if self._conn.execute("DELETE FROM messages WHERE id = ?", (message[0],)).rowcount:
+                        self.count -= 1
+                        self.bytes -= len(message[2])
+                        self._forget(message[1])
+            self._full = False
+    
+    
+    def pending(self, topic):
+        """
+        토픽의 대기 메시지 수 (보내는 중인 것 포함, 브로커가 확인해야 줄어듦)
+        """
+        return self._topics.get(topic, 0)
+    
+    
+    def oldest_age(self):
+        """
+        가장 오래된 대기 메시지의 나이 (초), 비어 있으면 0
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(created) FROM messages").fetchone()
+        return round(time.time() - row[0], 1) if row[0] is not None else 0.0
+    
+    
+    def get_stats(self):
+        """
+        Returns:
+            dict: {'depth', 'bytes', 'dropped', 'oldestAge', 'drainRate'}
+        """
+        return {
+            'depth': self.count,
+            'bytes': self.bytes,
+            'dropped': self.dropped,
+            'oldestAge': self.oldest_age(),
+            'drainRate': round(self.drain_rate, 1)
+        }
+    
+    
+    # ==================== 전송 ====================
+    
+    def start_drain(self, publish, is_connected, rate=SPOOL_DRAIN_RATE, batch=SPOOL_DRAIN_BATCH):
+        """
+        백그라운드 전송 시작
+        
+        Args:
+            publish (callable): publish(topic, payload, qos) → paho MQTTMessageInfo
+            is_connected (callable): 연결 여부
+            rate (float): 최대 전송 속도 (메시지/초)
+            batch (int): 한 번에 발행하고 확인을 기다릴 메시지 수
+        """
+        if self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._drain_loop,
+            args=(publish, is_connected, rate, max(int(batch), 1)),
+            name="mqtt-spool",
+            daemon=True
+        )
+        self._thread.start()
+    
+    
+    def _drain_batch(self, publish, batch):
+        """
+        가장 오래된 메시지 batch개를 발행하고, 확인된 것만 삭제
+        
+        Returns:
+            int: 보낸 메시지 수
+        """
+        messages = self.peek(batch)
+        if not messages:
+            return 0
+        
+        published = []
+        for message in messages:
+            _, topic, payload, qos = message
+            # 확인을 받고 지우도록 QoS 1 이상으로 발행
+            info = publish(topic, payload, max(qos, 1))
+            if info.rc != 0:
+                break
+            published.append((message, info))
+        
+        sent = []
+        deadline = time.monotonic() + ACK_TIMEOUT
+        for message, info in published:
+            try:
+                info.wait_for_publish(max(deadline - time.monotonic(), 0.0))
+            except (RuntimeError, ValueError):
+                pass
+            if info.is_published():
+                sent.append(message)
+        
+        self.remove(sent)
+        self._drained.inc(len(sent))
+        return len(sent)
+    
+    
+    def _drain_loop(self, publish, is_connected, rate, batch):
+        while not self._stop.is_set():
+            if not self.count or not is_connected():
+                self._wakeup.wait(1.0)
+                self._wakeup.clear()
+                self.drain_rate = 0.0
+                continue
+            
+            started = time.monotonic()
+            try:
+                sent = self._drain_batch(publish, batch)
+            except Exception as e:
+                print(f"✗ 스풀 전송 오류: {e}")
+                sent = 0
+            
+            if not sent:
+                # 발행이 안 되거나 확인이 안 옴 → 연결 상태가 바뀔 때까지 잠시 쉼
+                self._stop.wait(1.0)
+                continue
+            
+            # 전송 속도 제한 (실시간 메시지가 밀리지 않게)
+            delay = started + sent / rate - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            self.drain_rate = sent / (time.monotonic() - started)
+            
+            if not self.count:
+                print("✓ 스풀 전송 완료 (대기 메시지 없음)")
+    
+    
+    def close(self):
+        """
+        전송 중지 후 닫기 (남은 메시지는 파일에 남아 다음 실행에서 보냄)
+        """
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=ACK_TIMEOUT + 1.0)
+            self._thread = None
+        
+        with self._lock:
+            self._conn.close()
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    import os
+    import tempfile
+    
+    print("=== MQTT 스풀 테스트 ===\n")
+    
+    path = os.path.join(tempfile.gettempdir(), "spool_test.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    
+    class _Info:
+        rc = 0
+        
+        def wait_for_publish(self, timeout=None):
+            pass
+        
+        def is_published(self):
+            return True
+    
+    delivered = []
+    
+    def fake_publish(topic, payload, qos):
+        delivered.append(topic)
+        return _Info()
+    
+    spool = Spool(path, max_messages=500)
+    for i in range(600):
+        spool.put("farm/test/sensor", f'{{"n": {i}}}', qos=0)
+    print(f"저장: {spool.get_stats()}")
+    
+    online = threading.Event()
+    spool.start_drain(fake_publish, online.is_set, rate=1000, batch=50)
+    time.sleep(0.2)
+    print(f"연결 전 전송: {len(delivered)}개")
+    
+    online.set()
+    time.sleep(2.0)
+    print(f"연결 후 전송: {len(delivered)}개, 남은 것 {spool.get_stats()}")
+    spool.close()
+    
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
\ No newline at end of file
@@ -0,0 +1,411 @@
+"""
+로컬 시계열 저장소 모듈 - SQLite(WAL) + 묶음 쓰기
+
+센서 값은 MQTT로 한 번 발행하면 끝이라, 브로커가 끊겨 있던 동안의 값은 남지 않습니다.
+이 모듈은 모든 샘플을 기기의 SQLite 파일에 저장해 나중에 구간 조회할 수 있게 합니다.
+
+- 수집 쪽(스케줄러 워커, 센서 루프)은 메모리 대기열에 덧붙이기만 하고 바로 돌아갑니다.
+- 쓰기 스레드가 commit_interval마다(또는 batch_size개가 모이면) 대기열 전체를
+  트랜잭션 하나로 넣습니다 (group commit). SD 카드 쓰기/fsync 횟수가 샘플 수와 무관해집니다.
+- ADC 스트리밍 샘플은 쓰기 스레드가 링 버퍼에서 직접 가져옵니다 (MCP3008.read_since()).
+  스트리밍 스레드는 저장소를 전혀 기다리지 않습니다.
+- 대기열이 max_pending을 넘으면(SD 카드가 멈춘 경우 등) 가장 오래된 샘플부터 버리고 셉니다.
+
+테이블:
+    series(id, name)                         # 필드 이름 ('temperature', 'bed2.vpd', 'adc.0.0.1' 등)
+    samples(series, ts, value)               # 기본 키 (series, ts) → 센서별 시간 구간 조회
+
+WAL 모드라 쓰는 동안에도 다른 연결에서 query()로 읽을 수 있습니다.
+
+사용 예:
+    from modules import store
+    store.start("./sensor_store.db")
+    store.current.add('temperature', 24.3)
+    rows = store.current.query('temperature', start=time.time() - 3600)
+    store.stop()
+"""
+
+import sqlite3
+import threading
+import time
+
+from config import STORE_COMMIT_INTERVAL, STORE_BATCH_SIZE, STORE_MAX_PENDING, STORE_RETENTION_DAYS
+from modules import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    series INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    value REAL,
+    PRIMARY KEY (series, ts)
+) WITHOUT ROWID;
+"""
+
+# 오래된 샘플 정리 주기 (초)
+PRUNE_INTERVAL = 3600
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL에서는 NORMAL이면 커밋마다 fsync하지 않음 (전원이 나가면 마지막 체크포인트 이후 일부만 잃음)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class TimeSeriesStore:
+    """
+    SQLite 시계열 저장소
+    """
+    
+    def __init__(self, path, commit_interval=STORE_COMMIT_INTERVAL, batch_size=STORE_BATCH_SIZE,
+                 max_pending=STORE_MAX_PENDING, retention_days=STORE_RETENTION_DAYS):
+        """
+        Args:
+            path (str): 데이터베이스 파일 경로 (없으면 생성)
+            commit_interval (float): 묶어서 쓰는 주기 (초)
+            batch_size (int): 대기열이 이만큼 차면 주기 전에 씀
+            max_pending (int): 대기열 최대 샘플 수 (넘으면 오래된 것부터 버림)
+            retention_days (float, optional): 이보다 오래된 샘플 삭제 (일), None이면 보관
+        """
+        self.path = path
+        self.commit_interval = commit_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.retention_days = retention_days
+        
+        self.rows_written = 0
+        self.dropped = 0
+        
+        self._conn = _connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._series = dict(self._conn.execute("SELECT name, id FROM series"))
+        
+        self._lock = threading.Lock()
+        self._pending = []          # [(이름, ts, 값), ...]
+        self._streams = []          # [[adc, 커서], ...] 쓰기 스레드가 가져갈 ADC 스트림
+        self._pruned = 0.0
+        
+        self._rows = metrics.counter('store.rows')
+        self._drops = metrics.counter('store.dropped')
+        self._commit_latency = metrics.histogram('store.commit')
+        metrics.gauge('store.pending', lambda: len(self._pending))
+        
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._writer_loop, name="store", daemon=True)
+        self._thread.start()
+    
+    
+    # ==================== 수집 (어느 스레드에서나, 바로 돌아옴) ====================
+    
+    def _extend(self, rows):
+        with self._lock:
+            self._pending.extend(rows)
+            over = len(self._pending) - self.max_pending
+            if over > 0:
+                del self._pending[:over]
+                self.dropped += over
+            full = len(self._pending) >= self.batch_size
+        
+        if over > 0:
+            self._drops.inc(over)
+        if full:
+            self._wakeup.set()
+    
+    
+    def _extend_front(self, rows):
+        """쓰지 못한 샘플을 대기열 앞에 되돌림 (넘치면 가장 오래된 것부터 버림)"""
+        with self._lock:
+            self._pending[:0] = rows
+            over = len(self._pending) - self.max_pending
+            if over > 0:
+                del self._pending[:over]
+                self.dropped += over
+        
+        if over > 0:
+            self._drops.inc(over)
+    
+    
+    def add(self, name, value, wall=None):
+        """
+        샘플 하나 추가
+        
+        Args:
+            name (str): 필드 이름
+            value (float): 값
+            wall (float, optional): 측정 시각 (Unix timestamp), 없으면 지금
+        """
+        self._extend([(name, time.time() if wall is None else wall, value)])
+    
+    
+    def add_readings(self, readings):
+        """
+        {필드: Reading} 추가 (스케줄러 리스너로 등록 가능)
+        
+        숫자가 아닌 값과 None은 건너뜁니다.
+        """
+        self._extend([
+            (field, reading.wall, reading.value)
+            for field, reading in readings.items()
+            if isinstance(reading.value, (int, float))
+        ])
+    
+    
+    def add_many(self, name, timestamps, values):
+        """
+        같은 필드의 샘플 여러 개 추가 (list 또는 numpy 배열)
+        """
+        if hasattr(timestamps, 'tolist'):
+            timestamps = timestamps.tolist()
+        if hasattr(values, 'tolist'):
+            values = values.tolist()
+        self._extend([(name, ts, value) for ts, value in zip(timestamps, values)])
+    
+    
+    def add_stream(self, adc):
+        """
+        MCP3008 스트리밍 샘플 저장 (쓰기 스레드가 commit 때마다 새 샘플을 가져감)
+        
+        필드 이름은 'adc.{bus}.{device}.{채널}'이고 값은 ADC 코드(0~1023)입니다.
+        
+        Args:
+            adc (MCP3008): 스트리밍 중인 ADC
+        """
+        with self._lock:
+            # 등록한 뒤의 샘플부터 저장
+            self._streams.append([adc, adc.get_stream_stats()['sweeps']])
+    
+    
+    # ==================== 쓰기 스레드 ====================
+    
+    def _drain_streams(self):
+        """
+        ADC 링 버퍼에서 새 샘플을 대기열로 옮김
+        """
+        with self._lock:
+            streams = list(self._streams)
+        
+        for stream in streams:
+            adc, cursor = stream
+            cursor, times, codes, lost = adc.read_since(cursor)
+            stream[1] = cursor
+            
+            if lost:
+                self.dropped += lost
+                self._drops.inc(lost)
+            for channel, values in codes.items():
+                self.add_many(f"adc.{adc.bus}.{adc.device}.{channel}", times, values)
+    
+    
+    def _series_id(self, name):
+        """필드 이름 → series id (없으면 생성, 쓰기 스레드에서만 호출)"""
+        series = self._series.get(name)
+        if series is None:
+            cursor = self._conn.execute("INSERT INTO series (name) VALUES (?)", (name,))
+            series = self._series[name] = cursor.lastrowid
+        return series
+    
+    
+    def flush(self):
+        """
+        대기열 전체를 트랜잭션 하나로 쓰기
+        
+        Returns:
+            int: 쓴 샘플 수
+        """
+        self._drain_streams()
+        
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        
+        start = time.perf_counter()
+        try:
+            with self._conn:
+                series_id = self._series_id
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO samples (series, ts, value) VALUES (?, ?, ?)",
+                    [(series_id(name), ts, value) for name, ts, value in rows]
+                )
+        except Exception:
+            # 롤백된 series id는 버리고, 샘플은 대기열 앞에 되돌려 다음 주기에 다시 씀
+            self._series = dict(self._conn.execute("SELECT name, id FROM series"))
+            self._extend_front(rows)
+            raise
+        self._commit_latency.observe(time.perf_counter() - start)
+        
+        self.rows_written += len(rows)
+        self._rows.inc(len(rows))
+        return len(rows)
+    
+    
+    def prune(self, now=None):
+        """
+        retention_days보다 오래된 샘플 삭제
+        
+        Returns:
+            int: 삭제한 샘플 수
+        """
+        if not self.retention_days:
+            return 0
+        
+        cutoff = (time.time() if now is None else now) - self.retention_days * 86400
+        deleted = 0
+        with self._conn:
+            for series in list(self._series.values()):
+                cursor = self._conn.execute("DELETE FROM samples WHERE series = ? AND ts < ?", (series, cutoff))
+                deleted += cursor.rowcount
+        return deleted
+    
+    
+    def _writer_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            
+            try:
+                self.flush()
+                
+                if time.monotonic() - self._pruned >= PRUNE_INTERVAL:
+                    self._pruned = time.monotonic()
+                    deleted = self.prune()
+                    if deleted:
+                        print(f"✓ 저장소 정리: 오래된 샘플 {deleted}개 삭제")
+            except Exception as e:
+                print(f"✗ 저장소 쓰기 오류: {e}")
+    
+    
+    # ==================== 조회 ====================
+    
+    def query(self, name, start=None, end=None, limit=None):
+        """
+        필드 하나의 시간 구간 조회 (쓰기와 별도 연결이라 쓰는 중에도 읽을 수 있음)
+        
+        Args:
+            name (str): 필드 이름
+            start (float, optional): 시작 시각 (Unix timestamp, 포함)
+            end (float, optional): 끝 시각 (Unix timestamp, 미포함)
+            limit (int, optional): 최대 개수 (오래된 것부터)
+        
+        Returns:
+            list: [(ts, value), ...] 시간순
+        """
+        sql = ("SELECT ts, value FROM samples JOIN series ON samples.series = series.id "
+               "WHERE series.name = ? AND ts >= ? AND ts < ? ORDER BY ts")
+        params = [name, -1e300 if start is None else start, 1e300 if end is None else end]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+    
+    
+    def names(self):
+        """
+        저장된 필드 이름 목록
+        """
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            return [name for name, in conn.execute("SELECT name FROM series ORDER BY name")]
+        finally:
+            conn.close()
+    
+    
+    def close(self):
+        """
+        남은 샘플을 쓰고 닫기
+        """
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5.0)
+        
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+
+
+# ==================== 전역 저장소 ====================
+
+# 사용 중인 저장소, 저장하지 않으면 None
+current = None
+
+
+def start(path, **kwargs):
+    """
+    저장소 열기
+    
+    Args:
+        path (str): 데이터베이스 파일 경로
+        **kwargs: TimeSeriesStore 설정 (commit_interval 등)
+    
+    Returns:
+        TimeSeriesStore: 저장소
+    """
+    global current
+    
+    stop()
+    current = TimeSeriesStore(path, **kwargs)
+    print(f"✓ 시계열 저장소 열기: {path} (필드 {len(current._series)}개)")
+    return current
+
+
+def stop():
+    """
+    저장소 닫기 (열려 있지 않으면 아무것도 안 함)
+    """
+    global current
+    
+    ts_store, current = current, None
+    if ts_store is not None:
+        ts_store.close()
+        print(f"✓ 시계열 저장소 닫기: {ts_store.path} (샘플 {ts_store.rows_written}개 저장, {ts_store.dropped}개 버림)")
+
+
+# ==================== 테스트 ====================
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    
+    print("=== 시계열 저장소 테스트 ===\n")
+    
+    path = os.path.join(tempfile.gettempdir(), "store_test.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    
+    db = start(path, commit_interval=0.5)
+    
+    # 수집 쪽 비용 (ADC 스트리밍 1000Hz 10초 분량)
+    now = time.time()
+    started = time.perf_counter()
+    for i in range(10000):
+        db.add('adc.0.0.1', 500 + i % 7, now + i / 1000)
+    elapsed = time.perf_counter() - started
+    print(f"add() 비용: {elapsed / 10000 * 1e6:.2f}us/샘플")
+    
+    for i in range(60):
+        db.add('temperature', 20 + i / 10, now - 60 + i)
+    
+    time.sleep(1.0)
+    rows = db.query('temperature', start=now - 30)
+    print(f"구간 조회: {len(rows)}개, 처음 {rows[0]}, 마지막 {rows[-1]}")
+    print(f"필드: {db.names()}")
+    
+    stop()
+    print(f"파일 크기: {os.path.getsize(path)} bytes")
+    print(f"지표: {metrics.summary()['histograms'].get('store.commit')}")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
\ No newline at end of file
@@ -7,18 +7,37 @@
 - LightSensor: 조도 센서 (MCP3008 사용)
 - CO2Sensor: CO2 센서 (UART)
 - TDSSensor: TDS/EC 센서 (MCP3008 사용)
+
+드라이버는 처음 사용할 때 import 됩니다 (from sensors import LightSensor 등).
+쓰지 않는 센서의 하드웨어 라이브러리(adafruit_htu21d, spidev 등)는 불러오지 않습니다.
 """
 
-from .htu21d import HTU21DSensor
-from .mcp3008 import MCP3008
-from .light import LightSensor
-from .co2 import CO2Sensor
-from .tds import TDSSensor
+import importlib
+
+# 클래스 이름 → 드라이버 모듈 (지연 import)
+_DRIVERS = {
+    'HTU21DSensor': '.htu21d',
+    'MCP3008': '.mcp3008',
+    'get_adc': '.mcp3008',
+    'LightSensor': '.light',
+    'CO2Sensor': '.co2',
+    'TDSSensor': '.tds'
+}
+
+
+def __getattr__(name):
+    """sensors.<클래스> 접근 시 해당 드라이버 모듈만 import"""
+    if name in _DRIVERS:
+        module = importlib.import_module(_DRIVERS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # 패키지에서 import 가능한 클래스 목록
 __all__ = [
     'HTU21DSensor',
     'MCP3008', 
+    'get_adc',
     'LightSensor',
     'CO2Sensor',
     'TDSSensor'
@@ -0,0 +1,421 @@
+"""
+ADC 채널 캘리브레이션 모듈 - 다점 보정 곡선과 룩업 테이블
+
+채널별 보정 곡선(원시값 → 물리량 측정점 목록)과 보정 계수(K값 등)를
+JSON 파일에 저장합니다. 센서는 곡선을 1024칸 룩업 테이블로 미리 컴파일해 두고,
+읽을 때는 원시값 양옆의 두 칸을 선형 보간해서 바로 변환합니다 (오버샘플링 평균처럼 소수인 값).
+TDS처럼 온도 보정이 필요한 채널은 온도 축(1°C 간격)을 가진 2차원 테이블을 쓰고,
+온도도 양옆의 두 행 사이를 선형 보간합니다.
+
+보정값이 바뀌면(set_kvalue() 등) 등록된 리스너가 호출되어 테이블을 다시 만듭니다.
+
+오버샘플링/스트리밍으로 모인 원시값 배열은 lookup_many()로 한 번에 변환합니다.
+numpy가 있으면 테이블 인덱싱을 벡터 연산으로 하고, 없으면 같은 결과를 list로 돌려줍니다.
+
+파일 형식 (CALIBRATION_FILE):
+    {
+        "0": {"points": [[0, 0], [300, 120], [700, 800], [1023, 1000]]},
+        "1": {"kvalue": 1.0},
+        "0.1:1": {"kvalue": 1.05}
+    }
+    기본 칩(SPI_BUS/SPI_DEVICE)은 채널 번호, 다른 칩은 "버스.CE:채널"로 구분합니다 (channel_key()).
+"""
+
+import json
+import os
+import threading
+from array import array
+
+from config import CALIBRATION_FILE, SPI_BUS, SPI_DEVICE
+
+# numpy는 선택 사항 (배치 변환 가속)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 10비트 ADC 코드 수 (0~1023)
+ADC_CODES = 1024
+
+
+def code_positions(raws):
+    """
+    원시값 배열 → (아래 코드 인덱스, 위 코드 쪽 비율) 배열 (lookup()과 같은 보간/범위 제한, numpy 전용)
+    """
+    x = np.clip(np.asarray(raws, dtype=np.float64), 0, ADC_CODES - 1)
+    low = np.minimum(x.astype(np.intp), ADC_CODES - 2)
+    return low, x - low
+
+
+def channel_key(channel, bus=SPI_BUS, device=SPI_DEVICE):
+    """
+    캘리브레이션 저장 키
+    
+    기본 칩은 기존 파일과 호환되도록 채널 번호 그대로, 다른 칩은 "버스.CE:채널" 문자열입니다.
+    
+    Args:
+        channel (int): ADC 채널 번호
+        bus (int): SPI 버스 번호
+        device (int): SPI CE 번호
+    
+    Returns:
+        int | str: 저장 키
+    """
+    if (bus, device) == (SPI_BUS, SPI_DEVICE):
+        return channel
+    return f"{bus}.{device}:{channel}"
+
+
+def _parse_key(key):
+    return int(key) if key.isdigit() else key
+
+
+class CalibrationCurve:
+    """
+    다점 보정 곡선 (구간별 선형 보간)
+    
+    측정점 사이는 선형 보간, 범위 밖은 양 끝 구간의 기울기로 연장합니다.
+    """
+    
+    def __init__(self, points):
+        """
+        Args:
+            points (list): [(원시값, 물리량), ...] 측정점 2개 이상
+        """
+        points = sorted((float(x), float(y)) for x, y in points)
+        if len(points) < 2:
+            raise ValueError(f"보정 곡선에는 측정점이 2개 이상 필요합니다: {points}")
+        
+        self.xs = [p[0] for p in points]
+        self.ys = [p[1] for p in points]
+    
+    
+    def __call__(self, x):
+        """
+        곡선 값 계산
+        
+        Args:
+            x (float): 원시값
+        
+        Returns:
+            float: 보간된 물리량
+        """
+        xs, ys = self.xs, self.ys
+        
+        # x가 들어가는 구간 찾기 (범위 밖이면 양 끝 구간)
+        i = 1
+        while i < len(xs) - 1 and x > xs[i]:
+            i += 1
+        
+        x0, x1 = xs[i - 1], xs[i]
+        y0, y1 = ys[i - 1], ys[i]
+        
+        if x1 == x0:
+            return y1
+        return y0 + (x - x0) * (y1 - y0) / (x1 - x0)
+
+
+class LookupTable:
+    """
+    1024칸 룩업 테이블 (원시값 → 물리량)
+    """
+    
+    def __init__(self, func):
+        """
+        Args:
+            func (callable): func(raw) → 물리량. 0~1023 모든 코드에 대해 미리 계산
+        """
+        self.table = array('f', (func(raw) for raw in range(ADC_CODES)))
+        self._values = None  # numpy 사본 (lookup_many()에서 처음 만듦)
+    
+    
+    def values(self):
+        """
+        테이블 전체를 numpy 배열(float64)로 (numpy 전용)
+        """
+        if self._values is None:
+            self._values = np.frombuffer(self.table, dtype=np.float32).astype(np.float64)
+        return self._values
+    
+    
+    def lookup_many(self, raws):
+        """
+        원시값 배열 한 번에 변환
+        
+        Args:
+            raws (iterable): ADC 값 배열 (list, array, numpy 배열)
+        
+        Returns:
+            numpy.ndarray | list: 물리량 배열 (numpy가 없으면 list)
+        """
+        if NUMPY_AVAILABLE:
+            values = self.values()
+            low, frac = code_positions(raws)
+            return values[low] + (values[low + 1] - values[low]) * frac
+        return [self.lookup(raw) for raw in raws]
+    
+    
+    def lookup(self, raw):
+        """
+        원시값 변환
+        
+        Args:
+            raw (int | float): ADC 값 (오버샘플링 결합값처럼 소수면 양옆 두 코드 사이를 선형 보간)
+        
+        Returns:
+            float: 물리량
+        """
+        table = self.table
+        if raw <= 0:
+            return table[0]
+        if raw >= ADC_CODES - 1:
+            return table[ADC_CODES - 1]
+        
+        low = int(raw)
+        frac = raw - low
+        if not frac:
+            return table[low]
+        return table[low] + (table[low + 1] - table[low]) * frac
+
+
+class TemperatureLookupTable:
+    """
+    온도 축이 있는 룩업 테이블 (온도 행 × 1024칸)
+    
+    온도는 양옆의 두 행(기본 1°C 간격) 사이를 선형 보간합니다.
+    """
+    
+    def __init__(self, func, temp_min=0, temp_max=40, temp_step=1):
+        """
+        Args:
+            func (callable): func(raw, temperature) → 물리량
+            temp_min (float): 테이블 최저 온도 (°C)
+            temp_max (float): 테이블 최고 온도 (°C)
+            temp_step (float): 온도 간격 (°C)
+        """
+        self.temp_min = temp_min
+        self.temp_step = temp_step
+        self.rows = int(round((temp_max - temp_min) / temp_step)) + 1
+        self.tables = [
+            LookupTable(lambda raw, t=temp_min + row * temp_step: func(raw, t))
+            for row in range(self.rows)
+        ]
+        self._grid = None  # numpy (온도 행 × 1024) 배열, lookup_many()에서 처음 만듦
+    
+    
+    def lookup_many(self, raws, temperatures):
+        """
+        원시값 배열 한 번에 변환 (온도 보정 포함)
+        
+        Args:
+            raws (iterable): ADC 값 배열
+            temperatures (float | iterable): 온도 (°C) 하나 또는 raws와 같은 길이의 배열
+        
+        Returns:
+            numpy.ndarray | list: 물리량 배열 (numpy가 없으면 list)
+        """
+        if NUMPY_AVAILABLE:
+            if self._grid is None:
+                self._grid = np.stack([table.values() for table in self.tables])
+            
+            grid = self._grid
+            low, frac = code_positions(raws)
+            temps = np.broadcast_to(np.asarray(temperatures, dtype=np.float64), low.shape)
+            pos = np.clip((temps - self.temp_min) / self.temp_step, 0, self.rows - 1)
+            row = pos.astype(np.intp)
+            upper = np.minimum(row + 1, self.rows - 1)
+            
+            below = grid[row, low] + (grid[row, low + 1] - grid[row, low]) * frac
+            above = grid[upper, low] + (grid[upper, low + 1] - grid[upper, low]) * frac
+            return below + (above - below) * (pos - row)
+        
+        if isinstance(temperatures, (int, float)):
+            return [self.lookup(raw, temperatures) for raw in raws]
+        return [self.lookup(raw, t) for raw, t in zip(raws, temperatures)]
+    
+    
+    def lookup(self, raw, temperature):
+        """
+        원시값 변환 (온도 보정 포함)
+        
+        Args:
+            raw (int | float): ADC 값
+            temperature (float): 온도 (°C), 양옆 두 행 사이를 선형 보간 (범위 밖이면 양 끝 행 사용)
+        
+        Returns:
+            float: 물리량
+        """
+        pos = (temperature - self.temp_min) / self.temp_step
+        if pos <= 0:
+            return self.tables[0].lookup(raw)
+        if pos >= self.rows - 1:
+            return self.tables[self.rows - 1].lookup(raw)
+        
+        row = int(pos)
+        frac = pos - row
+        below = self.tables[row].lookup(raw)
+        if not frac:
+            return below
+        return below + (self.tables[row + 1].lookup(raw) - below) * frac
+
+
+class CalibrationStore:
+    """
+    채널별 캘리브레이션 저장소 (JSON 파일)
+    
+    사용 예:
+        store = get_calibration()
+        store.add_listener(1, sensor.rebuild_tables)
+        store.update_channel(1, kvalue=1.08)   # 저장 + 리스너 호출
+    """
+    
+    def __init__(self, path=CALIBRATION_FILE):
+        """
+        Args:
+            path (str): 캘리브레이션 파일 경로 (없으면 빈 설정으로 시작)
+        """
+        self.path = path
+        self.channels = {}
+        self._listeners = {}
+        self._lock = threading.Lock()
+        self.load()
+    
+    
+    def load(self):
+        """
+        파일에서 캘리브레이션 읽기
+        
+        파일이 없거나 깨졌으면 빈 설정을 사용합니다.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.channels = {_parse_key(ch): entry for ch, entry in data.items()}
+            print(f"✓ 캘리브레이션 로드: {self.path} (채널 {sorted(self.channels, key=str)})")
+        except FileNotFoundError:
+            self.channels = {}
+        except Exception as e:
+            print(f"⚠ 캘리브레이션 파일 읽기 실패 ({self.path}): {e}")
+            self.channels = {}
+    
+    
+    def save(self):
+        """
+        캘리브레이션을 파일에 저장
+        
+        임시 파일에 쓴 뒤 교체하므로 저장 중 전원이 나가도 기존 파일이 깨지지 않습니다.
+        """
+        data = {str(ch): entry for ch, entry in sorted(self.channels.items(), key=lambda item: str(item[0]))}
+        tmp_path = self.path + ".tmp"
+        
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    
+    def get_channel(self, channel):
+        """
+        채널 캘리브레이션 조회
+        
+        Returns:
+            dict: 채널 설정 (예: {'points': [...], 'kvalue': 1.0}), 없으면 빈 dict
+        """
+        return dict(self.channels.get(channel, {}))
+    
+    
+    def get_curve(self, channel):
+        """
+        채널의 다점 보정 곡선
+        
+        Returns:
+            CalibrationCurve: 측정점이 2개 이상이면 곡선, 아니면 None
+        """
+        points = self.channels.get(channel, {}).get('points')
+        if points and len(points) >= 2:
+            return CalibrationCurve(points)
+        return None
+    
+    
+    def update_channel(self, channel, save=True, **values):
+        """
+        채널 캘리브레이션 변경
+        
+        값을 바꾸고 파일에 저장한 뒤, 이 채널의 리스너(테이블 재생성)를 호출합니다.
+        
+        Args:
+            channel (int | str): ADC 채널 번호 (다른 칩이면 channel_key() 값)
+            save (bool): 파일에 저장할지 여부
+            **values: 바꿀 항목 (points=[[raw, value], ...], kvalue=1.0 등)
+        """
+        with self._lock:
+            self.channels.setdefault(channel, {}).update(values)
+            if save:
+                try:
+                    self.save()
+                except Exception as e:
+                    print(f"✗ 캘리브레이션 저장 실패 ({self.path}): {e}")
+            listeners = list(self._listeners.get(channel, ()))
+        
+        for callback in listeners:
+            callback()
+    
+    
+    def add_listener(self, channel, callback):
+        """
+        채널 캘리브레이션이 바뀔 때 호출할 함수 등록 (예: 센서의 rebuild_tables)
+        """
+        with self._lock:
+            self._listeners.setdefault(channel, []).append(callback)
+    
+    
+    def remove_listener(self, channel, callback):
+        """
+        등록한 리스너 제거
+        """
+        with self._lock:
+            listeners = self._listeners.get(channel, [])
+            if callback in listeners:
+                listeners.remove(callback)
+
+
+# ==================== 전역 저장소 ====================
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_calibration():
+    """
+    프로세스 전역 캘리브레이션 저장소 반환 (처음 호출 시 파일 로드)
+    
+    Returns:
+        CalibrationStore: 공유 저장소
+    """
+    global _store
+    
+    with _store_lock:
+        if _store is None:
+            _store = CalibrationStore(CALIBRATION_FILE)
+        return _store
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    import time
+    
+    print("=== 캘리브레이션 테스트 ===\n")
+    
+    # CdS 센서처럼 비선형인 다점 곡선
+    curve = CalibrationCurve([(0, 0), (300, 120), (700, 800), (1023, 1000)])
+    table = LookupTable(curve)
+    for raw in (0, 150, 300, 500, 700, 1023):
+        print(f"  raw {raw:4d} → {table.lookup(raw):.1f} lux")
+    
+    # 온도 축 테이블 컴파일 시간
+    start = time.perf_counter()
+    temp_table = TemperatureLookupTable(lambda raw, t: raw * (1.0 + 0.02 * (t - 25.0)))
+    print(f"\n온도 테이블 컴파일: {temp_table.rows}행, {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"  raw 512 @ 20°C → {temp_table.lookup(512, 20.0):.1f}")
\ No newline at end of file
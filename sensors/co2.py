@@ -1,120 +1,253 @@
 """
-CDS 조도 센서 모듈 (MCP3008 ADC 사용)
+CO2 센서 모듈 (UART 통신)
 
-CDS(광저항) 센서는 빛의 양에 따라 저항이 변하는 아날로그 센서입니다.
-MCP3008 ADC를 통해 아날로그 값을 디지털로 변환하여 읽습니다.
+NDIR 방식 CO2 센서(MH-Z19 계열)를 UART로 읽습니다.
+라즈베리파이의 UART(GPIO 14 TXD, GPIO 15 RXD)에 연결됩니다.
+
+9600bps에서 요청/응답 한 번에 수십 ms가 걸리므로, 백그라운드 스레드가
+주기적으로 측정 요청을 보내고 들어오는 프레임을 바로 파싱/체크섬 검사해
+마지막 정상 값을 캐시합니다. read_co2()는 캐시만 읽으므로 즉시 반환됩니다.
 """
 
-from .mcp3008 import MCP3008
-from config import SPI_BUS, SPI_DEVICE, ADC_LIGHT_CHANNEL
+import threading
+import time
+
+from config import CO2_SERIAL_PORT, CO2_BAUDRATE, CO2_POLL_INTERVAL, CO2_MAX_AGE
+from modules import recorder
+
+# 라이브러리 import 시도
+try:
+    import serial  # pyserial (UART 통신 라이브러리)
+    SERIAL_AVAILABLE = True
+except ImportError:
+    # 라이브러리 없으면 테스트 모드로 동작
+    SERIAL_AVAILABLE = False
+
+
+# MH-Z19 프로토콜
+FRAME_LENGTH = 9
+FRAME_START = 0xFF
+CMD_READ_CO2 = 0x86
+READ_COMMAND = bytes([0xFF, 0x01, CMD_READ_CO2, 0x00, 0x00, 0x00, 0x00, 0x00, 0x79])
+
+
+def checksum(frame):
+    """
+    MH-Z19 프레임 체크섬 계산
+    
+    Args:
+        frame (bytes): 9바이트 프레임
+    
+    Returns:
+        int: 체크섬 (byte 1~7 합의 2의 보수)
+    """
+    return (0xFF - (sum(frame[1:8]) & 0xFF) + 1) & 0xFF
 
 
-class LightSensor:
+class CO2Sensor:
     """
-    CDS 조도 센서 클래스
+    CO2 센서 클래스
     
-    MCP3008 ADC의 특정 채널에서 조도 값을 읽습니다.
+    백그라운드 스레드가 UART 프레임을 읽어 최신 CO2 값을 캐시합니다.
+    센서가 없으면 테스트용 더미 데이터를 반환합니다.
     """
     
-    def __init__(self, channel=ADC_LIGHT_CHANNEL):
+    def __init__(self, port=CO2_SERIAL_PORT, baudrate=CO2_BAUDRATE,
+                 poll_interval=CO2_POLL_INTERVAL, max_age=CO2_MAX_AGE):
         """
-        조도 센서 초기화
+        CO2 센서 초기화
+        
+        시리얼 포트를 열고 백그라운드 읽기 스레드를 시작합니다.
         
         Args:
-            channel (int): MCP3008 ADC 채널 번호 (기본값: config에서 가져옴)
+            port (str): 시리얼 포트 경로 (기본값: config에서 가져옴)
+            baudrate (int): 통신 속도 (기본값: config에서 가져옴)
+            poll_interval (float): 측정 요청 주기 (초)
+            max_age (float): 캐시 값 유효 시간 (초), 넘으면 read_co2()가 None 반환
         """
-        self.channel = channel  # ADC 채널 번호
-        self.adc = MCP3008(bus=SPI_BUS, device=SPI_DEVICE)  # MCP3008 객체 생성
+        self.serial = None
+        self.poll_interval = poll_interval
+        self.max_age = max_age
         
-        print(f"✓ 조도 센서 초기화 완료 (CH{channel})")
+        # 캐시 (백그라운드 스레드가 갱신)
+        self._ppm = None
+        self._updated = None  # 마지막 정상 프레임 수신 시각 (monotonic)
+        
+        # 통계
+        self.frames_ok = 0
+        self.checksum_errors = 0
+        
+        self._stop = threading.Event()
+        self._thread = None
+        
+        if SERIAL_AVAILABLE:
+            try:
+                # timeout: 읽기 스레드가 종료 신호를 확인할 수 있도록 짧게
+                self.serial = serial.Serial(port, baudrate=baudrate, timeout=0.1)
+                
+                self._thread = threading.Thread(
+                    target=self._reader_loop,
+                    name="co2-reader",
+                    daemon=True
+                )
+                self._thread.start()
+                
+                print(f"✓ CO2 센서 초기화 완료 ({port}, {baudrate}bps)")
+            except Exception as e:
+                print(f"✗ CO2 센서 초기화 실패: {e}")
+                self.serial = None
+        else:
+            print("⚠ CO2 센서 테스트 모드 (pyserial 라이브러리 없음)")
     
     
-    def read_raw(self):
+    def _reader_loop(self):
         """
-        ADC 원시 값 읽기
+        백그라운드 읽기 스레드
         
-        Returns:
-            int: ADC 값 (0~1023)
-                 - 0: 어두움 (0V)
-                 - 1023: 밝음 (3.3V)
+        poll_interval마다 측정 요청을 보내고, 들어온 바이트를 버퍼에 모아
+        완성된 프레임을 파싱합니다.
         """
-        return self.adc.read_adc(self.channel)
+        buffer = bytearray()
+        next_poll = time.monotonic()
+        
+        while not self._stop.is_set():
+            try:
+                now = time.monotonic()
+                if now >= next_poll:
+                    self.serial.write(READ_COMMAND)
+                    next_poll = now + self.poll_interval
+                
+                # 도착한 만큼 읽기 (없으면 timeout까지 대기)
+                chunk = self.serial.read(self.serial.in_waiting or 1)
+                if chunk:
+                    # 원시 데이터 기록 중이면 받은 바이트 그대로 기록 (modules/recorder.py)
+                    rec = recorder.current
+                    if rec is not None:
+                        rec.uart(chunk)
+                    
+                    buffer.extend(chunk)
+                    self._parse(buffer)
+            
+            except Exception as e:
+                print(f"✗ CO2 센서 읽기 오류: {e}")
+                buffer.clear()
+                self._stop.wait(1.0)
     
     
-    def read_voltage(self):
+    def _parse(self, buffer):
         """
-        전압 값 읽기
+        버퍼에서 완성된 프레임을 찾아 처리
         
-        Returns:
-            float: 전압 (V), 소수점 2자리
+        시작 바이트를 찾아 동기를 맞추고, 체크섬이 맞는 프레임만 캐시에 반영합니다.
+        처리한 바이트는 버퍼에서 제거합니다.
+        
+        Args:
+            buffer (bytearray): 수신 바이트 버퍼 (직접 수정됨)
         """
-        return self.adc.read_voltage(self.channel)
+        while len(buffer) >= FRAME_LENGTH:
+            # 프레임 시작(0xFF 0x86)까지 버리기
+            if buffer[0] != FRAME_START or buffer[1] != CMD_READ_CO2:
+                del buffer[0]
+                continue
+            
+            frame = bytes(buffer[:FRAME_LENGTH])
+            
+            if frame[8] != checksum(frame):
+                # 체크섬 오류: 시작 바이트만 버리고 다시 동기 맞추기
+                self.checksum_errors += 1
+                del buffer[0]
+                continue
+            
+            del buffer[:FRAME_LENGTH]
+            
+            # CO2 농도 = 상위 바이트 * 256 + 하위 바이트
+            self._ppm = frame[2] * 256 + frame[3]
+            self._updated = time.monotonic()
+            self.frames_ok += 1
     
     
-    def read_lux(self):
+    def get_age(self):
         """
-        조도 값 읽기 (Lux 단위로 변환)
+        캐시된 값의 나이
         
         Returns:
-            int: 조도 (lux)
-                 - 0~1000 lux 범위로 변환
-                 - 실제 센서 특성에 따라 보정 필요
+            float: 마지막 정상 프레임 이후 경과 시간 (초)
+                   아직 수신한 값이 없으면 None
+        """
+        if self._updated is None:
+            return None
+        return time.monotonic() - self._updated
+    
+    
+    def read_co2(self):
+        """
+        CO2 농도 읽기 (캐시)
         
-        Note:
-            현재는 간단한 선형 변환 사용
-            정확한 측정이 필요하면 센서 캘리브레이션 필요
+        UART 통신을 기다리지 않고 백그라운드 스레드가 받아 둔 값을 반환합니다.
+        
+        Returns:
+            int: CO2 농도 (ppm)
+                 센서 없으면 400 (테스트용)
+                 아직 값이 없거나 max_age보다 오래된 값이면 None
         """
-        raw_value = self.read_raw()
+        if self.serial is None:
+            # 테스트 모드: 더미 데이터 반환 (대기 중 CO2 농도)
+            return 400
         
-        if raw_value is not None:
-            # 간단한 선형 변환: 0~1023 → 0~1000 lux
-            # TODO: 실제 센서 특성에 맞게 변환식 조정
-            lux = int((raw_value / 1023.0) * 1000)
-            return lux
+        age = self.get_age()
+        if age is None or age > self.max_age:
+            return None
         
-        return None
+        return self._ppm
     
     
-    def read_percentage(self):
+    def read_all(self):
         """
-        조도를 백분율로 읽기
+        CO2 농도와 값의 나이를 한 번에 읽기
         
         Returns:
-            int: 조도 백분율 (0~100%)
-                 - 0%: 완전 어두움
-                 - 100%: 최대 밝기
+            dict: {
+                'co2': int,    # CO2 농도 (ppm)
+                'age': float   # 값의 나이 (초)
+            }
         """
-        raw_value = self.read_raw()
-        
-        if raw_value is not None:
-            # 백분율 변환: 0~1023 → 0~100%
-            percentage = int((raw_value / 1023.0) * 100)
-            return percentage
-        
-        return None
+        return {
+            'co2': self.read_co2(),
+            'age': self.get_age()
+        }
     
     
     def close(self):
         """
         센서 종료
         
-        MCP3008 SPI 통신을 닫습니다.
+        읽기 스레드를 멈추고 시리얼 포트를 닫습니다.
         """
-        self.adc.close()
+        self._stop.set()
+        
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        
+        if self.serial:
+            self.serial.close()
+            self.serial = None
+            print("✓ CO2 센서 시리얼 통신 종료")
 
 
 # 테스트 코드
 if __name__ == "__main__":
-    print("=== 조도 센서 테스트 ===\n")
+    print("=== CO2 센서 테스트 ===\n")
+    
+    # CO2 센서 객체 생성
+    sensor = CO2Sensor()
     
-    # 조도 센서 객체 생성
-    sensor = LightSensor()
+    # 첫 프레임 수신 대기
+    time.sleep(3)
     
-    # 다양한 방식으로 읽기
-    print(f"ADC 원시값: {sensor.read_raw()}")
-    print(f"전압: {sensor.read_voltage()}V")
-    print(f"조도: {sensor.read_lux()} lux")
-    print(f"백분율: {sensor.read_percentage()}%")
+    print(f"CO2: {sensor.read_co2()} ppm")
+    print(f"값의 나이: {sensor.get_age()}초")
+    print(f"정상 프레임: {sensor.frames_ok}, 체크섬 오류: {sensor.checksum_errors}")
     
     # 센서 종료
     sensor.close()
\ No newline at end of file
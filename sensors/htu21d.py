@@ -3,12 +3,33 @@ HTU21D 온습도 센서 모듈 (I2C 통신)
 
 HTU21D는 온도와 습도를 측정하는 디지털 센서입니다.
 I2C 통신을 사용하며, 라즈베리파이의 GPIO 2(SDA), GPIO 3(SCL)에 연결됩니다.
+
+여러 개를 쓸 때는 TCA9548A 멀티플렉서 채널마다 하나씩 연결하고
+mux_channel을 지정합니다 (sensors/tca9548a.py). I2C 통신 직전에 그 채널을 선택합니다.
+
+온도 변환은 최대 50ms, 습도 변환은 최대 16ms가 걸립니다.
+start_measurement()로 변환만 시작해 두고 다른 버스(SPI/UART) 작업을 한 뒤
+핸들의 result()로 결과를 가져오면 변환 시간을 겹쳐서 쓸 수 있습니다.
+
+adafruit_htu21d(0.11.x)의 temperature / relative_humidity 속성은 읽을 때마다
+변환 명령을 보내고 50ms / 16ms를 고정으로 기다리므로 쓰지 않습니다.
+measurement(what)로 변환을 시작하고, 완료 시각이 지나면 _data()로 원시 값만 읽어
+데이터시트 식으로 직접 변환합니다.
 """
 
+import threading
+import time
+from contextlib import nullcontext
+
+from config import HTU21D_ADDR, I2C_MUX_ADDR
+from modules import recorder
+from .tca9548a import get_i2c, get_mux
+
 # 라이브러리 import 시도
 try:
     from adafruit_htu21d import HTU21D  # HTU21D 센서 제어 라이브러리
-    import board  # 라즈베리파이 GPIO 핀 정의
+    from adafruit_htu21d import TEMPERATURE, HUMIDITY  # no-hold 측정 명령
+    import board  # 라즈베리파이 GPIO 핀 정의 (get_i2c()에서 사용)
     import busio  # I2C 통신 라이브러리
     I2C_AVAILABLE = True  # I2C 사용 가능 플래그
 except ImportError:
@@ -16,6 +37,69 @@ except ImportError:
     I2C_AVAILABLE = False
 
 
+# 데이터시트 기준 최대 변환 시간 (초): 온도 14비트 50ms, 습도 12비트 16ms
+CONVERSION_TIME = {
+    'temperature': 0.050,
+    'humidity': 0.016
+}
+
+
+def raw_to_temperature(raw):
+    """원시 16비트 값 → 온도 (°C), 하위 2비트(상태)는 버림 (데이터시트 식)"""
+    return (raw & 0xFFFC) * 175.72 / 65536.0 - 46.85
+
+
+def raw_to_humidity(raw):
+    """원시 16비트 값 → 상대습도 (%), 하위 2비트(상태)는 버림 (데이터시트 식)"""
+    return (raw & 0xFFFC) * 125.0 / 65536.0 - 6.0
+
+
+class HTU21DMeasurement:
+    """
+    진행 중인 HTU21D 변환 핸들
+    
+    HTU21DSensor.start_measurement()가 반환합니다.
+    result()를 호출하면 변환 완료까지 남은 시간만 기다린 뒤 값을 읽습니다.
+    """
+    
+    def __init__(self, sensor, kind, ready_at):
+        """
+        Args:
+            sensor (HTU21DSensor): 변환을 시작한 센서
+            kind (str): 'temperature' 또는 'humidity'
+            ready_at (float): 변환 완료 예상 시각 (monotonic)
+        """
+        self.sensor = sensor
+        self.kind = kind
+        self.ready_at = ready_at
+        self.done = False
+        self.value = None
+        self.captured = None  # 결과를 읽은 시각 (monotonic)
+    
+    
+    def ready(self):
+        """
+        변환 완료 여부 (예상 시각 기준)
+        
+        Returns:
+            bool: 결과를 기다리지 않고 읽을 수 있으면 True
+        """
+        return self.done or time.monotonic() >= self.ready_at
+    
+    
+    def result(self):
+        """
+        변환 결과 읽기
+        
+        Returns:
+            float: 온도 (°C) 또는 상대습도 (%), 소수점 1자리
+                   오류 시 None
+        """
+        if not self.done:
+            self.sensor._collect(self)
+        return self.value
+
+
 class HTU21DSensor:
     """
     HTU21D 온습도 센서 클래스
@@ -24,77 +108,233 @@ class HTU21DSensor:
     센서가 없으면 테스트용 더미 데이터를 반환합니다.
     """
     
-    def __init__(self):
+    def __init__(self, conversion_time=None, address=HTU21D_ADDR, mux_channel=None, mux_address=I2C_MUX_ADDR):
         """
         센서 초기화
         
         I2C 통신을 설정하고 HTU21D 센서 객체를 생성합니다.
         초기화 실패 시 테스트 모드로 동작합니다.
+        
+        Args:
+            conversion_time (dict, optional): 측정 종류별 변환 대기 시간 (초)
+                                              기본값은 데이터시트 최대값 (CONVERSION_TIME)
+            address (int): 센서 I2C 주소
+            mux_channel (int, optional): TCA9548A 채널 (0~7), None이면 멀티플렉서 없이 직접 연결
+            mux_address (int): 멀티플렉서 I2C 주소
         """
         self.sensor = None  # 센서 객체 초기화
+        self.address = address
+        self.mux = None  # 공유 TCA9548A (mux_channel을 지정했을 때)
+        self.mux_channel = mux_channel
+        self.conversion_time = dict(conversion_time or CONVERSION_TIME)
+        self._lock = threading.Lock()  # 한 번에 한 변환만 진행
+        self._pending = None  # 진행 중인 변환 핸들
+        self._pipelined = False  # 라이브러리로 변환 시작/결과 읽기를 나눌 수 있는지
+        
+        where = f"0x{address:02X}" if mux_channel is None else f"0x{address:02X}, MUX CH{mux_channel}"
         
         if I2C_AVAILABLE:
             try:
-                # I2C 통신 객체 생성 (SCL=GPIO3, SDA=GPIO2)
-                i2c = busio.I2C(board.SCL, board.SDA)
+                # 공유 I2C 통신 객체 (SCL=GPIO3, SDA=GPIO2)
+                i2c = get_i2c()
+                if mux_channel is not None:
+                    self.mux = get_mux(mux_address)
+                
+                # HTU21D 센서 객체 생성 (생성 시 소프트 리셋을 보내므로 채널 선택 후)
+                with self._bus():
+                    self.sensor = HTU21D(i2c, address)
                 
-                # HTU21D 센서 객체 생성
-                self.sensor = HTU21D(i2c)
+                # measurement()/_data()가 없는 라이브러리면 속성 읽기(변환 대기 포함)로 동작
+                self._pipelined = hasattr(self.sensor, 'measurement') and hasattr(self.sensor, '_data')
                 
-                print("✓ HTU21D 초기화 완료")
+                print(f"✓ HTU21D 초기화 완료 ({where})")
             except Exception as e:
-                print(f"✗ HTU21D 초기화 실패: {e}")
+                print(f"✗ HTU21D 초기화 실패 ({where}): {e}")
                 self.sensor = None
         else:
             print("⚠ HTU21D 테스트 모드 (라이브러리 없음)")
     
     
+    def _bus(self):
+        """
+        I2C 통신 구간 (멀티플렉서 뒤에 있으면 채널을 선택하고 붙잡아 둠)
+        """
+        if self.mux is None:
+            return nullcontext()
+        return self.mux.channel(self.mux_channel)
+    
+    
     def read_temperature(self):
         """
         온도 읽기
         
+        변환을 시작하고 완료될 때까지 기다립니다.
+        다른 작업과 겹치려면 start_measurement('temperature')를 사용하세요.
+        
         Returns:
             float: 섭씨 온도 (°C), 소수점 1자리
                    센서 없으면 25.0 (테스트용)
                    오류 시 None
         """
+        return self.start_measurement('temperature').result()
+    
+    
+    def read_humidity(self):
+        """
+        습도 읽기
+        
+        변환을 시작하고 완료될 때까지 기다립니다.
+        다른 작업과 겹치려면 start_measurement('humidity')를 사용하세요.
+        
+        Returns:
+            float: 상대습도 (%), 소수점 1자리
+                   센서 없으면 60.0 (테스트용)
+                   오류 시 None
+        """
+        return self.start_measurement('humidity').result()
+    
+    
+    def _read_temperature(self):
+        """
+        센서에서 온도 값 읽기 (변환이 끝난 뒤 호출)
+        """
         try:
             if self.sensor:
                 # 센서에서 온도 읽기
-                temp = float(self.sensor.temperature)
+                with self._bus():
+                    if self._pipelined:
+                        temp = raw_to_temperature(self._fetch())
+                    else:
+                        temp = float(self.sensor.temperature)
+                self._record('temperature', temp)
                 return round(temp, 1)  # 소수점 1자리 반올림
             else:
                 # 테스트 모드: 더미 데이터 반환
                 return 25.0
-                
+        
         except Exception as e:
             print(f"✗ 온도 읽기 오류: {e}")
             return None
     
     
-    def read_humidity(self):
+    def _read_humidity(self):
         """
-        습도 읽기
-        
-        Returns:
-            float: 상대습도 (%), 소수점 1자리
-                   센서 없으면 60.0 (테스트용)
-                   오류 시 None
+        센서에서 습도 값 읽기 (변환이 끝난 뒤 호출)
         """
         try:
             if self.sensor:
                 # 센서에서 습도 읽기
-                humidity = float(self.sensor.relative_humidity)
+                with self._bus():
+                    if self._pipelined:
+                        humidity = raw_to_humidity(self._fetch())
+                    else:
+                        humidity = float(self.sensor.relative_humidity)
+                self._record('humidity', humidity)
                 return round(humidity, 1)  # 소수점 1자리 반올림
             else:
                 # 테스트 모드: 더미 데이터 반환
                 return 60.0
-                
+        
         except Exception as e:
             print(f"✗ 습도 읽기 오류: {e}")
             return None
     
     
+    def _fetch(self):
+        """
+        시작해 둔 변환의 원시 값 읽기 (명령을 다시 보내지 않음, CRC는 라이브러리가 검사)
+        
+        라이브러리의 속성과 같이 읽은 뒤 진행 중인 측정 표시를 지워 다음 measurement()가
+        새 명령을 보내게 합니다. 실패해도 지워서 다른 종류의 변환을 막지 않게 합니다.
+        """
+        try:
+            return self.sensor._data()
+        finally:
+            self.sensor._measurement = 0
+    
+    
+    def _record(self, kind, value):
+        """
+        원시 데이터 기록 중이면 읽은 값 기록 (modules/recorder.py)
+        """
+        rec = recorder.current
+        if rec is not None:
+            rec.i2c(self.address, kind, value, self.mux_channel)
+    
+    
+    def start_measurement(self, kind):
+        """
+        변환 시작 (no-hold 모드)
+        
+        I2C 버스를 붙잡지 않고 변환 명령만 보낸 뒤 바로 반환합니다.
+        센서는 한 번에 하나만 변환할 수 있으므로, 이전 변환이 남아 있으면
+        그 결과를 먼저 읽어 정리합니다.
+        
+        Args:
+            kind (str): 'temperature' 또는 'humidity'
+        
+        Returns:
+            HTU21DMeasurement: 변환 핸들 (result()로 값 읽기)
+        """
+        if kind not in self.conversion_time:
+            raise ValueError(f"알 수 없는 측정 종류: {kind} (temperature/humidity)")
+        
+        with self._lock:
+            if self._pending is not None:
+                self._finish(self._pending)
+            
+            handle = HTU21DMeasurement(self, kind, time.monotonic())
+            
+            if self.sensor:
+                try:
+                    # no-hold 명령으로 변환만 시작 (결과는 _finish()에서 _data()로 읽음)
+                    if self._pipelined:
+                        command = TEMPERATURE if kind == 'temperature' else HUMIDITY
+                        with self._bus():
+                            self.sensor.measurement(command)
+                        handle.ready_at += self.conversion_time[kind]
+                    self._pending = handle
+                except Exception as e:
+                    print(f"✗ {kind} 변환 시작 오류: {e}")
+                    handle.captured = time.monotonic()
+                    handle.done = True
+            else:
+                # 테스트 모드: 바로 완료
+                self._pending = handle
+                self._finish(handle)
+            
+            return handle
+    
+    
+    def _collect(self, handle):
+        """
+        변환 결과 읽기 (HTU21DMeasurement.result()에서 호출)
+        """
+        with self._lock:
+            if not handle.done:
+                self._finish(handle)
+    
+    
+    def _finish(self, handle):
+        """
+        변환 완료를 기다려 결과를 핸들에 기록 (락을 잡은 상태에서 호출)
+        """
+        delay = handle.ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        
+        # 이미 시작된 변환이므로 명령을 다시 보내지 않고 원시 값만 읽음 (_fetch())
+        if handle.kind == 'temperature':
+            handle.value = self._read_temperature()
+        else:
+            handle.value = self._read_humidity()
+        
+        handle.captured = time.monotonic()
+        handle.done = True
+        if self._pending is handle:
+            self._pending = None
+    
+    
     def read_all(self):
         """
         온도와 습도를 한 번에 읽기
@@ -124,4 +364,9 @@ if __name__ == "__main__":
     
     # 전체 읽기 테스트
     print("\n전체 데이터:")
-    print(sensor.read_all())
\ No newline at end of file
+    print(sensor.read_all())
+    
+    # 파이프라인 읽기 테스트 (변환 시작 → 다른 작업 → 결과 읽기)
+    handle = sensor.start_measurement('temperature')
+    print(f"\n변환 완료 여부: {handle.ready()}")
+    print(f"파이프라인 온도: {handle.result()}°C")
\ No newline at end of file
@@ -3,10 +3,15 @@ CDS 조도 센서 모듈 (MCP3008 ADC 사용)
 
 CDS(광저항) 센서는 빛의 양에 따라 저항이 변하는 아날로그 센서입니다.
 MCP3008 ADC를 통해 아날로그 값을 디지털로 변환하여 읽습니다.
+
+조도 변환은 채널의 다점 보정 곡선을 룩업 테이블로 미리 계산해 사용합니다.
+보정 곡선이 없으면 0~1023 → 0~1000 lux 선형 변환입니다.
+스트리밍/오버샘플링 구간처럼 원시값이 많을 때는 convert_lux()로 배열째 변환합니다.
 """
 
-from .mcp3008 import MCP3008
-from config import SPI_BUS, SPI_DEVICE, ADC_LIGHT_CHANNEL
+from .mcp3008 import get_adc
+from .calibration import get_calibration, channel_key, CalibrationCurve, LookupTable, NUMPY_AVAILABLE
+from config import SPI_BUS, SPI_DEVICE, ADC_LIGHT_CHANNEL, ADC_OVERSAMPLING
 
 
 class LightSensor:
@@ -16,17 +21,64 @@ class LightSensor:
     MCP3008 ADC의 특정 채널에서 조도 값을 읽습니다.
     """
     
-    def __init__(self, channel=ADC_LIGHT_CHANNEL):
+    # 보정 곡선이 없을 때 사용하는 선형 변환 (ADC 값, lux)
+    DEFAULT_CURVE = [(0, 0), (1023, 1000)]
+    
+    def __init__(self, channel=ADC_LIGHT_CHANNEL, spi_bus=SPI_BUS, spi_device=SPI_DEVICE, oversampling=None):
         """
         조도 센서 초기화
         
         Args:
             channel (int): MCP3008 ADC 채널 번호 (기본값: config에서 가져옴)
+            spi_bus (int): MCP3008이 연결된 SPI 버스 번호
+            spi_device (int): MCP3008의 CE 번호
+            oversampling (dict, optional): 오버샘플링 설정 (samples, method, spacing, trim)
+                                           없으면 기본 칩은 ADC_OVERSAMPLING[channel]
         """
         self.channel = channel  # ADC 채널 번호
-        self.adc = MCP3008(bus=SPI_BUS, device=SPI_DEVICE)  # MCP3008 객체 생성
+        self.adc = get_adc(bus=spi_bus, device=spi_device)  # 공유 MCP3008 객체
+        self.calibration_key = channel_key(channel, spi_bus, spi_device)  # 칩별 캘리브레이션 키
+        self.last_reading = None  # 마지막 읽기의 품질 정보 (샘플 수, 스프레드)
+        
+        # 채널별 오버샘플링 설정 적용 (ADC_OVERSAMPLING은 기본 칩의 채널 기준)
+        if oversampling is None and self.calibration_key == channel:
+            oversampling = ADC_OVERSAMPLING.get(channel)
+        if oversampling:
+            self.adc.configure_channel(channel, **oversampling)
+        
+        # 캘리브레이션 룩업 테이블 (보정 곡선이 바뀌면 자동으로 재생성)
+        self.calibration = get_calibration()
+        self._lux_table = None
+        self.rebuild_tables()
+        self.calibration.add_listener(self.calibration_key, self.rebuild_tables)
+        
+        print(f"✓ 조도 센서 초기화 완료 (SPI{spi_bus}.{spi_device} CH{channel})")
+    
+    
+    def rebuild_tables(self):
+        """
+        보정 곡선으로 lux 룩업 테이블 다시 만들기
+        """
+        curve = self.calibration.get_curve(self.calibration_key)
+        if curve is None:
+            curve = CalibrationCurve(self.DEFAULT_CURVE)
+        
+        # 음수 lux 방지 (곡선을 범위 밖으로 연장한 경우)
+        self._lux_table = LookupTable(lambda raw: max(curve(raw), 0.0))
+    
+    
+    def set_curve(self, points):
+        """
+        다점 보정 곡선 설정
+        
+        Args:
+            points (list): [(ADC 값, 실제 lux), ...] 조도계로 측정한 점 2개 이상
         
-        print(f"✓ 조도 센서 초기화 완료 (CH{channel})")
+        Note:
+            캘리브레이션 파일에 저장되고 룩업 테이블이 다시 만들어집니다
+        """
+        self.calibration.update_channel(self.calibration_key, points=[list(p) for p in points])
+        print(f"✓ 조도 보정 곡선 설정: {len(points)}점")
     
     
     def read_raw(self):
@@ -34,11 +86,20 @@ class LightSensor:
         ADC 원시 값 읽기
         
         Returns:
-            int: ADC 값 (0~1023)
+            int: ADC 값 (0~1023), 오버샘플링 채널은 결합값 (float)
                  - 0: 어두움 (0V)
                  - 1023: 밝음 (3.3V)
+        
+        Note:
+            샘플 수와 스프레드는 self.last_reading에 남습니다
         """
-        return self.adc.read_adc(self.channel)
+        reading = self.adc.read_channel(self.channel)
+        self.last_reading = reading
+        
+        if reading is not None:
+            return reading['value']
+        
+        return None
     
     
     def read_voltage(self):
@@ -46,7 +107,7 @@ class LightSensor:
         전압 값 읽기
         
         Returns:
-            float: 전압 (V), 소수점 2자리
+            float: 전압 (V), 소수점 3자리
         """
         return self.adc.read_voltage(self.channel)
     
@@ -57,24 +118,55 @@ class LightSensor:
         
         Returns:
             int: 조도 (lux)
-                 - 0~1000 lux 범위로 변환
-                 - 실제 센서 특성에 따라 보정 필요
+                 - 보정 곡선이 없으면 0~1000 lux 선형 변환
         
         Note:
-            현재는 간단한 선형 변환 사용
-            정확한 측정이 필요하면 센서 캘리브레이션 필요
+            정확한 측정이 필요하면 set_curve()로 보정 곡선 설정
         """
         raw_value = self.read_raw()
         
         if raw_value is not None:
-            # 간단한 선형 변환: 0~1023 → 0~1000 lux
-            # TODO: 실제 센서 특성에 맞게 변환식 조정
-            lux = int((raw_value / 1023.0) * 1000)
-            return lux
+            # 배치 변환과 같은 경로 (정수 변환도 convert_lux() 한 곳에서)
+            return int(self.convert_lux([raw_value])[0])
         
         return None
     
     
+    def convert_lux(self, codes):
+        """
+        ADC 값 배열을 조도 배열로 변환 (ADC 읽기 없음)
+        
+        Args:
+            codes (iterable): ADC 값 배열 (0~1023)
+        
+        Returns:
+            numpy.ndarray | list: 조도 (lux, 정수), numpy가 없으면 list
+        """
+        lux = self._lux_table.lookup_many(codes)
+        if NUMPY_AVAILABLE:
+            return lux.astype(int)
+        return [int(value) for value in lux]
+    
+    
+    def read_lux_block(self, seconds=None):
+        """
+        스트리밍 중인 채널의 최근 구간을 조도 배열로 읽기
+        
+        Args:
+            seconds (float, optional): 구간 길이 (초). 없으면 스트리밍 window
+        
+        Returns:
+            dict: {'timestamps': 배열, 'lux': 배열} 오래된 것부터
+                  스트리밍 중이 아니면 None
+        """
+        block = self.adc.read_block(self.channel, seconds)
+        if block is None:
+            return None
+        
+        timestamps, codes = block
+        return {'timestamps': timestamps, 'lux': self.convert_lux(codes)}
+    
+    
     def read_percentage(self):
         """
         조도를 백분율로 읽기
@@ -98,8 +190,9 @@ class LightSensor:
         """
         센서 종료
         
-        MCP3008 SPI 통신을 닫습니다.
+        공유 MCP3008의 사용을 끝냅니다 (마지막 사용자일 때 SPI 종료).
         """
+        self.calibration.remove_listener(self.calibration_key, self.rebuild_tables)
         self.adc.close()
 
 
@@ -116,5 +209,8 @@ if __name__ == "__main__":
     print(f"조도: {sensor.read_lux()} lux")
     print(f"백분율: {sensor.read_percentage()}%")
     
+    # 배치 변환 (numpy 사용: {NUMPY_AVAILABLE})
+    print(f"배치 변환 [0, 256, 512, 1023]: {sensor.convert_lux([0, 256, 512, 1023])} lux")
+    
     # 센서 종료
     sensor.close()
\ No newline at end of file
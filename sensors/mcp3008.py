@@ -4,14 +4,65 @@ MCP3008 ADC 모듈 (SPI 통신)
 MCP3008은 8채널 10비트 ADC(아날로그-디지털 변환기)입니다.
 아날로그 센서(조도, EC/TDS)의 값을 디지털로 변환합니다.
 SPI 통신을 사용하며, 라즈베리파이의 SPI0에 연결됩니다.
+
+같은 (bus, device)를 여러 센서가 공유하므로 get_adc()로 프로세스 전역
+인스턴스 하나를 받아 사용합니다. 모든 SPI 통신은 인스턴스 락으로 직렬화됩니다.
+
+스트리밍 구간은 read_block()으로 배열째 꺼내 codes_to_voltage() 같은
+배치 변환에 넘깁니다 (numpy가 있으면 numpy 배열).
 """
 
+import threading
+import time
+from array import array
+
+from modules import recorder
+
 try:
     import spidev  # SPI 통신 라이브러리
     SPI_AVAILABLE = True
 except ImportError:
     SPI_AVAILABLE = False
 
+# numpy는 선택 사항 (배치 변환 가속)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# 채널별 명령 프레임 (start bit, single-ended|channel, don't care)
+# 매 읽기마다 리스트를 새로 만들지 않도록 미리 만들어 둡니다
+_COMMANDS = [(1, (8 + ch) << 4, 0) for ch in range(8)]
+
+# 전압 반올림 자릿수 (단일 읽기와 배치 변환 공통)
+VOLTAGE_DECIMALS = 3
+
+
+def codes_to_voltage(codes, vref=3.3, decimals=None):
+    """
+    ADC 값 배열을 전압 배열로 변환
+    
+    전압 = (ADC값 / 1023) * 기준전압. 단일 읽기(read_voltage)도 이 함수를
+    거치므로 반올림 규칙은 여기 한 곳에만 있습니다.
+    
+    Args:
+        codes (iterable): ADC 값 배열 (0~1023)
+        vref (float): 기준 전압 (V)
+        decimals (int, optional): 반올림 자릿수 (보통 VOLTAGE_DECIMALS). 없으면 반올림 없음
+    
+    Returns:
+        numpy.ndarray | list: 전압 배열 (V), numpy가 없으면 list
+    """
+    scale = vref / 1023.0
+    if NUMPY_AVAILABLE:
+        voltages = np.asarray(codes, dtype=np.float64) * scale
+        return voltages if decimals is None else np.round(voltages, decimals)
+    if decimals is None:
+        return [code * scale for code in codes]
+    return [round(code * scale, decimals) for code in codes]
+
 
 class MCP3008:
     """
@@ -29,6 +80,26 @@ class MCP3008:
             device (int): SPI 디바이스 번호 (기본 0, CE0)
         """
         self.spi = None
+        self.bus = bus
+        self.device = device
+        self.lock = threading.RLock()  # 스레드 간 SPI 접근 직렬화
+        self._users = 1  # get_adc()로 공유될 때의 사용자 수
+        
+        # 채널별 오버샘플링 설정: {ch: (샘플 수, 결합 방식, 샘플 간격(초), 트림 비율)}
+        self._oversampling = {}
+        
+        # 스트리밍 상태 (start_stream()에서 설정)
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+        self._stream_channels = ()
+        self._stream_codes = {}    # {ch: array('H')} 채널별 링 버퍼
+        self._stream_times = None  # array('d') 스윕별 monotonic 시각
+        self._stream_size = 0
+        self._stream_count = 0     # 지금까지 기록한 스윕 수 (쓰기 위치 = count % size)
+        self._stream_rate = 0
+        self._stream_window = 1.0
+        self._stream_overruns = 0  # 주기를 못 맞춘 횟수
+        self._wall_offset = 0.0    # time.time() - time.monotonic()
         
         if SPI_AVAILABLE:
             try:
@@ -45,6 +116,178 @@ class MCP3008:
             print("⚠ MCP3008 테스트 모드 (spidev 라이브러리 없음)")
     
     
+    def _convert(self, channel):
+        """
+        한 채널 변환 (락을 잡은 상태에서 호출)
+        
+        Args:
+            channel (int): ADC 채널 번호 (0~7)
+        
+        Returns:
+            int: 디지털 변환 값 (0~1023)
+        """
+        if self.spi:
+            # SPI 통신으로 데이터 송수신
+            # MCP3008은 변환마다 CS를 올렸다 내려야 하므로 채널당 xfer2 한 번
+            response = self.spi.xfer2(_COMMANDS[channel])
+            
+            # 받은 데이터를 10비트 값으로 변환 (0~1023)
+            # response[1]의 하위 2비트 + response[2]의 8비트
+            code = ((response[1] & 3) << 8) + response[2]
+            
+            # 원시 데이터 기록 중이면 코드 기록 (modules/recorder.py)
+            rec = recorder.current
+            if rec is not None:
+                rec.adc(self.bus, self.device, channel, code)
+            
+            return code
+        
+        # 테스트 모드: 중간값 반환
+        return 512
+    
+    
+    def configure_channel(self, channel, samples=1, method='median', spacing=0.0, trim=0.2):
+        """
+        채널별 오버샘플링 설정
+        
+        한 번 읽을 때 samples개의 샘플을 연속으로 변환한 뒤 하나로 결합합니다.
+        펌프 노이즈처럼 튀는 값이 섞이는 채널에 사용합니다.
+        
+        Args:
+            channel (int): ADC 채널 번호 (0~7)
+            samples (int): 읽기 1회당 샘플 수 (1이면 오버샘플링 안 함)
+            method (str): 결합 방식
+                          - 'median': 중앙값 (이상치에 가장 강함)
+                          - 'trimmed': 양쪽 trim 비율만큼 버린 평균
+            spacing (float): 샘플 사이 간격 (초), 0이면 연속 변환
+            trim (float): 'trimmed' 방식에서 양쪽에서 버릴 비율 (0~0.5 미만)
+        """
+        if not 0 <= channel <= 7:
+            raise ValueError(f"잘못된 채널 번호: {channel} (0~7 사용 가능)")
+        if samples < 1:
+            raise ValueError(f"샘플 수는 1 이상이어야 합니다: {samples}")
+        if method not in ('median', 'trimmed'):
+            raise ValueError(f"알 수 없는 결합 방식: {method} (median/trimmed)")
+        if not 0 <= trim < 0.5:
+            raise ValueError(f"트림 비율은 0~0.5 미만이어야 합니다: {trim}")
+        
+        with self.lock:
+            if samples == 1:
+                self._oversampling.pop(channel, None)
+            else:
+                self._oversampling[channel] = (samples, method, spacing, trim)
+    
+    
+    def _acquire(self, channel):
+        """
+        한 채널 측정 (락을 잡은 상태에서 호출)
+        
+        오버샘플링 설정이 있으면 여러 샘플을 읽어 결합합니다.
+        
+        샘플마다 xfer2를 한 번씩 부릅니다. MCP3008은 CS가 내려갈 때 변환을 시작하고
+        변환 하나마다 CS를 올렸다 내려야 하므로, 여러 변환을 한 번의 xfer2로 묶을 수 없습니다
+        (spidev는 한 전송 동안 CS를 내린 채로 둠).
+        
+        spacing이 있으면 샘플 사이 대기 동안 락을 놓아, 스트리밍 스레드나 다른 채널이
+        그동안 버스를 쓸 수 있게 합니다 (읽기 하나가 samples × spacing 동안 버스를 막지 않음).
+        그래서 spacing이 있는 채널은 scan()에서도 다른 채널과 같은 버스트로 묶이지 않습니다.
+        
+        Args:
+            channel (int): ADC 채널 번호 (0~7)
+        
+        Returns:
+            tuple: (결합값, 샘플 수, 스프레드)
+                   - 결합값: 샘플 1개면 int, 여러 개면 float (소수점 2자리)
+                   - 스프레드: 샘플 최대값 - 최소값 (0이면 흔들림 없음)
+        """
+        config = self._oversampling.get(channel)
+        
+        if config is None:
+            return self._convert(channel), 1, 0
+        
+        samples, method, spacing, trim = config
+        
+        values = []
+        for i in range(samples):
+            if i and spacing:
+                self.lock.release()
+                try:
+                    time.sleep(spacing)
+                finally:
+                    self.lock.acquire()
+            values.append(self._convert(channel))
+        
+        values.sort()
+        spread = values[-1] - values[0]
+        
+        if method == 'median':
+            mid = samples // 2
+            if samples % 2:
+                value = values[mid]
+            else:
+                value = (values[mid - 1] + values[mid]) / 2.0
+        else:
+            # 양쪽 trim 비율만큼 버리고 평균
+            cut = int(samples * trim)
+            kept = values[cut:samples - cut]
+            value = sum(kept) / len(kept)
+        
+        return round(value, 2), samples, spread
+    
+    
+    def read_channel(self, channel):
+        """
+        채널 읽기 (품질 정보 포함)
+        
+        오버샘플링 설정에 따라 여러 샘플을 한 번의 락 안에서 읽어 결합합니다
+        (spacing이 있으면 샘플 사이에는 락을 놓음, _acquire() 참고).
+        
+        Args:
+            channel (int): ADC 채널 번호 (0~7)
+        
+        Note:
+            start_stream()으로 스트리밍 중인 채널은 SPI를 건드리지 않고
+            ADC_STREAM_WINDOW 구간의 평균을 반환합니다 (read_window() 참고)
+        
+        Returns:
+            dict: {
+                'channel': int,      # 채널 번호
+                'value': float,      # 결합된 ADC 값 (0~1023)
+                'samples': int,      # 사용한 샘플 수
+                'spread': int,       # 샘플 최대값 - 최소값
+                'timestamp': float   # 측정 시작 시각 (Unix timestamp)
+            }
+            오류 시 None
+        """
+        # 채널 범위 체크
+        if not 0 <= channel <= 7:
+            print(f"✗ 잘못된 채널 번호: {channel} (0~7 사용 가능)")
+            return None
+        
+        # 스트리밍 중인 채널은 링 버퍼의 최근 구간 평균을 사용
+        if channel in self._stream_channels:
+            reading = self.read_window(channel, mode='mean')
+            if reading is not None:
+                return reading
+        
+        try:
+            with self.lock:
+                timestamp = time.time()
+                value, samples, spread = self._acquire(channel)
+            
+            return {
+                'channel': channel,
+                'value': value,
+                'samples': samples,
+                'spread': spread,
+                'timestamp': timestamp
+            }
+        
+        except Exception as e:
+            print(f"✗ ADC 읽기 오류 (CH{channel}): {e}")
+            return None
+    
+    
     def read_adc(self, channel):
         """
         MCP3008의 특정 채널에서 아날로그 값 읽기
@@ -56,34 +299,63 @@ class MCP3008:
             int: 디지털 변환 값 (0~1023)
                  - 0: 0V
                  - 1023: 기준전압(3.3V)
+                 오버샘플링 채널은 결합값 (float)
                  센서 없으면 512 (중간값, 테스트용)
                  오류 시 None
         """
-        # 채널 범위 체크
-        if not 0 <= channel <= 7:
-            print(f"✗ 잘못된 채널 번호: {channel} (0~7 사용 가능)")
-            return None
+        reading = self.read_channel(channel)
+        
+        if reading is not None:
+            return reading['value']
+        
+        return None
+    
+    
+    def scan(self, channels):
+        """
+        여러 채널을 한 번의 SPI 버스트로 읽기
+        
+        락을 한 번만 잡고 요청한 채널을 연속으로 변환합니다.
+        그 사이 다른 스레드가 끼어들 수 없으므로 모든 값이 같은 시점의 값입니다.
+        오버샘플링 설정이 있는 채널은 같은 버스트 안에서 여러 샘플을 읽습니다
+        (spacing이 있는 채널은 샘플 사이에 락을 놓으므로 다른 스레드가 끼어들 수 있음).
+        
+        Args:
+            channels (iterable): ADC 채널 번호 목록 (0~7)
+        
+        Returns:
+            dict: {
+                'timestamp': float,      # 버스트 시작 시각 (Unix timestamp)
+                'channels': {ch: value}, # 채널별 ADC 값 (0~1023)
+                'samples': {ch: int},    # 채널별 샘플 수
+                'spread': {ch: int}      # 채널별 샘플 스프레드
+            }
+            오류 시 None
+        """
+        channels = list(channels)
+        
+        for ch in channels:
+            if not 0 <= ch <= 7:
+                print(f"✗ 잘못된 채널 번호: {ch} (0~7 사용 가능)")
+                return None
         
         try:
-            if self.spi:
-                # MCP3008 통신 프로토콜
-                # [start bit, mode|channel, don't care]
-                command = [1, (8 + channel) << 4, 0]
-                
-                # SPI 통신으로 데이터 송수신
-                response = self.spi.xfer2(command)
-                
-                # 받은 데이터를 10비트 값으로 변환 (0~1023)
-                # response[1]의 하위 2비트 + response[2]의 8비트
-                adc_value = ((response[1] & 3) << 8) + response[2]
-                
-                return adc_value
-            else:
-                # 테스트 모드: 중간값 반환
-                return 512
-                
+            values, samples, spread = {}, {}, {}
+            
+            with self.lock:
+                timestamp = time.time()
+                for ch in channels:
+                    values[ch], samples[ch], spread[ch] = self._acquire(ch)
+            
+            return {
+                'timestamp': timestamp,
+                'channels': values,
+                'samples': samples,
+                'spread': spread
+            }
+        
         except Exception as e:
-            print(f"✗ ADC 읽기 오류 (CH{channel}): {e}")
+            print(f"✗ ADC 스캔 오류 (CH{channels}): {e}")
             return None
     
     
@@ -96,29 +368,388 @@ class MCP3008:
             vref (float): 기준 전압 (기본 3.3V)
         
         Returns:
-            float: 전압 값 (V), 소수점 2자리
+            float: 전압 값 (V), 소수점 VOLTAGE_DECIMALS자리
                    오류 시 None
         """
         adc_value = self.read_adc(channel)
         
         if adc_value is not None:
-            # ADC 값을 전압으로 변환
-            # 전압 = (ADC값 / 1023) * 기준전압
-            voltage = (adc_value / 1023.0) * vref
-            return round(voltage, 2)
+            return float(codes_to_voltage([adc_value], vref, VOLTAGE_DECIMALS)[0])
         
         return None
     
     
+    # ==================== 연속 스트리밍 ====================
+    
+    def start_stream(self, channels, rate=200, buffer_size=2048, window=1.0):
+        """
+        백그라운드 연속 샘플링 시작
+        
+        별도 스레드가 rate Hz로 채널들을 스윕하며 미리 할당한 링 버퍼에 기록합니다.
+        샘플마다 리스트나 객체를 새로 만들지 않으므로 수백 Hz에서도 부담이 적습니다.
+        센서 루프는 read_window()로 최근 구간의 평균/최대값만 읽으면 됩니다.
+        
+        Args:
+            channels (iterable): 스트리밍할 채널 번호 목록 (0~7)
+            rate (float): 스윕 주기 (Hz)
+            buffer_size (int): 채널별 링 버퍼 크기 (샘플 수)
+            window (float): read_channel()이 사용할 기본 평균 구간 (초)
+        """
+        channels = tuple(channels)
+        
+        for ch in channels:
+            if not 0 <= ch <= 7:
+                raise ValueError(f"잘못된 채널 번호: {ch} (0~7 사용 가능)")
+        if rate <= 0 or buffer_size < 1:
+            raise ValueError(f"잘못된 스트리밍 설정: rate={rate}, buffer_size={buffer_size}")
+        
+        self.stop_stream()
+        
+        # 링 버퍼 미리 할당 (채널별 10비트 코드, 스윕별 시각)
+        self._stream_codes = {ch: array('H', [0]) * buffer_size for ch in channels}
+        self._stream_times = array('d', [0.0]) * buffer_size
+        self._stream_size = buffer_size
+        self._stream_count = 0
+        self._stream_rate = rate
+        self._stream_window = window
+        self._stream_overruns = 0
+        self._wall_offset = time.time() - time.monotonic()
+        self._stream_stop.clear()
+        
+        self._stream_thread = threading.Thread(
+            target=self._stream_loop,
+            args=(channels, 1.0 / rate),
+            name=f"mcp3008-stream-{self.bus}.{self.device}",
+            daemon=True
+        )
+        self._stream_channels = channels
+        self._stream_thread.start()
+        
+        print(f"✓ MCP3008 스트리밍 시작 (CH{list(channels)}, {rate}Hz, 버퍼 {buffer_size})")
+    
+    
+    def _stream_loop(self, channels, period):
+        """
+        스트리밍 스레드 본체
+        
+        다음 마감 시각을 monotonic 기준으로 누적 계산해 주기가 밀리지 않게 합니다.
+        """
+        codes = [self._stream_codes[ch] for ch in channels]
+        times = self._stream_times
+        size = self._stream_size
+        convert = self._convert
+        lock = self.lock
+        stop = self._stream_stop
+        deadline = time.monotonic()
+        
+        while not stop.is_set():
+            index = self._stream_count % size
+            
+            try:
+                with lock:
+                    times[index] = time.monotonic()
+                    for buf, ch in zip(codes, channels):
+                        buf[index] = convert(ch)
+            except Exception as e:
+                print(f"✗ ADC 스트리밍 오류: {e}")
+                stop.wait(1.0)
+                deadline = time.monotonic()
+                continue
+            
+            # 모든 채널을 쓴 뒤에 카운트를 올려야 읽는 쪽이 반쯤 쓴 값을 보지 않음
+            self._stream_count += 1
+            
+            deadline += period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                stop.wait(delay)
+            else:
+                # 주기를 놓치면 따라잡으려 하지 않고 현재 시각부터 다시 시작
+                self._stream_overruns += 1
+                deadline = time.monotonic()
+    
+    
+    def stop_stream(self):
+        """
+        백그라운드 연속 샘플링 중지
+        """
+        if self._stream_thread is None:
+            return
+        
+        self._stream_stop.set()
+        self._stream_thread.join(timeout=1.0)
+        self._stream_thread = None
+        self._stream_channels = ()
+        print("✓ MCP3008 스트리밍 중지")
+    
+    
+    def is_streaming(self, channel=None):
+        """
+        스트리밍 여부 확인
+        
+        Args:
+            channel (int, optional): 채널 번호. 없으면 스트리밍 스레드 동작 여부
+        
+        Returns:
+            bool: 스트리밍 중이면 True
+        """
+        if channel is None:
+            return self._stream_thread is not None
+        return channel in self._stream_channels
+    
+    
+    def _stream_indexes(self, seconds):
+        """
+        최근 seconds 구간에 해당하는 링 버퍼 인덱스 목록 (오래된 것부터)
+        """
+        count = self._stream_count
+        size = self._stream_size
+        
+        n = min(count, size, max(1, int(seconds * self._stream_rate)))
+        if NUMPY_AVAILABLE:
+            return np.arange(count - n, count) % size
+        return [(count - n + i) % size for i in range(n)]
+    
+    
+    def read_window(self, channel, seconds=None, mode='mean'):
+        """
+        스트리밍 링 버퍼의 최근 구간 읽기
+        
+        Args:
+            channel (int): 스트리밍 중인 채널 번호
+            seconds (float, optional): 구간 길이 (초). 없으면 start_stream()의 window
+            mode (str): 대표값 계산 방식
+                        - 'mean': 구간 평균 (데시메이션 필터)
+                        - 'max' / 'min': 구간 최대/최소 (순간 스파이크 확인용)
+                        - 'last': 가장 최근 샘플
+        
+        Returns:
+            dict: read_channel()과 같은 형식 + 'min', 'max'
+            {
+                'channel': int,
+                'value': float,      # 대표값 (0~1023)
+                'samples': int,      # 구간 샘플 수
+                'spread': int,       # 구간 최대 - 최소
+                'min': int,
+                'max': int,
+                'timestamp': float   # 가장 최근 샘플 시각 (Unix timestamp)
+            }
+            스트리밍 중이 아니거나 아직 샘플이 없으면 None
+        """
+        if channel not in self._stream_channels or self._stream_count == 0:
+            return None
+        
+        if seconds is None:
+            seconds = self._stream_window
+        
+        buf = self._stream_codes[channel]
+        indexes = self._stream_indexes(seconds)
+        
+        if NUMPY_AVAILABLE:
+            values = np.frombuffer(buf, dtype=np.uint16)[indexes]
+            low = int(values.min())
+            high = int(values.max())
+            mean = float(values.mean())
+        else:
+            values = [buf[i] for i in indexes]
+            low = min(values)
+            high = max(values)
+            mean = sum(values) / len(values)
+        
+        if mode == 'mean':
+            value = round(mean, 2)
+        elif mode == 'max':
+            value = high
+        elif mode == 'min':
+            value = low
+        elif mode == 'last':
+            value = int(values[-1])
+        else:
+            raise ValueError(f"알 수 없는 모드: {mode} (mean/max/min/last)")
+        
+        return {
+            'channel': channel,
+            'value': value,
+            'samples': len(values),
+            'spread': high - low,
+            'min': low,
+            'max': high,
+            'timestamp': self._stream_times[indexes[-1]] + self._wall_offset
+        }
+    
+    
+    def read_series(self, channel, seconds=None, step=1):
+        """
+        스트리밍 링 버퍼의 최근 구간을 시계열로 읽기 (데시메이션)
+        
+        Args:
+            channel (int): 스트리밍 중인 채널 번호
+            seconds (float, optional): 구간 길이 (초). 없으면 start_stream()의 window
+            step (int): step개마다 하나씩 추출 (구간 내 평균 아님)
+        
+        Returns:
+            list: [(timestamp, code), ...] 오래된 것부터
+                  스트리밍 중이 아니면 빈 리스트
+        """
+        if channel not in self._stream_channels:
+            return []
+        
+        if seconds is None:
+            seconds = self._stream_window
+        
+        buf = self._stream_codes[channel]
+        times = self._stream_times
+        offset = self._wall_offset
+        
+        return [(times[i] + offset, buf[i]) for i in self._stream_indexes(seconds)[::-step][::-1]]
+    
+    
+    def read_block(self, channel, seconds=None):
+        """
+        스트리밍 링 버퍼의 최근 구간을 배열째 읽기 (배치 변환용)
+        
+        Args:
+            channel (int): 스트리밍 중인 채널 번호
+            seconds (float, optional): 구간 길이 (초). 없으면 start_stream()의 window
+        
+        Returns:
+            tuple: (timestamps, codes) 오래된 것부터, 링 버퍼와 분리된 사본
+                   numpy가 있으면 (float64 배열, uint16 배열), 없으면 list
+                   스트리밍 중이 아니거나 샘플이 없으면 None
+        """
+        if channel not in self._stream_channels or self._stream_count == 0:
+            return None
+        
+        if seconds is None:
+            seconds = self._stream_window
+        
+        buf = self._stream_codes[channel]
+        indexes = self._stream_indexes(seconds)
+        offset = self._wall_offset
+        
+        if NUMPY_AVAILABLE:
+            times = np.frombuffer(self._stream_times, dtype=np.float64)[indexes] + offset
+            return times, np.frombuffer(buf, dtype=np.uint16)[indexes]
+        
+        times = self._stream_times
+        return [times[i] + offset for i in indexes], [buf[i] for i in indexes]
+    
+    
+    def read_since(self, since):
+        """
+        since번째 스윕 이후 새로 기록된 샘플 모두 읽기 (저장소처럼 빠짐없이 가져갈 소비자용)
+        
+        스트리밍 스레드는 건드리지 않고 링 버퍼에서 복사만 합니다.
+        링 버퍼 크기 - 1 스윕보다 오래 안 가져가면 그보다 오래된 샘플은 잃습니다.
+        
+        Args:
+            since (int): 지난번에 돌려받은 커서 (처음에는 0)
+        
+        Returns:
+            tuple: (cursor, timestamps, {채널: codes}, lost)
+                   cursor는 다음 호출에 넘길 값, lost는 덮어써져 잃은 스윕 수
+                   배열은 read_block()과 같은 형식 (numpy 또는 list)
+        """
+        count = self._stream_count
+        size = self._stream_size
+        if since > count:
+            since = 0  # 스트리밍을 다시 시작함
+        
+        if count == since or not self._stream_channels:
+            return count, [], {}, 0
+        
+        # 가장 오래된 슬롯((count - size) % size)은 스트리밍 스레드가 다음에 쓸 자리이므로
+        # 복사하는 중에 덮일 수 있음 → 한 칸 남기고 읽고, 그 스윕은 잃은 것으로 셈
+        start = max(since, count - size + 1)
+        lost = start - since
+        offset = self._wall_offset
+        
+        if NUMPY_AVAILABLE:
+            indexes = np.arange(start, count) % size
+            times = np.frombuffer(self._stream_times, dtype=np.float64)[indexes] + offset
+            codes = {ch: np.frombuffer(self._stream_codes[ch], dtype=np.uint16)[indexes]
+                     for ch in self._stream_channels}
+        else:
+            indexes = [i % size for i in range(start, count)]
+            times = [self._stream_times[i] + offset for i in indexes]
+            codes = {ch: [self._stream_codes[ch][i] for i in indexes] for ch in self._stream_channels}
+        
+        return count, times, codes, lost
+    
+    
+    def get_stream_stats(self):
+        """
+        스트리밍 통계 조회
+        
+        Returns:
+            dict: {'channels', 'rate', 'sweeps', 'overruns'}
+        """
+        return {
+            'channels': list(self._stream_channels),
+            'rate': self._stream_rate,
+            'sweeps': self._stream_count,
+            'overruns': self._stream_overruns
+        }
+    
+    
     def close(self):
         """
         SPI 통신 종료
         
         프로그램 종료 시 SPI 연결을 닫습니다.
+        get_adc()로 공유된 인스턴스는 마지막 사용자가 닫을 때만 실제로 닫힙니다.
         """
-        if self.spi:
-            self.spi.close()
-            print("✓ MCP3008 SPI 통신 종료")
+        with _registry_lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            
+            if _shared.get((self.bus, self.device)) is self:
+                del _shared[(self.bus, self.device)]
+        
+        self.stop_stream()
+        
+        with self.lock:
+            if self.spi:
+                self.spi.close()
+                self.spi = None
+                print("✓ MCP3008 SPI 통신 종료")
+
+
+# ==================== 공유 버스 관리 ====================
+
+# (bus, device) → MCP3008 인스턴스
+_shared = {}
+_registry_lock = threading.Lock()
+
+
+def get_adc(bus=0, device=0):
+    """
+    (bus, device)별 공유 MCP3008 인스턴스 반환
+    
+    같은 CE 핀에 SpiDev 핸들이 여러 개 열리지 않도록
+    프로세스 전체에서 인스턴스 하나를 공유합니다.
+    사용이 끝나면 close()를 호출하세요 (마지막 사용자가 닫을 때 SPI 종료).
+    
+    Args:
+        bus (int): SPI 버스 번호
+        device (int): SPI 디바이스 번호 (CE)
+    
+    Returns:
+        MCP3008: 공유 인스턴스
+    """
+    key = (bus, device)
+    
+    with _registry_lock:
+        adc = _shared.get(key)
+        
+        if adc is None:
+            adc = MCP3008(bus=bus, device=device)
+            _shared[key] = adc
+        else:
+            adc._users += 1
+        
+        return adc
 
 
 # 테스트 코드
@@ -128,6 +759,9 @@ if __name__ == "__main__":
     # MCP3008 객체 생성
     adc = MCP3008(bus=0, device=0)
     
+    # CH1은 9샘플 중앙값으로 읽기
+    adc.configure_channel(1, samples=9, method='median', spacing=0.001)
+    
     # 전체 채널 읽기 테스트
     print("채널별 ADC 값:")
     for ch in range(8):
@@ -135,5 +769,24 @@ if __name__ == "__main__":
         voltage = adc.read_voltage(ch)
         print(f"  CH{ch}: {value} (ADC) = {voltage}V")
     
+    # 한 번의 버스트로 전체 채널 스캔
+    result = adc.scan(range(8))
+    print(f"\n스캔 결과 ({result['timestamp']:.3f}): {result['channels']}")
+    print(f"  샘플 수: {result['samples']}, 스프레드: {result['spread']}")
+    
+    # 스트리밍 테스트 (CH0, CH1을 200Hz로 1초간)
+    adc.start_stream([0, 1], rate=200, buffer_size=512)
+    time.sleep(1.0)
+    print(f"\n스트리밍 평균 (CH1): {adc.read_window(1)}")
+    print(f"스트리밍 통계: {adc.get_stream_stats()}")
+    
+    # 구간 배치 변환 (numpy 사용: {NUMPY_AVAILABLE})
+    block = adc.read_block(1)
+    if block is not None:
+        times, codes = block
+        voltages = codes_to_voltage(codes)
+        print(f"배치 변환 (CH1): {len(codes)}개, 마지막 {voltages[-1]:.3f}V")
+    adc.stop_stream()
+    
     # SPI 종료
     adc.close()
\ No newline at end of file
@@ -0,0 +1,449 @@
+"""
+센서 레지스트리 모듈 - 설정 기반 센서 생성 및 드라이버 지연 import
+
+config.SENSORS에 선언된 센서(타입, 버스, 채널 등)를 만들어 관리합니다.
+드라이버 모듈(adafruit_htu21d, spidev, pyserial 등)은 해당 타입의 센서가
+실제로 켜져 있을 때만 import 되므로, 쓰지 않는 드라이버 비용을 내지 않습니다.
+
+새 센서 타입은 register_type()으로 등록하면 app.py 수정 없이 사용할 수 있습니다.
+
+같은 타입 센서를 여러 개 쓸 수 있습니다:
+- ADC 센서는 'adc'로 config.ADC_CHIPS의 칩을 고르고, 채널은 칩의 채널 맵에서 찾습니다
+- HTU21D는 'mux_channel'로 TCA9548A 채널을 지정합니다
+- 같은 타입이 여럿이면 읽은 값은 "센서 이름.필드"로 저장되고,
+  처음 선언한 센서는 기존 필드 이름('temperature' 등)으로도 저장됩니다
+- 같은 멀티플렉서 뒤의 센서들은 schedule_groups()가 작업 하나(MuxGroup)로 묶어
+  채널 순서대로 읽으므로 주기마다 채널 전환이 최소가 됩니다
+"""
+
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+from config import ADC_CHIPS, SENSOR_READ_TIMEOUT
+from modules.snapshot import Reading, INSTANCE_SEP, instance_field
+
+
+# 센서 타입 → {'module', 'class', 'reader', 'bus', 'timeout'}
+SENSOR_TYPES = {}
+
+# 센서 선언에서 생성자 인자로 넘기지 않는 키
+RESERVED_KEYS = ('name', 'type', 'bus', 'period', 'enabled', 'adc', 'timeout')
+
+
+def register_type(type_name, module, class_name, reader, bus, timeout=SENSOR_READ_TIMEOUT):
+    """
+    센서 타입 등록
+    
+    Args:
+        type_name (str): 설정에서 쓰는 타입 이름 (예: 'htu21d')
+        module (str): 드라이버 모듈 경로 (예: 'sensors.htu21d'), 필요할 때 import
+        class_name (str): 드라이버 클래스 이름
+        reader (callable): reader(sensor, lookup) → {필드: Reading}
+                           lookup(field)로 다른 센서의 최신값을 조회할 수 있음
+        bus (str): 기본 버스 이름 ('i2c', 'spi', 'uart')
+        timeout (float): 기본 읽기 마감 시간 (초), 이보다 오래 걸리면 실패로 처리
+    """
+    SENSOR_TYPES[type_name] = {
+        'module': module,
+        'class': class_name,
+        'reader': reader,
+        'bus': bus,
+        'timeout': timeout
+    }
+
+
+def load_driver(type_name):
+    """
+    센서 타입의 드라이버 클래스 로드 (이때 처음 import)
+    
+    Args:
+        type_name (str): 센서 타입 이름
+    
+    Returns:
+        type: 드라이버 클래스
+    """
+    if type_name not in SENSOR_TYPES:
+        raise ValueError(f"알 수 없는 센서 타입: {type_name}")
+    
+    info = SENSOR_TYPES[type_name]
+    module = importlib.import_module(info['module'])
+    return getattr(module, info['class'])
+
+
+# ==================== 타입별 읽기 함수 ====================
+
+def adc_reading(sensor, value):
+    """
+    ADC 센서 값을 실제 측정 시각과 묶기
+    
+    Args:
+        sensor: LightSensor 또는 TDSSensor (last_reading에 측정 시각이 있음)
+        value: 변환된 값
+    
+    Returns:
+        Reading: 값과 캡처 시각
+    """
+    if sensor.last_reading:
+        return Reading.from_wall(value, sensor.last_reading['timestamp'])
+    return Reading(value)
+
+
+def read_htu21d(sensor, lookup):
+    """HTU21D 온습도 (I2C) - 온도/습도 변환을 차례로 실행"""
+    temp_handle = sensor.start_measurement('temperature')
+    temperature = temp_handle.result()
+    hum_handle = sensor.start_measurement('humidity')
+    humidity = hum_handle.result()
+    
+    return {
+        'temperature': Reading(temperature, monotonic=temp_handle.captured),
+        'humidity': Reading(humidity, monotonic=hum_handle.captured)
+    }
+
+
+def read_light(sensor, lookup):
+    """조도 (SPI, MCP3008)"""
+    return {'light': adc_reading(sensor, sensor.read_lux())}
+
+
+def read_co2(sensor, lookup):
+    """CO2 (UART) - 캐시된 값이므로 캡처 시각은 값의 나이로 계산"""
+    return {'co2': Reading.from_age(sensor.read_co2(), sensor.get_age())}
+
+
+def read_tds(sensor, lookup):
+    """EC/TDS (SPI, MCP3008) - 최신 온도로 보정 (없으면 25°C)"""
+    temp = lookup('temperature') or 25.0
+    
+    # ADC 1회 측정으로 EC/TDS를 같은 샘플에서 계산
+    result = sensor.read_all(temperature=temp)
+    if result is None:
+        return {'ec': Reading(None), 'tds': Reading(None)}
+    
+    return {
+        'ec': Reading.from_wall(result['ec'], result['timestamp']),
+        'tds': Reading.from_wall(result['tds'], result['timestamp'])
+    }
+
+
+# 마감 시간: HTU21D는 변환 대기(최대 66ms) 포함, ADC는 오버샘플링 포함, CO2는 캐시 읽기
+register_type('htu21d', 'sensors.htu21d', 'HTU21DSensor', read_htu21d, bus='i2c', timeout=0.5)
+register_type('light', 'sensors.light', 'LightSensor', read_light, bus='spi', timeout=0.25)
+register_type('co2', 'sensors.co2', 'CO2Sensor', read_co2, bus='uart', timeout=0.25)
+register_type('tds', 'sensors.tds', 'TDSSensor', read_tds, bus='spi', timeout=0.25)
+
+
+# ==================== 센서 인스턴스 ====================
+
+class SensorEntry:
+    """
+    설정으로 생성된 센서 하나 (드라이버 객체 + 읽기 함수 + 스케줄 정보)
+    """
+    
+    def __init__(self, name, type_name, bus, period, sensor, reader, timeout=None):
+        self.name = name
+        self.type = type_name
+        self.bus = bus
+        self.period = period
+        self.sensor = sensor
+        self.reader = reader
+        self.timeout = timeout  # 읽기 마감 시간 (초)
+        
+        # 같은 타입이 여럿일 때 init_sensors()에서 설정
+        self.instance = None   # 인스턴스 이름 (필드 앞에 붙음), 하나뿐이면 None
+        self.primary = True    # 기존 필드 이름으로도 저장할지 여부
+        
+        # TCA9548A 뒤의 센서면 공유 멀티플렉서와 채널 (schedule_groups()에서 사용)
+        self.mux = getattr(sensor, 'mux', None)
+        self.mux_channel = getattr(sensor, 'mux_channel', None)
+    
+    
+    def read(self, lookup=lambda field: None):
+        """
+        센서 읽기
+        
+        Args:
+            lookup (callable): lookup(field) → 다른 센서의 최신값 (보정용)
+        
+        Returns:
+            dict: {필드: Reading}, 인스턴스가 있으면 {"인스턴스.필드": Reading}도 포함
+        """
+        readings = self.reader(self.sensor, lookup)
+        if self.instance is None:
+            return readings
+        
+        keyed = {instance_field(self.instance, field): reading for field, reading in readings.items()}
+        if self.primary:
+            keyed.update(readings)
+        return keyed
+    
+    
+    def close(self):
+        """드라이버에 close()가 있으면 호출"""
+        close = getattr(self.sensor, 'close', None)
+        if close:
+            close()
+
+
+class MuxGroup:
+    """
+    같은 TCA9548A 뒤에 있고 주기가 같은 센서들을 묶은 스케줄러 작업
+    
+    센서마다 작업을 따로 두면 주기마다 순서가 섞여 채널을 센서 수만큼 바꾸지만,
+    묶어서 채널 순서대로 읽으면 채널마다 한 번만 선택합니다. 시작 채널은
+    멀티플렉서에 지금 선택된 채널로 돌려 잡으므로, 연속된 주기 사이에서도
+    전환이 하나 줄어듭니다 (채널 k개 → 주기당 k-1번).
+    
+    SensorEntry와 같은 속성(name, bus, period, timeout, read)을 가집니다.
+    마감 시간은 묶인 센서들 마감 시간의 합입니다.
+    """
+    
+    def __init__(self, name, entries):
+        """
+        Args:
+            name (str): 작업 이름
+            entries (list): 같은 멀티플렉서 / 버스 / 주기의 SensorEntry 목록
+        """
+        self.name = name
+        self.entries = sorted(entries, key=lambda e: e.mux_channel)
+        self.bus = self.entries[0].bus
+        self.period = self.entries[0].period
+        self.mux = self.entries[0].mux
+        self.timeout = sum(e.timeout for e in self.entries) if all(e.timeout for e in self.entries) else None
+        self.channels = sorted({e.mux_channel for e in self.entries})
+        self._fields = {}  # {센서 이름: 마지막으로 읽은 필드들} - 실패 시 None 기록용
+    
+    
+    def order(self):
+        """
+        이번 주기의 읽기 순서 (지금 선택된 채널부터 채널 순서대로)
+        
+        Returns:
+            list: SensorEntry 목록
+        """
+        start = 0
+        if self.mux.selected in self.channels:
+            start = self.channels.index(self.mux.selected)
+        rank = {ch: i for i, ch in enumerate(self.channels[start:] + self.channels[:start])}
+        return sorted(self.entries, key=lambda e: rank[e.mux_channel])
+    
+    
+    def read(self, lookup=lambda field: None):
+        """
+        묶인 센서를 모두 읽기 (한 센서가 실패해도 나머지는 계속)
+        
+        Returns:
+            dict: 센서들의 {필드: Reading}을 합친 것
+        """
+        readings = {}
+        for entry in self.order():
+            # 같은 채널 센서들을 읽는 동안 다른 스레드가 채널을 바꾸지 못하게 붙잡음
+            try:
+                with self.mux.channel(entry.mux_channel):
+                    result = entry.read(lookup)
+            except Exception as e:
+                print(f"✗ {entry.name} 읽기 오류 (MUX CH{entry.mux_channel}): {e}")
+                result = {field: Reading(None) for field in self._fields.get(entry.name, ())}
+            
+            self._fields[entry.name] = tuple(result)
+            readings.update(result)
+        return readings
+
+
+def schedule_groups(entries):
+    """
+    스케줄러에 등록할 작업 목록
+    
+    멀티플렉서 뒤의 센서는 (멀티플렉서, 버스, 주기)별로 MuxGroup 하나로 묶고,
+    나머지는 센서마다 작업 하나입니다.
+    
+    Args:
+        entries (iterable): SensorEntry 목록
+    
+    Returns:
+        list: SensorEntry 또는 MuxGroup (name, bus, period, timeout, read를 가짐)
+    """
+    tasks = []
+    groups = {}
+    
+    for entry in entries:
+        if entry.mux is None:
+            tasks.append(entry)
+            continue
+        
+        key = (entry.mux.address, entry.bus, entry.period)
+        if key not in groups:
+            groups[key] = []
+            tasks.append(key)
+        groups[key].append(entry)
+    
+    periods = {}
+    for address, bus, period in groups:
+        periods.setdefault(address, []).append(period)
+    
+    result = []
+    for task in tasks:
+        if isinstance(task, SensorEntry):
+            result.append(task)
+            continue
+        
+        members = groups[task]
+        if len(members) == 1:
+            result.append(members[0])
+            continue
+        
+        address, bus, period = task
+        name = f"mux{address:#04x}"
+        if len(periods[address]) > 1:
+            name += f"-{period:g}s"
+        result.append(MuxGroup(name, members))
+    
+    return result
+
+
+def resolve_adc(spec):
+    """
+    'adc' 칩 이름을 드라이버 인자(spi_bus, spi_device, channel)로 풀기
+    
+    채널은 선언에 'channel'이 있으면 그 값, 없으면 칩의 채널 맵에서 센서 이름으로 찾습니다.
+    
+    Args:
+        spec (dict): 센서 선언
+    
+    Returns:
+        dict: 드라이버 인자 ('adc'가 없으면 빈 dict)
+    """
+    chip_name = spec.get('adc')
+    if chip_name is None:
+        return {}
+    
+    if chip_name not in ADC_CHIPS:
+        raise ValueError(f"알 수 없는 ADC 칩: {chip_name} (ADC_CHIPS: {list(ADC_CHIPS)})")
+    
+    chip = ADC_CHIPS[chip_name]
+    name = spec.get('name', spec['type'])
+    channel = spec.get('channel', chip.get('channels', {}).get(name))
+    if channel is None:
+        raise ValueError(f"{chip_name} 채널 맵에 {name}이(가) 없습니다")
+    
+    return {'spi_bus': chip['spi_bus'], 'spi_device': chip['spi_device'], 'channel': channel}
+
+
+def create_sensor(spec, default_period):
+    """
+    센서 선언 하나로 센서 생성
+    
+    Args:
+        spec (dict): 센서 선언 (예: {'name': 'light', 'type': 'light', 'channel': 0})
+                     RESERVED_KEYS 외의 키는 드라이버 생성자 인자로 전달
+                     'adc'가 있으면 ADC_CHIPS의 SPI 버스/CE/채널로 풀어서 전달
+        default_period (float): 'period'가 없을 때 사용할 읽기 주기 (초)
+    
+    Returns:
+        SensorEntry: 생성된 센서
+    """
+    type_name = spec['type']
+    driver = load_driver(type_name)
+    
+    options = {k: v for k, v in spec.items() if k not in RESERVED_KEYS}
+    options.update(resolve_adc(spec))
+    sensor = driver(**options)
+    
+    info = SENSOR_TYPES[type_name]
+    return SensorEntry(
+        name=spec.get('name', type_name),
+        type_name=type_name,
+        bus=spec.get('bus', info['bus']),
+        period=spec.get('period', default_period),
+        sensor=sensor,
+        reader=info['reader'],
+        timeout=spec.get('timeout', info['timeout'])
+    )
+
+
+def init_sensors(specs, default_period=5):
+    """
+    켜져 있는 센서들을 병렬로 초기화
+    
+    센서마다 초기화 시간(I2C 탐색, 시리얼 포트 열기 등)이 다르므로
+    동시에 초기화해 시작 시간을 줄입니다. 실패한 센서는 건너뜁니다.
+    
+    Args:
+        specs (list): 센서 선언 목록 (config.SENSORS)
+        default_period (float): 'period'가 없을 때 사용할 읽기 주기 (초)
+    
+    Returns:
+        dict: {센서 이름: SensorEntry} (선언 순서 유지)
+    """
+    enabled = []
+    claimed = {}  # (SPI 버스, CE, 채널) → 센서 이름
+    
+    for spec in specs:
+        if not spec.get('enabled', True):
+            continue
+        
+        name = spec.get('name', spec.get('type'))
+        if INSTANCE_SEP in name:
+            print(f"✗ {name} 센서 이름에 '{INSTANCE_SEP}'를 쓸 수 없습니다")
+            continue
+        
+        # 같은 ADC 칩의 같은 채널을 두 센서가 쓰지 않도록 확인
+        try:
+            adc = resolve_adc(spec)
+        except ValueError as e:
+            print(f"✗ {name} 센서 설정 오류: {e}")
+            continue
+        if adc:
+            key = (adc['spi_bus'], adc['spi_device'], adc['channel'])
+            if key in claimed:
+                print(f"✗ {name} 센서 설정 오류: SPI{key[0]}.{key[1]} CH{key[2]}는 이미 {claimed[key]}이(가) 사용 중")
+                continue
+            claimed[key] = name
+        
+        enabled.append(spec)
+    
+    if not enabled:
+        return {}
+    
+    def create(spec):
+        try:
+            return create_sensor(spec, default_period)
+        except Exception as e:
+            print(f"✗ {spec.get('name', spec.get('type'))} 센서 초기화 실패: {e}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=len(enabled), thread_name_prefix="sensor-init") as executor:
+        entries = [entry for entry in executor.map(create, enabled) if entry is not None]
+    
+    # 같은 타입이 여럿이면 인스턴스 이름으로 구분 (처음 선언한 것이 기본 필드도 가짐)
+    by_type = {}
+    for entry in entries:
+        by_type.setdefault(entry.type, []).append(entry)
+    for same_type in by_type.values():
+        if len(same_type) > 1:
+            for i, entry in enumerate(same_type):
+                entry.instance = entry.name
+                entry.primary = i == 0
+    
+    return {entry.name: entry for entry in entries}
+
+
+# ==================== 테스트 ====================
+
+if __name__ == "__main__":
+    import sys
+    
+    print("=== 센서 레지스트리 테스트 ===\n")
+    
+    specs = [
+        {'name': 'light', 'type': 'light', 'channel': 0, 'period': 1},
+        {'name': 'tds', 'type': 'tds', 'channel': 1, 'period': 1},
+    ]
+    
+    sensors = init_sensors(specs)
+    print(f"\n초기화된 센서: {list(sensors)}")
+    print(f"import된 드라이버: {sorted(m for m in sys.modules if m.startswith('sensors.'))}")
+    
+    for entry in sensors.values():
+        print(f"  {entry.name} ({entry.bus}, {entry.period}초): {entry.read()}")
+        entry.close()
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+TCA9548A I2C 멀티플렉서 모듈
+
+HTU21D는 I2C 주소가 0x40으로 고정이라 한 버스에 하나만 연결할 수 있습니다.
+TCA9548A는 버스 하나를 8개 하위 채널로 나누어, 채널마다 HTU21D를 하나씩 달 수 있게 합니다.
+제어 레지스터에 채널 비트(1 << 채널)를 쓰면 그 채널만 연결됩니다.
+
+채널 전환도 I2C 트랜잭션이므로, 마지막으로 선택한 채널을 기억해 두고
+같은 채널을 다시 선택할 때는 쓰지 않습니다. 여러 센서를 한 주기에 읽을 때는
+레지스트리의 MuxGroup이 채널 순서대로 읽어 전환 횟수를 줄입니다 (sensors/registry.py).
+
+I2C 버스 객체와 멀티플렉서는 get_i2c() / get_mux()로 프로세스 전체에서 공유합니다.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from config import I2C_MUX_ADDR
+from modules import metrics
+
+# 라이브러리 import 시도
+try:
+    import board  # 라즈베리파이 GPIO 핀 정의
+    import busio  # I2C 통신 라이브러리
+    I2C_AVAILABLE = True  # I2C 사용 가능 플래그
+except ImportError:
+    I2C_AVAILABLE = False
+
+# 하위 채널 수
+CHANNELS = 8
+
+
+class TCA9548A:
+    """
+    TCA9548A 멀티플렉서 클래스
+    
+    사용 예:
+        mux = get_mux()
+        with mux.channel(3):
+            sensor.start_measurement(...)   # 채널 3의 장치와 통신
+    """
+    
+    def __init__(self, i2c, address=I2C_MUX_ADDR):
+        """
+        Args:
+            i2c: busio.I2C 객체 (get_i2c())
+            address (int): 멀티플렉서 I2C 주소 (0x70~0x77)
+        """
+        self.i2c = i2c
+        self.address = address
+        self.lock = threading.RLock()  # 채널 선택 ~ 하위 장치 통신까지 묶음
+        self.selected = None           # 마지막으로 선택한 채널 (모르면 None)
+        self.switches = 0              # 실제로 채널을 바꾼 횟수
+    
+    
+    def _write(self, value):
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto(self.address, bytes([value]))
+        finally:
+            self.i2c.unlock()
+    
+    
+    def select(self, channel):
+        """
+        하위 채널 선택 (이미 선택된 채널이면 아무것도 하지 않음)
+        
+        Args:
+            channel (int): 0~7, None이면 모든 채널 연결 해제
+        """
+        if channel is not None and not 0 <= channel < CHANNELS:
+            raise ValueError(f"멀티플렉서 채널은 0~{CHANNELS - 1}입니다: {channel}")
+        
+        with self.lock:
+            if channel == self.selected:
+                return
+            
+            try:
+                self._write(0 if channel is None else 1 << channel)
+            except Exception:
+                # 실제로 어떤 채널이 열려 있는지 모르므로 다음에는 반드시 다시 씀
+                self.selected = None
+                raise
+            
+            self.selected = channel
+            self.switches += 1
+        
+        metrics.inc(f"i2c.mux.{self.address:#04x}.switches")
+    
+    
+    @contextmanager
+    def channel(self, channel):
+        """
+        채널을 선택한 상태로 블록 실행 (그동안 다른 스레드는 채널을 바꿀 수 없음)
+        
+        Args:
+            channel (int): 0~7
+        """
+        with self.lock:
+            self.select(channel)
+            yield self
+    
+    
+    def scan(self, channel):
+        """
+        하위 채널에 연결된 I2C 주소 목록 (멀티플렉서 자신은 제외)
+        """
+        with self.channel(channel):
+            while not self.i2c.try_lock():
+                pass
+            try:
+                return [a for a in self.i2c.scan() if a != self.address]
+            finally:
+                self.i2c.unlock()
+
+
+# ==================== 공유 인스턴스 ====================
+
+_i2c = None
+_muxes = {}
+_registry_lock = threading.Lock()
+
+
+def get_i2c():
+    """
+    프로세스 전역 I2C 버스 객체 (SCL=GPIO3, SDA=GPIO2)
+    
+    같은 버스의 장치들(멀티플렉서와 그 뒤의 센서들)이 버스 락을 함께 쓰도록 공유합니다.
+    
+    Returns:
+        busio.I2C: 공유 버스 객체, 라이브러리가 없으면 None
+    """
+    global _i2c
+    
+    if not I2C_AVAILABLE:
+        return None
+    
+    with _registry_lock:
+        if _i2c is None:
+            _i2c = busio.I2C(board.SCL, board.SDA)
+        return _i2c
+
+
+def get_mux(address=I2C_MUX_ADDR):
+    """
+    주소별 공유 TCA9548A 인스턴스 반환
+    
+    선택된 채널 상태를 인스턴스가 기억하므로, 같은 멀티플렉서를
+    여러 객체로 다루면 안 됩니다.
+    
+    Args:
+        address (int): 멀티플렉서 I2C 주소
+    
+    Returns:
+        TCA9548A: 공유 인스턴스
+    """
+    i2c = get_i2c()
+    
+    with _registry_lock:
+        mux = _muxes.get(address)
+        if mux is None:
+            mux = _muxes[address] = TCA9548A(i2c, address)
+        return mux
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    print("=== TCA9548A 멀티플렉서 테스트 ===\n")
+    
+    if not I2C_AVAILABLE:
+        print("⚠ I2C 라이브러리 없음 (테스트 모드)")
+    else:
+        mux = get_mux()
+        for ch in range(CHANNELS):
+            print(f"  CH{ch}: {[hex(a) for a in mux.scan(ch)]}")
+        
+        for ch in (0, 0, 1, 1, 0):
+            mux.select(ch)
+        print(f"\n선택 5회 → 실제 전환 {mux.switches}회")
\ No newline at end of file
@@ -3,10 +3,18 @@ TDS/EC 센서 모듈 (MCP3008 ADC 사용)
 
 Analog TDS Sensor V1.0은 물의 전기전도도(EC)와 총용존고형물(TDS)을 측정하는 아날로그 센서입니다.
 MCP3008 ADC를 통해 아날로그 값을 디지털로 변환하여 읽습니다.
+
+TDS 변환은 (온도 × ADC 코드) 룩업 테이블로 미리 계산해 두고,
+K값이나 보정 곡선이 바뀌면 테이블을 다시 만듭니다 (sensors/calibration.py).
+스트리밍/오버샘플링 구간처럼 원시값이 많을 때는 convert_codes()로 배열째 변환합니다.
 """
 
-from .mcp3008 import MCP3008
-from config import SPI_BUS, SPI_DEVICE, ADC_TDS_CHANNEL
+from .mcp3008 import get_adc, codes_to_voltage, VOLTAGE_DECIMALS
+from .calibration import get_calibration, channel_key, TemperatureLookupTable, NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+from config import SPI_BUS, SPI_DEVICE, ADC_TDS_CHANNEL, ADC_OVERSAMPLING, TDS_LUT_TEMPERATURES
 
 
 class TDSSensor:
@@ -20,17 +28,78 @@ class TDSSensor:
     VREF = 3.3  # 기준 전압 (V)
     KVALUE = 1.0  # TDS 보정 계수 (실측값에 따라 조정 필요)
     
-    def __init__(self, channel=ADC_TDS_CHANNEL):
+    def __init__(self, channel=ADC_TDS_CHANNEL, spi_bus=SPI_BUS, spi_device=SPI_DEVICE, oversampling=None):
         """
         TDS 센서 초기화
         
         Args:
             channel (int): MCP3008 ADC 채널 번호 (기본값: config에서 가져옴)
+            spi_bus (int): MCP3008이 연결된 SPI 버스 번호
+            spi_device (int): MCP3008의 CE 번호
+            oversampling (dict, optional): 오버샘플링 설정 (samples, method, spacing, trim)
+                                           없으면 기본 칩은 ADC_OVERSAMPLING[channel]
         """
         self.channel = channel  # ADC 채널 번호
-        self.adc = MCP3008(bus=SPI_BUS, device=SPI_DEVICE)  # MCP3008 객체 생성
+        self.adc = get_adc(bus=spi_bus, device=spi_device)  # 공유 MCP3008 객체
+        self.calibration_key = channel_key(channel, spi_bus, spi_device)  # 칩별 캘리브레이션 키
+        self.last_reading = None  # 마지막 읽기의 품질 정보 (샘플 수, 스프레드)
+        
+        # 채널별 오버샘플링 설정 적용 (ADC_OVERSAMPLING은 기본 칩의 채널 기준)
+        if oversampling is None and self.calibration_key == channel:
+            oversampling = ADC_OVERSAMPLING.get(channel)
+        if oversampling:
+            self.adc.configure_channel(channel, **oversampling)
+        
+        # 캘리브레이션 룩업 테이블 (보정값이 바뀌면 자동으로 재생성)
+        self.calibration = get_calibration()
+        self._tds_table = None
+        self.rebuild_tables()
+        self.calibration.add_listener(self.calibration_key, self.rebuild_tables)
+        
+        print(f"✓ TDS 센서 초기화 완료 (SPI{spi_bus}.{spi_device} CH{channel})")
+    
+    
+    def _compute_tds(self, raw, temperature, curve=None):
+        """
+        ADC 값 하나를 TDS로 계산 (룩업 테이블 생성용)
+        
+        Args:
+            raw (int): ADC 값 (0~1023)
+            temperature (float): 물 온도 (°C)
+            curve (CalibrationCurve, optional): 25°C 기준 다점 보정 곡선 (원시값 → ppm)
+                                                없으면 3차 다항식 사용
+        
+        Returns:
+            float: TDS (ppm), 반올림 전
+        """
+        if curve is None:
+            voltage = (raw / 1023.0) * self.VREF
+            tds_value = self.convert(voltage, temperature, rounded=False)['tds']
+        else:
+            # 측정점은 25°C 기준이므로 원시값을 25°C 값으로 환산해서 곡선에 넣음
+            temp_coefficient = 1.0 + 0.02 * (temperature - 25.0)
+            tds_value = curve(raw / temp_coefficient) * self.KVALUE
+        
+        return max(tds_value, 0.0)
+    
+    
+    def rebuild_tables(self):
+        """
+        캘리브레이션(K값, 보정 곡선)으로 TDS 룩업 테이블 다시 만들기
+        
+        새 테이블을 다 만든 뒤 교체하므로, 만드는 동안에도 이전 테이블로 읽을 수 있습니다.
+        """
+        settings = self.calibration.get_channel(self.calibration_key)
+        self.KVALUE = settings.get('kvalue', TDSSensor.KVALUE)
+        curve = self.calibration.get_curve(self.calibration_key)
         
-        print(f"✓ TDS 센서 초기화 완료 (CH{channel})")
+        temp_min, temp_max, temp_step = TDS_LUT_TEMPERATURES
+        self._tds_table = TemperatureLookupTable(
+            lambda raw, t: self._compute_tds(raw, t, curve),
+            temp_min=temp_min,
+            temp_max=temp_max,
+            temp_step=temp_step
+        )
     
     
     def read_raw(self):
@@ -38,9 +107,18 @@ class TDSSensor:
         ADC 원시 값 읽기
         
         Returns:
-            int: ADC 값 (0~1023)
+            int: ADC 값 (0~1023), 오버샘플링 채널은 결합값 (float)
+        
+        Note:
+            샘플 수와 스프레드는 self.last_reading에 남습니다
         """
-        return self.adc.read_adc(self.channel)
+        reading = self.adc.read_channel(self.channel)
+        self.last_reading = reading
+        
+        if reading is not None:
+            return reading['value']
+        
+        return None
     
     
     def read_voltage(self):
@@ -50,63 +128,204 @@ class TDSSensor:
         Returns:
             float: 전압 (V), 소수점 3자리
         """
-        voltage = self.adc.read_voltage(self.channel, vref=self.VREF)
-        if voltage is not None:
-            return round(voltage, 3)
+        # read_raw()를 거쳐야 오버샘플링 품질 정보가 last_reading에 남습니다
+        raw_value = self.read_raw()
+        if raw_value is not None:
+            return float(codes_to_voltage([raw_value], self.VREF, VOLTAGE_DECIMALS)[0])
         return None
     
     
-    def read_tds(self, temperature=25.0):
+    def convert(self, voltage, temperature=25.0, rounded=True):
         """
-        TDS 값 읽기 (총용존고형물)
+        전압을 TDS/EC로 변환 (ADC 읽기 없음, 룩업 테이블 없이 직접 계산)
         
         Args:
+            voltage (float): 센서 전압 (V)
             temperature (float): 물 온도 (°C), 온도 보정용
+            rounded (bool): False면 반올림하지 않은 값 반환 (테이블 생성용)
         
         Returns:
-            float: TDS 값 (ppm), 소수점 1자리
-                   오류 시 None
+            dict: {
+                'voltage': float,              # 센서 전압 (V)
+                'compensated_voltage': float,  # 25°C 기준으로 보정한 전압 (V)
+                'tds': float,                  # TDS (ppm), 소수점 1자리
+                'ec': float                    # EC (mS/cm), 소수점 2자리
+            }
         
         Note:
             TDS 변환 공식 (Gravity TDS Sensor 기준):
-            1. 전압 읽기
-            2. 온도 보정 계수 계산
-            3. TDS = (133.42 * 전압^3 - 255.86 * 전압^2 + 857.39 * 전압) * 0.5 * K값
+            1. 온도 보정 계수 계산
+            2. TDS = (133.42 * 전압^3 - 255.86 * 전압^2 + 857.39 * 전압) * 0.5 * K값
+            3. EC = TDS / 500 (TDS (ppm) ≈ EC (mS/cm) * 500)
             
-            TODO: 실제 센서로 캘리브레이션 필요
+            다점 보정 곡선은 반영하지 않습니다 (read_all()은 룩업 테이블 사용)
+        """
+        # 온도 보정 계수 (25°C 기준)
+        temp_coefficient = 1.0 + 0.02 * (temperature - 25.0)
+        
+        # 전압을 보정된 전압으로 변환
+        compensated_voltage = voltage / temp_coefficient
+        
+        # TDS 계산 (3차 다항식 근사)
+        # 출처: DFRobot Gravity TDS Sensor 공식
+        tds_value = (133.42 * compensated_voltage**3 
+                    - 255.86 * compensated_voltage**2 
+                    + 857.39 * compensated_voltage) * 0.5
+        
+        # K값으로 보정
+        tds_value *= self.KVALUE
+        
+        # 음수 방지
+        if tds_value < 0:
+            tds_value = 0
+        
+        if not rounded:
+            return {
+                'voltage': voltage,
+                'compensated_voltage': compensated_voltage,
+                'tds': tds_value,
+                'ec': tds_value / 500.0
+            }
+        
+        tds_value = round(tds_value, 1)
+        
+        return {
+            'voltage': voltage,
+            'compensated_voltage': round(compensated_voltage, 3),
+            'tds': tds_value,
+            'ec': round(tds_value / 500.0, 2)
+        }
+    
+    
+    def read_all(self, temperature=25.0):
         """
-        voltage = self.read_voltage()
+        전압, 보정 전압, TDS, EC를 한 번의 ADC 측정으로 읽기
         
-        if voltage is None:
+        모든 값이 같은 샘플에서 계산되므로 서로 일관됩니다.
+        TDS는 룩업 테이블에서 (온도, ADC 값)으로 바로 꺼냅니다.
+        
+        Args:
+            temperature (float): 물 온도 (°C), 온도 보정용
+        
+        Returns:
+            dict: {
+                'voltage': float,              # 센서 전압 (V)
+                'compensated_voltage': float,  # 25°C 기준으로 보정한 전압 (V)
+                'tds': float,                  # TDS (ppm), 소수점 1자리
+                'ec': float,                   # EC (mS/cm), 소수점 2자리
+                'timestamp': float             # 측정 시각 (Unix timestamp)
+            }
+            오류 시 None
+        """
+        raw_value = self.read_raw()
+        
+        if raw_value is None:
             return None
         
         try:
-            # 온도 보정 계수 (25°C 기준)
+            voltage = float(codes_to_voltage([raw_value], self.VREF, VOLTAGE_DECIMALS)[0])
             temp_coefficient = 1.0 + 0.02 * (temperature - 25.0)
+            tds_value = round(self._tds_table.lookup(raw_value, temperature), 1)
             
-            # 전압을 보정된 전압으로 변환
-            compensated_voltage = voltage / temp_coefficient
-            
-            # TDS 계산 (3차 다항식 근사)
-            # 출처: DFRobot Gravity TDS Sensor 공식
-            tds_value = (133.42 * compensated_voltage**3 
-                        - 255.86 * compensated_voltage**2 
-                        + 857.39 * compensated_voltage) * 0.5
-            
-            # K값으로 보정
-            tds_value *= self.KVALUE
-            
-            # 음수 방지
-            if tds_value < 0:
-                tds_value = 0
-            
-            return round(tds_value, 1)
-            
+            return {
+                'voltage': voltage,
+                'compensated_voltage': round(voltage / temp_coefficient, 3),
+                'tds': tds_value,
+                'ec': round(tds_value / 500.0, 2),
+                'timestamp': self.last_reading['timestamp']
+            }
+        
         except Exception as e:
             print(f"✗ TDS 계산 오류: {e}")
             return None
     
     
+    def convert_codes(self, codes, temperatures=25.0):
+        """
+        ADC 값 배열을 전압/TDS/EC 배열로 변환 (ADC 읽기 없음)
+        
+        read_all()과 같은 룩업 테이블과 반올림을 쓰므로 샘플별 결과가 같습니다.
+        
+        Args:
+            codes (iterable): ADC 값 배열 (0~1023)
+            temperatures (float | iterable): 물 온도 (°C) 하나 또는 codes와 같은 길이의 배열
+        
+        Returns:
+            dict: {'voltage', 'compensated_voltage', 'tds', 'ec'} 각각 배열
+                  numpy가 없으면 list
+        """
+        voltages = codes_to_voltage(codes, self.VREF, VOLTAGE_DECIMALS)
+        tds_values = self._tds_table.lookup_many(codes, temperatures)
+        
+        if NUMPY_AVAILABLE:
+            temp_coefficient = 1.0 + 0.02 * (np.asarray(temperatures, dtype=np.float64) - 25.0)
+            tds_values = np.round(tds_values, 1)
+            
+            return {
+                'voltage': voltages,
+                'compensated_voltage': np.round(voltages / temp_coefficient, 3),
+                'tds': tds_values,
+                'ec': np.round(tds_values / 500.0, 2)
+            }
+        
+        if isinstance(temperatures, (int, float)):
+            temperatures = [temperatures] * len(voltages)
+        tds_values = [round(t, 1) for t in tds_values]
+        
+        return {
+            'voltage': voltages,
+            'compensated_voltage': [
+                round(v / (1.0 + 0.02 * (t - 25.0)), 3) for v, t in zip(voltages, temperatures)
+            ],
+            'tds': tds_values,
+            'ec': [round(t / 500.0, 2) for t in tds_values]
+        }
+    
+    
+    def read_block(self, temperature=25.0, seconds=None):
+        """
+        스트리밍 중인 채널의 최근 구간을 TDS/EC 배열로 읽기
+        
+        Args:
+            temperature (float | iterable): 물 온도 (°C)
+            seconds (float, optional): 구간 길이 (초). 없으면 스트리밍 window
+        
+        Returns:
+            dict: convert_codes() 결과 + 'timestamps' (오래된 것부터)
+                  스트리밍 중이 아니면 None
+        """
+        block = self.adc.read_block(self.channel, seconds)
+        if block is None:
+            return None
+        
+        timestamps, codes = block
+        result = self.convert_codes(codes, temperature)
+        result['timestamps'] = timestamps
+        return result
+    
+    
+    def read_tds(self, temperature=25.0):
+        """
+        TDS 값 읽기 (총용존고형물)
+        
+        Args:
+            temperature (float): 물 온도 (°C), 온도 보정용
+        
+        Returns:
+            float: TDS 값 (ppm), 소수점 1자리
+                   오류 시 None
+        
+        Note:
+            EC도 필요하면 read_all()로 한 번에 읽으세요 (ADC 측정 1회)
+        """
+        result = self.read_all(temperature)
+        
+        if result is not None:
+            return result['tds']
+        
+        return None
+    
+    
     def read_ec(self, temperature=25.0):
         """
         EC 값 읽기 (전기전도도)
@@ -120,14 +339,12 @@ class TDSSensor:
         
         Note:
             EC와 TDS 관계: TDS (ppm) ≈ EC (mS/cm) * 500
-            따라서: EC = TDS / 500
+            TDS도 필요하면 read_all()로 한 번에 읽으세요 (ADC 측정 1회)
         """
-        tds = self.read_tds(temperature)
+        result = self.read_all(temperature)
         
-        if tds is not None:
-            # TDS를 EC로 변환
-            ec = tds / 500.0
-            return round(ec, 2)
+        if result is not None:
+            return result['ec']
         
         return None
     
@@ -140,17 +357,35 @@ class TDSSensor:
             kvalue (float): 보정 계수
                            - 표준 용액으로 측정하여 조정
                            - K = 실제값 / 측정값
+        
+        Note:
+            캘리브레이션 파일에 저장되고 룩업 테이블이 다시 만들어집니다
         """
-        self.KVALUE = kvalue
+        self.calibration.update_channel(self.calibration_key, kvalue=kvalue)
         print(f"✓ TDS K값 설정: {kvalue}")
     
     
+    def set_curve(self, points):
+        """
+        25°C 기준 다점 보정 곡선 설정
+        
+        Args:
+            points (list): [(ADC 값, 실제 TDS ppm), ...] 표준 용액 측정점 2개 이상
+        
+        Note:
+            캘리브레이션 파일에 저장되고 룩업 테이블이 다시 만들어집니다
+        """
+        self.calibration.update_channel(self.calibration_key, points=[list(p) for p in points])
+        print(f"✓ TDS 보정 곡선 설정: {len(points)}점")
+    
+    
     def close(self):
         """
         센서 종료
         
-        MCP3008 SPI 통신을 닫습니다.
+        공유 MCP3008의 사용을 끝냅니다 (마지막 사용자일 때 SPI 종료).
         """
+        self.calibration.remove_listener(self.calibration_key, self.rebuild_tables)
         self.adc.close()
 
 
@@ -166,11 +401,16 @@ if __name__ == "__main__":
     print(f"전압: {sensor.read_voltage()}V")
     print(f"TDS: {sensor.read_tds()} ppm")
     print(f"EC: {sensor.read_ec()} mS/cm")
+    print(f"한 번에 읽기: {sensor.read_all()}")
     
     # 온도 보정 테스트
     print(f"\nTDS (20°C): {sensor.read_tds(temperature=20.0)} ppm")
     print(f"TDS (25°C): {sensor.read_tds(temperature=25.0)} ppm")
     print(f"TDS (30°C): {sensor.read_tds(temperature=30.0)} ppm")
     
+    # 배치 변환 (numpy 사용: {NUMPY_AVAILABLE})
+    batch = sensor.convert_codes([100, 300, 500], temperatures=[20.0, 25.0, 30.0])
+    print(f"\n배치 변환 TDS: {batch['tds']} ppm, EC: {batch['ec']} mS/cm")
+    
     # 센서 종료
     sensor.close()
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+하드웨어 시뮬레이션 패키지
+
+라즈베리파이가 아닌 리눅스 PC에서도 app.py 전체(센서 드라이버, 스케줄러, MQTT 발행)를
+실제 코드 경로 그대로 실행하고 프로파일링할 수 있도록 가짜 하드웨어 라이브러리를 제공합니다.
+
+    spidev          → sim.spi     (MCP3008 명령 프레임 해석)
+    board / busio   → sim.i2c     (HTU21D 칩 모델: no-hold NACK, CRC)
+    adafruit_htu21d → sim.htu21d  (가짜 I2C 버스 위의 드라이버)
+    serial          → sim.uart    (MH-Z19 응답 프레임, 보레이트 전송 시간)
+    RPi.GPIO        → sim.gpio    (기기 핀 → 환경 모델 반영)
+    cv2             → sim.camera  (프레임 간격 지연, JPEG 쓰기)
+
+모든 값은 sim.environment.Greenhouse 모델(하루 주기, 구름, 기기 상태)에서 나옵니다.
+
+사용법 (센서 모듈을 import 하기 전에 호출):
+    import sim
+    sim.install()
+
+config.SIMULATION = True로 두면 app.py가 시작할 때 자동으로 설치합니다.
+"""
+
+import sys
+import types
+
+from sim.environment import Greenhouse
+
+# 가짜 모듈로 바꿀 모듈 이름 (이미 import 됐으면 경고)
+SIMULATED_MODULES = ('spidev', 'board', 'busio', 'adafruit_htu21d', 'serial', 'RPi', 'RPi.GPIO', 'cv2')
+
+_environment = None
+_installed = False
+
+
+def install(latency=None, time_scale=1.0, seed=None, environment=None):
+    """
+    가짜 하드웨어 모듈을 sys.modules에 설치
+    
+    Args:
+        latency (dict, optional): 버스별 트랜잭션 지연 (초)
+                                  예: {'spi': 0.00005, 'i2c': 0.0003, 'uart': 0.002, 'camera': 0.033}
+        time_scale (float): 시뮬레이션 시계 배속 (1.0 = 실시간)
+        seed (int, optional): 난수 시드
+        environment (Greenhouse, optional): 사용할 환경 모델 (예: 기록 리플레이)
+                                            주면 latency/time_scale/seed는 무시
+    
+    Returns:
+        Greenhouse: 환경 모델 (기기 상태 조작, 지연 변경 등에 사용)
+    """
+    global _environment, _installed
+    
+    already = [name for name in SIMULATED_MODULES if name in sys.modules]
+    if already:
+        print(f"⚠ 이미 import된 하드웨어 모듈은 시뮬레이션으로 바뀌지 않습니다: {', '.join(already)}")
+    
+    if environment is None:
+        environment = Greenhouse(seed=seed, time_scale=time_scale, latency=latency)
+    _environment = environment
+    
+    from sim import spi, i2c, htu21d, uart, gpio, camera
+    
+    board = types.ModuleType('board')
+    board.SCL = 3
+    board.SDA = 2
+    
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = gpio
+    
+    sys.modules.update({
+        'spidev': spi,
+        'board': board,
+        'busio': i2c,
+        'adafruit_htu21d': htu21d,
+        'serial': uart,
+        'RPi': rpi,
+        'RPi.GPIO': gpio,
+        'cv2': camera,
+    })
+    _installed = True
+    
+    print(f"✓ 하드웨어 시뮬레이션 설치 ({type(_environment).__name__}, 지연 {_environment.latency})")
+    return _environment
+
+
+def is_installed():
+    """install()로 가짜 하드웨어를 설치했는지 여부"""
+    return _installed
+
+
+def get_environment():
+    """
+    현재 환경 모델 반환 (install() 전이면 기본 설정으로 생성)
+    
+    Returns:
+        Greenhouse: 환경 모델
+    """
+    global _environment
+    
+    if _environment is None:
+        _environment = Greenhouse()
+    return _environment
+
+
+def set_latency(bus, seconds):
+    """
+    실행 중에 버스 트랜잭션 지연 변경
+    
+    Args:
+        bus (str): 'spi', 'i2c', 'uart', 'gpio', 'camera'
+        seconds (float): 지연 (초)
+    """
+    get_environment().latency[bus] = seconds
\ No newline at end of file
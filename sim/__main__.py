@@ -0,0 +1,35 @@
+"""
+하드웨어 시뮬레이션 테스트 (python -m sim)
+
+가짜 하드웨어를 설치하고 실제 센서 드라이버로 한 번씩 읽습니다.
+"""
+
+import time
+
+import sim
+
+print("=== 하드웨어 시뮬레이션 테스트 ===\n")
+
+env = sim.install(latency={'spi': 0.00005, 'i2c': 0.0003, 'uart': 0.002, 'camera': 0.033})
+
+from sensors.light import LightSensor
+from sensors.tds import TDSSensor
+from sensors.htu21d import HTU21DSensor
+from sensors.co2 import CO2Sensor
+
+light = LightSensor()
+tds = TDSSensor()
+htu = HTU21DSensor()
+co2 = CO2Sensor()
+
+time.sleep(0.5)  # CO2 첫 응답 대기
+
+print(f"\n환경: {env.state()}")
+print(f"조도: {light.read_lux()} lux")
+print(f"TDS: {tds.read_all(temperature=htu.read_temperature())}")
+print(f"온습도: {htu.read_all()}")
+print(f"CO2: {co2.read_co2()} ppm")
+
+co2.close()
+light.close()
+tds.close()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+가짜 cv2 - USB 카메라
+
+cv2 대신 sys.modules['cv2']로 설치됩니다.
+VideoCapture.read()는 프레임 간격(30fps 기준)만큼 지연된 뒤 프레임을 돌려주고,
+imwrite()는 환경 조도에 맞는 밝기의 흑백 JPEG을 실제 사진과 비슷한 크기로 씁니다.
+(라이브러리 없이 만들 수 있도록 단색 baseline JPEG + 주석 세그먼트로 크기를 맞춤)
+"""
+
+import struct
+
+import sim
+
+CAP_PROP_FRAME_WIDTH = 3
+CAP_PROP_FRAME_HEIGHT = 4
+CAP_PROP_FPS = 5
+IMWRITE_JPEG_QUALITY = 1
+
+# 실제 USB 카메라 JPEG 크기에 맞추기 위한 압축률 (바이트 / 픽셀, 품질 85 기준)
+BYTES_PER_PIXEL = 0.2
+
+
+class Frame:
+    """
+    카메라 프레임 (numpy 배열 대신 크기와 밝기만 가짐)
+    """
+    
+    def __init__(self, width, height, level):
+        self.width = width
+        self.height = height
+        self.level = level          # 밝기 (0~255)
+        self.shape = (height, width, 3)
+
+
+class VideoCapture:
+    """
+    cv2.VideoCapture 흉내
+    """
+    
+    def __init__(self, index=0):
+        self.index = index
+        self._opened = True
+        self._props = {CAP_PROP_FRAME_WIDTH: 640, CAP_PROP_FRAME_HEIGHT: 480, CAP_PROP_FPS: 30}
+    
+    
+    def isOpened(self):
+        return self._opened
+    
+    
+    def set(self, prop, value):
+        self._props[prop] = value
+        return True
+    
+    
+    def get(self, prop):
+        return float(self._props.get(prop, 0))
+    
+    
+    def read(self):
+        if not self._opened:
+            return False, None
+        
+        env = sim.get_environment()
+        env.delay('camera')
+        
+        # 조도 0~1250 lux → 밝기 20~235
+        level = int(20 + min(env.state()['light'] / 1250.0, 1.0) * 215)
+        frame = Frame(int(self._props[CAP_PROP_FRAME_WIDTH]), int(self._props[CAP_PROP_FRAME_HEIGHT]), level)
+        return True, frame
+    
+    
+    def release(self):
+        self._opened = False
+
+
+# ==================== JPEG 인코딩 ====================
+
+# 표준 DC 휘도 허프만 테이블 (카테고리 0~11)
+_DC_BITS = [0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0]
+_DC_CODES = ['00', '010', '011', '100', '101', '110',
+             '1110', '11110', '111110', '1111110', '11111110', '111111110']
+
+
+def _segment(marker, payload):
+    return struct.pack('>BBH', 0xFF, marker, len(payload) + 2) + payload
+
+
+def encode_jpeg(frame, quality=85):
+    """
+    단색 흑백 JPEG 만들기
+    
+    Args:
+        frame (Frame): 프레임
+        quality (int): JPEG 품질 (파일 크기에만 반영)
+    
+    Returns:
+        bytes: JPEG 파일 내용
+    """
+    width, height = frame.width, frame.height
+    blocks = ((width + 7) // 8) * ((height + 7) // 8)
+    
+    # 양자화 테이블을 모두 1로 두면 단색 블록의 DC 계수 = 8 × (밝기 - 128)
+    dc = 8 * (frame.level - 128)
+    category = abs(dc).bit_length()
+    bits = (dc if dc >= 0 else dc + (1 << category) - 1)
+    
+    # 첫 블록만 DC 차이를 싣고, 나머지 블록은 차이 0 + EOB
+    stream = _DC_CODES[category] + (format(bits, f'0{category}b') if category else '') + '0'
+    stream += ('00' + '0') * (blocks - 1)
+    stream += '1' * (-len(stream) % 8)
+    
+    scan = bytearray()
+    for i in range(0, len(stream), 8):
+        byte = int(stream[i:i + 8], 2)
+        scan.append(byte)
+        if byte == 0xFF:
+            scan.append(0x00)
+    
+    header = b'\xff\xd8'
+    header += _segment(0xDB, bytes([0]) + bytes([1] * 64))
+    header += _segment(0xC0, struct.pack('>BHHB', 8, height, width, 1) + bytes([1, 0x11, 0]))
+    header += _segment(0xC4, bytes([0x00]) + bytes(_DC_BITS) + bytes(range(12)))
+    header += _segment(0xC4, bytes([0x10]) + bytes([1] + [0] * 15) + bytes([0x00]))  # AC: EOB 하나
+    
+    # 실제 사진 크기만큼 주석(COM) 세그먼트로 채움
+    target = int(width * height * BYTES_PER_PIXEL * (0.4 + quality / 140.0))
+    padding = b''
+    remaining = target - len(header) - len(scan) - 14
+    while remaining > 4:
+        chunk = min(remaining - 4, 65533)
+        padding += _segment(0xFE, bytes(chunk))
+        remaining -= chunk + 4
+    
+    sos = _segment(0xDA, bytes([1, 1, 0x00, 0, 63, 0]))
+    return header + padding + sos + bytes(scan) + b'\xff\xd9'
+
+
+def imencode(ext, frame, params=None):
+    quality = 95
+    if params and IMWRITE_JPEG_QUALITY in params[::2]:
+        quality = params[params.index(IMWRITE_JPEG_QUALITY) + 1]
+    return True, encode_jpeg(frame, quality)
+
+
+def imwrite(filename, frame, params=None):
+    ok, data = imencode('.jpg', frame, params)
+    with open(filename, 'wb') as f:
+        f.write(data)
+    return ok
\ No newline at end of file
@@ -0,0 +1,350 @@
+"""
+시뮬레이션 환경 모델 - 가상 온실의 신호
+
+하루 주기(일출/일몰), 구름, 기온/습도의 상관관계, 광합성에 따른 CO2 변화,
+양액 TDS의 느린 변동을 흉내 냅니다. 가짜 하드웨어(spi, i2c, uart, gpio, camera)는
+모두 이 모델에서 값을 가져오므로 센서끼리 서로 맞는 값이 나옵니다.
+
+GPIO로 켠 기기(LED, 팬, 펌프)는 조도/기온/습도에 반영됩니다.
+"""
+
+import math
+import random
+import threading
+import time
+
+import config
+
+# MCP3008 기준 전압 (V)
+VREF = 3.3
+
+# GPIO 핀 → 기기 이름 (config에 PIN_*이 없으면 주석에 적힌 기본 핀 사용)
+ACTUATOR_PINS = {
+    getattr(config, 'PIN_FAN', 17): 'fan',
+    getattr(config, 'PIN_PUMP', 27): 'pump',
+    getattr(config, 'PIN_LED', 22): 'led',
+}
+
+
+class Greenhouse:
+    """
+    가상 온실
+    
+    시뮬레이션 시계는 실제 시간보다 time_scale배 빠르게 흐를 수 있습니다
+    (예: 1440이면 하루가 1분).
+    """
+    
+    def __init__(self, seed=None, time_scale=1.0, latency=None):
+        """
+        Args:
+            seed (int, optional): 난수 시드 (같은 시드면 같은 잡음/구름)
+            time_scale (float): 시뮬레이션 시계 배속
+            latency (dict, optional): 버스별 트랜잭션 지연 (초) {'spi': ..., 'i2c': ...}
+        """
+        self.random = random.Random(seed)
+        self.time_scale = time_scale
+        self.latency = dict(latency or {})
+        self.delay_scale = 1.0        # 하드웨어 지연(전송/변환 시간) 배율, 리플레이 가속 시 줄임
+        
+        self._lock = threading.Lock()
+        self._start_wall = time.time()
+        self._start_mono = time.monotonic()
+        self._last = None             # 마지막 상태 갱신 시각 (시뮬레이션 시계)
+        
+        # 천천히 변하는 상태 (랜덤 워크)
+        self._cloud = 1.0             # 구름 투과율 (0.3~1.0)
+        self._temp_drift = 0.0        # 기온 편차 (°C)
+        self._tds = 850.0             # 양액 TDS (ppm)
+        
+        self.actuators = {'fan': False, 'pump': False, 'led': False}
+        self.adc_wiring = adc_wiring()  # {(SPI 버스, CE, 채널): 센서 타입}
+    
+    
+    # ==================== 시계 ====================
+    
+    def now(self):
+        """
+        시뮬레이션 시각 (Unix timestamp)
+        """
+        elapsed = time.monotonic() - self._start_mono
+        return self._start_wall + elapsed * self.time_scale
+    
+    
+    def hour(self, t=None):
+        """
+        시뮬레이션 시각의 현지 시각 (0~24, 소수)
+        """
+        local = time.localtime(self.now() if t is None else t)
+        return local.tm_hour + local.tm_min / 60.0 + local.tm_sec / 3600.0
+    
+    
+    def delay(self, bus, extra=0.0):
+        """
+        버스 트랜잭션 지연 흉내
+        
+        Args:
+            bus (str): 'spi', 'i2c', 'uart', 'gpio', 'camera'
+            extra (float): 전송 시간 등 추가 지연 (초)
+        """
+        seconds = (self.latency.get(bus, 0.0) + extra) * self.delay_scale
+        if seconds > 0:
+            time.sleep(seconds)
+    
+    
+    # ==================== 상태 ====================
+    
+    def _update(self):
+        """
+        랜덤 워크 상태를 경과 시간만큼 진행 (락을 잡은 상태에서 호출)
+        """
+        t = self.now()
+        if self._last is None:
+            self._last = t
+            return t
+        
+        dt = min(t - self._last, 3600.0)
+        self._last = t
+        if dt <= 0:
+            return t
+        
+        # 구름: 수 분 단위로 천천히 변함 (평균 0.85로 되돌아오는 랜덤 워크)
+        step = math.sqrt(dt / 60.0)
+        self._cloud += (0.85 - self._cloud) * min(dt / 600.0, 1.0) + self.random.gauss(0, 0.05) * step
+        self._cloud = min(max(self._cloud, 0.3), 1.0)
+        
+        # 기온 편차: 날씨에 따른 느린 변동
+        self._temp_drift += -self._temp_drift * min(dt / 3600.0, 1.0) + self.random.gauss(0, 0.1) * step
+        self._temp_drift = min(max(self._temp_drift, -3.0), 3.0)
+        
+        # TDS: 양분 흡수/증발로 천천히 변함, 펌프가 돌면 조금씩 희석
+        self._tds += self.random.gauss(0, 0.5) * step
+        if self.actuators['pump']:
+            self._tds -= 0.2 * dt / 60.0
+        self._tds = min(max(self._tds, 300.0), 2000.0)
+        
+        return t
+    
+    
+    def sun(self, t=None):
+        """
+        일사량 비율 (0~1): 6시 일출, 18시 일몰
+        """
+        h = self.hour(t)
+        return max(0.0, math.sin(math.pi * (h - 6.0) / 12.0))
+    
+    
+    def state(self):
+        """
+        현재 환경 값
+        
+        Returns:
+            dict: {
+                'time': float,          # 시뮬레이션 시각
+                'light': float,         # 조도 (lux, 0~1000 스케일)
+                'temperature': float,   # 기온 (°C)
+                'humidity': float,      # 상대습도 (%)
+                'co2': float,           # CO2 (ppm)
+                'tds': float,           # 양액 TDS (ppm, 25°C 기준)
+                'water_temperature': float
+            }
+        """
+        with self._lock:
+            t = self._update()
+            cloud = self._cloud
+            temp_drift = self._temp_drift
+            tds = self._tds
+            fan = self.actuators['fan']
+            pump = self.actuators['pump']
+            led = self.actuators['led']
+        
+        sun = self.sun(t)
+        h = self.hour(t)
+        
+        light = 900.0 * sun * cloud + (250.0 if led else 0.0)
+        
+        # 기온은 일사보다 2시간 늦게 최고점 (14시 무렵)
+        heat = max(0.0, math.sin(math.pi * (h - 8.0) / 12.0))
+        temperature = 17.0 + 9.0 * heat * (0.5 + 0.5 * cloud) + temp_drift - (1.5 if fan else 0.0)
+        
+        # 기온이 오르면 상대습도는 내려감
+        humidity = 88.0 - 2.2 * (temperature - 17.0) + (4.0 if pump else 0.0) - (3.0 if fan else 0.0)
+        humidity = min(max(humidity, 30.0), 99.0)
+        
+        # 밤에는 호흡으로 쌓이고 낮에는 광합성으로 줄어듦, 팬은 외기(420ppm) 쪽으로
+        co2 = 650.0 - 290.0 * min(sun * cloud * 1.5, 1.0)
+        if fan:
+            co2 = 420.0 + (co2 - 420.0) * 0.3
+        
+        return {
+            'time': t,
+            'light': max(light, 0.0),
+            'temperature': temperature,
+            'humidity': humidity,
+            'co2': co2,
+            'tds': tds,
+            'water_temperature': temperature - 1.0
+        }
+    
+    
+    def set_actuator(self, name, on):
+        """
+        기기 상태 변경 (GPIO 출력에서 호출)
+        """
+        with self._lock:
+            self._update()
+            self.actuators[name] = bool(on)
+    
+    
+    # ==================== 센서 신호 ====================
+    
+    def adc_voltage(self, channel, bus=None, device=None):
+        """
+        MCP3008 채널 입력 전압 (잡음 없음)
+        
+        어느 칩의 어느 채널에 무슨 센서가 달렸는지는 config.ADC_CHIPS의 채널 맵과
+        config.SENSORS의 타입으로 정합니다 (칩을 모르면 기본 채널 번호 기준).
+        
+        Args:
+            channel (int): ADC 채널 번호
+            bus (int, optional): SPI 버스 번호
+            device (int, optional): SPI CE 번호
+        
+        Returns:
+            float: 입력 전압 (V)
+        """
+        state = self.state()
+        kind = self.adc_wiring.get((bus, device, channel))
+        if kind is None and (bus, device) in ((None, None), (config.SPI_BUS, config.SPI_DEVICE)):
+            kind = {config.ADC_LIGHT_CHANNEL: 'light', config.ADC_TDS_CHANNEL: 'tds'}.get(channel)
+        
+        if kind == 'light':
+            # 조도 센서 기본 변환(0~1023 → 0~1000 lux)의 역
+            return min(state['light'] / 1000.0, 1.0) * VREF
+        
+        if kind == 'tds':
+            return tds_to_voltage(state['tds'], state['water_temperature'])
+        
+        # 연결되지 않은 채널: 떠 있는 입력 (중간 전압 근처)
+        return VREF / 2 + self.random.gauss(0, 0.05)
+    
+    
+    def adc_code(self, channel, bus=0, device=0):
+        """
+        MCP3008 변환 결과 (잡음 포함)
+        
+        가우시안 잡음(약 1.2 LSB)과 가끔 튀는 값(펌프/릴레이 스파이크)을 섞습니다.
+        
+        Args:
+            channel (int): ADC 채널 번호
+            bus (int): SPI 버스 번호
+            device (int): SPI CE 번호
+        
+        Returns:
+            int: ADC 코드 (0~1023)
+        """
+        code = self.adc_voltage(channel, bus, device) / VREF * 1023.0 + self.random.gauss(0, 1.2)
+        
+        if self.random.random() < 0.003:
+            code += self.random.choice((-1, 1)) * self.random.uniform(30, 80)
+        
+        return min(max(int(round(code)), 0), 1023)
+    
+    
+    def htu21d_value(self, kind, address=0x40, mux_channel=None):
+        """
+        HTU21D 측정값 (잡음 포함)
+        
+        멀티플렉서 뒤의 센서는 베드마다 조금씩 다른 위치에 있는 것처럼
+        채널별로 고정된 편차를 더합니다.
+        
+        Args:
+            kind (str): 'temperature' 또는 'humidity'
+            address (int): I2C 주소
+            mux_channel (int, optional): TCA9548A 채널
+        
+        Returns:
+            float: 온도 (°C) 또는 상대습도 (%)
+        """
+        state = self.state()
+        offset = 0 if mux_channel is None else (mux_channel % 4) - 1.5
+        if kind == 'temperature':
+            return state['temperature'] + offset * 0.3 + self.random.gauss(0, 0.04)
+        return state['humidity'] - offset * 1.0 + self.random.gauss(0, 0.2)
+    
+    
+    def uart_response(self, command):
+        """
+        UART로 명령을 받았을 때 센서가 돌려줄 바이트 (MH-Z19)
+        
+        Args:
+            command (bytes): 받은 명령 프레임
+        
+        Returns:
+            bytes: 응답 바이트 (응답 없으면 b'')
+        """
+        if not (len(command) == 9 and command[0] == 0xFF and command[2] == 0x86
+                and command[8] == _checksum(command)):
+            return b''
+        
+        ppm = int(round(self.state()['co2'] + self.random.gauss(0, 5)))
+        ppm = min(max(ppm, 0), 5000)
+        frame = bytearray([0xFF, 0x86, ppm >> 8, ppm & 0xFF, 0x40, 0, 0, 0, 0])
+        frame[8] = _checksum(frame)
+        return bytes(frame)
+
+
+def adc_wiring():
+    """
+    설정에 선언된 ADC 배선
+    
+    Returns:
+        dict: {(SPI 버스, CE, 채널): 센서 타입}
+    """
+    types = {spec.get('name', spec['type']): spec['type'] for spec in getattr(config, 'SENSORS', ())}
+    wiring = {}
+    
+    for spec in getattr(config, 'SENSORS', ()):
+        chip = getattr(config, 'ADC_CHIPS', {}).get(spec.get('adc'))
+        if chip is None:
+            continue
+        channel = spec.get('channel', chip['channels'].get(spec.get('name', spec['type'])))
+        wiring[(chip['spi_bus'], chip['spi_device'], channel)] = spec['type']
+    
+    for chip in getattr(config, 'ADC_CHIPS', {}).values():
+        for name, channel in chip['channels'].items():
+            if name in types:
+                wiring.setdefault((chip['spi_bus'], chip['spi_device'], channel), types[name])
+    
+    return wiring
+
+
+def _checksum(frame):
+    """MH-Z19 체크섬 (byte 1~7 합의 2의 보수)"""
+    return (0xFF - (sum(frame[1:8]) & 0xFF) + 1) & 0xFF
+
+
+def tds_to_voltage(tds, temperature):
+    """
+    TDS 값이 나오는 센서 전압 (TDSSensor 변환식의 역함수, K값 1.0 기준)
+    
+    Args:
+        tds (float): TDS (ppm, 25°C 기준)
+        temperature (float): 물 온도 (°C)
+    
+    Returns:
+        float: 센서 전압 (V)
+    """
+    def poly(v):
+        return (133.42 * v**3 - 255.86 * v**2 + 857.39 * v) * 0.5
+    
+    # 다항식이 0~VREF에서 단조 증가하므로 이분법으로 충분
+    low, high = 0.0, VREF
+    for _ in range(30):
+        mid = (low + high) / 2
+        if poly(mid) < tds:
+            low = mid
+        else:
+            high = mid
+    
+    temp_coefficient = 1.0 + 0.02 * (temperature - 25.0)
+    return min(low * temp_coefficient, VREF)
\ No newline at end of file
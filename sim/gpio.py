@@ -0,0 +1,83 @@
+"""
+가짜 RPi.GPIO - 펌프/LED/팬 릴레이
+
+RPi.GPIO 대신 sys.modules['RPi.GPIO']로 설치됩니다.
+출력 핀 상태를 보관하고, 기기 핀(config.PIN_*)의 변화는 환경 모델에 반영합니다.
+"""
+
+import threading
+
+import sim
+from sim.environment import ACTUATOR_PINS
+
+BCM = 11
+BOARD = 10
+OUT = 0
+IN = 1
+HIGH = 1
+LOW = 0
+PUD_OFF = 20
+PUD_DOWN = 21
+PUD_UP = 22
+
+_lock = threading.Lock()
+_mode = None
+_pins = {}  # 핀 번호 → {'direction': OUT/IN, 'value': HIGH/LOW}
+
+
+def _each(channel):
+    return channel if isinstance(channel, (list, tuple)) else [channel]
+
+
+def setmode(mode):
+    global _mode
+    _mode = mode
+
+
+def getmode():
+    return _mode
+
+
+def setwarnings(flag):
+    pass
+
+
+def setup(channel, direction, pull_up_down=PUD_OFF, initial=LOW):
+    with _lock:
+        for pin in _each(channel):
+            _pins[pin] = {'direction': direction, 'value': initial if direction == OUT else LOW}
+
+
+def output(channel, value):
+    env = sim.get_environment()
+    env.delay('gpio')
+    
+    values = value if isinstance(value, (list, tuple)) else [value] * len(_each(channel))
+    with _lock:
+        for pin, level in zip(_each(channel), values):
+            if pin not in _pins or _pins[pin]['direction'] != OUT:
+                raise RuntimeError("The GPIO channel has not been set up as an OUTPUT")
+            _pins[pin]['value'] = HIGH if level else LOW
+    
+    for pin, level in zip(_each(channel), values):
+        if pin in ACTUATOR_PINS:
+            env.set_actuator(ACTUATOR_PINS[pin], level)
+
+
+def input(channel):
+    with _lock:
+        if channel not in _pins:
+            raise RuntimeError("You must setup() the GPIO channel first")
+        return _pins[channel]['value']
+
+
+def cleanup(channel=None):
+    with _lock:
+        pins = list(_pins) if channel is None else _each(channel)
+        for pin in pins:
+            _pins.pop(pin, None)
+    
+    env = sim.get_environment()
+    for pin in pins:
+        if pin in ACTUATOR_PINS:
+            env.set_actuator(ACTUATOR_PINS[pin], False)
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+가짜 adafruit_htu21d - 가짜 I2C 버스 위에서 동작하는 HTU21D 드라이버
+
+adafruit_htu21d 대신 sys.modules['adafruit_htu21d']로 설치됩니다.
+adafruit_htu21d 0.11.22와 같은 API만 제공합니다 (HTU21D, TEMPERATURE, HUMIDITY,
+measurement(what), 인자 없는 _data(), temperature / relative_humidity 속성).
+속성은 라이브러리처럼 매번 변환 명령을 보내고 50ms / 16ms를 기다리므로,
+드라이버가 라이브러리에 없는 API를 쓰거나 속성을 읽어 변환을 다시 시작하면 여기서도 드러납니다.
+실제 I2C 명령/응답(NACK 폴링, CRC 검사)을 거쳐 값을 읽습니다.
+"""
+
+import struct
+import time
+
+from sim.i2c import crc8, CMD_SOFT_RESET
+
+# no-hold 측정 명령 (adafruit_htu21d와 같은 값)
+TEMPERATURE = 0xF3
+HUMIDITY = 0xF5
+
+
+class HTU21D:
+    """
+    adafruit_htu21d.HTU21D 흉내
+    """
+    
+    def __init__(self, i2c_bus, address=0x40):
+        self.i2c = i2c_bus
+        self.address = address
+        self._command(CMD_SOFT_RESET)
+        self._measurement = 0
+        time.sleep(0.01)
+    
+    
+    def _command(self, command):
+        self.i2c.writeto(self.address, struct.pack("B", command))
+    
+    
+    def _data(self):
+        # 변환 중에는 NACK → 응답할 때까지 계속 읽기 (라이브러리와 같이 대기 없음)
+        data = bytearray(3)
+        while True:
+            try:
+                self.i2c.readfrom_into(self.address, data)
+                if data[0] != 0xFF:
+                    break
+            except OSError:
+                pass
+        
+        value, checksum = struct.unpack(">HB", data)
+        if checksum != crc8(data[:2]):
+            raise ValueError("CRC mismatch")
+        return value
+    
+    
+    @property
+    def relative_humidity(self):
+        self.measurement(HUMIDITY)
+        self._measurement = 0
+        time.sleep(0.016)
+        value = self._data()
+        return value * 125.0 / 65536.0 - 6.0
+    
+    
+    @property
+    def temperature(self):
+        self.measurement(TEMPERATURE)
+        self._measurement = 0
+        time.sleep(0.050)
+        value = self._data()
+        return value * 175.72 / 65536.0 - 46.85
+    
+    
+    def measurement(self, what):
+        """
+        변환 시작 (no-hold), 다른 종류의 변환이 진행 중이면 RuntimeError
+        
+        Args:
+            what (int): TEMPERATURE 또는 HUMIDITY
+        """
+        if what not in (HUMIDITY, TEMPERATURE):
+            raise ValueError()
+        if not self._measurement:
+            self._command(what)
+        elif self._measurement != what:
+            raise RuntimeError("other measurement in progress")
+        self._measurement = what
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+가짜 busio / board - HTU21D가 연결된 I2C 버스
+
+busio.I2C 대신 sys.modules['busio']로 설치됩니다.
+버스에는 바이트 단위로 동작하는 HTU21D 칩 모델이 0x40에 붙어 있어,
+변환 명령(no-hold), 변환 시간 동안의 NACK, CRC까지 실제 칩처럼 응답합니다.
+
+config.SENSORS에 mux_channel을 지정한 HTU21D가 있으면 설정대로 배선합니다:
+TCA9548A 멀티플렉서(I2C_MUX_ADDR) 뒤의 8개 채널에 HTU21D가 하나씩 있고,
+버스에 직접 연결된 HTU21D는 없습니다 (같은 0x40 주소끼리 충돌하므로).
+"""
+
+import errno
+import threading
+import time
+
+import config
+import sim
+
+# HTU21D 명령
+CMD_TEMP_HOLD = 0xE3
+CMD_HUMIDITY_HOLD = 0xE5
+CMD_TEMP_NO_HOLD = 0xF3
+CMD_HUMIDITY_NO_HOLD = 0xF5
+CMD_SOFT_RESET = 0xFE
+
+# 데이터시트 최대 변환 시간 (초)
+CONVERSION_TIME = {'temperature': 0.050, 'humidity': 0.016}
+
+
+def crc8(data):
+    """
+    HTU21D CRC-8 (다항식 x^8 + x^5 + x^4 + 1, 초기값 0)
+    """
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x131) if crc & 0x80 else (crc << 1)
+    return crc & 0xFF
+
+
+class HTU21DChip:
+    """
+    HTU21D 칩 모델
+    """
+    
+    address = 0x40
+    
+    def __init__(self, mux_channel=None):
+        self.mux_channel = mux_channel  # 멀티플렉서 뒤에 있으면 채널 번호
+        self._kind = None       # 진행 중인 변환 ('temperature' / 'humidity')
+        self._ready_at = 0.0    # 변환 완료 시각 (monotonic)
+    
+    
+    def write(self, data):
+        command = data[0] if data else None
+        
+        if command in (CMD_TEMP_HOLD, CMD_TEMP_NO_HOLD):
+            self._kind = 'temperature'
+        elif command in (CMD_HUMIDITY_HOLD, CMD_HUMIDITY_NO_HOLD):
+            self._kind = 'humidity'
+        elif command == CMD_SOFT_RESET:
+            self._kind = None
+            return
+        else:
+            return
+        
+        conversion = CONVERSION_TIME[self._kind] * sim.get_environment().delay_scale
+        self._ready_at = time.monotonic() + conversion
+        
+        # hold 명령은 클럭 스트레칭으로 변환이 끝날 때까지 버스를 붙잡음
+        if command in (CMD_TEMP_HOLD, CMD_HUMIDITY_HOLD):
+            time.sleep(conversion)
+    
+    
+    def read(self, length):
+        if self._kind is None or time.monotonic() < self._ready_at:
+            # 변환 중에는 읽기 주소에 NACK
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        
+        value = sim.get_environment().htu21d_value(self._kind, self.address, self.mux_channel)
+        
+        if self._kind == 'temperature':
+            raw = int(round((value + 46.85) / 175.72 * 65536)) & 0xFFFC
+        else:
+            raw = (int(round((value + 6.0) / 125.0 * 65536)) & 0xFFFC) | 0x02  # 상태 비트: 습도
+        
+        self._kind = None
+        data = [raw >> 8, raw & 0xFF]
+        data.append(crc8(data))
+        return bytes(data[:length])
+
+
+class TCA9548AChip:
+    """
+    TCA9548A 멀티플렉서 모델
+    
+    제어 레지스터(1바이트)의 비트마다 하위 채널이 연결됩니다.
+    """
+    
+    def __init__(self, address, channels):
+        """
+        Args:
+            address (int): 멀티플렉서 주소
+            channels (dict): {채널: {주소: 칩}}
+        """
+        self.address = address
+        self.channels = channels
+        self.control = 0
+    
+    
+    def write(self, data):
+        if data:
+            self.control = data[-1]
+    
+    
+    def read(self, length):
+        return bytes([self.control])[:length]
+    
+    
+    def connected(self):
+        """현재 연결된 하위 채널의 장치들 [(주소, 칩), ...]"""
+        return [
+            (address, chip)
+            for channel, chips in self.channels.items() if self.control & (1 << channel)
+            for address, chip in chips.items()
+        ]
+
+
+def _uses_mux():
+    return any(
+        spec['type'] == 'htu21d' and spec.get('mux_channel') is not None and spec.get('enabled', True)
+        for spec in getattr(config, 'SENSORS', ())
+    )
+
+
+class I2C:
+    """
+    busio.I2C 흉내
+    """
+    
+    def __init__(self, scl=None, sda=None, frequency=100000):
+        self.frequency = frequency
+        self._lock = threading.Lock()
+        
+        mux_address = getattr(config, 'I2C_MUX_ADDR', 0x70)
+        if _uses_mux():
+            self._devices = {}
+            self._mux = TCA9548AChip(mux_address, {
+                ch: {HTU21DChip.address: HTU21DChip(mux_channel=ch)} for ch in range(8)
+            })
+        else:
+            self._devices = {HTU21DChip.address: HTU21DChip()}
+            self._mux = TCA9548AChip(mux_address, {})
+        self._devices[mux_address] = self._mux
+    
+    
+    def _device(self, address):
+        # 버스에 직접 연결된 장치 + 멀티플렉서가 연결해 준 하위 장치
+        found = [device for a, device in self._mux.connected() if a == address]
+        device = self._devices.get(address)
+        if device is not None:
+            found.append(device)
+        
+        if not found:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        if len(found) > 1:
+            # 같은 주소 장치 둘이 동시에 응답 → 데이터 충돌
+            raise OSError(errno.EIO, f"I2C address conflict at 0x{address:02X}")
+        return found[0]
+    
+    
+    def _transfer_time(self, nbytes):
+        # 주소 바이트 + 데이터, 바이트당 9클럭 (ACK 포함)
+        return (nbytes + 1) * 9 / self.frequency
+    
+    
+    def try_lock(self):
+        return self._lock.acquire(blocking=False)
+    
+    
+    def unlock(self):
+        self._lock.release()
+    
+    
+    def scan(self):
+        return sorted(set(self._devices) | {a for a, _ in self._mux.connected()})
+    
+    
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        sim.get_environment().delay('i2c', self._transfer_time(len(data)))
+        self._device(address).write(data)
+    
+    
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        sim.get_environment().delay('i2c', self._transfer_time(end - start))
+        data = self._device(address).read(end - start)
+        buffer[start:start + len(data)] = data
+    
+    
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *,
+                              out_start=0, out_end=None, in_start=0, in_end=None):
+        self.writeto(address, buffer_out, start=out_start, end=out_end)
+        self.readfrom_into(address, buffer_in, start=in_start, end=in_end)
+    
+    
+    def deinit(self):
+        pass
\ No newline at end of file
@@ -0,0 +1,379 @@
+"""
+기록 리플레이 - 기록한 원시 데이터를 가속해서 다시 흘려보내기
+
+modules/recorder.py로 기록한 파일을 가짜 하드웨어(sim)의 데이터 소스로 사용합니다.
+app.py의 센서 초기화, 스케줄러(회로 차단기, 파생 지표), get_all_sensor_data(),
+sensor_loop의 전송 경로(publish_sensor_data)를 그대로 돌리므로, 드라이버 변환(룩업 테이블,
+CO2 프레임 파싱)부터 묶음 전송 / 변화 보고까지 실제 장비와 같은 코드를 거칩니다.
+
+시간은 기록된 시각 기준의 가상 시계(VirtualClock)로 흐르며, speed배(1x ~ 1000x 이상)로 재생합니다.
+하드웨어 대기 시간(HTU21D 변환, ADC 샘플 간격, CO2 폴링 주기)도 speed배 줄입니다.
+기록에 없는 센서 값은 환경 모델(Greenhouse)로 채웁니다.
+
+사용법:
+    python -m sim.replay recordings/farm.rec.gz 1000
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import sim
+from sim.environment import Greenhouse
+from modules.recorder import read_records, ADC, I2C, UART
+from config import SENSORS, SENSOR_INTERVAL, ADC_OVERSAMPLING, CO2_POLL_INTERVAL
+
+# 가상 시계를 설치해도 실제 시간이 필요한 곳 (배속 대기, 경과 시간)
+_real_time = time.time
+_real_monotonic = time.monotonic
+_real_sleep = time.sleep
+
+
+class ReplayEnvironment(Greenhouse):
+    """
+    기록 파일을 데이터 소스로 쓰는 환경 모델
+    
+    advance(t)로 가상 시계를 옮기면 t까지의 레코드가 소스별 대기열에 들어가고,
+    가짜 하드웨어가 읽을 때마다 대기열에서 순서대로 꺼내 줍니다.
+    새 레코드가 없으면 마지막 값을 다시 돌려줍니다 (센서가 같은 값을 내는 것처럼).
+    """
+    
+    def __init__(self, path, max_pending=4096):
+        """
+        Args:
+            path (str): 기록 파일 경로
+            max_pending (int): 소스별 대기열 최대 길이 (넘치면 오래된 값부터 버림)
+        """
+        super().__init__(seed=0)
+        self.path = path
+        self.max_pending = max_pending
+        
+        self._records = read_records(path)
+        self._next = next(self._records, None)
+        self._queue_lock = threading.Lock()
+        
+        self.start_time = self._next[0] if self._next else None
+        self.last_time = self.start_time   # 마지막으로 꺼낸 레코드 시각
+        self.clock = self.start_time or time.time()
+        self.records = 0
+        
+        self._adc = {}        # (장치, 채널) → deque(코드)
+        self._adc_last = {}
+        self._i2c = {}        # (주소, 종류) → deque(값)
+        self._i2c_last = {}
+        self._uart = bytearray()
+    
+    
+    @property
+    def finished(self):
+        """기록 파일을 끝까지 읽었는지 여부"""
+        return self._next is None
+    
+    
+    def now(self):
+        """가상 시계 (기록된 시각)"""
+        return self.clock
+    
+    
+    def advance(self, t):
+        """
+        가상 시계를 t로 옮기고 t까지의 레코드를 대기열에 넣기
+        
+        Args:
+            t (float): 가상 시각 (Unix timestamp)
+        """
+        with self._queue_lock:
+            self.clock = t
+            
+            while self._next is not None and self._next[0] <= t:
+                record_time, kind, payload = self._next
+                
+                if kind == ADC:
+                    device, channel, code = payload
+                    queue = self._adc.get((device, channel))
+                    if queue is None:
+                        queue = self._adc[(device, channel)] = deque(maxlen=self.max_pending)
+                    queue.append(code)
+                elif kind == I2C:
+                    address, name, value = payload
+                    queue = self._i2c.get((address, name))
+                    if queue is None:
+                        queue = self._i2c[(address, name)] = deque(maxlen=self.max_pending)
+                    queue.append(value)
+                elif kind == UART:
+                    self._uart += payload
+                    if len(self._uart) > self.max_pending:
+                        del self._uart[:-self.max_pending]
+                
+                self.records += 1
+                self.last_time = record_time
+                self._next = next(self._records, None)
+    
+    
+    def adc_code(self, channel, bus=0, device=0):
+        key = ((bus << 4) | device, channel)
+        with self._queue_lock:
+            queue = self._adc.get(key)
+            if queue:
+                self._adc_last[key] = queue.popleft()
+            code = self._adc_last.get(key)
+        
+        if code is None:
+            return super().adc_code(channel, bus, device)
+        return code
+    
+    
+    def htu21d_value(self, kind, address=0x40, mux_channel=None):
+        key = (address if mux_channel is None else (mux_channel, address), kind)
+        with self._queue_lock:
+            queue = self._i2c.get(key)
+            if queue:
+                self._i2c_last[key] = queue.popleft()
+            value = self._i2c_last.get(key)
+        
+        if value is None:
+            return super().htu21d_value(kind, address, mux_channel)
+        return value
+    
+    
+    def uart_response(self, command):
+        # 명령과 상관없이 지금까지 기록된 수신 바이트를 그대로 전달
+        with self._queue_lock:
+            data = bytes(self._uart)
+            self._uart.clear()
+        return data
+
+
+def _scaled_specs(specs, speed):
+    """
+    센서 선언의 하드웨어 대기 시간을 speed배 줄인 복사본
+    """
+    from sensors.htu21d import CONVERSION_TIME
+    
+    scaled = []
+    for spec in specs:
+        spec = dict(spec)
+        if spec['type'] == 'htu21d':
+            spec.setdefault('conversion_time', {k: v / speed for k, v in CONVERSION_TIME.items()})
+        elif spec['type'] == 'co2':
+            spec['poll_interval'] = spec.get('poll_interval', CO2_POLL_INTERVAL) / speed
+        scaled.append(spec)
+    return scaled
+
+
+class VirtualClock:
+    """
+    리플레이용 가상 시계
+    
+    install()하는 동안 time.time()과 time.monotonic()이 이 시계를 돌려주므로
+    스케줄러, 회로 차단기, 드라이버, 스냅샷, 파생 지표가 모두 기록된 시각 기준으로 동작합니다.
+    jump(t)로 다음 일정 시각까지 건너뛰고, 그 사이(센서 읽기 중)에는 실제 시간만큼 흐릅니다.
+    time.sleep()과 스레드 대기(Event.wait 등)는 실제 시간 그대로입니다.
+    """
+    
+    def __init__(self, start):
+        """
+        Args:
+            start (float): 시작 시각 (Unix timestamp)
+        """
+        self._anchor = (start, _real_monotonic())   # (가상 시각, 그때의 실제 monotonic)
+    
+    
+    def now(self):
+        """가상 시각 (Unix timestamp, monotonic으로도 사용)"""
+        base, real = self._anchor
+        return base + (_real_monotonic() - real)
+    
+    
+    def jump(self, t):
+        """t로 건너뜀 (이미 지났으면 그대로, 시계는 뒤로 가지 않음)"""
+        if t > self.now():
+            self._anchor = (t, _real_monotonic())
+    
+    
+    def install(self):
+        time.time = self.now
+        time.monotonic = self.now
+    
+    
+    def uninstall(self):
+        time.time = _real_time
+        time.monotonic = _real_monotonic
+
+
+class _Publisher:
+    """
+    리플레이 중 app의 mqtt_client 자리에 넣는 전송 함수 묶음
+    
+    publish=False면 보낸 것으로 치고(True) 브로커에는 보내지 않습니다.
+    나머지 속성(연결 상태 등)은 mqtt_client를 그대로 씁니다.
+    """
+    
+    def __init__(self, mqtt, publish, stats):
+        self._mqtt = mqtt
+        self._publish = publish
+        self._stats = stats
+    
+    
+    def _send(self, name, *args):
+        ok = getattr(self._mqtt, name)(*args) if self._publish else True
+        self._stats['published' if ok else 'failed'] += 1
+        return ok
+    
+    
+    def send_sensor_data(self, data):
+        return self._send('send_sensor_data', data)
+    
+    
+    def send_sensor_batch(self, message, count):
+        return self._send('send_sensor_batch', message, count)
+    
+    
+    def send_daily(self, rollup):
+        return self._send('send_daily', rollup)
+    
+    
+    def __getattr__(self, name):
+        return getattr(self._mqtt, name)
+
+
+def replay(path, speed=1.0, publish=True, specs=None, interval=SENSOR_INTERVAL, on_payload=None):
+    """
+    기록 파일 재생
+    
+    app.py의 실제 경로를 가상 시계로 돌립니다.
+        init_sensors() → 스케줄러 (센서별 주기, 회로 차단기, 파생 지표 리스너)
+        → interval마다 get_all_sensor_data() → publish_sensor_data()
+          (묶음 전송 / 변화 보고 / 일별 요약 포함, config 설정 그대로)
+    스케줄러는 스레드 대신 step()으로 일정 시각마다 돌리고, 가상 시계는 그 시각으로 건너뜁니다.
+    
+    Args:
+        path (str): 기록 파일 경로
+        speed (float): 재생 배속 (1.0 = 실시간, 1000 = 1000배)
+        publish (bool): True면 MQTT 브로커에 연결해 mqtt_client로 발행
+        specs (list, optional): 센서 선언 목록 (기본값: config.SENSORS)
+        interval (float): 발행 주기 (가상 시간, 초)
+        on_payload (callable, optional): on_payload(data) - interval마다 get_all_sensor_data() 결과로 호출
+    
+    Returns:
+        dict: 재생 통계 (레코드 수, 샘플/발행 횟수, 스케줄러 작업 통계, 가상/실제 경과 시간)
+    """
+    if speed <= 0:
+        raise ValueError(f"배속은 0보다 커야 합니다: {speed}")
+    
+    env = ReplayEnvironment(path)
+    if env.start_time is None:
+        print(f"⚠ 빈 기록 파일: {path}")
+        return {}
+    
+    env.delay_scale = 1.0 / speed
+    sim.install(environment=env)
+    
+    # 가짜 하드웨어 설치 후에 import 해야 드라이버가 가짜 모듈을 사용함
+    import app
+    
+    stats = {'records': 0, 'samples': 0, 'published': 0, 'failed': 0}
+    start = env.start_time
+    clock = VirtualClock(start)
+    
+    # 발행은 app 경로 그대로, 브로커로 보낼지만 바꿈
+    app.mqtt = _Publisher(app.mqtt, publish, stats)
+    # ADC 스트리밍은 실제 시간으로 샘플링하므로 끄고, 해당 채널도 스케줄러 주기로 읽음
+    app.ADC_STREAM_CHANNELS = []
+    
+    scheduler = None
+    real_start = _real_monotonic()
+    
+    clock.install()
+    try:
+        # 리플레이 값이 기기의 오늘 DLI 상태 파일에 섞이지 않게 저장 없이 새로 시작
+        app.init_derived(state_file=None)
+        app.derived_metrics.day = datetime.fromtimestamp(start).date()
+        
+        env.advance(start)
+        app.init_sensors(_scaled_specs(specs or SENSORS, speed))
+        app.init_publishing()
+        
+        # ADC 샘플 간격도 배속만큼 줄임
+        for entry in app.sensor_entries.values():
+            channel = getattr(entry.sensor, 'channel', None)
+            if hasattr(entry.sensor, 'adc') and channel in ADC_OVERSAMPLING:
+                settings = dict(ADC_OVERSAMPLING[channel])
+                settings['spacing'] = settings.get('spacing', 0.0) / speed
+                entry.sensor.adc.configure_channel(channel, **settings)
+        
+        if publish:
+            app.mqtt.connect_to_broker()
+            for _ in range(50):
+                if app.mqtt.get_connection_status():
+                    break
+                _real_sleep(0.1)
+        
+        scheduler = app.scheduler
+        next_read = scheduler.step(clock.now()) if scheduler else None
+        next_publish = start + interval
+        real_start = _real_monotonic()
+        
+        print(f"▶ 리플레이 시작: {path} ({speed}x)")
+        
+        while True:
+            t = next_publish if next_read is None else min(next_read, next_publish)
+            if env.finished and t > env.last_time:
+                break
+            
+            # 가상 시각 t에 맞춰 대기 (배속 기준)
+            wait = real_start + (t - start) / speed - _real_monotonic()
+            if wait > 0:
+                _real_sleep(wait)
+            
+            clock.jump(t)
+            now = clock.now()
+            env.advance(now)
+            
+            if next_read is not None and next_read <= now:
+                next_read = scheduler.step(now)
+            
+            if next_publish <= now:
+                data = app.get_all_sensor_data()
+                if on_payload:
+                    on_payload(data)
+                app.publish_sensor_data(data)
+                stats['samples'] += 1
+                next_publish += interval
+    
+    finally:
+        try:
+            if app.sensor_batcher is not None:
+                app.sensor_batcher.flush()
+            for entry in app.sensor_entries.values():
+                entry.close()
+            if publish:
+                app.mqtt.disconnect_from_broker()
+        finally:
+            clock.uninstall()
+            app.mqtt = app.mqtt._mqtt
+    
+    stats['records'] = env.records
+    stats['tasks'] = scheduler.get_stats() if scheduler else {}
+    stats['virtual_seconds'] = round(env.last_time - start, 3)
+    stats['elapsed'] = round(_real_monotonic() - real_start, 3)
+    stats['effective_speed'] = round(stats['virtual_seconds'] / stats['elapsed'], 1) if stats['elapsed'] else None
+    
+    print(f"■ 리플레이 종료: { {k: v for k, v in stats.items() if k != 'tasks'} }")
+    return stats
+
+
+# 테스트 코드
+if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) < 2:
+        print("사용법: python -m sim.replay <기록 파일> [배속] [--no-publish]")
+        sys.exit(1)
+    
+    replay(
+        sys.argv[1],
+        speed=float(sys.argv[2]) if len(sys.argv) > 2 and not sys.argv[2].startswith('--') else 1.0,
+        publish='--no-publish' not in sys.argv
+    )
\ No newline at end of file
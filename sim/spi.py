@@ -0,0 +1,75 @@
+"""
+가짜 spidev - MCP3008이 연결된 SPI 버스
+
+spidev.SpiDev 대신 sys.modules['spidev']로 설치됩니다.
+xfer2()로 들어온 MCP3008 명령 프레임을 해석해 환경 모델의 채널 값을 돌려줍니다.
+"""
+
+import sim
+
+
+class SpiDev:
+    """
+    spidev.SpiDev 흉내 (MCP3008 한 개가 CE에 연결된 것으로 가정)
+    """
+    
+    def __init__(self, bus=None, device=None):
+        self.max_speed_hz = 1000000
+        self.mode = 0
+        self.bits_per_word = 8
+        self.bus = None
+        self.device = None
+        self.transfers = 0  # xfer2 호출 수 (프로파일링용)
+        
+        if bus is not None:
+            self.open(bus, device)
+    
+    
+    def open(self, bus, device):
+        self.bus = bus
+        self.device = device
+    
+    
+    def close(self):
+        self.bus = None
+        self.device = None
+    
+    
+    def xfer2(self, data):
+        """
+        전이중 전송 (CS를 전송 동안 내린 상태로 유지)
+        
+        Args:
+            data (list | tuple): [0x01, (0x08 | 채널) << 4, 0x00]
+        
+        Returns:
+            list: [0, 상위 2비트, 하위 8비트]
+        """
+        if self.bus is None:
+            raise OSError(9, "Bad file descriptor")
+        
+        env = sim.get_environment()
+        
+        # 전송 시간: 바이트 수 × 8비트 / 클럭
+        env.delay('spi', len(data) * 8 / self.max_speed_hz)
+        self.transfers += 1
+        
+        if len(data) < 3 or data[0] != 0x01 or not data[1] & 0x80:
+            # MCP3008 명령이 아니면 MISO는 0
+            return [0] * len(data)
+        
+        channel = (data[1] >> 4) & 0x07
+        code = env.adc_code(channel, self.bus, self.device)
+        return [0, (code >> 8) & 0x03, code & 0xFF] + [0] * (len(data) - 3)
+    
+    
+    def xfer(self, data):
+        return self.xfer2(data)
+    
+    
+    def readbytes(self, length):
+        return [0] * length
+    
+    
+    def writebytes(self, data):
+        sim.get_environment().delay('spi', len(data) * 8 / self.max_speed_hz)
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+가짜 pyserial - MH-Z19 CO2 센서가 연결된 UART
+
+serial 대신 sys.modules['serial']로 설치됩니다.
+읽기 명령 프레임을 받으면 전송 시간(보레이트 기준)과 센서 응답 지연 뒤에
+체크섬이 붙은 9바이트 응답 프레임이 수신 버퍼에 들어옵니다.
+"""
+
+import threading
+import time
+
+import sim
+
+
+class SerialException(IOError):
+    """pyserial.SerialException 흉내"""
+
+
+class Serial:
+    """
+    serial.Serial 흉내 (MH-Z19 한 대가 연결된 포트)
+    """
+    
+    def __init__(self, port=None, baudrate=9600, timeout=None, **kwargs):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        
+        self._cond = threading.Condition()
+        self._pending = []          # [(도착 시각, bytes)] 아직 도착하지 않은 응답
+        self._rx = bytearray()      # 도착한 바이트
+    
+    
+    def _byte_time(self, nbytes):
+        # 시작/정지 비트 포함 바이트당 10비트
+        return nbytes * 10 / self.baudrate
+    
+    
+    def _deliver(self):
+        """도착 시각이 지난 응답을 수신 버퍼로 옮김 (락을 잡은 상태에서 호출)"""
+        now = time.monotonic()
+        while self._pending and self._pending[0][0] <= now:
+            self._rx.extend(self._pending.pop(0)[1])
+    
+    
+    @property
+    def in_waiting(self):
+        with self._cond:
+            self._deliver()
+            return len(self._rx)
+    
+    
+    def write(self, data):
+        if not self.is_open:
+            raise SerialException("Port is closed")
+        
+        data = bytes(data)
+        env = sim.get_environment()
+        response = env.uart_response(data)
+        
+        if response:
+            # 명령 전송 + 센서 처리 + 응답 전송 시간 뒤에 도착
+            transfer = self._byte_time(len(data)) + env.latency.get('uart', 0.0) + self._byte_time(len(response))
+            arrival = time.monotonic() + transfer * env.delay_scale
+            with self._cond:
+                self._pending.append((arrival, response))
+                self._cond.notify_all()
+        
+        return len(data)
+    
+    
+    def read(self, size=1):
+        if not self.is_open:
+            raise SerialException("Port is closed")
+        
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        
+        with self._cond:
+            while True:
+                self._deliver()
+                if len(self._rx) >= size:
+                    break
+                
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                
+                # 다음 응답 도착이나 timeout 중 먼저 오는 시각까지 대기
+                wake = [t for t, _ in self._pending[:1]]
+                if deadline is not None:
+                    wake.append(deadline)
+                self._cond.wait(max(min(wake) - now, 0) if wake else None)
+            
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+    
+    
+    def reset_input_buffer(self):
+        with self._cond:
+            self._rx.clear()
+    
+    
+    def flush(self):
+        pass
+    
+    
+    def close(self):
+        self.is_open = False
\ No newline at end of file